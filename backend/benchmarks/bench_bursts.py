@@ -0,0 +1,109 @@
+"""Benchmark: Durchsatz und Trefferquote der Burst-Erkennung.
+
+1. Nur der Detektor (``BurstDetector.step``) über synthetische Reihen mit
+   eingestreuten Bursts: Punkte pro Stunde, erkannte Bursts und Fehlalarme.
+2. Ende-zu-Ende über ``POST /api/api/trends/metrics/batch`` (Insert in
+   ``trend_metrics``, Zustand laden/schreiben, Bursts speichern) gegen eine
+   frische SQLite-Datenbank.
+
+Aufruf (aus ``backend/``)::
+
+    python -m benchmarks.bench_bursts --series 2000 --points 200 --batch 5000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BURST_FACTOR = 4.0
+
+
+def synthetic(series, points, burst_rate, seed):
+    """``(serie, periode, wert, ist_burst)`` in Periodenreihenfolge über alle Reihen."""
+    rnd = random.Random(seed)
+    levels = [rnd.uniform(20, 200) for _ in range(series)]
+    data = []
+    for period in range(points):
+        for s in range(series):
+            levels[s] *= rnd.uniform(0.99, 1.012)  # langsame Drift
+            burst = period >= 10 and rnd.random() < burst_rate
+            value = rnd.gauss(levels[s], levels[s] * 0.05) * (BURST_FACTOR if burst else 1.0)
+            data.append((s, period, max(0.0, value), burst))
+    return data
+
+
+def bench_detector(data, series):
+    from src.services.bursts import BurstDetector
+
+    detector = BurstDetector()
+    states = [[0, 0.0, 0.0, 0.0] for _ in range(series)]
+    step = detector.step
+    flagged = []
+    start = time.perf_counter()
+    for s, _, value, _ in data:
+        flagged.append(step(states[s], value) is not None)
+    elapsed = time.perf_counter() - start
+    hits = sum(1 for (_, _, _, burst), flag in zip(data, flagged) if burst and flag)
+    injected = sum(1 for *_, burst in data if burst)
+    false_alarms = sum(1 for (_, _, _, burst), flag in zip(data, flagged) if flag and not burst)
+    print(f'detector only      {len(data) / elapsed * 3600 / 1e6:>8.1f} M points/h  '
+          f'({len(data)} points, {elapsed:.2f} s)')
+    print(f'                   {hits}/{injected} injected bursts found, '
+          f'{false_alarms} false alarms ({false_alarms / max(1, len(data) - injected):.4%})')
+
+
+def bench_ingest(data, series, batch):
+    os.environ['DATA_DIR'] = tempfile.mkdtemp(prefix='bench_bursts_')
+    os.environ.pop('DATABASE_URL', None)
+    from src.main import app
+    from src.models.user import db, User
+    from src.models.content import Content
+    from src.services.write_queue import write_queue
+
+    anchor = datetime(2025, 1, 1)
+    with app.app_context():
+        db.session.add(User(id=1, username='bench', email='bench@example.com'))
+        db.session.execute(db.insert(Content), [{'id': s + 1, 'title': f'Trend {s}', 'content_type': 'trend',
+                                                 'created_by': 1} for s in range(series)])
+        db.session.commit()
+
+    client = app.test_client()
+    found = 0
+    start = time.perf_counter()
+    for offset in range(0, len(data), batch):
+        metrics = [{'content_id': s + 1, 'metric_type': 'mentions', 'value': value,
+                    'period_start': (anchor + timedelta(days=period)).isoformat(),
+                    'period_end': (anchor + timedelta(days=period + 1)).isoformat()}
+                   for s, period, value, _ in data[offset:offset + batch]]
+        response = client.post('/api/api/trends/metrics/batch', json={'metrics': metrics})
+        if response.status_code != 201:
+            sys.exit(f'batch failed: {response.status_code} {response.get_data(as_text=True)[:200]}')
+        found += response.get_json()['burst_count']
+    elapsed = time.perf_counter() - start
+    print(f'batch ingest       {len(data) / elapsed * 3600 / 1e6:>8.1f} M points/h  '
+          f'({len(data)} points in batches of {batch}, {elapsed:.2f} s, {found} bursts stored)')
+    with app.app_context():
+        write_queue.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--series', type=int, default=2000)
+    parser.add_argument('--points', type=int, default=200, help='Perioden pro Reihe')
+    parser.add_argument('--burst-rate', type=float, default=0.002)
+    parser.add_argument('--batch', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    data = synthetic(args.series, args.points, args.burst_rate, args.seed)
+    bench_detector(data, args.series)
+    bench_ingest(data, args.series, args.batch)
+
+
+if __name__ == '__main__':
+    main()
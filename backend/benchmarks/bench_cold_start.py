@@ -0,0 +1,101 @@
+"""Benchmark: Kaltstart des Backends (Import, App-Factory, erster Request).
+
+Jeder Lauf startet einen frischen Python-Prozess und misst ``import src.main``,
+``create_app()`` (inkl. Startaufgaben) und den ersten Request – einmal gegen
+eine leere Datenbank (Schema + Seeding), einmal gegen eine bestehende. Zusätzlich
+wird geprüft, dass schwere optionale Abhängigkeiten (NumPy, SciPy, requests,
+bs4) beim Start nicht geladen werden. Ausgabe als JSON, z.B. für CI; mit
+``--budget-ms`` endet das Skript mit Exit-Code 1, wenn der Median des Starts
+gegen eine bestehende Datenbank das Budget überschreitet. Aufruf (aus ``backend/``)::
+
+    python -m benchmarks.bench_cold_start --runs 5 --budget-ms 1500
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ('numpy', 'scipy', 'requests', 'bs4')
+
+_CHILD = """
+import json, sys, time
+t0 = time.perf_counter()
+import src.main
+t1 = time.perf_counter()
+app = src.main.create_app()
+t2 = time.perf_counter()
+response = app.test_client().get('/api/contents')
+t3 = time.perf_counter()
+print(json.dumps({
+    'import_ms': (t1 - t0) * 1000,
+    'create_app_ms': (t2 - t1) * 1000,
+    'first_request_ms': (t3 - t2) * 1000,
+    'status': response.status_code,
+    'heavy_modules': [m for m in %r if m in sys.modules],
+}))
+""" % (HEAVY_MODULES,)
+
+
+def _run_once(data_dir):
+    env = dict(os.environ, DATA_DIR=data_dir)
+    env.pop('DATABASE_URL', None)
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, '-c', _CHILD], cwd=BACKEND_DIR, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    result = json.loads(out.strip().splitlines()[-1])
+    result['process_ms'] = (time.perf_counter() - start) * 1000
+    return result
+
+
+def _summary(runs):
+    summary = {}
+    for key in ('import_ms', 'create_app_ms', 'first_request_ms', 'process_ms'):
+        values = [run[key] for run in runs]
+        summary[key] = {'median': round(statistics.median(values), 1), 'min': round(min(values), 1),
+                        'max': round(max(values), 1)}
+    startup = [run['import_ms'] + run['create_app_ms'] for run in runs]
+    summary['startup_ms'] = {'median': round(statistics.median(startup), 1), 'min': round(min(startup), 1),
+                             'max': round(max(startup), 1)}
+    summary['heavy_modules'] = sorted({m for run in runs for m in run['heavy_modules']})
+    summary['errors'] = sum(1 for run in runs if run['status'] != 200)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, help='max. Median import + create_app (bestehende DB)')
+    parser.add_argument('--output', help='JSON zusätzlich in diese Datei schreiben')
+    args = parser.parse_args()
+
+    # Leere Datenbank: jeder Lauf mit eigenem DATA_DIR
+    empty = [_run_once(tempfile.mkdtemp(prefix='bench_cold_')) for _ in range(args.runs)]
+    # Bestehende Datenbank: einmal anlegen, danach nur noch starten
+    data_dir = tempfile.mkdtemp(prefix='bench_cold_')
+    _run_once(data_dir)
+    existing = [_run_once(data_dir) for _ in range(args.runs)]
+
+    report = {'python': sys.version.split()[0], 'runs': args.runs,
+              'empty_db': _summary(empty), 'existing_db': _summary(existing)}
+    failed = bool(report['existing_db']['heavy_modules']) or report['empty_db']['errors'] \
+        or report['existing_db']['errors']
+    if args.budget_ms is not None:
+        report['budget_ms'] = args.budget_ms
+        failed = failed or report['existing_db']['startup_ms']['median'] > args.budget_ms
+    report['ok'] = not failed
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w') as fh:
+            fh.write(text + '\n')
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Benchmark: Overhead der Request-Instrumentierung (src/instrumentation.py).
+
+Misst dieselben Requests ohne Engine-Listener, mit Sampling aus und mit
+Sampling 100 %. Aufruf (aus ``backend/``)::
+
+    python -m benchmarks.bench_instrumentation --contents 1000 --requests 2000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--contents', type=int, default=1000)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    os.environ['DATA_DIR'] = tempfile.mkdtemp(prefix='bench_instr_')
+    os.environ.pop('DATABASE_URL', None)
+    from benchmarks.datagen import generate
+    from src import instrumentation
+    from src.main import app
+    from src.models.user import db
+
+    with app.app_context():
+        generate(contents=args.contents)
+        engine = db.engine
+    client = app.test_client()
+    paths = [f'/api/contents/{1 + (i * 7919) % args.contents}/comments' for i in range(args.requests)]
+
+    def run():
+        start = time.perf_counter()
+        for path in paths:
+            client.get(path)
+        return (time.perf_counter() - start) / len(paths) * 1e6
+
+    def without_listeners():
+        instrumentation.remove_engine_events(engine)
+
+    def sampling(rate):
+        def apply():
+            instrumentation.install_engine_events(engine)
+            app.config['PERF_SAMPLE_RATE'] = rate
+        return apply
+
+    app.config['PERF_SLOW_MS'] = float('inf')
+    modes = [('ohne Listener', without_listeners), ('Sampling aus', sampling(0.0)),
+             ('Sampling 100 %', sampling(1.0))]
+    run()  # Aufwärmen (Caches, Pool)
+    # Modi abwechselnd messen und je Modus das Minimum nehmen (Rauschen der Maschine)
+    best = {label: float('inf') for label, _ in modes}
+    for _ in range(args.repeat):
+        for label, apply in modes:
+            apply()
+            best[label] = min(best[label], run())
+    modes = list(best.items())
+
+    baseline = modes[0][1]
+    for label, us in modes:
+        print(f'{label:<16} {us:8.1f} µs/request  ({(us / baseline - 1) * 100:+.1f} %)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""Benchmark: Report-Erzeugung (PDF/XLSX) und Report-Cache.
+
+Gegen eine mit ``datagen`` gefüllte SQLite-Datenbank: Erzeugungsdauer je
+Format und Speicherspitze (``tracemalloc``) für alle Trends bzw. ein Zehntel
+davon – bei gestreamter Ausgabe bleibt die Spitze annähernd gleich.
+Danach die Antwortzeit von ``POST /api/reports`` für einen gecachten Report
+und nach einer Datenänderung (neuer Datenstand, neuer Auftrag).
+
+Aufruf (aus ``backend/``)::
+
+    python -m benchmarks.bench_reports --contents 20000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--contents', type=int, default=20000)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    os.environ['DATA_DIR'] = tempfile.mkdtemp(prefix='bench_reports_')
+    os.environ.pop('DATABASE_URL', None)
+    from src.main import app
+    from src.models.user import db
+    from src.models.content import Content
+    from src.services import reports
+    from src.services.counters import read_data_version
+    from src.services.write_queue import write_queue
+    from benchmarks.datagen import generate
+
+    client = app.test_client()
+    with app.app_context():
+        generate(contents=args.contents, seed=args.seed)
+        db.session.commit()
+        scores = sorted(score for (score,) in db.session.execute(
+            db.select(Content.priority_score).where(Content.content_type == 'trend')))
+        tenth = scores[int(len(scores) * 0.9)]
+
+        for fmt in ('xlsx', 'pdf'):
+            for label, filters in (('all trends', {}), ('top tenth', {'min_score': tenth})):
+                # Auftrag ohne Worker anlegen und direkt rendern, damit tracemalloc misst
+                spec = reports.make_spec(filters, fmt, f'bench {label}')
+                version = read_data_version(db.session)
+                report_id = reports.report_id_for(reports.spec_hash(spec), version)
+                db.session.rollback()
+                write_queue.execute(reports._enqueue_job, report_id, reports.spec_hash(spec), version, spec)
+                tracemalloc.start()
+                start = time.perf_counter()
+                result = reports.render(report_id)
+                elapsed = time.perf_counter() - start
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                db.session.remove()
+                print(f'{fmt:<4} {label:<10} {result["rows"]:>7} rows in {elapsed:6.2f} s '
+                      f'({result["rows"] / elapsed:>7.0f} rows/s), {result["size_bytes"] / 1e6:6.2f} MB, '
+                      f'peak {peak / 1e6:5.1f} MB')
+
+    body = {'format': 'xlsx', 'filters': {}, 'title': 'bench all trends'}
+    start = time.perf_counter()
+    for _ in range(args.requests):
+        response = client.post('/api/api/reports', json=body)
+        assert response.status_code == 200, response.get_json()
+    print(f'cached POST /api/reports  {(time.perf_counter() - start) / args.requests * 1000:.2f} ms')
+
+    client.post('/api/contents/1/ratings', json={'user_id': 1, 'value': 5})
+    start = time.perf_counter()
+    response = client.post('/api/api/reports', json=body)
+    queued = time.perf_counter() - start
+    reports.worker.join()
+    print(f'after data change         {response.status_code} in {queued * 1000:.2f} ms, '
+          f'ready after {time.perf_counter() - start:.2f} s')
+    reports.worker.stop()
+    write_queue.stop()
+
+
+if __name__ == '__main__':
+    main()
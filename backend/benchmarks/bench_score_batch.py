@@ -0,0 +1,124 @@
+"""Benchmark: Scoring-Workshop einzeln vs. über den Batch-Endpunkt.
+
+Ein Workshop bewertet ``--trends`` Trends in allen fünf Score-Typen, je Runde
+einmal pro Analyst. Dieselben Bewertungen laufen einmal als Einzel-Requests
+(``POST /api/api/contents/<id>/scores``, ein Commit pro Score) und einmal als
+``POST /api/api/trends/scores/batch`` (eine Transaktion pro Runde) auf
+getrennten, gleich großen Trend-Mengen. Gezählt werden Zeit, SQL-Statements
+und Commits; am Ende wird geprüft, dass beide Wege denselben Zustand
+hinterlassen (Scores, Konsens, Priority, Historie).
+
+Aufruf (aus ``backend/``)::
+
+    python -m benchmarks.bench_score_batch --trends 200 --rounds 2
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SCORE_TYPES = ('relevance', 'impact', 'urgency', 'feasibility', 'risk')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--trends', type=int, default=200)
+    parser.add_argument('--rounds', type=int, default=2, help='Runden (Analysten); ab Runde 2 auch Updates')
+    args = parser.parse_args()
+
+    os.environ['DATA_DIR'] = tempfile.mkdtemp(prefix='bench_score_batch_')
+    os.environ.pop('DATABASE_URL', None)
+    from sqlalchemy import event, select
+
+    from src.main import app
+    from src.models.user import db, User
+    from src.models.content import Content
+    from src.models.trend_management import ScoreConsensus, TrendScore, TrendScoreSeries
+    from src.services.audit import audit_trail
+    from src.services.write_queue import write_queue
+
+    with app.app_context():
+        users = [User(username=f'analyst{i}', email=f'analyst{i}@example.com') for i in range(args.rounds)]
+        db.session.add_all(users)
+        db.session.flush()
+        contents = [Content(title=f'Trend {i}', content_type='trend', created_by=users[0].id)
+                    for i in range(2 * args.trends)]
+        db.session.add_all(contents)
+        db.session.commit()
+        user_ids = [user.id for user in users]
+        single_ids = [content.id for content in contents[:args.trends]]
+        batch_ids = [content.id for content in contents[args.trends:]]
+        engine = db.engine
+
+    counters = {'statements': 0, 'commits': 0}
+
+    def count_statement(*_):
+        counters['statements'] += 1
+
+    def count_commit(*_):
+        counters['commits'] += 1
+
+    event.listen(engine, 'before_cursor_execute', count_statement)
+    event.listen(engine, 'commit', count_commit)
+
+    client = app.test_client()
+    rng = random.Random(7)
+    # je Runde ein Analyst; die letzte Runde wiederholt Runde 1 (Überschreiben eigener Scores)
+    rounds = [(user_ids[r % len(user_ids)], [round(rng.uniform(0, 5), 2) for _ in range(args.trends * 5)])
+              for r in range(args.rounds)] + [(user_ids[0], [round(rng.uniform(0, 5), 2)
+                                                             for _ in range(args.trends * 5)])]
+
+    def single(content_ids):
+        for user_id, values in rounds:
+            for position, (content_id, score_type) in enumerate(
+                    (cid, score_type) for cid in content_ids for score_type in SCORE_TYPES):
+                response = client.post(f'/api/api/contents/{content_id}/scores', json={
+                    'score_type': score_type, 'value': values[position], 'calculated_by': user_id})
+                assert response.status_code == 201, response.get_data(as_text=True)
+
+    def batch(content_ids):
+        for user_id, values in rounds:
+            scores = [{'content_id': cid, 'score_type': score_type, 'value': values[position],
+                       'calculated_by': user_id}
+                      for position, (cid, score_type) in enumerate(
+                          (cid, score_type) for cid in content_ids for score_type in SCORE_TYPES)]
+            response = client.post('/api/api/trends/scores/batch', json={'scores': scores})
+            assert response.status_code == 201, response.get_data(as_text=True)[:500]
+
+    scores = args.trends * 5 * len(rounds)
+    print(f'{scores} scores ({args.trends} trends x 5 types x {len(rounds)} rounds)')
+    for label, run, content_ids in (('single requests', single, single_ids), ('batch endpoint', batch, batch_ids)):
+        counters.update(statements=0, commits=0)
+        start = time.perf_counter()
+        run(content_ids)
+        elapsed = time.perf_counter() - start
+        print(f'{label:<16} {elapsed:8.2f} s  {scores / elapsed:9.0f} scores/s  '
+              f'{counters["statements"]:7d} statements  {counters["commits"]:5d} commits')
+
+    with app.app_context():
+        def state(content_ids):
+            position = {content_id: i for i, content_id in enumerate(content_ids)}
+            score_rows = sorted((position[r.content_id], r.score_type, r.calculated_by, r.value)
+                                for r in TrendScore.query.filter(TrendScore.content_id.in_(content_ids)))
+            consensus_rows = sorted((position[r.content_id], r.score_type, r.count, round(r.total, 6), r.sketch)
+                                    for r in ScoreConsensus.query.filter(ScoreConsensus.content_id.in_(content_ids)))
+            priorities = [round(p, 9) for p in db.session.execute(
+                select(Content.priority_score).where(Content.id.in_(content_ids)).order_by(Content.id)).scalars()]
+            series = sorted((position[r.content_id], r.score_type_id, r.scorer_id, r.chunk, r.count, bytes(r.values))
+                            for r in TrendScoreSeries.query.filter(TrendScoreSeries.content_id.in_(content_ids)))
+            return score_rows, consensus_rows, priorities, series
+
+        same = [a == b for a, b in zip(state(single_ids), state(batch_ids))]
+    print('same state (scores, consensus, priority, history):', same)
+    audit_trail.stop()
+    write_queue.stop()
+    if not all(same):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""Benchmark: Sentiment-Pipeline.
+
+1. ``score_texts`` über synthetische deutsche und englische Kommentare:
+   Texte pro Sekunde je Stapelgröße.
+2. Inkrementelle Läufe gegen eine mit ``datagen`` gefüllte SQLite-Datenbank:
+   erster Gesamtlauf, danach ``--new-comments`` neue Kommentare per ORM und
+   ein Lauf, der nur die betroffenen Contents anfasst.
+
+Aufruf (aus ``backend/``)::
+
+    python -m benchmarks.bench_sentiment --contents 10000 --new-comments 2000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_PHRASES = (
+    'Das ist ein sehr guter Ansatz für den Bestand', 'Die Umsetzung ist leider zu teuer und riskant',
+    'Wir sehen kein echtes Potenzial, aber die Idee ist spannend', 'Die Mieter sind begeistert',
+    'This is a promising platform for tenants', 'The rollout was not successful and costs are high',
+    'Great pilot, but the integration is complicated', 'We love the energy savings in the portfolio',
+)
+
+
+def synthetic(count, seed):
+    rnd = random.Random(seed)
+    return ['. '.join(rnd.choices(_PHRASES, k=rnd.randint(1, 4))) + '.' for _ in range(count)]
+
+
+def bench_scoring(texts):
+    from src.services.sentiment import score_texts, vocabulary
+
+    vocab = vocabulary()
+    score_texts(texts[:100], vocab)  # Cache der Token-IDs füllen
+    for batch in (1, 100, 1000, 10000):
+        start = time.perf_counter()
+        for offset in range(0, len(texts), batch):
+            score_texts(texts[offset:offset + batch], vocab)
+        elapsed = time.perf_counter() - start
+        print(f'score_texts batch {batch:>6}  {len(texts) / elapsed:>10.0f} texts/s')
+
+
+def bench_pipeline(contents, new_comments, seed):
+    os.environ['DATA_DIR'] = tempfile.mkdtemp(prefix='bench_sentiment_')
+    os.environ.pop('DATABASE_URL', None)
+    from src.main import app
+    from src.models.user import db
+    from src.models.content import Comment
+    from src.services import sentiment
+    from src.services.write_queue import write_queue
+    from benchmarks.datagen import generate
+
+    with app.app_context():
+        counts = generate(contents=contents, seed=seed)
+        db.session.commit()
+        start = time.perf_counter()
+        result = sentiment.run()
+        elapsed = time.perf_counter() - start
+        print(f'full run            {result["contents"]:>7} contents, {result["comments"]:>7} comments '
+              f'in {elapsed:.2f} s ({counts["comments"] / elapsed:.0f} comments/s)')
+
+        rnd = random.Random(seed + 2)
+        texts = synthetic(new_comments, seed + 2)
+        db.session.add_all(Comment(content_id=rnd.randint(1, contents), user_id=1, text=text) for text in texts)
+        db.session.commit()
+        start = time.perf_counter()
+        result = sentiment.run()
+        elapsed = time.perf_counter() - start
+        print(f'incremental run     {result["contents"]:>7} contents, {result["comments"]:>7} comments '
+              f'in {elapsed:.2f} s ({result["comments"] / elapsed:.0f} comments/s)')
+
+        start = time.perf_counter()
+        result = sentiment.run()
+        print(f'empty queue         {(time.perf_counter() - start) * 1000:.1f} ms')
+        write_queue.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--texts', type=int, default=50000)
+    parser.add_argument('--contents', type=int, default=10000)
+    parser.add_argument('--new-comments', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    bench_scoring(synthetic(args.texts, args.seed))
+    bench_pipeline(args.contents, args.new_comments, args.seed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""Benchmark: Lesedurchsatz mehrerer gunicorn-Worker auf einer SQLite-Datei (WAL).
+
+Startet die App je Worker-Anzahl mit ``gunicorn.conf.py``, feuert parallel
+Lese-Requests (``GET /api/stats``) und im Hintergrund Schreib-Requests
+(``POST /api/api/trend-tags``) ab und zählt Fehler, insbesondere
+"database is locked". Aufruf (aus ``backend/``)::
+
+    python -m benchmarks.bench_sqlite_workers --workers 1 2 4 --contents 20000
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def seed(data_dir, contents):
+    env_backup = dict(os.environ)
+    os.environ['DATA_DIR'] = data_dir
+    os.environ.pop('DATABASE_URL', None)
+    try:
+        from src.main import app
+        from src.models.user import db, User
+        from src.models.content import Content, Rating, Comment
+        with app.app_context():
+            db.session.execute(db.insert(User), [{'id': 1, 'username': 'bench', 'email': 'bench@example.com'}])
+            types = ['trend', 'technology', 'inspiration']
+            db.session.execute(db.insert(Content), [
+                {'id': i, 'title': f'Content {i}', 'content_type': types[i % 3], 'created_by': 1, 'status': 'approved'}
+                for i in range(1, contents + 1)
+            ])
+            db.session.execute(db.insert(Rating), [
+                {'content_id': i, 'user_id': 1, 'value': i % 5 + 1} for i in range(1, contents + 1)
+            ])
+            db.session.execute(db.insert(Comment), [
+                {'content_id': i, 'user_id': 1, 'text': 'Kommentar'} for i in range(1, contents + 1, 2)
+            ])
+            db.session.commit()
+            db.session.remove()
+            db.engine.dispose()
+    finally:
+        os.environ.clear()
+        os.environ.update(env_backup)
+
+
+def wait_ready(base_url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f'{base_url}/health', timeout=1).status_code == 200:
+                return
+        except requests.ConnectionError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError('gunicorn did not start')
+
+
+def run_load(base_url, clients, duration, write_interval):
+    stop = time.monotonic() + duration
+    counts = {'reads': 0, 'writes': 0, 'errors': 0, 'locked': 0}
+    lock = threading.Lock()
+
+    def record(response):
+        ok = response.status_code < 400
+        with lock:
+            if not ok:
+                counts['errors'] += 1
+                if 'locked' in response.text:
+                    counts['locked'] += 1
+        return ok
+
+    def reader():
+        session = requests.Session()
+        done = 0
+        while time.monotonic() < stop:
+            if record(session.get(f'{base_url}/api/stats')):
+                done += 1
+        with lock:
+            counts['reads'] += done
+
+    def writer():
+        session = requests.Session()
+        n = 0
+        while time.monotonic() < stop:
+            n += 1
+            name = f'bench-{os.getpid()}-{time.monotonic_ns()}-{n}'
+            if record(session.post(f'{base_url}/api/api/trend-tags', json={'name': name})):
+                with lock:
+                    counts['writes'] += 1
+            time.sleep(write_interval)
+
+    threads = [threading.Thread(target=reader) for _ in range(clients)]
+    threads += [threading.Thread(target=writer) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--contents', type=int, default=20_000)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--write-interval', type=float, default=0.01)
+    parser.add_argument('--port', type=int, default=5055)
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix='bench_sqlite_')
+    seed(data_dir, args.contents)
+    base_url = f'http://127.0.0.1:{args.port}'
+
+    print(f'{"workers":>7} {"reads/s":>10} {"writes/s":>9} {"errors":>7} {"locked":>7}')
+    for workers in args.workers:
+        env = dict(os.environ, DATA_DIR=data_dir, PORT=str(args.port), WEB_CONCURRENCY=str(workers))
+        env.pop('DATABASE_URL', None)
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'src.main:app'],
+            cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            wait_ready(base_url)
+            counts = run_load(base_url, args.clients, args.duration, args.write_interval)
+        finally:
+            server.terminate()
+            server.wait()
+        print(f'{workers:>7} {counts["reads"] / args.duration:>10.1f} {counts["writes"] / args.duration:>9.1f} '
+              f'{counts["errors"]:>7} {counts["locked"]:>7}')
+
+
+if __name__ == '__main__':
+    main()
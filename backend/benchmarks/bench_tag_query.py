@@ -0,0 +1,111 @@
+"""Benchmark: boolesche Tag-Abfrage über den Tag-Index vs. SQL-Join.
+
+Aufruf (aus ``backend/``)::
+
+    python -m benchmarks.bench_tag_query --contents 100000 --tags 1000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _timed(fn, repeat):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--contents', type=int, default=100_000)
+    parser.add_argument('--tags', type=int, default=1_000)
+    parser.add_argument('--tags-per-content', type=int, default=5)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    os.environ['DATA_DIR'] = tempfile.mkdtemp(prefix='bench_tags_')
+    os.environ.pop('DATABASE_URL', None)
+    from src.main import app
+    from src.models.user import db, User
+    from src.models.content import Content
+    from src.models.associations import content_trend_tags
+    from src.models.trend_management import TrendTag
+    from src.services.tag_index import tag_index
+
+    rnd = random.Random(42)
+    with app.app_context():
+        db.session.execute(db.insert(User), [{'id': 1, 'username': 'bench', 'email': 'bench@example.com'}])
+        db.session.execute(db.insert(TrendTag), [{'id': i, 'name': f'tag{i}'} for i in range(1, args.tags + 1)])
+        db.session.execute(db.insert(Content), [
+            {'id': i, 'title': f'Trend {i}', 'content_type': 'trend', 'created_by': 1,
+             'priority_score': rnd.random() * 5}
+            for i in range(1, args.contents + 1)
+        ])
+        # Zipf-artige Verteilung: wenige sehr häufige, viele seltene Tags
+        weights = [1 / rank for rank in range(1, args.tags + 1)]
+        links = set()
+        for content_id in range(1, args.contents + 1):
+            for tag_id in rnd.choices(range(1, args.tags + 1), weights, k=args.tags_per_content):
+                links.add((content_id, tag_id))
+        db.session.execute(content_trend_tags.insert(), [
+            {'content_id': c, 'trend_tag_id': t} for c, t in links
+        ])
+        db.session.commit()
+
+        build_ms, _ = _timed(tag_index.build, 1)
+        print(f'{args.contents} contents, {args.tags} tags, {len(links)} links; index build {build_ms:.1f} ms')
+
+        base = Content.query.filter_by(content_type='trend').order_by(Content.priority_score.desc())
+
+        def sql_join_or():
+            q = base.join(Content.trend_tags).filter(TrendTag.name.in_(['tag1', 'tag2']))
+            return q.paginate(page=1, per_page=20, error_out=False).total
+
+        def has(name):
+            return Content.trend_tags.any(TrendTag.name == name)
+
+        def sql_exists_bool():
+            q = base.filter(has('tag1'), db.or_(has('tag2'), has('tag3')), ~has('tag4'))
+            return q.paginate(page=1, per_page=20, error_out=False).total
+
+        def index_query(query):
+            def run():
+                q = base.filter(tag_index.filter_clause(query))
+                return q.paginate(page=1, per_page=20, error_out=False).total
+            return run
+
+        cases = [
+            ('SQL join, tag1 OR tag2 (alt)', sql_join_or),
+            ('Index, tag1 OR tag2', index_query('tag1 OR tag2')),
+            ('SQL EXISTS, tag1 AND (tag2 OR tag3) NOT tag4', sql_exists_bool),
+            ('Index, tag1 AND (tag2 OR tag3) NOT tag4', index_query('tag1 AND (tag2 OR tag3) NOT tag4')),
+            ('Index, NOT tag1', index_query('NOT tag1')),
+        ]
+        for label, fn in cases:
+            ms, total = _timed(fn, args.repeat)
+            print(f'{label:<48} {ms:9.2f} ms  total={total}')
+
+        # Literale ID-Liste vs. Unterabfragen je nach Treffermenge (TAG_INDEX_MAX_LITERAL_IDS)
+        for query in ('tag1', 'tag1 OR tag2', 'tag20', 'tag200 OR tag300', 'NOT tag1'):
+            hits = len(tag_index.match(query)[0])
+            for label, limit in (('Literale', float('inf')), ('SQL', -1)):
+                app.config['TAG_INDEX_MAX_LITERAL_IDS'] = limit
+                ms, total = _timed(index_query(query), args.repeat)
+                print(f'{label + ", " + query:<36} {hits:>9} IDs {ms:9.2f} ms  total={total}')
+        app.config.pop('TAG_INDEX_MAX_LITERAL_IDS')
+
+        eval_ms, _ = _timed(lambda: tag_index.match('tag1 AND (tag2 OR tag3) NOT tag4'), args.repeat)
+        print(f'{"Index-Auswertung allein":<48} {eval_ms:9.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
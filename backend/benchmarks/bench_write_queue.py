@@ -0,0 +1,80 @@
+"""Benchmark: Schreibdurchsatz mit und ohne Single-Writer-Queue (Group Commit).
+
+Mehrere Threads legen gleichzeitig Kommentare an – einmal mit einem Commit pro
+Insert über ``db.session``, einmal über ``write_queue``. Aufruf (aus ``backend/``)::
+
+    python -m benchmarks.bench_write_queue --threads 16 --writes 200
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--writes', type=int, default=200, help='Inserts pro Thread')
+    parser.add_argument('--synchronous', default='NORMAL', help='SQLite synchronous (NORMAL/FULL)')
+    args = parser.parse_args()
+
+    os.environ['DATA_DIR'] = tempfile.mkdtemp(prefix='bench_writes_')
+    os.environ.pop('DATABASE_URL', None)
+    from src import database
+    pragmas = database.sqlite_pragmas
+    database.sqlite_pragmas = lambda: {**pragmas(), 'synchronous': args.synchronous}
+
+    from src.main import app
+    from src.models.user import db, User
+    from src.models.content import Content, Comment
+    from src.services.write_queue import write_queue
+
+    with app.app_context():
+        db.session.add(User(id=1, username='bench', email='bench@example.com'))
+        db.session.add(Content(id=1, title='Bench', content_type='trend', created_by=1))
+        db.session.commit()
+
+    def insert_comment(session, text):
+        session.add(Comment(content_id=1, user_id=1, text=text))
+
+    def direct(n):
+        with app.app_context():
+            for i in range(n):
+                db.session.add(Comment(content_id=1, user_id=1, text=f'direct {i}'))
+                db.session.commit()
+
+    def queued(n):
+        with app.app_context():
+            for i in range(n):
+                write_queue.execute(insert_comment, f'queued {i}')
+
+    for label, worker in (('commit per insert', direct), ('write queue', queued)):
+        errors = []
+
+        def run():
+            try:
+                worker(args.writes)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=run) for _ in range(args.threads)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        total = args.threads * args.writes
+        print(f'{label:<18} {total / elapsed:>10.0f} writes/s  ({total} writes, {elapsed:.2f} s, '
+              f'{len(errors)} errors{": " + str(errors[0]) if errors else ""})')
+
+    with app.app_context():
+        write_queue.stop()
+
+
+if __name__ == '__main__':
+    main()
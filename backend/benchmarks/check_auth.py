@@ -0,0 +1,180 @@
+"""Prüft die Team-Sichtbarkeit aller Listen-, Aggregat- und Report-Routen.
+
+Legt zwei Teams mit je einem Benutzer (API-Token) an, dazu je Team einen
+Trend und einen Trend ohne Team, alle mit fast gleichem Text (Duplikate,
+Ähnlichkeit), Scores zweier Analysten, Korrelationen, Bursts und Reports.
+Danach fragt jedes Team jede Route ab; Contents des anderen Teams dürfen
+nirgends auftauchen, Reports des anderen Teams sind 404.
+
+Zum Schluss entzieht ein zweiter Prozess ein Token und eine
+Team-Mitgliedschaft; dieser Prozess muss beides sofort sehen, über den
+globalen Berechtigungs-Cache wie über eine zweite ``PermissionCache``-Instanz.
+Aufruf (aus ``backend/``)::
+
+    python -m benchmarks.check_auth
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TEXT = 'Modulare Holzbauweise senkt Baukosten und Bauzeit im urbanen Wohnungsbau deutlich'
+
+
+def check(label, condition, detail=''):
+    print(f'[{"ok" if condition else "FAIL"}] {label}{f" – {detail}" if detail else ""}')
+    if not condition:
+        check.failed = True
+
+
+check.failed = False
+
+
+def _revoke(data_dir, user_id, member_id, team_id):
+    """Läuft in einem eigenen Prozess (anderer Worker): Token und Mitgliedschaft entziehen."""
+    os.environ['DATA_DIR'] = data_dir
+    from src.main import app
+    from src.models.user import db, Team, User
+
+    with app.app_context():
+        db.session.get(User, user_id).api_token_hash = None
+        member = db.session.get(User, member_id)
+        member.teams.remove(db.session.get(Team, team_id))
+        db.session.commit()
+
+
+def main():
+    argparse.ArgumentParser(description=__doc__.splitlines()[0]).parse_args()
+
+    os.environ['DATA_DIR'] = tempfile.mkdtemp(prefix='check_auth_')
+    os.environ.pop('DATABASE_URL', None)
+    from src.auth import PermissionCache, load_principal, permission_cache
+    from src.main import app
+    from src.models.user import db
+    from src.models.trend_management import TrendBurst
+    from src.services import reports
+    from src.services.write_queue import write_queue
+
+    client = app.test_client()
+
+    # --- Aufbau (anonym im Modus optional: ohne Einschränkung) ---
+    users = [client.post('/api/users', json={'username': f'user{i}', 'email': f'user{i}@example.org'}).get_json()['id']
+             for i in range(3)]
+    teams = [client.post('/api/teams', json={'name': name}).get_json()['id'] for name in ('Research', 'Sales')]
+    tokens = {}
+    for team_id, user_id in zip(teams, users):
+        client.put(f'/api/teams/{team_id}/members', json={'add': [user_id]})
+        tokens[team_id] = client.post(f'/api/users/{user_id}/token').get_json()['token']
+    contents = {}
+    for key, team_id in (('a', teams[0]), ('b', teams[1]), ('open', None)):
+        response = client.post('/api/contents', json={
+            'title': f'Holzmodulbau {TEXT}', 'short_description': TEXT, 'long_description': TEXT,
+            'content_type': 'trend', 'created_by': users[2], 'team_id': team_id, 'status': 'approved'})
+        contents[key] = response.get_json()['id']
+    a, b, open_id = contents['a'], contents['b'], contents['open']
+    # Füll-Contents, damit der gemeinsame Text nicht als zu häufig aus dem TF-IDF-Vokabular fällt
+    for i, words in enumerate(('Sensorik Gebäudetechnik', 'Solarfassade Energie', 'Coworking Flächen',
+                               'Mieterportal Digitalisierung', 'Logistikimmobilien Automatisierung',
+                               'Quartiersentwicklung Mobilität')):
+        client.post('/api/contents', json={'title': f'{words} {i}', 'short_description': words,
+                                           'content_type': 'technology', 'created_by': users[2]})
+    client.post('/api/api/trends/scores/batch', json={'scores': [
+        {'content_id': cid, 'score_type': 'relevance', 'value': value, 'calculated_by': user_id}
+        for cid in contents.values() for user_id, value in ((users[0], 1.0), (users[1], 5.0))]})
+    for pair in ((a, open_id), (b, open_id), (a, b)):
+        client.post('/api/api/trends/correlations', json={'trend_a_id': pair[0], 'trend_b_id': pair[1],
+                                                           'correlation_strength': 0.8})
+    client.post('/api/api/trends/bulk/recompute-similarities')
+    with app.app_context():
+        now = datetime.utcnow()
+        db.session.add_all(TrendBurst(content_id=cid, metric_type='mentions', period_start=now, value=10.0,
+                                      baseline=1.0, stddev=1.0, zscore=9.0, cusum=9.0, detector='zscore')
+                           for cid in contents.values())
+        db.session.commit()
+    report_ids = {}
+    for team_id in teams:
+        response = client.post('/api/api/reports', json={'format': 'xlsx'},
+                               headers={'Authorization': f'Bearer {tokens[team_id]}'})
+        report_ids[team_id] = response.get_json()['id']
+    report_ids[None] = client.post('/api/api/reports', json={'format': 'pdf'}).get_json()['id']
+    reports.worker.join()
+
+    # --- Abfragen je Team ---
+    for own, other in ((teams[0], teams[1]), (teams[1], teams[0])):
+        headers = {'Authorization': f'Bearer {tokens[own]}'}
+        mine, foreign = (a, b) if own == teams[0] else (b, a)
+        visible = {mine, open_id}
+
+        def get(url):
+            return client.get(url, headers=headers).get_json()
+
+        label = f'Team {own}:'
+        leaderboard = get('/api/api/trends/leaderboard')
+        ids = {entry['content_id'] for entry in leaderboard['entries']}
+        check(f'{label} Rangliste', ids == visible and leaderboard['total'] == 2, str(sorted(ids)))
+        ranks = get(f'/api/api/contents/{mine}/rank')['ranks']
+        check(f'{label} Rang', all(rank['total'] <= 2 for rank in ranks), str(ranks))
+        dashboard = get('/api/api/trends/analytics/dashboard')
+        ids = {trend['id'] for trend in dashboard['top_trends']}
+        phases = sum(row['count'] for row in dashboard['phase_distribution'])
+        check(f'{label} Dashboard', ids == visible and dashboard['recent_activity'] == 2 and phases <= 2,
+              f'{sorted(ids)}, activity {dashboard["recent_activity"]}')
+        history = get(f'/api/api/trends/score-history?content_ids={mine},{foreign}')['contents']
+        check(f'{label} Score-Verläufe', set(history) == {str(mine)}, str(sorted(history)))
+        ids = {row['content_id'] for row in get('/api/api/trends/consensus/disagreements?min_count=2')}
+        check(f'{label} Konsens-Abweichungen', ids == visible, str(sorted(ids)))
+        pairs = [(row['trend_a_id'], row['trend_b_id']) for row in get('/api/api/trends/correlations')]
+        check(f'{label} Korrelationen', pairs == [(mine, open_id)], str(pairs))
+        ids = {row['content_id'] for row in get('/api/api/trends/bursts')}
+        check(f'{label} Bursts', ids == visible, str(sorted(ids)))
+        ids = {row['content_id'] for row in get(f'/api/contents/{open_id}/similar')}
+        check(f'{label} ähnliche Contents', foreign not in ids and mine in ids, str(sorted(ids)))
+        duplicates = client.post('/api/content/duplicates', headers=headers,
+                                 json={'title': f'Holzmodulbau {TEXT}', 'summary': TEXT,
+                                       'long_description': TEXT}).get_json()['duplicate_candidates']
+        ids = {row['content_id'] for row in duplicates}
+        check(f'{label} Duplikat-Prüfung', ids == visible, str(sorted(ids)))
+        listed = {job['id'] for job in get('/api/api/reports')}
+        check(f'{label} Report-Liste', listed == {report_ids[own]}, f'{len(listed)} Reports')
+        for report_id, expected in ((report_ids[own], 200), (report_ids[other], 404), (report_ids[None], 404)):
+            detail = client.get(f'/api/api/reports/{report_id}', headers=headers).status_code
+            download = client.get(f'/api/api/reports/{report_id}/download', headers=headers).status_code
+            check(f'{label} Report {report_id[:8]}', detail == expected and download == expected,
+                  f'Status {detail}, Download {download}')
+
+    listed = {job['id'] for job in client.get('/api/api/reports').get_json()}
+    check('ohne Einschränkung: alle Reports', listed == set(report_ids.values()), f'{len(listed)} Reports')
+
+    # --- Entzug in einem anderen Prozess ---
+    second = PermissionCache()
+    with app.app_context():
+        warm = load_principal(db.session, tokens[teams[0]], cache=second) is not None
+    warm = warm and client.get('/api/me', headers={'Authorization': f'Bearer {tokens[teams[1]]}'}).status_code == 200
+    check('Caches gefüllt', warm and len(permission_cache) == 2 and len(second) == 1)
+    process = multiprocessing.get_context('spawn').Process(
+        target=_revoke, args=(os.environ['DATA_DIR'], users[0], users[1], teams[1]))
+    process.start()
+    process.join()
+    check('Entzug im zweiten Prozess', process.exitcode == 0)
+    with app.app_context():
+        principal = load_principal(db.session, tokens[teams[0]], cache=second)
+    check('zweite Cache-Instanz: Token entzogen', principal is None)
+    status = client.get('/api/me', headers={'Authorization': f'Bearer {tokens[teams[0]]}'}).status_code
+    check('globaler Cache: Token entzogen', status == 401, f'Status {status}')
+    me = client.get('/api/me', headers={'Authorization': f'Bearer {tokens[teams[1]]}'}).get_json()
+    check('globaler Cache: Team entzogen', me['team_ids'] == [], str(me['team_ids']))
+    leaderboard = client.get('/api/api/trends/leaderboard',
+                             headers={'Authorization': f'Bearer {tokens[teams[1]]}'}).get_json()
+    ids = {entry['content_id'] for entry in leaderboard['entries']}
+    check('Rangliste ohne Team', ids == {open_id}, str(sorted(ids)))
+    reports.worker.stop()
+    write_queue.stop()
+    raise SystemExit(1 if check.failed else 0)
+
+
+if __name__ == '__main__':
+    main()
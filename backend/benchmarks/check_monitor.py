@@ -0,0 +1,236 @@
+"""Prüft den Quellen-Monitor gegen einen lokalen HTTP-Stand-in.
+
+Der Stand-in (``StandIn``) bedient Seiten unter drei Hostnamen
+(127.0.0.1-3) mit ETag, Last-Modified oder ganz ohne Validatoren,
+beantwortet bedingte Anfragen mit 304 und protokolliert jede Anfrage samt
+Client-Verbindung. Geprüft werden erster Abruf, Erkennung geänderter Seiten
+(304 vs. Text-Hash), ``source_changes``-Metriken, Sentiment der Quellen,
+der Mindestabstand je Host, die Wiederverwendung von Verbindungen und die
+Planung: über 48 simulierte Stunden werden Trends mit hohem Priority Score
+häufiger geprüft. Aufruf (aus ``backend/``)::
+
+    python -m benchmarks.check_monitor --contents 300
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+HOSTS = ('127.0.0.1', '127.0.0.2', '127.0.0.3')
+VALIDATORS = ('etag', 'last_modified', 'none')
+_WORDS = ('Die Nachfrage ist stark und die Mieter sind begeistert.',
+          'Das Projekt ist leider gescheitert, die Kosten sind zu hoch.')
+
+
+class StandIn:
+    """Lokaler HTTP-Server mit versionierten Seiten und Anfrage-Protokoll."""
+
+    def __init__(self):
+        self.pages = {}  # Pfad -> {'version', 'validator', 'status'}
+        self.log = []  # (host, pfad, zeit, status, client_port)
+        self._lock = threading.Lock()
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # Keep-Alive
+
+            def do_GET(self):
+                stand_in.handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('0.0.0.0', 0), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def url(self, host, path):
+        return f'http://{host}:{self.port}{path}'
+
+    def handle(self, request):
+        received = time.monotonic()
+        page = self.pages.get(request.path)
+        headers, body, status = {}, b'', 404
+        if page is not None:
+            status = page['status']
+            etag = f'W/"{request.path}-v{page["version"]}"'
+            modified = formatdate(1_700_000_000 + page['version'] * 3600, usegmt=True)
+            if page['validator'] == 'etag':
+                headers['ETag'] = etag
+            elif page['validator'] == 'last_modified':
+                headers['Last-Modified'] = modified
+            if status == 200 and ((page['validator'] == 'etag' and request.headers.get('If-None-Match') == etag) or
+                                  (page['validator'] == 'last_modified'
+                                   and request.headers.get('If-Modified-Since') == modified)):
+                status = 304
+            elif status == 200:
+                body = (f'<html><head><title>{request.path} v{page["version"]}</title>'
+                        f'<script>var rotating = {time.time()};</script></head>'
+                        f'<body><p>{_WORDS[page["version"] % 2]}</p></body></html>').encode()
+        request.send_response(status)
+        for key, value in headers.items():
+            request.send_header(key, value)
+        request.send_header('Content-Type', 'text/html; charset=utf-8')
+        request.send_header('Content-Length', str(len(body)))
+        request.end_headers()
+        request.wfile.write(body)
+        with self._lock:
+            self.log.append((request.headers.get('Host', '').split(':')[0], request.path, received, status,
+                             request.client_address[1]))
+
+
+def check(label, condition, detail=''):
+    print(f'[{"ok" if condition else "FAIL"}] {label}{f" – {detail}" if detail else ""}')
+    if not condition:
+        check.failed = True
+
+
+check.failed = False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--contents', type=int, default=300)
+    parser.add_argument('--host-rate', type=float, default=200.0, help='Anfragen pro Sekunde und Host')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    os.environ['DATA_DIR'] = tempfile.mkdtemp(prefix='check_monitor_')
+    os.environ.pop('DATABASE_URL', None)
+    from src.main import app
+    from src.models.user import db
+    from src.models.content import Content, ContentSentiment
+    from src.models.trend_management import SourceState, TrendMetrics
+    from src.services import source_monitor
+    from src.services.write_queue import write_queue
+    from benchmarks.datagen import generate
+
+    stand_in = StandIn()
+    app.config.update(MONITOR_HOST_RATE=args.host_rate, MONITOR_BATCH=100_000, MONITOR_WORKERS=8,
+                      MONITOR_INTERVAL=43200, MONITOR_MIN_INTERVAL=900, MONITOR_TIMEOUT=5)
+    client = app.test_client()
+
+    with app.app_context():
+        generate(contents=args.contents, seed=args.seed)
+        db.session.commit()
+        trends = db.session.execute(db.select(Content.id, Content.priority_score)
+                                    .where(Content.content_type == 'trend')).all()
+        scores = dict(trends)
+        failing = set(list(scores)[::10])
+        for content_id in scores:
+            urls = []
+            for j, validator in enumerate(VALIDATORS):
+                path = f'/t{content_id}/{j}'
+                stand_in.pages[path] = {'version': 0, 'validator': validator, 'status': 200}
+                urls.append(stand_in.url(HOSTS[(content_id + j) % len(HOSTS)], path))
+            if content_id in failing:
+                stand_in.pages[f'/t{content_id}/broken'] = {'version': 0, 'validator': 'none', 'status': 500}
+                urls.append(stand_in.url(HOSTS[0], f'/t{content_id}/broken'))
+            db.session.execute(db.update(Content).where(Content.id == content_id)
+                               .values(external_source_urls=json.dumps(urls)))
+        db.session.commit()
+        source_monitor.schedule.invalidate()
+
+        # 1) Erster Zyklus: alle Trends, alle Quellen neu
+        t0 = datetime(2026, 1, 1)
+        start = time.perf_counter()
+        first = source_monitor.run_cycle(now=t0)
+        elapsed = time.perf_counter() - start
+        check('first cycle checks every trend', first['trends'] == len(scores), str(first))
+        check('all working sources new, broken ones failed',
+              first['new'] == 3 * len(scores) and first['error'] == len(failing))
+        print(f'     {first["sources"]} sources in {elapsed:.2f} s ({first["sources"] / elapsed:.0f} sources/s, '
+              f'{len(HOSTS)} hosts at {args.host_rate:g}/s each)')
+        monitored = db.session.execute(db.select(db.func.count()).where(Content.last_monitored_at == t0)).scalar()
+        check('last_monitored_at set', monitored == len(scores), f'{monitored}/{len(scores)}')
+
+        # 2) Mindestabstand je Host und Wiederverwendung der Verbindungen
+        # Ankunftszeiten schwanken: höchstens WINDOW + 2 Anfragen in jedem Fenster von WINDOW Abständen
+        window, interval, busiest = 20, 1.0 / args.host_rate, 0
+        for host in HOSTS:
+            times = sorted(at for h, _, at, _, _ in stand_in.log if h == host)
+            end = 0
+            for begin, at in enumerate(times):
+                while end < len(times) and times[end] < at + window * interval:
+                    end += 1
+                busiest = max(busiest, end - begin)
+        connections = {(h, port) for h, _, _, _, port in stand_in.log}
+        check('per-host rate limit respected', busiest <= window + 2,
+              f'at most {busiest} requests per {window * interval * 1000:.0f} ms and host, limit {window}')
+        check('connections pooled', len(connections) <= len(HOSTS) * 8,
+              f'{len(stand_in.log)} requests over {len(connections)} connections')
+
+        # 3) Geänderte Seiten: 304 für unveränderte mit Validatoren, Hash für Seiten ohne
+        changed = {path for i, path in enumerate(sorted(stand_in.pages)) if i % 5 == 0 and not path.endswith('broken')}
+        for path in changed:
+            stand_in.pages[path]['version'] += 1
+        stand_in.log.clear()
+        t1 = t0 + timedelta(days=1)
+        second = source_monitor.run_cycle(now=t1)
+        unchanged_with_validator = sum(1 for path, page in stand_in.pages.items()
+                                       if path not in changed and page['validator'] != 'none' and page['status'] == 200)
+        conditional = sum(1 for _, _, _, status, _ in stand_in.log if status == 304)
+        check('unchanged pages with validators answered 304',
+              second['not_modified'] == unchanged_with_validator == conditional,
+              f'{second["not_modified"]} not_modified, {conditional} 304 responses')
+        check('changed pages detected', second['changed'] == len(changed), f'{second["changed"]}/{len(changed)}')
+        check('unchanged pages without validators detected via text hash',
+              second['unchanged'] == len(scores) - sum(1 for p in changed if p.endswith('/2')))
+        metric_sum = db.session.execute(db.select(db.func.sum(TrendMetrics.value))
+                                        .where(TrendMetrics.metric_type == 'source_changes')).scalar()
+        check('source_changes metrics match', metric_sum == len(changed), f'{metric_sum}')
+        errors = db.session.execute(db.select(db.func.max(SourceState.error_count))
+                                    .where(SourceState.url.like('%broken'))).scalar()
+        check('consecutive errors counted', errors == 2, f'error_count {errors}')
+
+        # 4) Sentiment der Quellen
+        scored = db.session.execute(db.select(db.func.count()).select_from(ContentSentiment)
+                                    .where(ContentSentiment.source_count > 0)).scalar()
+        check('source sentiment stored', scored == len(scores), f'{scored}/{len(scores)}')
+
+        # 5) Planung über 48 simulierte Stunden: hohe Scores öfter
+        checks = dict.fromkeys(scores, 0)
+        for hour in range(1, 49):
+            now = t1 + timedelta(hours=hour)
+            taken = source_monitor.schedule.take(now, 100_000)
+            for content_id in taken:
+                checks[content_id] += 1
+            # ohne Abruf neu einplanen: die Planung allein ist Gegenstand dieser Prüfung
+            for content_id in taken:
+                source_monitor.schedule.reschedule(content_id, source_monitor.due_at(
+                    now, scores[content_id], 43200, 900))
+        ranked = sorted(scores, key=lambda cid: scores[cid] or 0)
+        fifth = max(1, len(ranked) // 5)
+        low = sum(checks[cid] for cid in ranked[:fifth]) / fifth
+        high = sum(checks[cid] for cid in ranked[-fifth:]) / fifth
+        check('hot trends checked more often', high > 1.5 * low,
+              f'top fifth {high:.1f} checks / 48 h, bottom fifth {low:.1f}')
+
+        # 6) Routen
+        content_id = next(iter(scores))
+        sources = client.get(f'/api/api/contents/{content_id}/sources').get_json()
+        check('GET sources', len(sources['sources']) >= 3 and sources['sources'][0]['check_count'] == 2)
+        response = client.post(f'/api/api/contents/{content_id}/sources/check')
+        check('POST sources/check', response.status_code == 200 and response.get_json()['trends'] == 1,
+              str(response.get_json()))
+        response = client.post('/api/api/trends/bulk/monitor', json={'limit': 5})
+        check('POST bulk/monitor', response.status_code == 200, str(response.get_json()))
+        response = client.put(f'/api/contents/{content_id}', json={'external_source_urls': ['ftp://x']})
+        check('invalid source URL rejected', response.status_code == 400)
+        write_queue.stop()
+
+    stand_in.server.shutdown()
+    sys.exit(1 if check.failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""Prüft den PostgreSQL-Modus gegen eine lokale Wegwerf-Instanz.
+
+Nutzt ``--database-url`` bzw. ``TEST_DATABASE_URL`` oder startet, falls das
+Paket ``pgserver`` installiert ist (``pip install pgserver``), eine temporäre
+PostgreSQL-Instanz. Geprüft werden paralleler Start mehrerer Instanzen
+(Schema-Lock), Migrationen, Pool-Optionen, der serverseitige
+Statement-Timeout, ``CREATE INDEX CONCURRENTLY`` unter Schreiblast und ein
+Durchlauf der wichtigsten Routen. Aufruf (aus ``backend/``)::
+
+    python -m benchmarks.check_postgres
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def _start_stand_in():
+    try:
+        import pgserver
+    except ImportError:
+        sys.exit('No database given: set TEST_DATABASE_URL or pip install pgserver')
+    server = pgserver.get_server(tempfile.mkdtemp(prefix='pg_stand_in_'), cleanup_mode='stop')
+    return server.get_uri().replace('postgresql://', 'postgresql+psycopg2://', 1)
+
+
+def check(label, condition, detail=''):
+    print(f'[{"ok" if condition else "FAIL"}] {label}{f" – {detail}" if detail else ""}')
+    if not condition:
+        check.failed = True
+
+
+check.failed = False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database-url', default=os.getenv('TEST_DATABASE_URL'))
+    parser.add_argument('--instances', type=int, default=3)
+    args = parser.parse_args()
+
+    db_url = args.database_url or _start_stand_in()
+    env = dict(os.environ, DATABASE_URL=db_url, DB_STATEMENT_TIMEOUT_MS='1000')
+
+    # 1) Mehrere Instanzen starten gleichzeitig gegen die leere Datenbank
+    procs = [subprocess.Popen([sys.executable, '-c', 'from src.main import app'], cwd=BACKEND_DIR, env=env,
+                              stderr=subprocess.PIPE) for _ in range(args.instances)]
+    errors = [p.communicate()[1].decode() for p in procs if p.wait() != 0]
+    check(f'{args.instances} parallel starts', not errors, errors[0].strip().splitlines()[-1] if errors else '')
+
+    os.environ.update(DATABASE_URL=db_url, DB_STATEMENT_TIMEOUT_MS='1000')
+    from src.main import app
+    from src.models.user import db
+    from src.migrations import MIGRATIONS, create_index, pending
+    from src.models.trend_management import TrendPhase
+
+    with app.app_context():
+        engine = db.engine
+        # 2) Migrationen & Seeding genau einmal
+        check('all migrations applied', not pending(engine), ', '.join(m.id for m in MIGRATIONS))
+        check('default phases seeded once', TrendPhase.query.count() == 5, str(TrendPhase.query.count()))
+        indexes = set(db.session.execute(db.text('SELECT indexname FROM pg_indexes')).scalars())
+        check('migration indexes exist', 'ix_trend_score_content_type' in indexes)
+
+        # 3) Pool & serverseitige Timeouts
+        check('pool_pre_ping enabled', engine.pool._pre_ping)
+        check('pool size', engine.pool.size() == int(os.getenv('DB_POOL_SIZE', 5)), str(engine.pool.size()))
+        timeout = db.session.execute(db.text('SHOW statement_timeout')).scalar()
+        check('statement_timeout set per connection', timeout == '1s', timeout)
+        try:
+            db.session.execute(db.text('SELECT pg_sleep(2)'))
+            check('long statement cancelled', False)
+        except Exception as e:
+            db.session.rollback()
+            check('long statement cancelled', 'statement timeout' in str(e), type(e).__name__)
+
+        # 4) CREATE INDEX CONCURRENTLY blockiert parallele Inserts nicht
+        db.session.execute(db.text('SET LOCAL statement_timeout = 0'))
+        db.session.execute(db.text('CREATE TABLE IF NOT EXISTS bench_ci (id serial primary key, v text)'))
+        db.session.execute(db.text("INSERT INTO bench_ci (v) SELECT md5(g::text) FROM generate_series(1, 300000) g"))
+        db.session.commit()
+        stop = threading.Event()
+        inserted = []
+
+        def writer():
+            with engine.connect() as connection:
+                while not stop.is_set():
+                    connection.execute(db.text("INSERT INTO bench_ci (v) VALUES ('x')"))
+                    connection.commit()
+                    inserted.append(time.monotonic())
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        start = time.monotonic()
+        with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+            connection.execute(db.text('SET statement_timeout = 0'))
+            create_index(connection, 'ix_bench_ci_v', 'bench_ci', ['v'])
+        end = time.monotonic()
+        stop.set()
+        thread.join()
+        during = sum(1 for t in inserted if start <= t <= end)
+        check('inserts continue during concurrent index build', during > 0,
+              f'{during} inserts in {end - start:.2f} s')
+        db.session.execute(db.text('DROP TABLE bench_ci'))
+        db.session.commit()
+
+    # 5) Routen-Durchlauf
+    client = app.test_client()
+    user = client.post('/api/users', json={'username': 'pg', 'email': 'pg@example.com'}).get_json()
+    content = client.post('/api/contents', json={'title': 'Smart Building Analytics', 'content_type': 'trend',
+                                                 'created_by': user['id'], 'status': 'approved'})
+    check('create content', content.status_code == 201, str(content.status_code))
+    content_id = content.get_json()['id']
+    score = client.post(f'/api/api/contents/{content_id}/scores', json={'score_type': 'impact', 'value': 4})
+    check('create score', score.status_code == 201, str(score.status_code))
+    search = client.get('/api/api/trends/search?q=Smart')
+    check('search trends', search.status_code == 200 and search.get_json()['total'] >= 1)
+    stats = client.get('/api/stats')
+    check('stats', stats.status_code == 200)
+
+    sys.exit(1 if check.failed else 0)
+
+
+if __name__ == '__main__':
+    main()
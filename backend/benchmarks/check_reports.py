@@ -0,0 +1,127 @@
+"""Prüft die Leases der Report-Aufträge.
+
+Verzögert die Erzeugung künstlich (``REPORT_BATCH`` Zeilen je Pause) und
+fordert denselben Report während der Erzeugung erneut an:
+
+- Heartbeat läuft: der Auftrag bleibt trotz Laufzeit > ``REPORT_LEASE`` beim
+  ersten Renderer, es gibt genau einen Lauf;
+- Heartbeat hängt: nach Ablauf des Leases wird neu eingereiht, der zweite
+  Renderer schließt ab, der erste bricht beim nächsten Heartbeat ab;
+- Auftrag ging verloren (Prozess-Neustart vor dem Start): nach Ablauf des
+  Warte-Leases wird neu eingereiht und erzeugt.
+
+Aufruf (aus ``backend/``)::
+
+    python -m benchmarks.check_reports
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def check(label, condition, detail=''):
+    print(f'[{"ok" if condition else "FAIL"}] {label}{f" – {detail}" if detail else ""}')
+    if not condition:
+        check.failed = True
+
+
+check.failed = False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--contents', type=int, default=300)
+    parser.add_argument('--delay', type=float, default=0.5, help='Pause je Batch in Sekunden')
+    args = parser.parse_args()
+
+    os.environ['DATA_DIR'] = tempfile.mkdtemp(prefix='check_reports_')
+    os.environ.pop('DATABASE_URL', None)
+    from src.main import app
+    from src.services import reports
+    from src.services.write_queue import write_queue
+    from benchmarks.datagen import generate
+
+    with app.app_context():
+        generate(contents=args.contents, seed=42)
+    app.config.update(REPORT_WORKERS=2, REPORT_BATCH=25, REPORT_LEASE=1, REPORT_HEARTBEAT=0.2)
+    client = app.test_client()
+
+    state = {'hung': False, 'drop': False, 'runs': []}
+    rows, renew, render = reports._rows, reports._renew, reports.render
+
+    def slow_rows(session, filters, batch_size):
+        for i, row in enumerate(rows(session, filters, batch_size)):
+            if i % batch_size == 0:
+                time.sleep(args.delay)
+            yield row
+
+    def hanging_renew(session, report_id, started_at):
+        return True if state['hung'] else renew(session, report_id, started_at)
+
+    def counting_render(report_id):
+        if state['drop']:
+            return None
+        result = render(report_id)
+        state['runs'].append(result)
+        return result
+
+    reports._rows, reports._renew, reports.render = slow_rows, hanging_renew, counting_render
+
+    def request(title):
+        return client.post('/api/api/reports', json={'format': 'xlsx', 'title': title}).get_json()
+
+    def job(report_id):
+        return client.get(f'/api/api/reports/{report_id}').get_json()
+
+    # --- Heartbeat läuft ---
+    first = request('lease-alive')
+    time.sleep(2.5)
+    again = request('lease-alive')
+    check('Heartbeat: nicht neu eingereiht', again['id'] == first['id'] and again['status'] == 'running'
+          and again['started_at'] == job(first['id'])['started_at'], again['status'])
+    reports.worker.join()
+    runs = [run for run in state['runs'] if run]
+    check('Heartbeat: ein Lauf, fertig', len(runs) == 1 and job(first['id'])['status'] == 'done',
+          f'{len(runs)} Läufe')
+
+    # --- Heartbeat hängt ---
+    state['runs'].clear()
+    state['hung'] = True
+    first = request('lease-hung')
+    time.sleep(2.5)
+    again = request('lease-hung')
+    check('hängender Heartbeat: neu eingereiht', again['id'] == first['id'] and again['status'] == 'queued',
+          again['status'])
+    state['hung'] = False
+    reports.worker.join()
+    aborted = [run for run in state['runs'] if run is None]
+    check('hängender Heartbeat: alter Lauf abgebrochen, neuer fertig',
+          len(aborted) == 1 and len(state['runs']) == 2 and job(first['id'])['status'] == 'done'
+          and client.get(f'/api/api/reports/{first["id"]}/download').status_code == 200,
+          f'{len(state["runs"])} Läufe, {len(aborted)} abgebrochen')
+
+    # --- Auftrag verloren ---
+    state['runs'].clear()
+    app.config['REPORT_JOB_TIMEOUT'] = 1
+    state['drop'] = True
+    first = request('lease-lost')
+    reports.worker.join()
+    check('verlorener Auftrag: wartet noch', request('lease-lost')['status'] == 'queued')
+    state['drop'] = False
+    time.sleep(1.5)
+    request('lease-lost')
+    reports.worker.join()
+    check('verlorener Auftrag: nach Ablauf erzeugt', job(first['id'])['status'] == 'done'
+          and len(state['runs']) == 1)
+
+    reports.worker.stop()
+    write_queue.stop()
+    raise SystemExit(1 if check.failed else 0)
+
+
+if __name__ == '__main__':
+    main()
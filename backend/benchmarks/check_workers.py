@@ -0,0 +1,198 @@
+"""Prüft die prozesslokalen Strukturen mit mehreren Worker-Prozessen.
+
+Schreibt abwechselnd in diesem Prozess (wie ein Request im selben Worker)
+und in einem zweiten, per ``spawn`` gestarteten Prozess (wie ein anderer
+gunicorn-Worker) und liest danach hier. Eigene Schreibzugriffe müssen ohne
+Neuaufbau sichtbar sein, fremde sofort beim nächsten Zugriff (Vergleich mit
+``data_version``, src/services/counters.py); geprüft werden Ranglisten,
+Tag-Index, Duplikat-Index und das Similarity-Modell. Neuaufbauten zählt
+``rei_cache_requests_total{result="miss"}``. Aufruf (aus ``backend/``)::
+
+    python -m benchmarks.check_workers --contents 300
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def check(label, condition, detail=''):
+    print(f'[{"ok" if condition else "FAIL"}] {label}{f" – {detail}" if detail else ""}')
+    if not condition:
+        check.failed = True
+
+
+check.failed = False
+
+
+# ============================================================
+# Schreibzugriffe (hier oder im zweiten Prozess)
+# ============================================================
+def set_priority(content_id, score):
+    from src.models.user import db
+    from src.models.content import Content
+
+    db.session.get(Content, content_id).priority_score = score
+    db.session.commit()
+
+
+def add_tag(content_id, tag_id):
+    from src.models.user import db
+    from src.models.content import Content
+    from src.models.trend_management import TrendTag
+
+    content = db.session.get(Content, content_id)
+    content.trend_tags.append(db.session.get(TrendTag, tag_id))
+    db.session.commit()
+
+
+def set_text(content_id, text):
+    from src.models.user import db
+    from src.models.content import Content, ContentSignature
+    from src.services.duplicates import content_signature
+
+    content = db.session.get(Content, content_id)
+    content.title = content.short_description = content.long_description = text
+    if content.minhash is None:
+        content.minhash = ContentSignature()
+    content.minhash.signature = content_signature(content).tobytes()
+    db.session.commit()
+
+
+def set_text_similar(content_id, text):
+    from src.services.similarity import similarity_service
+
+    set_text(content_id, text)
+    similarity_service.update_content(content_id)
+
+
+def _child(data_dir, name, args):
+    os.environ['DATA_DIR'] = data_dir
+    from src.main import app
+
+    with app.app_context():
+        globals()[name](*args)
+
+
+def foreign(name, *args):
+    """Führt ``name(*args)`` in einem anderen Prozess auf derselben Datenbank aus."""
+    process = multiprocessing.get_context('spawn').Process(target=_child, args=(os.environ['DATA_DIR'], name, args))
+    process.start()
+    process.join()
+    if process.exitcode != 0:
+        raise SystemExit(f'{name} im zweiten Prozess fehlgeschlagen')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--contents', type=int, default=300)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    os.environ['DATA_DIR'] = tempfile.mkdtemp(prefix='check_workers_')
+    os.environ.pop('DATABASE_URL', None)
+    from src.main import app
+    from src.models.user import db
+    from src.models.content import Content
+    from src.monitoring import metrics
+    from src.services.write_queue import write_queue
+    from benchmarks.datagen import generate
+
+    def misses(cache):
+        return metrics.snapshot().get(('rei_cache_requests_total', (('cache', cache), ('result', 'miss'))), 0)
+
+    client = app.test_client()
+    with app.app_context():
+        generate(contents=args.contents, seed=args.seed)
+        trends = db.session.execute(db.select(Content.id).where(Content.content_type == 'trend')
+                                    .order_by(Content.priority_score, Content.id)).scalars().all()
+
+    # --- Ranglisten ---
+    def leader():
+        return client.get('/api/api/trends/leaderboard?limit=1').get_json()['entries'][0]['content_id']
+
+    leader()
+    before = misses('leaderboards')
+    with app.app_context():
+        set_priority(trends[0], 1000.0)
+    check('Rangliste: eigener Schreibzugriff', leader() == trends[0] and misses('leaderboards') == before)
+    foreign('set_priority', trends[1], 2000.0)
+    check('Rangliste: fremder Schreibzugriff', leader() == trends[1] and misses('leaderboards') == before + 1)
+    check('Rangliste: danach ohne Neuaufbau', leader() == trends[1] and misses('leaderboards') == before + 1)
+
+    # --- Tag-Index ---
+    tag_id = client.post('/api/api/trend-tags', json={'name': 'worker-check'}).get_json()['id']
+
+    def tagged():
+        return client.get('/api/api/trends/search?tags=worker-check').get_json()['total']
+
+    tagged()
+    before = misses('tag_index')
+    client.post(f'/api/api/contents/{trends[2]}/tags', json={'tag_id': tag_id})
+    check('Tag-Index: eigener Schreibzugriff', tagged() == 1 and misses('tag_index') == before)
+    foreign('add_tag', trends[3], tag_id)
+    check('Tag-Index: fremder Schreibzugriff', tagged() == 2 and misses('tag_index') == before + 1)
+    app.config['TAG_INDEX_MAX_LITERAL_IDS'] = 0
+    check('Tag-Index: SQL statt ID-Liste', tagged() == 2)
+    app.config.pop('TAG_INDEX_MAX_LITERAL_IDS')
+
+    # --- Duplikat-Index ---
+    text = 'Serielle Sanierung mit vorgefertigten Fassadenelementen und Wärmepumpen im Bestand'
+
+    def duplicates(title):
+        response = client.post('/api/content/duplicates', json={'title': title, 'summary': title,
+                                                                'long_description': title})
+        return {row['content_id'] for row in response.get_json()['duplicate_candidates']}
+
+    duplicates(text)
+    before = misses('duplicate_index')
+    created = client.post('/api/contents', json={'title': text, 'short_description': text, 'long_description': text,
+                                                 'content_type': 'trend', 'created_by': 1}).get_json()['id']
+    check('Duplikat-Index: eigener Schreibzugriff',
+          duplicates(text) == {created} and misses('duplicate_index') == before)
+    edited = f'{text} Quartier'
+    foreign('set_text', trends[4], edited)
+    found = duplicates(edited)
+    check('Duplikat-Index: fremde Textänderung', trends[4] in found and misses('duplicate_index') == before + 1,
+          str(sorted(found)))
+    duplicates(edited)
+    check('Duplikat-Index: danach ohne Neuaufbau', misses('duplicate_index') == before + 1)
+    client.delete(f'/api/contents/{created}')
+    found = duplicates(text)
+    check('Duplikat-Index: eigene Löschung', created not in found and misses('duplicate_index') == before + 1,
+          str(sorted(found)))
+
+    # --- Similarity-Modell ---
+    # Seltene Wörter, die vor dem Rebuild ins Vokabular kommen (neue Wörter zählen erst danach)
+    text = 'Dachaufstockung Holzhybrid Quartiersspeicher Kreislaufbeton'
+
+    def similar(content_id):
+        return [row['content_id'] for row in client.get(f'/api/contents/{content_id}/similar').get_json()]
+
+    def put_text(content_id):
+        client.put(f'/api/contents/{content_id}',
+                   json={'title': text, 'short_description': text, 'long_description': text})
+
+    put_text(trends[8])
+    client.post('/api/api/trends/bulk/recompute-similarities')
+    before = misses('similarity_matrix')
+    put_text(trends[5])
+    check('Similarity: eigene Änderung', similar(trends[5])[:1] == [trends[8]]
+          and misses('similarity_matrix') == before, str(similar(trends[5])[:3]))
+    foreign('set_text_similar', trends[6], text)
+    check('Similarity: fremde Änderung in der Tabelle', trends[6] in similar(trends[8])[:3],
+          str(similar(trends[8])[:3]))
+    put_text(trends[7])
+    found = similar(trends[7])[:3]
+    check('Similarity: danach neu geladen', set(found) == {trends[5], trends[6], trends[8]}
+          and misses('similarity_matrix') == before + 1, str(found))
+
+    write_queue.stop()
+    raise SystemExit(1 if check.failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,293 @@
+"""Deterministischer Generator für synthetische Real-Estate-Trenddaten.
+
+Füllt das komplette Schema in konfigurierbarer Größe: Users, Contents aller
+drei Typen, Ratings, Kommentare, Trend-Scores samt Score-Historie, Tags, Korrelationen, Alerts,
+Historie, Metriken und Opportunity Spaces. Gleicher ``seed`` und gleiche
+Größe ergeben exakt dieselben Zeilen (auch die Zeitstempel, relativ zu einem
+festen ``ANCHOR``), sodass Benchmark-Ergebnisse zwischen Releases vergleichbar
+sind. Geschrieben wird per Core-Bulk-Insert in Blöcken; 100k Contents (rund
+1,7 Mio. Zeilen) dauern auf SQLite etwa eine halbe Minute.
+
+In einem App-Kontext::
+
+    from benchmarks.datagen import generate
+    counts = generate(contents=10_000)
+
+oder direkt in eine Datenbank (aus ``backend/``)::
+
+    DATA_DIR=/tmp/bench python -m benchmarks.datagen --contents 10000
+"""
+import argparse
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ANCHOR = datetime(2025, 6, 30)
+CHUNK = 5000
+
+CONTENT_TYPES = (('trend', 0.4), ('technology', 0.35), ('inspiration', 0.25))
+STATUSES = (('approved', 0.7), ('draft', 0.25), ('rejected', 0.05))
+INDUSTRIES = ('Residential', 'Office', 'Retail', 'Logistics', 'Hospitality', 'Healthcare',
+              'Construction', 'Facility Management', 'Finance', 'Public Sector')
+TIME_HORIZONS = ('short', 'medium', 'long')
+SCORE_WEIGHTS = {'relevance': 0.25, 'impact': 0.30, 'urgency': 0.20, 'feasibility': 0.15, 'risk': 0.10}
+CRITERIA = (None, 'relevance', 'feasibility', 'impact')
+METRIC_TYPES = ('engagement', 'mentions', 'sentiment')
+HISTORY_TYPES = ('phase_change', 'score_update', 'status_change')
+ALERT_TYPES = ('score_change', 'phase_change', 'new_content')
+
+_TOPICS = (
+    'smart building', 'digital twin', 'proptech platform', 'energy retrofit', 'esg reporting',
+    'co-living', 'flexible office', 'last mile logistics', 'modular construction', 'timber construction',
+    'predictive maintenance', 'tenant experience app', 'building automation', 'heat pump', 'solar roof',
+    'bim workflow', 'tokenized real estate', 'ai valuation', 'occupancy sensing', 'indoor air quality',
+    'circular economy', 'urban mobility hub', 'senior living', 'student housing', 'data center',
+    'micro apartment', 'green lease', 'carbon accounting', 'smart metering', 'access control',
+    'drone inspection', 'construction robotics', '3d printed housing', 'mixed use district', 'vertical farming',
+)
+_QUALIFIERS = ('emerging', 'scalable', 'cloud-based', 'regional', 'european', 'low-carbon', 'ai-driven',
+               'tenant-centric', 'hybrid', 'automated', 'open', 'integrated', 'sustainable', 'modular')
+_WORDS = (
+    'portfolio', 'asset', 'investor', 'tenant', 'landlord', 'operator', 'developer', 'city', 'district',
+    'energy', 'emission', 'sensor', 'data', 'platform', 'market', 'demand', 'vacancy', 'rent', 'yield',
+    'regulation', 'subsidy', 'pilot', 'rollout', 'adoption', 'cost', 'efficiency', 'risk', 'financing',
+    'maintenance', 'renovation', 'occupancy', 'workspace', 'housing', 'logistics', 'retail', 'mobility',
+    'analytics', 'automation', 'integration', 'standard', 'interface', 'benchmark', 'certification',
+    'Mieter', 'Bestand', 'Quartier', 'Nachhaltigkeit', 'Sanierung', 'Gebäude', 'Betrieb', 'Förderung',
+)
+_TAG_NAMES = (
+    'ESG', 'PropTech', 'ConTech', 'SmartBuilding', 'IoT', 'AI', 'BIM', 'DigitalTwin', 'Energy', 'Retrofit',
+    'Decarbonization', 'Mobility', 'Logistics', 'Office', 'Residential', 'Retail', 'Hospitality', 'Healthcare',
+    'Finance', 'Blockchain', 'Circularity', 'Modular', 'Timber', 'Robotics', 'Sensors', 'Cybersecurity',
+    'Regulation', 'Tenant', 'Workplace', 'Urbanization', 'Demographics', 'DataCenter', 'Solar', 'HeatPump',
+    'WaterManagement', 'AirQuality', 'Analytics', 'Automation', 'Platform', 'Marketplace',
+)
+
+
+def scale_config(contents):
+    """Anzahl der Zeilen je Tabelle für ``contents`` Contents."""
+    return {
+        'users': max(20, contents // 20),
+        'tags': max(len(_TAG_NAMES), min(1000, contents // 50)),
+        'contents': contents,
+        'correlations': max(10, contents // 10),
+        'alerts': max(10, contents // 50),
+        'opportunity_spaces': max(5, contents // 100),
+        'metric_periods': 4,
+    }
+
+
+def _pick(rnd, weighted):
+    values, weights = zip(*weighted)
+    return rnd.choices(values, weights)[0]
+
+
+def _sentence(rnd, words):
+    return ' '.join(rnd.choices(_WORDS, k=words)).capitalize() + '.'
+
+
+def _insert(session, table, rows):
+    from src.models.user import db
+
+    # Core-Insert auf die Tabelle (executemany) statt ORM-Bulk-Pfad
+    table = getattr(table, '__table__', table)
+    for start in range(0, len(rows), CHUNK):
+        session.execute(db.insert(table), rows[start:start + CHUNK])
+
+
+def generate(contents=1000, seed=42, session=None):
+    """Füllt die Datenbank im aktuellen App-Kontext; gibt die Zeilenzahlen je Tabelle zurück.
+
+    Erwartet ein Schema ohne Contents (die Default-Phasen dürfen existieren).
+    """
+    from src.models.user import db, User
+    from src.models.content import Content, Rating, Comment, OpportunitySpace
+    from src.models.associations import content_trend_tags
+    from src.services.bursts import replay as replay_bursts
+    from src.services.consensus import rebuild as rebuild_consensus
+    from src.services.sentiment import enqueue_all as enqueue_sentiment
+    from src.services.counters import reconcile
+    from src.services.leaderboards import leaderboards
+    from src.models.trend_management import (
+        TrendPhase, TrendScore, TrendAlert, TrendCorrelation, TrendHistory, TrendMetrics, TrendTag,
+        ScoreType, TrendScoreSeries
+    )
+    from src.services.score_history import encode_series, to_epoch
+
+    session = session or db.session
+    rnd = random.Random(seed)
+    cfg = scale_config(contents)
+    phase_ids = [pid for pid, in session.query(TrendPhase.id).order_by(TrendPhase.order)]
+    counts = {}
+
+    def when(max_days):
+        return ANCHOR - timedelta(seconds=rnd.randrange(max_days * 86400))
+
+    # --- Users & Tags ---
+    users = [{'id': i, 'username': f'user{i:06d}', 'email': f'user{i:06d}@example.com'}
+             for i in range(1, cfg['users'] + 1)]
+    _insert(session, User, users)
+    tags = []
+    for i in range(1, cfg['tags'] + 1):
+        base = _TAG_NAMES[(i - 1) % len(_TAG_NAMES)]
+        name = base if i <= len(_TAG_NAMES) else f'{base}{(i - 1) // len(_TAG_NAMES)}'
+        tags.append({'id': i, 'name': name, 'description': f'{name} related trends',
+                     'color': f'#{rnd.randrange(0x1000000):06X}', 'created_at': when(720)})
+    _insert(session, TrendTag, tags)
+    counts.update(users=len(users), trend_tags=len(tags))
+
+    # --- Contents mit abhängigen Zeilen ---
+    user_ids = range(1, cfg['users'] + 1)
+    tag_weights = [1 / rank for rank in range(1, cfg['tags'] + 1)]  # Zipf-artig
+    content_rows, tag_links, ratings, comments, scores, history, metrics = [], [], [], [], [], [], []
+    trend_ids = []
+    for cid in range(1, contents + 1):
+        ctype = _pick(rnd, CONTENT_TYPES)
+        topic = rnd.choice(_TOPICS)
+        created_at = when(730)
+        row = {
+            'id': cid,
+            'title': f'{rnd.choice(_QUALIFIERS).capitalize()} {topic} {cid}',
+            'short_description': f'{topic.capitalize()}: {_sentence(rnd, 12)}',
+            'long_description': ' '.join(_sentence(rnd, rnd.randint(8, 20)) for _ in range(rnd.randint(2, 6))),
+            'content_type': ctype,
+            'image_url': f'https://images.example.com/{cid}.jpg' if rnd.random() < 0.3 else None,
+            'created_at': created_at,
+            'created_by': rnd.choice(user_ids),
+            'industry': rnd.choice(INDUSTRIES),
+            'time_horizon': rnd.choice(TIME_HORIZONS),
+            'status': _pick(rnd, STATUSES),
+            'trend_phase_id': None,
+            'priority_score': 0.0,
+            'last_monitored_at': None,
+            'external_source_urls': None,
+            'sentiment_score': round(rnd.uniform(-1, 1), 3) if rnd.random() < 0.5 else None,
+            'confidence_level': round(rnd.uniform(0.2, 1.0), 3),
+        }
+        content_rows.append(row)
+
+        for tag_id in dict.fromkeys(rnd.choices(range(1, cfg['tags'] + 1), tag_weights, k=rnd.randint(1, 5))):
+            tag_links.append({'content_id': cid, 'trend_tag_id': tag_id})
+
+        for user_id, criteria in dict.fromkeys((rnd.choice(user_ids), rnd.choice(CRITERIA))
+                                                for _ in range(rnd.randint(0, 6))):
+            ratings.append({'content_id': cid, 'user_id': user_id, 'value': rnd.randint(1, 5),
+                            'criteria': criteria, 'created_at': created_at + timedelta(hours=rnd.randint(1, 2000))})
+        for _ in range(rnd.randint(0, 4)):
+            comments.append({'content_id': cid, 'user_id': rnd.choice(user_ids), 'text': _sentence(rnd, 15),
+                             'created_at': created_at + timedelta(hours=rnd.randint(1, 2000))})
+
+        score_types = list(SCORE_WEIGHTS) if ctype == 'trend' else rnd.sample(list(SCORE_WEIGHTS), rnd.randint(0, 2))
+        total = weight = 0.0
+        for score_type in score_types:
+            value = round(rnd.uniform(0, 5), 2)
+            automatic = rnd.random() < 0.3
+            scores.append({'content_id': cid, 'score_type': score_type, 'value': value,
+                           'calculated_at': created_at + timedelta(days=rnd.randint(0, 60)),
+                           'calculated_by': None if automatic else rnd.choice(user_ids), 'is_automatic': automatic})
+            total += value * SCORE_WEIGHTS[score_type]
+            weight += SCORE_WEIGHTS[score_type]
+        # wie Content.calculate_priority_score (ein Wert je Score-Typ: alle Konsens-Modi = Mittelwert)
+        row['priority_score'] = total / weight if weight else 0.0
+
+        if ctype == 'trend':
+            trend_ids.append(cid)
+            if phase_ids:
+                row['trend_phase_id'] = rnd.choice(phase_ids)
+            row['last_monitored_at'] = ANCHOR - timedelta(days=rnd.randint(0, 30))
+            for _ in range(rnd.randint(1, 3)):
+                history.append({'content_id': cid, 'phase_id': row['trend_phase_id'],
+                                'changed_at': created_at + timedelta(days=rnd.randint(0, 300)),
+                                'changed_by': rnd.choice(user_ids), 'change_type': rnd.choice(HISTORY_TYPES),
+                                'old_value': rnd.choice(_QUALIFIERS), 'new_value': rnd.choice(_QUALIFIERS),
+                                'notes': _sentence(rnd, 6)})
+            for metric_type in METRIC_TYPES:
+                for period in range(cfg['metric_periods']):
+                    start = ANCHOR - timedelta(days=30 * (period + 1))
+                    metrics.append({'content_id': cid, 'metric_type': metric_type,
+                                    'value': round(rnd.uniform(-1, 1) if metric_type == 'sentiment'
+                                                   else rnd.expovariate(1 / 50), 3),
+                                    'period_start': start, 'period_end': start + timedelta(days=30),
+                                    'calculated_at': start + timedelta(days=31)})
+
+    _insert(session, Content, content_rows)
+    _insert(session, content_trend_tags, tag_links)
+    _insert(session, Rating, ratings)
+    _insert(session, Comment, comments)
+    _insert(session, TrendScore, scores)
+    consensus_rows = rebuild_consensus(session.connection())
+    _insert(session, TrendHistory, history)
+    _insert(session, TrendMetrics, metrics)
+    replay_bursts(session.connection())
+    enqueue_sentiment(session.connection())
+    counts.update(contents=len(content_rows), content_trend_tags=len(tag_links), ratings=len(ratings),
+                  comments=len(comments), trend_scores=len(scores), trend_score_consensus=consensus_rows,
+                  trend_history=len(history), trend_metrics=len(metrics))
+
+    # --- Score-Historie ---
+    # eigener Generator, damit die übrigen Tabellen für denselben Seed unverändert bleiben
+    series_rnd = random.Random(seed + 1)
+    type_ids = {name: i for i, name in enumerate(SCORE_WEIGHTS, 1)}
+    series = []
+    for score in scores:
+        # Zufallspfad rückwärts ab dem aktuellen Wert, im Tagesabstand bis zur Berechnung
+        value, at = score['value'], to_epoch(score['calculated_at'])
+        points = []
+        for _ in range(series_rnd.randint(4, 40)):
+            points.append((at, value))
+            value = round(min(5.0, max(0.0, value + series_rnd.gauss(0, 0.2))), 2)
+            at -= series_rnd.randint(3600, 3 * 86400)
+        for chunk in encode_series(points[::-1]):
+            series.append({'content_id': score['content_id'], 'score_type_id': type_ids[score['score_type']],
+                           'scorer_id': score['calculated_by'] or 0, **chunk})
+    _insert(session, ScoreType, [{'id': type_id, 'name': name} for name, type_id in type_ids.items()])
+    _insert(session, TrendScoreSeries, series)
+    counts.update(trend_score_series=len(series))
+
+    # --- Korrelationen, Alerts, Opportunity Spaces ---
+    pool = trend_ids if len(trend_ids) >= 2 else list(range(1, contents + 1))
+    correlations = []
+    if len(pool) >= 2:
+        for _ in range(cfg['correlations']):
+            a, b = rnd.sample(pool, 2)
+            strength = round(rnd.uniform(-1, 1), 3)
+            correlations.append({'trend_a_id': a, 'trend_b_id': b, 'correlation_strength': strength,
+                                 'correlation_type': 'positive' if strength >= 0 else 'negative',
+                                 'detected_at': when(365), 'confidence_score': round(rnd.random(), 3)})
+    alerts = [{'content_id': rnd.choice(pool), 'user_id': rnd.choice(user_ids), 'alert_type': rnd.choice(ALERT_TYPES),
+               'threshold': round(rnd.uniform(1, 5), 1), 'is_active': rnd.random() < 0.8, 'created_at': when(365),
+               'last_triggered': None} for _ in range(cfg['alerts'])]
+    spaces = [{'title': f'Opportunity space {i}: {rnd.choice(_TOPICS)}', 'description': _sentence(rnd, 20),
+               'created_by': rnd.choice(user_ids), 'created_at': when(365)}
+              for i in range(1, cfg['opportunity_spaces'] + 1)]
+    _insert(session, TrendCorrelation, correlations)
+    _insert(session, TrendAlert, alerts)
+    _insert(session, OpportunitySpace, spaces)
+    counts.update(trend_correlations=len(correlations), trend_alerts=len(alerts), opportunity_spaces=len(spaces))
+
+    # Core-Inserts umgehen die Zählerpflege (src/services/counters.py) und die Ranglisten
+    reconcile(session.connection())
+    session.commit()
+    leaderboards.invalidate()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--contents', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    from src.main import app
+
+    with app.app_context():
+        counts = generate(contents=args.contents, seed=args.seed)
+    for table, count in counts.items():
+        print(f'{table:<20} {count:>9}')
+
+
+if __name__ == '__main__':
+    main()
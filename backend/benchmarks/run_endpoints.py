@@ -0,0 +1,489 @@
+"""Benchmark-Runner: alle Blueprint-Routen bei 1k/10k/100k Contents.
+
+Für jede Größe wird in einem eigenen Prozess eine frische SQLite-Datenbank mit
+``benchmarks.datagen`` gefüllt und jede Route aus ``routes/content.py``,
+``routes/trend_management.py``, ``routes/user.py``, ``routes/admin.py`` und ``routes/monitoring.py``
+über den Flask-Test-Client aufgerufen. Gemessen werden Latenz-Perzentile, SQL-Statements pro Request
+(Engine-Events, inkl. Writer-Thread) und der Python-Speicher-Peak pro Request
+(tracemalloc, in einem zusätzlichen Durchlauf, entfällt bei Routen über dem
+Zeitbudget). Die URL-Preview ruft einen
+lokalen Stand-in-Server ab. Routen, für die kein Fall definiert ist, stehen
+unter ``uncovered``.
+
+Schwere Routen (vollständige Listen, Bulk-Jobs) laufen einmal; jede Route
+wird höchstens ``--max-seconds`` lang wiederholt. Die JSON-Ausgabe ist bis
+auf die Messwerte deterministisch und lässt sich mit ``--compare`` gegen
+einen früheren Lauf vergleichen. Aufruf (aus ``backend/``)::
+
+    python -m benchmarks.run_endpoints --scales 1000 10000 100000 --output bench.json
+    python -m benchmarks.run_endpoints --scales 1000 --compare bench.json
+"""
+import argparse
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import namedtuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+BLUEPRINTS = ('content', 'trend', 'user', 'admin', 'monitoring')
+ADMIN_TOKEN = 'bench-admin'
+PERCENTILES = (50, 90, 95, 99)
+
+# build(i) liefert (Pfad, kwargs für client.open); Vorbereitungen darin sind nicht Teil der Messung
+Case = namedtuple('Case', 'label endpoint method build heavy', defaults=(False,))
+
+_PREVIEW_HTML = b"""<html><head><title>Stand-in</title>
+<meta property="og:title" content="Smart Building Report">
+<meta property="og:description" content="Benchmark stand-in page">
+<meta property="og:image" content="https://images.example.com/report.jpg">
+<meta property="og:site_name" content="REI Bench"></head><body>ok</body></html>"""
+
+
+class _PreviewHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(_PREVIEW_HTML)))
+        self.end_headers()
+        self.wfile.write(_PREVIEW_HTML)
+
+    def log_message(self, *args):
+        pass
+
+
+def _start_preview_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _PreviewHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f'http://127.0.0.1:{server.server_address[1]}/report'
+
+
+def _percentile(sorted_values, p):
+    # Nearest-Rank
+    index = max(0, min(len(sorted_values) - 1, -(-p * len(sorted_values) // 100) - 1))
+    return sorted_values[index]
+
+
+def _cases(client, ctx):
+    """Alle Fälle in Ausführungsreihenfolge: Lesen, Schreiben, Bulk-Jobs, Löschen."""
+    n, users, trends = ctx['contents'], ctx['users'], ctx['trend_ids']
+
+    def cid(i):
+        return 1 + (i * 7919) % n
+
+    def uid(i):
+        return 1 + (i * 104729) % users
+
+    def tid(i):
+        return trends[(i * 7919) % len(trends)]
+
+    def created(response):
+        assert response.status_code == 201, response.get_data(as_text=True)[:200]
+        body = response.get_json()
+        return body.get('id') or body['content']['id']
+
+    def new_content(i):
+        return created(client.post('/api/contents', json={
+            'title': f'Bench delete {i}', 'content_type': 'trend', 'created_by': 1, 'status': 'draft'}))
+
+    def new_user(i):
+        return created(client.post('/api/users', json={'username': f'bench_del{i}',
+                                                       'email': f'bench_del{i}@example.com'}))
+
+    admin = {'X-Admin-Token': ADMIN_TOKEN}
+    bearer = {}
+
+    def analyst():
+        # Analyst mit Token für die Fälle mit Authorization-Header (einmal angelegt)
+        if not bearer:
+            user_id = created(client.post('/api/users', json={'username': 'bench_auth',
+                                                              'email': 'bench_auth@example.com'}))
+            client.put(f'/api/users/{user_id}/role', json={'role': 'analyst'}, headers=admin)
+            token = client.post(f'/api/users/{user_id}/token', headers=admin).get_json()['token']
+            bearer['Authorization'] = f'Bearer {token}'
+        return bearer
+
+    def team(i):
+        return created(client.post('/api/teams', json={'name': f'Bench team {i}'}, headers=admin))
+
+    def tagged(i):
+        content_id = tid(i)
+        client.post(f'/api/api/contents/{content_id}/tags', json={'tag_id': 1 + i % ctx['tags']})
+        return f'/api/api/contents/{content_id}/tags/{1 + i % ctx["tags"]}', {}
+
+    def comment(i):
+        # (content_id, comment_id) eines vorhandenen Kommentars
+        for j in range(i, i + 50):
+            items = client.get(f'/api/contents/{cid(j)}/comments?limit=1').get_json()['comments']
+            if items:
+                return items[0]['content_id'], items[0]['id']
+        raise AssertionError('no comments found')
+
+    def report(i):
+        from src.services.reports import worker
+
+        body = client.post('/api/api/reports', json={'format': ('pdf', 'xlsx')[i % 2],
+                                                     'filters': {'min_score': 3}}).get_json()
+        worker.join()
+        return body['id']
+
+    def get(path):
+        return lambda i: (path(i) if callable(path) else path, {})
+
+    def send(path, body):
+        return lambda i: (path(i) if callable(path) else path, {'json': body(i)})
+
+    return [
+        # --- user.py ---
+        Case('GET /api/users', 'user.get_users', 'GET', get('/api/users'), heavy=True),
+        Case('GET /api/users/<id>', 'user.get_user', 'GET', get(lambda i: f'/api/users/{uid(i)}')),
+        # --- content.py: Lesen ---
+        Case('GET /api/contents', 'content.get_contents', 'GET', get('/api/contents'), heavy=True),
+        Case('GET /api/contents?type&industry&search', 'content.get_contents', 'GET',
+             get('/api/contents?type=technology&industry=Office&search=energy'), heavy=True),
+        Case('GET /api/contents/<id>', 'content.get_content', 'GET', get(lambda i: f'/api/contents/{cid(i)}')),
+        Case('GET /api/contents/<id>/comments', 'content.get_content_comments', 'GET',
+             get(lambda i: f'/api/contents/{cid(i)}/comments')),
+        Case('GET /api/contents/<id>/comments?threaded&replies', 'content.get_content_comments', 'GET',
+             get(lambda i: f'/api/contents/{cid(i)}/comments?threaded=1&replies=3&limit=20')),
+        Case('GET /api/comments/<id>/replies', 'content.get_comment_replies', 'GET',
+             get(lambda i: f'/api/comments/{comment(i)[1]}/replies')),
+        Case('GET /api/opportunity-spaces', 'content.get_opportunity_spaces', 'GET', get('/api/opportunity-spaces')),
+        Case('GET /api/stats', 'content.get_stats', 'GET', get('/api/stats')),
+        Case('GET /api/content/preview', 'content.content_preview', 'GET',
+             get(lambda i: f'/api/content/preview?url={ctx["preview_url"]}')),
+        Case('POST /api/content/duplicates', 'content.content_duplicates', 'POST',
+             send('/api/content/duplicates', lambda i: {'title': ctx['sample_title'], 'summary': 'energy retrofit'})),
+        # --- trend_management.py: Lesen ---
+        Case('GET /api/api/trend-phases', 'trend.get_trend_phases', 'GET', get('/api/api/trend-phases')),
+        Case('GET /api/api/trend-tags', 'trend.get_trend_tags', 'GET', get('/api/api/trend-tags')),
+        Case('GET /api/api/contents/<id>/scores', 'trend.get_content_scores', 'GET',
+             get(lambda i: f'/api/api/contents/{tid(i)}/scores')),
+        Case('GET /api/api/contents/<id>/score-history', 'trend.get_content_score_history', 'GET',
+             get(lambda i: f'/api/api/contents/{tid(i)}/score-history')),
+        Case('GET /api/api/trends/score-history?content_ids&points', 'trend.get_trends_score_history', 'GET',
+             get(lambda i: '/api/api/trends/score-history?points=50&content_ids='
+                 + ','.join(str(tid(i + k)) for k in range(100)))),
+        Case('GET /api/api/contents/<id>/consensus', 'trend.get_content_consensus', 'GET',
+             get(lambda i: f'/api/api/contents/{tid(i)}/consensus')),
+        Case('GET /api/api/trends/consensus/disagreements', 'trend.get_consensus_disagreements', 'GET',
+             get('/api/api/trends/consensus/disagreements?min_count=2')),
+        Case('GET /api/api/trends/leaderboard?scope=tag', 'trend.get_trend_leaderboard', 'GET',
+             get(lambda i: f'/api/api/trends/leaderboard?scope=tag&key={1 + i % ctx["tags"]}&limit=20')),
+        Case('GET /api/api/contents/<id>/rank', 'trend.get_content_rank', 'GET',
+             get(lambda i: f'/api/api/contents/{tid(i)}/rank')),
+        Case('GET /api/api/contents/<id>/forecast', 'trend.get_content_forecast', 'GET',
+             get(lambda i: f'/api/api/contents/{tid(i)}/forecast')),
+        Case('GET /api/api/contents/<id>/history', 'trend.get_content_history', 'GET',
+             get(lambda i: f'/api/api/contents/{tid(i)}/history')),
+        Case('GET /api/api/contents/<id>/metrics', 'trend.get_content_metrics', 'GET',
+             get(lambda i: f'/api/api/contents/{tid(i)}/metrics')),
+        Case('GET /api/api/contents/<id>/sources', 'trend.get_content_sources', 'GET',
+             get(lambda i: f'/api/api/contents/{tid(i)}/sources')),
+        Case('GET /api/api/contents/<id>/sentiment', 'trend.get_content_sentiment', 'GET',
+             get(lambda i: f'/api/api/contents/{tid(i)}/sentiment')),
+        Case('GET /api/api/contents/<id>/bursts', 'trend.get_content_bursts', 'GET',
+             get(lambda i: f'/api/api/contents/{tid(i)}/bursts')),
+        Case('GET /api/api/trends/bursts', 'trend.get_trend_bursts', 'GET',
+             get('/api/api/trends/bursts?since=2020-01-01T00:00:00')),
+        Case('GET /api/api/trends/analytics/dashboard', 'trend.get_trend_dashboard', 'GET',
+             get('/api/api/trends/analytics/dashboard')),
+        Case('GET /api/api/trends/correlations', 'trend.get_trend_correlations', 'GET',
+             get('/api/api/trends/correlations')),
+        Case('GET /api/api/trend-alerts', 'trend.get_trend_alerts', 'GET', get('/api/api/trend-alerts'), heavy=True),
+        Case('GET /api/api/trend-alerts?user_id', 'trend.get_trend_alerts', 'GET',
+             get(lambda i: f'/api/api/trend-alerts?user_id={uid(i)}')),
+        Case('GET /api/api/trends/search?q', 'trend.search_trends', 'GET',
+             get('/api/api/trends/search?q=retrofit&min_score=1')),
+        Case('GET /api/api/trends/search?tags', 'trend.search_trends', 'GET',
+             get('/api/api/trends/search?tags=ESG%20AND%20(AI%20OR%20IoT)%20NOT%20Retail')),
+        Case('GET /api/api/trends/search?phase_id&min_score', 'trend.search_trends', 'GET',
+             get(lambda i: f'/api/api/trends/search?phase_id={1 + i % 5}&min_score=2&page={1 + i % 5}')),
+        Case('GET /api/me (Token)', 'user.get_me', 'GET', lambda i: ('/api/me', {'headers': analyst()})),
+        Case('GET /api/contents (Token, Team-Filter)', 'content.get_contents', 'GET',
+             lambda i: ('/api/contents', {'headers': analyst()}), heavy=True),
+        Case('GET /api/teams', 'user.get_teams', 'GET', get('/api/teams')),
+        # --- Schreiben ---
+        Case('POST /api/users', 'user.create_user', 'POST',
+             send('/api/users', lambda i: {'username': f'bench{i}', 'email': f'bench{i}@example.com'})),
+        Case('PUT /api/users/<id>', 'user.update_user', 'PUT',
+             send(lambda i: f'/api/users/{uid(i)}', lambda i: {'email': f'user{uid(i):06d}@example.com'})),
+        Case('PUT /api/users/<id>/role', 'user.set_user_role', 'PUT',
+             lambda i: (f'/api/users/{uid(i)}/role', {'json': {'role': ('analyst', 'manager')[i % 2]},
+                                                      'headers': admin})),
+        Case('POST /api/users/<id>/token', 'user.issue_user_token', 'POST',
+             lambda i: (f'/api/users/{uid(i)}/token', {'headers': admin})),
+        Case('DELETE /api/users/<id>/token', 'user.revoke_user_token', 'DELETE',
+             lambda i: (f'/api/users/{uid(i)}/token', {'headers': admin})),
+        Case('POST /api/teams', 'user.create_team', 'POST',
+             lambda i: ('/api/teams', {'json': {'name': f'Bench new team {i}'}, 'headers': admin})),
+        Case('PUT /api/teams/<id>/members', 'user.update_team_members', 'PUT',
+             lambda i: (f'/api/teams/{team(i)}/members', {'json': {'add': [uid(i), uid(i + 1)]}, 'headers': admin})),
+        Case('POST /api/contents', 'content.create_content', 'POST', send('/api/contents', lambda i: {
+            'title': f'Benchmark trend {i}: digital twin for {ctx["sample_title"]}', 'content_type': 'trend',
+            'short_description': 'Sensor data and energy analytics for office portfolios', 'created_by': uid(i),
+            'industry': 'Office', 'status': 'approved'})),
+        Case('POST /api/content', 'content.content_create_slim', 'POST', send('/api/content', lambda i: {
+            'type': 'inspiration', 'title': f'Slim benchmark {i}', 'summary': 'Co-living concept for students',
+            'created_by': uid(i), 'status': 'draft'})),
+        Case('POST /api/content/upload', 'content.content_upload', 'POST', lambda i: ('/api/content/upload', {
+            'data': {'file': (io.BytesIO(b'benchmark upload'), f'bench{i}.txt'), 'type': 'technology',
+                     'title': f'Upload {i}', 'created_by': str(uid(i))},
+            'content_type': 'multipart/form-data'})),
+        Case('PUT /api/contents/<id>', 'content.update_content', 'PUT',
+             send(lambda i: f'/api/contents/{cid(i)}', lambda i: {'industry': 'Office', 'time_horizon': 'medium'})),
+        Case('POST /api/contents/<id>/ratings', 'content.rate_content', 'POST',
+             send(lambda i: f'/api/contents/{cid(i)}/ratings',
+                  lambda i: {'user_id': uid(i), 'value': 1 + i % 5, 'criteria': 'impact'})),
+        Case('POST /api/contents/<id>/comments', 'content.comment_content', 'POST',
+             send(lambda i: f'/api/contents/{cid(i)}/comments', lambda i: {'user_id': uid(i), 'text': f'Comment {i}'})),
+        Case('POST /api/contents/<id>/comments (reply)', 'content.comment_content', 'POST',
+             lambda i: (lambda content_id, parent_id: (f'/api/contents/{content_id}/comments', {'json': {
+                 'user_id': uid(i), 'text': f'Reply {i}', 'parent_id': parent_id}}))(*comment(i))),
+        Case('POST /api/opportunity-spaces', 'content.create_opportunity_space', 'POST',
+             send('/api/opportunity-spaces', lambda i: {'title': f'Space {i}', 'created_by': uid(i)})),
+        Case('POST /api/api/trend-phases', 'trend.create_trend_phase', 'POST',
+             send('/api/api/trend-phases', lambda i: {'name': f'Bench phase {i}', 'order': 100 + i})),
+        Case('POST /api/api/contents/<id>/scores', 'trend.create_content_score', 'POST',
+             send(lambda i: f'/api/api/contents/{tid(i)}/scores',
+                  lambda i: {'score_type': 'impact', 'value': i % 5, 'calculated_by': uid(i)})),
+        Case('POST /api/api/trends/scores/batch', 'trend.create_scores_batch', 'POST',
+             send('/api/api/trends/scores/batch', lambda i: {'scores': [
+                 {'content_id': tid(i * 20 + j), 'score_type': score_type, 'value': (i + j) % 6,
+                  'calculated_by': uid(i)}
+                 for j in range(20) for score_type in ('relevance', 'impact', 'urgency', 'feasibility', 'risk')]})),
+        Case('POST /api/api/trends/correlations', 'trend.create_trend_correlation', 'POST',
+             send('/api/api/trends/correlations', lambda i: {
+                 'trend_a_id': tid(i), 'trend_b_id': tid(i + 1), 'correlation_strength': 0.5})),
+        Case('POST /api/api/trend-alerts', 'trend.create_trend_alert', 'POST', send('/api/api/trend-alerts', lambda i: {
+            'content_id': tid(i), 'user_id': uid(i), 'alert_type': 'score_change', 'threshold': 4.0})),
+        Case('PUT /api/api/trend-alerts/<id>', 'trend.update_trend_alert', 'PUT',
+             send(lambda i: f'/api/api/trend-alerts/{1 + i % ctx["alerts"]}', lambda i: {'threshold': 3.5})),
+        Case('POST /api/api/contents/<id>/history', 'trend.create_history_entry', 'POST',
+             send(lambda i: f'/api/api/contents/{tid(i)}/history',
+                  lambda i: {'change_type': 'status_change', 'old_value': 'draft', 'new_value': 'approved'})),
+        Case('POST /api/api/trend-tags', 'trend.create_trend_tag', 'POST',
+             send('/api/api/trend-tags', lambda i: {'name': f'BenchTag{i}'})),
+        Case('POST /api/api/contents/<id>/tags', 'trend.add_tag_to_content', 'POST',
+             send(lambda i: f'/api/api/contents/{tid(i)}/tags', lambda i: {'tag_id': 1 + (i * 31) % ctx['tags']})),
+        Case('DELETE /api/api/contents/<id>/tags/<tag_id>', 'trend.remove_tag_from_content', 'DELETE', tagged),
+        Case('PUT /api/api/contents/<id>/phase', 'trend.update_content_phase', 'PUT',
+             send(lambda i: f'/api/api/contents/{tid(i)}/phase', lambda i: {'phase_id': 1 + i % 5})),
+        Case('POST /api/api/contents/<id>/metrics', 'trend.create_content_metric', 'POST',
+             send(lambda i: f'/api/api/contents/{tid(i)}/metrics', lambda i: {
+                 'metric_type': 'mentions', 'value': i, 'period_start': '2025-07-01T00:00:00',
+                 'period_end': '2025-07-31T00:00:00'})),
+        Case('POST /api/api/trends/metrics/batch', 'trend.create_metrics_batch', 'POST',
+             send('/api/api/trends/metrics/batch', lambda i: {'metrics': [
+                 {'content_id': tid(i * 100 + j), 'metric_type': 'mentions', 'value': j + i % 7,
+                  'period_start': '2025-08-01T00:00:00', 'period_end': '2025-08-31T00:00:00'}
+                 for j in range(100)]})),
+        # --- Bulk-Jobs ---
+        Case('POST /api/api/trends/bulk/recalculate-scores', 'trend.bulk_recalculate_scores', 'POST',
+             get('/api/api/trends/bulk/recalculate-scores'), heavy=True),
+        Case('POST /api/api/trends/bulk/recompute-similarities', 'trend.bulk_recompute_similarities', 'POST',
+             get('/api/api/trends/bulk/recompute-similarities'), heavy=True),
+        Case('POST /api/api/trends/bulk/detect-duplicates', 'trend.bulk_detect_duplicates', 'POST',
+             send('/api/api/trends/bulk/detect-duplicates', lambda i: {}), heavy=True),
+        Case('POST /api/api/trends/bulk/monitor', 'trend.bulk_monitor', 'POST',
+             send('/api/api/trends/bulk/monitor', lambda i: {}), heavy=True),
+        Case('POST /api/api/trends/bulk/sentiment', 'trend.bulk_sentiment', 'POST',
+             send('/api/api/trends/bulk/sentiment', lambda i: {'all': True}), heavy=True),
+        Case('POST /api/api/trends/bulk/forecast', 'trend.bulk_forecast', 'POST',
+             send('/api/api/trends/bulk/forecast', lambda i: {'force': True}), heavy=True),
+        # --- Reports (erste Anfrage je Format erzeugt, danach Cache) ---
+        Case('POST /api/api/reports', 'trend.create_report', 'POST',
+             send('/api/api/reports', lambda i: {'format': ('pdf', 'xlsx')[i % 2], 'filters': {'min_score': 3}})),
+        Case('GET /api/api/reports', 'trend.get_reports', 'GET', get('/api/api/reports')),
+        Case('GET /api/api/reports/<id>', 'trend.get_report', 'GET', get(lambda i: f'/api/api/reports/{report(i)}')),
+        Case('GET /api/api/reports/<id>/download', 'trend.download_report', 'GET',
+             get(lambda i: f'/api/api/reports/{report(i)}/download')),
+        Case('GET /api/contents/<id>/similar', 'content.get_similar_contents', 'GET',
+             get(lambda i: f'/api/contents/{cid(i)}/similar')),
+        # --- admin.py ---
+        Case('GET /api/admin/slow-requests', 'admin.get_slow_requests', 'GET',
+             lambda i: ('/api/admin/slow-requests', {'headers': {'X-Admin-Token': ADMIN_TOKEN}})),
+        Case('DELETE /api/admin/slow-requests', 'admin.clear_slow_requests', 'DELETE',
+             lambda i: ('/api/admin/slow-requests', {'headers': {'X-Admin-Token': ADMIN_TOKEN}})),
+        Case('POST /api/admin/counters/reconcile', 'admin.reconcile_counters', 'POST',
+             lambda i: ('/api/admin/counters/reconcile', {'headers': {'X-Admin-Token': ADMIN_TOKEN}})),
+        Case('POST /api/admin/leaderboards/check', 'admin.check_leaderboards', 'POST',
+             lambda i: ('/api/admin/leaderboards/check', {'headers': {'X-Admin-Token': ADMIN_TOKEN}}), heavy=True),
+        Case('GET /api/admin/audit', 'admin.get_audit_log', 'GET',
+             lambda i: ('/api/admin/audit?limit=100', {'headers': {'X-Admin-Token': ADMIN_TOKEN}})),
+        # --- monitoring.py ---
+        Case('GET /health', 'monitoring.health', 'GET', get('/health')),
+        Case('GET /health/deep', 'monitoring.health_deep', 'GET', get('/health/deep')),
+        Case('GET /metrics', 'monitoring.prometheus_metrics', 'GET', get('/metrics')),
+        # --- Löschen (frisch angelegte Objekte) ---
+        Case('DELETE /api/contents/<id>', 'content.delete_content', 'DELETE',
+             lambda i: (f'/api/contents/{new_content(i)}', {})),
+        Case('DELETE /api/users/<id>', 'user.delete_user', 'DELETE', lambda i: (f'/api/users/{new_user(i)}', {})),
+    ]
+
+
+def _request(client, path, method, kwargs):
+    """Request inkl. vollständigem Body; liefert ``(response, Zeitpunkt des ersten Body-Blocks)``."""
+    response = client.open(path, method=method, buffered=False, **kwargs)
+    chunks = iter(response.response)
+    first = next(chunks, b'')
+    first_byte = time.perf_counter()
+    body = [first, *chunks]
+    response.close()
+    response.set_data(b''.join(body))
+    return response, first_byte
+
+
+def _measure(client, case, counter, iterations, max_seconds, offset):
+    latencies, first_bytes, queries, errors = [], [], [], 0
+    runs = 1 if case.heavy else iterations
+    spent = 0.0
+    for i in range(offset, offset + runs):
+        path, kwargs = case.build(i)
+        before = counter[0]
+        start = time.perf_counter()
+        response, first_byte = _request(client, path, case.method, kwargs)
+        elapsed = time.perf_counter() - start
+        queries.append(counter[0] - before)
+        latencies.append(elapsed * 1000)
+        first_bytes.append((first_byte - start) * 1000)
+        errors += response.status_code >= 400
+        spent += elapsed
+        if spent > max_seconds:
+            break
+
+    # Speicher-Peak in einem separaten Durchlauf (tracemalloc verfälscht die Latenz);
+    # entfällt, wenn die Route schon ihr Zeitbudget verbraucht hat
+    peak = None
+    if spent <= max_seconds:
+        path, kwargs = case.build(offset + runs)
+        tracemalloc.start()
+        response, _ = _request(client, path, case.method, kwargs)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        errors += response.status_code >= 400
+
+    latencies.sort()
+    result = {'endpoint': case.endpoint, 'runs': len(latencies), 'errors': errors,
+              'mean_ms': round(sum(latencies) / len(latencies), 2), 'max_ms': round(latencies[-1], 2)}
+    for p in PERCENTILES:
+        result[f'p{p}_ms'] = round(_percentile(latencies, p), 2)
+    result['ttfb_p50_ms'] = round(_percentile(sorted(first_bytes), 50), 2)
+    result.update(queries=max(queries), queries_min=min(queries), status=response.status_code,
+                  peak_kib=round(peak / 1024, 1) if peak is not None else None)
+    return result
+
+
+def run_scale(contents, iterations, max_seconds, seed):
+    """Läuft im Kindprozess: Daten erzeugen, alle Fälle messen."""
+    os.environ['DATA_DIR'] = tempfile.mkdtemp(prefix=f'bench_endpoints_{contents}_')
+    os.environ.pop('DATABASE_URL', None)
+    os.environ['ADMIN_TOKEN'] = ADMIN_TOKEN
+    from sqlalchemy import event
+
+    from benchmarks.datagen import generate
+    from src.main import app
+    from src.models.user import db
+    from src.models.content import Content
+
+    with app.app_context():
+        start = time.perf_counter()
+        rows = generate(contents=contents, seed=seed)
+        generate_s = time.perf_counter() - start
+        trend_ids = [cid for cid, in db.session.query(Content.id).filter(Content.content_type == 'trend')
+                     .order_by(Content.id)]
+        ctx = {'contents': contents, 'users': rows['users'], 'tags': rows['trend_tags'],
+               'alerts': rows['trend_alerts'], 'trend_ids': trend_ids,
+               'sample_title': db.session.get(Content, 1).title, 'preview_url': _start_preview_server()}
+        counter = [0]
+
+        @event.listens_for(db.engine, 'before_cursor_execute')
+        def _count(*args):
+            counter[0] += 1
+
+        db.session.remove()
+
+    client = app.test_client()
+    cases = _cases(client, ctx)
+    routes = {}
+    for number, case in enumerate(cases):
+        routes[case.label] = _measure(client, case, counter, iterations, max_seconds, offset=number * 1000)
+        result = routes[case.label]
+        print(f'  {contents:>7} {case.label:<52} p50 {result["p50_ms"]:>9.2f} ms '
+              f'(TTFB {result["ttfb_p50_ms"]:>8.2f} ms) {result["queries"]:>7} queries', file=sys.stderr)
+
+    covered = {case.endpoint for case in cases}
+    uncovered = sorted(rule.endpoint for rule in app.url_map.iter_rules()
+                       if rule.endpoint.split('.')[0] in BLUEPRINTS and rule.endpoint not in covered)
+    return {'rows': rows, 'generate_s': round(generate_s, 2), 'routes': routes, 'uncovered': uncovered,
+            'peak_rss_mib': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)}
+
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _compare(report, baseline):
+    print(f'{"route":<60} {"scale":>7} {"p50 old":>10} {"p50 new":>10} {"ratio":>7} {"queries":>15}')
+    for scale, data in report['scales'].items():
+        old_routes = baseline.get('scales', {}).get(scale, {}).get('routes', {})
+        for label, new in data['routes'].items():
+            old = old_routes.get(label)
+            if not old:
+                continue
+            ratio = new['p50_ms'] / old['p50_ms'] if old['p50_ms'] else float('inf')
+            print(f'{label:<60} {scale:>7} {old["p50_ms"]:>10.2f} {new["p50_ms"]:>10.2f} {ratio:>6.2f}x '
+                  f'{old["queries"]:>7}->{new["queries"]:<7}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--max-seconds', type=float, default=10.0, help='Messzeit pro Route und Größe')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='JSON in diese Datei schreiben (sonst stdout)')
+    parser.add_argument('--compare', help='früheren JSON-Lauf als Vergleich ausgeben')
+    parser.add_argument('--scale', type=int, help=argparse.SUPPRESS)  # intern: Kindprozess
+    args = parser.parse_args()
+
+    if args.scale:
+        json.dump(run_scale(args.scale, args.iterations, args.max_seconds, args.seed), sys.stdout)
+        return
+
+    report = {'meta': {'git_revision': _git_revision(), 'python': sys.version.split()[0], 'database': 'sqlite',
+                       'iterations': args.iterations, 'max_seconds': args.max_seconds, 'seed': args.seed},
+              'scales': {}}
+    for contents in args.scales:
+        # Jede Größe in einem eigenen Prozess: frische DB, Indizes und Speicher-Peak
+        out = subprocess.run([sys.executable, '-m', 'benchmarks.run_endpoints', '--scale', str(contents),
+                              '--iterations', str(args.iterations), '--max-seconds', str(args.max_seconds),
+                              '--seed', str(args.seed)], cwd=BACKEND_DIR, stdout=subprocess.PIPE, check=True)
+        report['scales'][str(contents)] = json.loads(out.stdout)
+
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as fh:
+            fh.write(text + '\n')
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare) as fh:
+            _compare(report, json.load(fh))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,29 @@
+# gunicorn-Konfiguration für mehrere Worker auf einer SQLite-Datei (WAL)
+#
+#   gunicorn -c gunicorn.conf.py src.main:app
+#
+# preload_app: Tabellen anlegen und Seeding (src/startup.py) laufen genau einmal im
+# Master-Prozess statt parallel in jedem Worker. Danach sind alle Verbindungen zu,
+# sodass jeder Worker eigene SQLite-Verbindungen öffnet (mit WAL-Pragmas).
+#
+# Jeder Worker hält eigene Strukturen im Speicher (Ranglisten, Tag-Index,
+# Duplikat-Index, Similarity-Modell, Berechtigungs-Cache) und eine eigene
+# Write-Queue. Eigene Commits übernehmen sie direkt; Schreibzugriffe anderer
+# Worker erkennen sie an den Versionszählern in platform_counter
+# (data_version, auth_version; src/services/counters.py) und bauen beim
+# nächsten Zugriff neu auf. Prüfen: python -m benchmarks.check_workers
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', '2'))
+threads = int(os.getenv('GUNICORN_THREADS', '1'))
+preload_app = True
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '60'))
+
+
+def post_fork(server, worker):
+    # Absicherung, falls nach dem Start doch Verbindungen geöffnet wurden
+    from src.main import app
+    from src.models.__init__ import db
+    with app.app_context():
+        db.engine.dispose(close=False)
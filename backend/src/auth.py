@@ -0,0 +1,381 @@
+"""Rollen und Berechtigungen (Abschnitt 10) mit Team-Sichtbarkeit.
+
+Jede Rolle ist eine feste Bitmaske aus ``Permission``-Bits. Beim ersten
+Request mit einem API-Token (``Authorization: Bearer <token>``) wird daraus
+ein ``Principal`` kompiliert – Benutzer-ID, Bitmaske und Team-IDs – und
+unter dem SHA-256 des Tokens gecacht. Die Prüfung pro Request ist danach ein
+Dict-Zugriff und ein Bit-Test plus der Versionsvergleich unten (eine kleine
+Abfrage je Request). Ändern sich Rolle, Token oder Teams eines Benutzers über
+das ORM, wird sein Eintrag nach dem Commit verworfen (``after_flush``
+sammelt, ``after_commit`` übernimmt, wie bei den Ranglisten). Jede solche
+Änderung erhöht zudem ``auth_version`` (src/services/counters.py); sieht ein
+Worker-Prozess beim Nachschlagen einen Schritt, den er nicht selbst committet
+hat, verwirft er seinen ganzen Cache. ``AUTH_CACHE_TTL`` (Default 300
+Sekunden) begrenzt die Lebensdauer eines Eintrags zusätzlich.
+
+Routen deklarieren ihr Recht mit ``@requires(Permission.X)``; ohne Angabe
+genügt ``VIEW`` für GET und ``MANAGE`` für alles andere. ``X-Admin-Token`` ==
+``ADMIN_TOKEN`` gilt als Admin ohne Benutzer.
+
+``AUTH_MODE``:
+
+* ``optional`` (Default): Anfragen ohne Token laufen wie bisher ohne Prüfung,
+  ``created_by``/``user_id`` kommen dann aus dem Body. Anfragen mit Token
+  werden geprüft und handeln als der Token-Benutzer.
+* ``required``: ohne gültiges Token 401.
+
+Contents mit ``team_id`` sind nur für Mitglieder dieses Teams (und Rollen mit
+``ALL_TEAMS``) sichtbar, Contents ohne Team für alle. Listen filtern dafür mit
+``content_scope()`` in SQL (Index ``ix_content_team_type_status_created``),
+Routen mit ``<content_id>`` antworten für fremde Contents mit 404.
+"""
+import enum
+import hashlib
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
+from flask import current_app, g, jsonify, request
+from sqlalchemy import event, inspect, or_, select
+from sqlalchemy.orm import Session
+
+MODES = ('optional', 'required')
+DEFAULT_CACHE_TTL = 300
+DEFAULT_CACHE_SIZE = 10000
+# Blueprints mit eigener Zugriffsregel (ADMIN_TOKEN bzw. METRICS_TOKEN)
+_EXEMPT_BLUEPRINTS = ('admin', 'monitoring')
+
+
+class Permission(enum.IntFlag):
+    VIEW = 1 << 0            # Contents, Trends, Analysen lesen
+    REPORT = 1 << 1          # Reports erzeugen
+    ALERT = 1 << 2           # eigene Trend-Alerts
+    COMMENT = 1 << 3
+    RATE = 1 << 4
+    CREATE = 1 << 5          # Contents und Opportunity Spaces anlegen
+    EDIT_OWN = 1 << 6        # eigene Contents bearbeiten
+    SCORE = 1 << 7           # Scores, Metriken, Tags, Korrelationen, Historie
+    EDIT_TEAM = 1 << 8       # alle sichtbaren Contents bearbeiten
+    DELETE = 1 << 9          # Contents löschen
+    MANAGE = 1 << 10         # Phasen, Tag-Definitionen, Bulk-Jobs, Quellenprüfung
+    ADMIN = 1 << 11          # Benutzer, Rollen, Teams, Admin-Routen
+    ALL_TEAMS = 1 << 12      # Contents aller Teams
+
+
+_OBSERVER = Permission.VIEW | Permission.REPORT | Permission.ALERT
+_ANALYST = (_OBSERVER | Permission.COMMENT | Permission.RATE | Permission.CREATE | Permission.EDIT_OWN
+            | Permission.SCORE)
+_MANAGER = _ANALYST | Permission.EDIT_TEAM | Permission.DELETE | Permission.MANAGE
+
+ROLES = {
+    'observer': _OBSERVER,
+    'analyst': _ANALYST,
+    'manager': _MANAGER,
+    'admin': Permission(sum(Permission)),
+}
+
+
+class Principal(NamedTuple):
+    """Kompilierte Rechte eines Benutzers (``user_id`` None: ``X-Admin-Token``)."""
+    user_id: int | None
+    role: str
+    bits: int
+    team_ids: frozenset
+
+    def can(self, permission):
+        return self.bits & permission == permission
+
+    def sees_team(self, team_id):
+        return team_id is None or team_id in self.team_ids or self.can(Permission.ALL_TEAMS)
+
+    def to_dict(self):
+        return {
+            'user_id': self.user_id,
+            'role': self.role,
+            'permissions': [p.name for p in Permission if self.bits & p],
+            'team_ids': sorted(self.team_ids),
+        }
+
+
+SYSTEM = Principal(None, 'admin', ROLES['admin'], frozenset())
+
+
+def hash_token(token):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def new_token():
+    """Neues API-Token und sein Hash; gespeichert wird nur der Hash."""
+    token = secrets.token_urlsafe(32)
+    return token, hash_token(token)
+
+
+def compile_principal(session, user_id, role):
+    """Bitmaske der Rolle plus Team-IDs (eine Abfrage über ``ix_team_member_user``)."""
+    from src.models.user import team_member
+
+    team_ids = frozenset(session.execute(
+        select(team_member.c.team_id).where(team_member.c.user_id == user_id)).scalars())
+    return Principal(user_id, role, int(ROLES.get(role, 0)), team_ids)
+
+
+class PermissionCache:
+    """Token-Hash -> (Principal, Ablaufzeit), LRU-begrenzt, threadsicher.
+
+    ``generation`` zählt Invalidierungen: Ein Principal, dessen Abfrage vor
+    einer Invalidierung begann, wird nicht mehr eingetragen. ``version`` ist
+    die zuletzt gesehene fremde ``auth_version`` (siehe ``sync``).
+    """
+
+    def __init__(self, ttl=DEFAULT_CACHE_TTL, max_entries=DEFAULT_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.generation = 0
+        self.version = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token_hash):
+        with self._lock:
+            entry = self._entries.get(token_hash)
+            if entry is None:
+                return None
+            if entry[1] < time.monotonic():
+                del self._entries[token_hash]
+                return None
+            self._entries.move_to_end(token_hash)
+            return entry[0]
+
+    def put(self, token_hash, principal, generation):
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[token_hash] = (principal, time.monotonic() + self.ttl)
+            self._entries.move_to_end(token_hash)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_ids=None):
+        """Verwirft die Einträge von ``user_ids`` (None: alle)."""
+        with self._lock:
+            self.generation += 1
+            if user_ids is None:
+                self._entries.clear()
+                return
+            for token_hash in [h for h, (p, _) in self._entries.items() if p.user_id in user_ids]:
+                del self._entries[token_hash]
+
+    def sync(self, version):
+        """Verwirft alle Einträge, wenn ein anderer Prozess Rechte geändert hat (``version`` gestiegen)."""
+        with self._lock:
+            if version == self.version:
+                return
+            self.version = version
+            self.generation += 1
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+permission_cache = PermissionCache()
+
+
+def load_principal(session, token, cache=None):
+    """Principal zum Token aus dem Cache oder der DB; ``None`` bei unbekanntem Token."""
+    from src.models.user import User
+    from src.services.counters import AUTH_VERSION, foreign_versions
+
+    cache = permission_cache if cache is None else cache
+    cache.sync(foreign_versions(session)[AUTH_VERSION])
+    token_hash = hash_token(token)
+    principal = cache.get(token_hash)
+    if principal is None:
+        generation = cache.generation
+        row = session.execute(select(User.id, User.role).where(User.api_token_hash == token_hash)).first()
+        if row is None:
+            return None
+        principal = compile_principal(session, row.id, row.role)
+        cache.put(token_hash, principal, generation)
+    return principal
+
+
+# ============================================================
+# Zugriff aus Routen
+# ============================================================
+def requires(permission):
+    """Deklariert das Recht einer Route; geprüft wird zentral in ``_authorize``."""
+    def decorate(view):
+        view.required_permission = permission
+        return view
+    return decorate
+
+
+def current_principal():
+    """Principal des Requests oder ``None`` (anonym im Modus ``optional``)."""
+    return g.get('principal')
+
+
+def acting_user_id(claimed):
+    """Handelnder Benutzer: aus dem Token, sonst (anonym bzw. Admin-Token) ``claimed`` aus dem Body."""
+    principal = g.get('principal')
+    if principal is not None and principal.user_id is not None:
+        return principal.user_id
+    return claimed
+
+
+def bind_acting_user(data, key):
+    """Setzt ``data[key]`` auf den Token-Benutzer; ohne Token bleibt der Body-Wert."""
+    principal = g.get('principal')
+    if principal is not None and principal.user_id is not None and isinstance(data, dict):
+        data[key] = principal.user_id
+
+
+def team_ids():
+    """Sichtbare Teams als sortierte Liste; ``None`` = keine Einschränkung."""
+    principal = g.get('principal')
+    if principal is None or principal.can(Permission.ALL_TEAMS):
+        return None
+    return sorted(principal.team_ids)
+
+
+def content_scope(column, teams):
+    """SQL-Prädikat für ``teams`` aus ``team_ids()`` (``None``: kein Filter)."""
+    if teams is None:
+        return None
+    if not teams:
+        return column.is_(None)
+    return or_(column.is_(None), column.in_(teams))
+
+
+def sees_team(team_id):
+    """Darf der Request Contents dieses Teams sehen bzw. ihm zuordnen?"""
+    principal = g.get('principal')
+    return principal is None or principal.sees_team(team_id)
+
+
+def visible_content_filter(column):
+    """SQL-Prädikat „Content-ID ``column`` ist für den Request sichtbar“ (``None``: kein Filter)."""
+    from src.models.content import Content
+    scope = content_scope(Content.team_id, team_ids())
+    if scope is None:
+        return None
+    return column.in_(select(Content.id).where(scope))
+
+
+def visible_content_ids(session, content_ids):
+    """Teilmenge von ``content_ids``, die der Request sehen darf (eine Abfrage)."""
+    from src.models.content import Content
+    scope = content_scope(Content.team_id, team_ids())
+    if scope is None or not content_ids:
+        return set(content_ids)
+    return set(session.scalars(select(Content.id).where(Content.id.in_(set(content_ids)), scope)))
+
+
+def may_edit(content):
+    """``EDIT_TEAM`` oder ``EDIT_OWN`` für eigene Contents (anonym im Modus ``optional``: ja)."""
+    principal = g.get('principal')
+    if principal is None:
+        return True
+    return principal.can(Permission.EDIT_TEAM) or (
+        principal.can(Permission.EDIT_OWN) and content.created_by == principal.user_id)
+
+
+def _error(message, status):
+    return jsonify({'error': message}), status
+
+
+def _authorize():
+    # Frontend, statische Dateien und Blueprints mit eigener Zugriffsregel
+    if request.blueprint is None or request.blueprint in _EXEMPT_BLUEPRINTS:
+        return None
+    from src.models.__init__ import db
+
+    header = request.headers.get('Authorization', '')
+    admin_token = current_app.config.get('ADMIN_TOKEN')
+    if header.startswith('Bearer '):
+        principal = load_principal(db.session, header[7:].strip())
+        if principal is None:
+            return _error('Invalid token', 401)
+    elif admin_token and request.headers.get('X-Admin-Token') == admin_token:
+        principal = SYSTEM
+    elif current_app.config['AUTH_MODE'] == 'required':
+        return _error('Authentication required', 401)
+    else:
+        return None
+    g.principal = principal
+
+    default = Permission.VIEW if request.method in ('GET', 'HEAD', 'OPTIONS') else Permission.MANAGE
+    view = current_app.view_functions[request.endpoint]
+    if not principal.can(getattr(view, 'required_permission', default)):
+        return _error('Forbidden', 403)
+    content_id = (request.view_args or {}).get('content_id')
+    if content_id is not None and not principal.can(Permission.ALL_TEAMS):
+        from src.models.content import Content
+
+        team_id = db.session.execute(select(Content.team_id).where(Content.id == content_id)).scalar()
+        if not principal.sees_team(team_id):
+            return _error('Content not found', 404)
+    return None
+
+
+# ============================================================
+# Invalidierung bei Rollen-, Token- und Teamänderungen
+# ============================================================
+@event.listens_for(Session, 'after_flush')
+def _collect_changes(session, flush_context):
+    from src.models.user import Team, User
+    from src.services.counters import AUTH_VERSION, book_version
+
+    changed = False
+    for objects, deleted in ((session.dirty, False), (session.deleted, True)):
+        for obj in objects:
+            if isinstance(obj, Team):
+                session.info['auth_invalidate_all'] = True  # betroffene Mitglieder unbekannt
+                changed = True
+            elif isinstance(obj, User) and (deleted or any(
+                    inspect(obj).attrs[name].history.has_changes() for name in ('role', 'api_token_hash', 'teams'))):
+                session.info.setdefault('auth_changes', set()).add(obj.id)
+                changed = True
+    if changed:
+        book_version(session, AUTH_VERSION)  # für die Caches der anderen Worker-Prozesse
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_changes(session):
+    changed = session.info.pop('auth_changes', None)
+    if session.info.pop('auth_invalidate_all', False):
+        permission_cache.invalidate()
+    elif changed:
+        permission_cache.invalidate(changed)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_changes(session):
+    session.info.pop('auth_changes', None)
+    session.info.pop('auth_invalidate_all', None)
+
+
+def admin_allowed():
+    """Admin-Routen: ``X-Admin-Token`` oder ein Token mit ``ADMIN``."""
+    token = current_app.config.get('ADMIN_TOKEN')
+    if token and request.headers.get('X-Admin-Token') == token:
+        return True
+    header = request.headers.get('Authorization', '')
+    if not header.startswith('Bearer '):
+        return False
+    from src.models.__init__ import db
+
+    principal = load_principal(db.session, header[7:].strip())
+    return principal is not None and principal.can(Permission.ADMIN)
+
+
+def init_app(app):
+    app.config.setdefault('AUTH_MODE', 'optional')
+    app.config.setdefault('AUTH_CACHE_TTL', DEFAULT_CACHE_TTL)
+    if app.config['AUTH_MODE'] not in MODES:
+        raise ValueError(f"AUTH_MODE must be one of: {', '.join(MODES)}")
+    permission_cache.ttl = app.config['AUTH_CACHE_TTL']
+    app.before_request(_authorize)
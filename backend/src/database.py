@@ -0,0 +1,112 @@
+"""Datenbank-Konfiguration: URL, Engine-Pool, SQLite-Pragmas und PostgreSQL.
+
+Für SQLite-Dateien wird beim Öffnen jeder Verbindung der Produktionsmodus
+gesetzt: WAL (Leser blockieren Schreiber nicht mehr und umgekehrt),
+``busy_timeout`` (Schreiber warten auf die Sperre statt sofort mit
+"database is locked" abzubrechen), ``synchronous=NORMAL`` (in WAL sicher bei
+Prozessabstürzen, fsync nur beim Checkpoint) sowie mmap- und Cache-Größe.
+Alle Werte lassen sich per Umgebungsvariable anpassen.
+
+Mit ``DATABASE_URL=postgresql://...`` läuft das Backend auf PostgreSQL:
+Pool-Größe und Overflow sind konfigurierbar, tote Verbindungen werden per
+``pool_pre_ping`` erkannt, und ``statement_timeout``/``lock_timeout`` werden
+serverseitig pro Verbindung gesetzt, damit hängende Abfragen keine Worker
+blockieren. Schemaänderungen laufen über ``src/migrations.py``.
+"""
+import os
+import pathlib
+
+from sqlalchemy import event
+
+
+def _env_int(name, default):
+    value = os.getenv(name)
+    return int(value) if value not in (None, '') else default
+
+
+def database_url():
+    """``DATABASE_URL`` oder eine SQLite-Datei in ``DATA_DIR`` (Render: /tmp)."""
+    db_url = os.getenv("DATABASE_URL")
+    if db_url and db_url.startswith("postgres://"):
+        # Render/Heroku liefern das alte Schema, SQLAlchemy 2 kennt nur postgresql://
+        db_url = "postgresql://" + db_url[len("postgres://"):]
+    if not db_url:
+        data_dir = pathlib.Path(os.getenv("DATA_DIR", "/tmp")).resolve()
+        data_dir.mkdir(parents=True, exist_ok=True)
+        db_url = f"sqlite:///{data_dir}/app.db"
+    return db_url
+
+
+def is_postgres(db_url):
+    return db_url.startswith("postgresql")
+
+
+def is_sqlite_file(db_url):
+    return db_url.startswith("sqlite:") and ":memory:" not in db_url and db_url.rstrip("/") != "sqlite:"
+
+
+def sqlite_pragmas():
+    return {
+        'journal_mode': 'WAL',
+        'busy_timeout': _env_int('SQLITE_BUSY_TIMEOUT_MS', 15000),
+        'synchronous': 'NORMAL',
+        'mmap_size': _env_int('SQLITE_MMAP_SIZE', 256 * 1024 * 1024),
+        'cache_size': -_env_int('SQLITE_CACHE_SIZE_KB', 64 * 1024),  # negativ = KiB statt Seiten
+        'temp_store': 'MEMORY',
+    }
+
+
+def engine_options(db_url):
+    """``SQLALCHEMY_ENGINE_OPTIONS`` passend zur Datenbank."""
+    if is_sqlite_file(db_url):
+        return {
+            # QueuePool: eine Verbindung je Thread, Pragmas nur einmal pro Verbindung
+            'pool_size': _env_int('DB_POOL_SIZE', 5),
+            'max_overflow': _env_int('DB_MAX_OVERFLOW', 10),
+            'connect_args': {'timeout': sqlite_pragmas()['busy_timeout'] / 1000},
+        }
+    if is_postgres(db_url):
+        statement_timeout = _env_int('DB_STATEMENT_TIMEOUT_MS', 30000)
+        lock_timeout = _env_int('DB_LOCK_TIMEOUT_MS', 10000)
+        return {
+            'pool_size': _env_int('DB_POOL_SIZE', 5),
+            'max_overflow': _env_int('DB_MAX_OVERFLOW', 10),
+            'pool_timeout': _env_int('DB_POOL_TIMEOUT', 30),
+            'pool_recycle': _env_int('DB_POOL_RECYCLE', 1800),
+            'pool_pre_ping': True,
+            'connect_args': {
+                'options': f'-c statement_timeout={statement_timeout} -c lock_timeout={lock_timeout}',
+                'application_name': os.getenv('DB_APPLICATION_NAME', 'rei-backend'),
+            },
+        }
+    return {}
+
+
+def install_sqlite_pragmas(engine):
+    """Registriert die Pragmas für jede neue SQLite-Verbindung der Engine."""
+    pragmas = sqlite_pragmas()
+
+    @event.listens_for(engine, 'connect')
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+
+
+def configure_database(app, db):
+    """Setzt URL und Engine-Optionen und bindet SQLAlchemy an die App."""
+    db_url = database_url()
+    app.config["SQLALCHEMY_DATABASE_URI"] = db_url
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", engine_options(db_url))
+    # Schreibzugriffe über einen Writer-Thread bündeln (src/services/write_queue.py)
+    app.config.setdefault("WRITE_QUEUE_ENABLED", is_sqlite_file(db_url))
+
+    db.init_app(app)
+
+    if is_sqlite_file(db_url):
+        with app.app_context():
+            install_sqlite_pragmas(db.engine)
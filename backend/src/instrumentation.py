@@ -0,0 +1,238 @@
+"""Performance-Instrumentierung pro Request: SQL-Anzahl, Zeiten, Server-Timing.
+
+Ein Anteil ``PERF_SAMPLE_RATE`` (0.0–1.0, Default 0 = aus) der Requests wird
+vollständig gemessen: Anzahl und Dauer aller SQL-Statements (Engine-Events,
+auch im Writer-Thread der Write-Queue), Zeit für die JSON-Serialisierung und
+die langsamsten Statements samt Parametern. Gemessene Requests erhalten einen
+``Server-Timing``-Header (``db``, ``serialize``, ``app``, ``total``), den die
+Browser-DevTools direkt anzeigen. Requests über ``PERF_SLOW_MS`` landen in
+einem Ringpuffer (``PERF_RING_SIZE`` Einträge), abrufbar über
+``GET /api/admin/slow-requests``.
+
+Mit ``X-Perf-Trace: 1`` und gültigem ``X-Admin-Token`` wird ein einzelner
+Request unabhängig von der Sampling-Rate gemessen. Ist Sampling aus, kostet
+jedes Statement nur einen Thread-Local-Zugriff.
+"""
+import heapq
+import os
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from flask import g, request
+from sqlalchemy import event
+
+_local = threading.local()
+_PARAMS_MAX_CHARS = 300
+
+
+def _env_float(name, default):
+    value = os.getenv(name)
+    return float(value) if value not in (None, '') else default
+
+
+class RequestRecorder:
+    """Sammelt die Messwerte eines Requests."""
+    __slots__ = ('started', 'queries', 'db_time', 'serialize_time', 'slowest', 'top_n', '_seq')
+
+    def __init__(self, top_n):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.slowest = []  # Min-Heap (Dauer, seq, sql, params) der langsamsten Statements
+        self.top_n = top_n
+        self._seq = 0
+
+    def add_statement(self, statement, parameters, duration):
+        self.queries += 1
+        self.db_time += duration
+        self._seq += 1
+        entry = (duration, self._seq, statement, parameters)
+        if len(self.slowest) < self.top_n:
+            heapq.heappush(self.slowest, entry)
+        elif duration > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, entry)
+
+    def statements(self):
+        return [{'sql': sql, 'params': _format_params(params), 'duration_ms': round(duration * 1000, 3)}
+                for duration, _, sql, params in sorted(self.slowest, reverse=True)]
+
+
+def _format_params(parameters):
+    text = repr(parameters)
+    return text if len(text) <= _PARAMS_MAX_CHARS else text[:_PARAMS_MAX_CHARS] + '...'
+
+
+def current_recorder():
+    """Recorder des laufenden Requests in diesem Thread oder ``None``."""
+    return getattr(_local, 'recorder', None)
+
+
+class bind_recorder:
+    """Ordnet Statements eines anderen Threads (z.B. Writer-Thread) einem Request zu."""
+    __slots__ = ('recorder', 'previous')
+
+    def __init__(self, recorder):
+        self.recorder = recorder
+
+    def __enter__(self):
+        self.previous = getattr(_local, 'recorder', None)
+        _local.recorder = self.recorder
+        return self.recorder
+
+    def __exit__(self, *exc):
+        _local.recorder = self.previous
+
+
+class SlowRequestLog:
+    """Threadsicherer Ringpuffer der langsamsten Requests."""
+
+    def __init__(self, size=100):
+        self._lock = threading.Lock()
+        self._entries = deque(maxlen=size)
+
+    def resize(self, size):
+        with self._lock:
+            self._entries = deque(self._entries, maxlen=size)
+
+    def add(self, entry):
+        with self._lock:
+            self._entries.append(entry)
+
+    def entries(self, limit=None):
+        with self._lock:
+            entries = list(self._entries)
+        entries.reverse()  # neueste zuerst
+        return entries[:limit] if limit else entries
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+slow_requests = SlowRequestLog()
+
+
+# --- SQLAlchemy-Engine-Events ---
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if getattr(_local, 'recorder', None) is not None:
+        conn.info.setdefault('perf_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    recorder = getattr(_local, 'recorder', None)
+    if recorder is None:
+        return
+    started = conn.info.get('perf_started')
+    if started:
+        recorder.add_statement(statement, parameters, time.perf_counter() - started.pop())
+
+
+def _handle_error(exception_context):
+    # Abgebrochene Statements: Startzeit verwerfen, damit der Stack stimmt
+    started = exception_context.connection.info.get('perf_started') if exception_context.connection else None
+    if started:
+        started.pop()
+
+
+_ENGINE_EVENTS = (
+    ('before_cursor_execute', _before_cursor_execute),
+    ('after_cursor_execute', _after_cursor_execute),
+    ('handle_error', _handle_error),
+)
+
+
+def install_engine_events(engine):
+    for name, fn in _ENGINE_EVENTS:
+        if not event.contains(engine, name, fn):
+            event.listen(engine, name, fn)
+
+
+def remove_engine_events(engine):
+    for name, fn in _ENGINE_EVENTS:
+        if event.contains(engine, name, fn):
+            event.remove(engine, name, fn)
+
+
+# --- JSON-Serialisierung ---
+def _timed_dumps(dumps):
+    def timed(obj, **kwargs):
+        recorder = getattr(_local, 'recorder', None)
+        if recorder is None:
+            return dumps(obj, **kwargs)
+        start = time.perf_counter()
+        try:
+            return dumps(obj, **kwargs)
+        finally:
+            recorder.serialize_time += time.perf_counter() - start
+    return timed
+
+
+# --- Flask-Request-Lebenszyklus ---
+def _trace_requested(app):
+    token = app.config.get('ADMIN_TOKEN')
+    return (request.headers.get('X-Perf-Trace') == '1' and bool(token)
+            and request.headers.get('X-Admin-Token') == token)
+
+
+def _server_timing(recorder, total):
+    db_ms = recorder.db_time * 1000
+    serialize_ms = recorder.serialize_time * 1000
+    app_ms = max(0.0, total * 1000 - db_ms - serialize_ms)
+    return (f'db;dur={db_ms:.2f};desc="{recorder.queries} queries", serialize;dur={serialize_ms:.2f}, '
+            f'app;dur={app_ms:.2f}, total;dur={total * 1000:.2f}')
+
+
+def init_app(app):
+    """Registriert Engine-Events, JSON-Timing und Request-Hooks."""
+    from src.models.__init__ import db
+
+    app.config.setdefault('PERF_SAMPLE_RATE', _env_float('PERF_SAMPLE_RATE', 0.0))
+    app.config.setdefault('PERF_SLOW_MS', _env_float('PERF_SLOW_MS', 500.0))
+    app.config.setdefault('PERF_RING_SIZE', int(_env_float('PERF_RING_SIZE', 100)))
+    app.config.setdefault('PERF_TOP_STATEMENTS', int(_env_float('PERF_TOP_STATEMENTS', 5)))
+    app.config.setdefault('ADMIN_TOKEN', os.getenv('ADMIN_TOKEN'))
+    slow_requests.resize(app.config['PERF_RING_SIZE'])
+
+    with app.app_context():
+        install_engine_events(db.engine)
+    app.json.dumps = _timed_dumps(app.json.dumps)
+
+    @app.before_request
+    def _start_recording():
+        if request.blueprint in ('admin', 'monitoring'):
+            return
+        rate = app.config['PERF_SAMPLE_RATE']
+        if (rate > 0 and (rate >= 1 or random.random() < rate)) or _trace_requested(app):
+            _local.recorder = g.perf_recorder = RequestRecorder(app.config['PERF_TOP_STATEMENTS'])
+
+    @app.after_request
+    def _finish_recording(response):
+        recorder = g.pop('perf_recorder', None)
+        if recorder is None:
+            return response
+        _local.recorder = None
+        total = time.perf_counter() - recorder.started
+        response.headers['Server-Timing'] = _server_timing(recorder, total)
+        if total * 1000 >= app.config['PERF_SLOW_MS']:
+            slow_requests.add({
+                'method': request.method,
+                'path': request.full_path.rstrip('?'),
+                'endpoint': request.endpoint,
+                'status': response.status_code,
+                'at': datetime.utcnow().isoformat(),
+                'total_ms': round(total * 1000, 2),
+                'db_ms': round(recorder.db_time * 1000, 2),
+                'serialize_ms': round(recorder.serialize_time * 1000, 2),
+                'queries': recorder.queries,
+                'slowest_statements': recorder.statements(),
+            })
+        return response
+
+    @app.teardown_request
+    def _reset_recording(exc):
+        # Auch bei Exceptions (after_request läuft dann nicht) den Thread freigeben
+        _local.recorder = None
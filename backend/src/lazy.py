@@ -0,0 +1,33 @@
+"""Verzögertes Importieren schwerer, selten gebrauchter Abhängigkeiten.
+
+``np = lazy_module('numpy')`` verhält sich wie das Modul, importiert es aber
+erst beim ersten Attributzugriff. So zahlen Kaltstart und Requests, die z.B.
+nie den Ähnlichkeitsdienst berühren, nicht für NumPy/SciPy. Der eigentliche
+Import läuft über ``importlib`` und ist damit threadsicher.
+"""
+import importlib
+
+
+class LazyModule:
+    __slots__ = ('_name', '_module')
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        module = self._module
+        if module is None:
+            module = self._module = importlib.import_module(self._name)
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return f'<lazy module {self._name!r} ({state})>'
+
+
+def lazy_module(name):
+    return LazyModule(name)
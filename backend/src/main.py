@@ -1,79 +1,126 @@
 import os
 import sys
-import pathlib
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from flask import Flask, send_from_directory
+import threading
+
+from flask import Flask
 from flask_cors import CORS
 from src.models.__init__ import db
+from src.database import configure_database
+from src import auth, instrumentation, monitoring, static_assets
+from src.serialization import JSONProvider
+from src.startup import run_startup_tasks
 from src.routes.user import user_bp
 from src.routes.content import content_bp
 from src.routes.trend_management import trend_bp
+from src.routes.admin import admin_bp
+from src.routes.monitoring import monitoring_bp
 
-app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
-app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
-CORS(app)
-
-# --- DB-Config (Render: SQLite in /tmp; alternativ DATABASE_URL nutzen) ---
-db_url = os.getenv("DATABASE_URL")
-if not db_url:
-    data_dir = pathlib.Path(os.getenv("DATA_DIR", "/tmp")).resolve()
-    data_dir.mkdir(parents=True, exist_ok=True)
-    db_url = f"sqlite:///{data_dir}/app.db"
 
-app.config["SQLALCHEMY_DATABASE_URI"] = db_url
-app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+def create_app(config=None):
+    """App-Factory: baut eine App; Startaufgaben laufen einmal pro App (src/startup.py)."""
+    app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
+    app.json = JSONProvider(app)  # orjson, falls installiert (src/serialization.py)
+    app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
+    app.config['STARTUP_TASKS'] = os.getenv("STARTUP_TASKS", "1") != "0"
+    if config:
+        app.config.update(config)
+    CORS(app)
 
-# --- WICHTIG: SQLAlchemy an App binden ---
-db.init_app(app)
+    # --- DB-Config & SQLAlchemy an App binden (Render: SQLite in /tmp; alternativ
+    # DATABASE_URL nutzen; WAL/Pragmas für SQLite siehe src/database.py) ---
+    configure_database(app, db)
+    # SQL-Anzahl/-Zeiten pro Request, Server-Timing, langsame Requests (Sampling)
+    instrumentation.init_app(app)
+    # Prometheus-Metriken (/metrics) und Health-Checks (/health/deep)
+    app.config.setdefault('METRICS_TOKEN', os.getenv('METRICS_TOKEN'))
+    app.config.setdefault('HEALTH_DB_MAX_MS', float(os.getenv('HEALTH_DB_MAX_MS', '250')))
+    monitoring.init_app(app)
+    # Konsens der Analysten im Priority Score: mean | median | trimmed_mean (src/services/consensus.py)
+    app.config.setdefault('PRIORITY_AGGREGATION', os.getenv('PRIORITY_AGGREGATION', 'trimmed_mean'))
+    app.config.setdefault('CONSENSUS_TRIM', float(os.getenv('CONSENSUS_TRIM', '0.25')))
+    if app.config['PRIORITY_AGGREGATION'] not in ('mean', 'median', 'trimmed_mean'):
+        raise ValueError("PRIORITY_AGGREGATION must be mean, median or trimmed_mean")
+    # Prognosen der Trend-Metriken (src/services/forecasting.py)
+    app.config.setdefault('FORECAST_HORIZON', int(os.getenv('FORECAST_HORIZON', '6')))
+    app.config.setdefault('FORECAST_LEVEL', float(os.getenv('FORECAST_LEVEL', '0.95')))
+    app.config.setdefault('FORECAST_SEASON_LENGTH', int(os.getenv('FORECAST_SEASON_LENGTH', '12')))
+    # Burst-Erkennung auf neuen Metriken (src/services/bursts.py)
+    app.config.setdefault('BURST_METRIC_TYPES', os.getenv('BURST_METRIC_TYPES', 'mentions,engagement'))
+    app.config.setdefault('BURST_Z', float(os.getenv('BURST_Z', '3.0')))
+    app.config.setdefault('BURST_CUSUM_H', float(os.getenv('BURST_CUSUM_H', '5.0')))
+    app.config.setdefault('BURST_ALERTS', os.getenv('BURST_ALERTS', '1') != '0')
+    # Sentiment der Contents und Kommentare (src/services/sentiment.py)
+    app.config.setdefault('SENTIMENT_BATCH', int(os.getenv('SENTIMENT_BATCH', '1000')))
+    app.config.setdefault('SENTIMENT_DESCRIPTION_WEIGHT', float(os.getenv('SENTIMENT_DESCRIPTION_WEIGHT', '2.0')))
+    app.config.setdefault('SENTIMENT_SOURCE_WEIGHT', float(os.getenv('SENTIMENT_SOURCE_WEIGHT', '2.0')))
+    app.config.setdefault('SENTIMENT_LEXICON', os.getenv('SENTIMENT_LEXICON'))
+    # Überwachung externer Quellen (src/services/source_monitor.py)
+    app.config.setdefault('MONITOR_INTERVAL', int(os.getenv('MONITOR_INTERVAL', '43200')))
+    app.config.setdefault('MONITOR_MIN_INTERVAL', int(os.getenv('MONITOR_MIN_INTERVAL', '900')))
+    app.config.setdefault('MONITOR_BATCH', int(os.getenv('MONITOR_BATCH', '100')))
+    app.config.setdefault('MONITOR_WORKERS', int(os.getenv('MONITOR_WORKERS', '8')))
+    app.config.setdefault('MONITOR_HOST_RATE', float(os.getenv('MONITOR_HOST_RATE', '1.0')))
+    app.config.setdefault('MONITOR_TIMEOUT', float(os.getenv('MONITOR_TIMEOUT', '10')))
+    # Reports (PDF/XLSX) im Hintergrund, Cache unter REPORT_DIR (src/services/reports.py)
+    app.config.setdefault('REPORT_WORKERS', int(os.getenv('REPORT_WORKERS', '1')))
+    app.config.setdefault('REPORT_BATCH', int(os.getenv('REPORT_BATCH', '500')))
+    app.config.setdefault('REPORT_JOB_TIMEOUT', int(os.getenv('REPORT_JOB_TIMEOUT', '600')))
+    app.config.setdefault('REPORT_LEASE', int(os.getenv('REPORT_LEASE', '60')))
+    app.config.setdefault('REPORT_HEARTBEAT', float(os.getenv('REPORT_HEARTBEAT', '15')))
+    app.config.setdefault('REPORT_DIR', os.getenv('REPORT_DIR'))
+    # Rollen, API-Tokens und Team-Sichtbarkeit: optional | required (src/auth.py)
+    app.config.setdefault('AUTH_MODE', os.getenv('AUTH_MODE', 'optional'))
+    app.config.setdefault('AUTH_CACHE_TTL', int(os.getenv('AUTH_CACHE_TTL', '300')))
+    auth.init_app(app)
+    # Audit-Log aller Änderungen, write-behind (src/services/audit.py)
+    app.config.setdefault('AUDIT_ENABLED', os.getenv('AUDIT_ENABLED', '1') != '0')
+    app.config.setdefault('AUDIT_QUEUE_SIZE', int(os.getenv('AUDIT_QUEUE_SIZE', '50000')))
+    app.config.setdefault('AUDIT_BATCH', int(os.getenv('AUDIT_BATCH', '500')))
+    app.config.setdefault('AUDIT_FLUSH_INTERVAL', float(os.getenv('AUDIT_FLUSH_INTERVAL', '1.0')))
+    app.config.setdefault('AUDIT_DIR', os.getenv('AUDIT_DIR'))
+    app.config.setdefault('AUDIT_MAX_VALUE', int(os.getenv('AUDIT_MAX_VALUE', '500')))
 
-# --- Blueprints registrieren ---
-app.register_blueprint(user_bp, url_prefix="/api")
-app.register_blueprint(content_bp, url_prefix="/api")
-app.register_blueprint(trend_bp, url_prefix="/api")
+    # --- Blueprints registrieren ---
+    app.register_blueprint(user_bp, url_prefix="/api")
+    app.register_blueprint(content_bp, url_prefix="/api")
+    app.register_blueprint(trend_bp, url_prefix="/api")
+    app.register_blueprint(admin_bp, url_prefix="/api")
+    app.register_blueprint(monitoring_bp)
 
-# --- Tabellen anlegen & Defaults setzen (IM APP-KONTEXT!) ---
-with app.app_context():
-    from src.models.user import User
-    from src.models.content import Content
-    from src.models.trend_management import (
-        TrendPhase, TrendScore, TrendAlert, TrendCorrelation,
-        TrendHistory, TrendMetrics, TrendTag
-    )
-    db.create_all()
+    static_assets.init_app(app)
+    app.add_url_rule('/', view_func=serve_frontend, defaults={'path': ''})
+    app.add_url_rule('/<path:path>', view_func=serve_frontend)
 
-    # Optional: Default-Phasen, falls noch keine existieren
-    if TrendPhase.query.count() == 0:
-        default_phases = [
-            {'name': 'Emerging',   'description': 'Neue, schwache Signale',                'order': 1, 'color': '#EF4444'},
-            {'name': 'Growing',    'description': 'Wachsende Trends mit Evidenz',         'order': 2, 'color': '#F59E0B'},
-            {'name': 'Mainstream', 'description': 'Etablierte Trends, breite Adoption',   'order': 3, 'color': '#10B981'},
-            {'name': 'Declining',  'description': 'Abnehmende Relevanz',                  'order': 4, 'color': '#6B7280'},
-            {'name': 'Legacy',     'description': 'Historisch, für Referenz',             'order': 5, 'color': '#374151'},
-        ]
-        for p in default_phases:
-            db.session.add(TrendPhase(**p))
-        db.session.commit()
+    # --- Tabellen anlegen & Defaults setzen (idempotent, einmal pro App) ---
+    if app.config['STARTUP_TASKS']:
+        run_startup_tasks(app)
+    return app
 
-@app.get("/health")
-def health():
-    return {"status": "ok"}
 
 # Optional: Falls du das Backend auch für das gebaute Frontend nutzt
 # (bei deiner 2-Service-Lösung auf Render nicht zwingend nötig)
-@app.route('/', defaults={'path': ''})
-@app.route('/<path:path>')
 def serve_frontend(path):
-    static_folder_path = app.static_folder
-    if static_folder_path is None:
-        return "Static folder not configured", 404
-    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-        return send_from_directory(static_folder_path, path)
-    index_path = os.path.join(static_folder_path, 'index.html')
-    if os.path.exists(index_path):
-        return send_from_directory(static_folder_path, 'index.html')
-    return "index.html not found", 404
+    # Manifest, Kompression und Cache-Header: src/static_assets.py
+    return static_assets.serve(path)
+
+# ``src.main:app`` (gunicorn, Benchmarks) wird erst beim ersten Zugriff gebaut,
+# ein bloßes ``import src.main`` startet also weder DB-Zugriffe noch Seeding
+_app = None
+_app_lock = threading.Lock()
+
+
+def __getattr__(name):
+    global _app
+    if name != 'app':
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    with _app_lock:
+        if _app is None:
+            _app = create_app()
+    return _app
+
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    create_app().run(host='0.0.0.0', port=5000, debug=True)
@@ -0,0 +1,306 @@
+"""Schema-Migrationen für bestehende Datenbanken.
+
+``db.create_all()`` legt nur fehlende Tabellen an und ändert bestehende nie.
+Alles, was eine laufende Datenbank nachträglich braucht (v.a. Indizes auf
+vorhandenen Tabellen), wird hier als nummerierte Migration registriert und
+genau einmal ausgeführt; angewendete IDs stehen in ``schema_migrations``.
+
+Migrationen mit ``transactional=False`` laufen im Autocommit-Modus ohne
+Statement-Timeout. Das ist für ``CREATE INDEX CONCURRENTLY`` auf PostgreSQL
+nötig, das Schreibzugriffe während des Index-Aufbaus nicht blockiert.
+Gleichzeitig startende Instanzen serialisieren sich über ``schema_lock``
+(PostgreSQL-Advisory-Lock).
+
+Manuell ausführen (aus ``backend/``)::
+
+    python -m src.migrations
+"""
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, inspect, select, text
+
+_SCHEMA_LOCK_ID = 0x52454931  # beliebige, app-weit feste Advisory-Lock-ID
+
+_metadata = MetaData()
+schema_migrations = Table(
+    'schema_migrations', _metadata,
+    Column('id', String(100), primary_key=True),
+    Column('applied_at', DateTime, nullable=False),
+)
+
+MIGRATIONS = []
+
+
+class Migration:
+    def __init__(self, id, fn, transactional):
+        self.id = id
+        self.fn = fn
+        self.transactional = transactional
+        self.description = (fn.__doc__ or '').strip()
+
+
+def migration(id, transactional=True):
+    """Registriert eine Migration; ``fn(connection)`` muss idempotent sein."""
+    def register(fn):
+        MIGRATIONS.append(Migration(id, fn, transactional))
+        return fn
+    return register
+
+
+@contextmanager
+def schema_lock(engine):
+    """Serialisiert Schema-Änderungen mehrerer Instanzen (nur PostgreSQL, sonst no-op)."""
+    if engine.dialect.name != 'postgresql':
+        yield
+        return
+    # Autocommit: eine offene Transaktion würde CREATE INDEX CONCURRENTLY blockieren
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+        # Pollen statt pg_advisory_lock: ein blockiert wartendes Statement hält
+        # einen Snapshot, auf den CREATE INDEX CONCURRENTLY des Halters warten würde
+        while not connection.execute(text('SELECT pg_try_advisory_lock(:id)'), {'id': _SCHEMA_LOCK_ID}).scalar():
+            time.sleep(0.5)
+        try:
+            yield
+        finally:
+            connection.execute(text('SELECT pg_advisory_unlock(:id)'), {'id': _SCHEMA_LOCK_ID})
+
+
+def create_index(connection, name, table, columns, unique=False):
+    """Legt einen Index an, falls er fehlt; auf PostgreSQL ``CONCURRENTLY``.
+
+    Ein abgebrochener ``CONCURRENTLY``-Aufbau hinterlässt einen ungültigen
+    Index; der wird erkannt, entfernt und neu aufgebaut.
+    """
+    quote = connection.dialect.identifier_preparer.quote
+    cols = ', '.join(quote(column) for column in columns)
+    kind = 'UNIQUE INDEX' if unique else 'INDEX'
+
+    if connection.dialect.name == 'postgresql':
+        invalid = connection.execute(text(
+            'SELECT 1 FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid '
+            'WHERE c.relname = :name AND NOT i.indisvalid'
+        ), {'name': name}).first()
+        if invalid:
+            connection.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS {quote(name)}'))
+        connection.execute(text(
+            f'CREATE {kind} CONCURRENTLY IF NOT EXISTS {quote(name)} ON {quote(table)} ({cols})'
+        ))
+    else:
+        connection.execute(text(f'CREATE {kind} IF NOT EXISTS {quote(name)} ON {quote(table)} ({cols})'))
+
+
+def drop_index(connection, name):
+    """Entfernt einen Index, falls vorhanden; auf PostgreSQL ``CONCURRENTLY``."""
+    quote = connection.dialect.identifier_preparer.quote
+    concurrently = ' CONCURRENTLY' if connection.dialect.name == 'postgresql' else ''
+    connection.execute(text(f'DROP INDEX{concurrently} IF EXISTS {quote(name)}'))
+
+
+def add_column(connection, table, name, ddl):
+    """Fügt eine Spalte hinzu, falls sie fehlt (``ddl``: Typ und Constraints, z.B. ``INTEGER NOT NULL DEFAULT 0``)."""
+    if name in {column['name'] for column in inspect(connection).get_columns(table)}:
+        return
+    quote = connection.dialect.identifier_preparer.quote
+    connection.execute(text(f'ALTER TABLE {quote(table)} ADD COLUMN {quote(name)} {ddl}'))
+
+
+def pending(engine):
+    _metadata.create_all(engine, checkfirst=True)
+    with engine.connect() as connection:
+        applied = set(connection.execute(select(schema_migrations.c.id)).scalars())
+    return [m for m in MIGRATIONS if m.id not in applied]
+
+
+def run_migrations(engine):
+    """Führt alle ausstehenden Migrationen aus und gibt ihre IDs zurück."""
+    applied = []
+    for m in pending(engine):
+        if m.transactional:
+            with engine.begin() as connection:
+                m.fn(connection)
+                connection.execute(schema_migrations.insert(), {'id': m.id, 'applied_at': datetime.utcnow()})
+        else:
+            with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+                if connection.dialect.name == 'postgresql':
+                    connection.execute(text('SET statement_timeout = 0'))
+                    connection.execute(text('SET lock_timeout = 0'))
+                m.fn(connection)
+                connection.execute(schema_migrations.insert(), {'id': m.id, 'applied_at': datetime.utcnow()})
+        applied.append(m.id)
+    return applied
+
+
+# ============================================================
+# Migrationen
+# ============================================================
+
+
+@migration('0001_foreign_key_indexes', transactional=False)
+def _foreign_key_indexes(connection):
+    """Indizes für die häufigsten Lookups je Content"""
+    create_index(connection, 'ix_rating_content_id', 'rating', ['content_id'])
+    create_index(connection, 'ix_comment_content_id', 'comment', ['content_id'])
+    create_index(connection, 'ix_trend_score_content_type', 'trend_score', ['content_id', 'score_type'])
+    create_index(connection, 'ix_trend_metrics_content_period', 'trend_metrics', ['content_id', 'period_start'])
+    create_index(connection, 'ix_trend_history_content_changed', 'trend_history', ['content_id', 'changed_at'])
+    create_index(connection, 'ix_content_trend_tags_tag', 'content_trend_tags', ['trend_tag_id'])
+    create_index(connection, 'ix_content_type_status_created', 'content', ['content_type', 'status', 'created_at'])
+
+
+@migration('0002_platform_counters')
+def _platform_counters(connection):
+    """Zählertabelle für /api/stats anlegen und per COUNT(*) initialisieren"""
+    from src.models.content import PlatformCounter
+    from src.services.counters import reconcile
+
+    PlatformCounter.__table__.create(connection, checkfirst=True)
+    reconcile(connection)
+
+
+@migration('0003_score_history')
+def _score_history(connection):
+    """Append-only Score-Historie anlegen und mit den aktuellen Scores starten"""
+    from src.models.trend_management import ScoreType, TrendScoreSeries
+    from src.services.score_history import backfill
+
+    ScoreType.__table__.create(connection, checkfirst=True)
+    TrendScoreSeries.__table__.create(connection, checkfirst=True)
+    backfill(connection)
+
+
+@migration('0004_score_consensus')
+def _score_consensus(connection):
+    """Konsens-Tabelle anlegen und aus den aktuellen Scores aufbauen"""
+    from src.models.trend_management import ScoreConsensus
+    from src.services.consensus import rebuild
+
+    ScoreConsensus.__table__.create(connection, checkfirst=True)
+    rebuild(connection)
+
+
+@migration('0005_trend_forecast')
+def _trend_forecast(connection):
+    """Prognose-Cache anlegen (gefüllt beim ersten Abruf bzw. per Bulk-Endpunkt)"""
+    from src.models.trend_management import TrendForecast
+
+    TrendForecast.__table__.create(connection, checkfirst=True)
+
+
+@migration('0006_burst_detection')
+def _burst_detection(connection):
+    """Burst-Tabellen anlegen und den Detektor-Zustand aus der Metrik-Historie aufbauen"""
+    from src.models.trend_management import MetricStreamState, TrendBurst
+    from src.services.bursts import replay
+
+    MetricStreamState.__table__.create(connection, checkfirst=True)
+    TrendBurst.__table__.create(connection, checkfirst=True)
+    replay(connection)
+
+
+@migration('0007_sentiment')
+def _sentiment(connection):
+    """Sentiment-Tabellen anlegen und alle Contents zur ersten Bewertung vormerken"""
+    from src.models.content import CommentSentiment, ContentSentiment, SentimentQueue
+    from src.services.sentiment import enqueue_all
+
+    for model in (ContentSentiment, CommentSentiment, SentimentQueue):
+        model.__table__.create(connection, checkfirst=True)
+    enqueue_all(connection)
+
+
+@migration('0008_source_monitor')
+def _source_monitor(connection):
+    """Abrufzustand der externen Quellen anlegen (gefüllt beim ersten Monitor-Zyklus)"""
+    from src.models.trend_management import SourceState
+
+    SourceState.__table__.create(connection, checkfirst=True)
+
+
+@migration('0009_reports')
+def _reports(connection):
+    """Report-Aufträge anlegen und den Datenstand der Report-Caches initialisieren"""
+    from src.models.trend_management import ReportJob
+    from src.services.counters import reconcile
+
+    ReportJob.__table__.create(connection, checkfirst=True)
+    reconcile(connection)
+
+
+@migration('0010_comment_threads', transactional=False)
+def _comment_threads(connection):
+    """Antworten auf Kommentare und Keyset-Indizes für die Cursor-Paginierung"""
+    add_column(connection, 'comment', 'parent_id', 'INTEGER')
+    add_column(connection, 'comment', 'reply_count', 'INTEGER NOT NULL DEFAULT 0')
+    create_index(connection, 'ix_comment_content_created', 'comment', ['content_id', 'created_at'])
+    create_index(connection, 'ix_comment_parent_created', 'comment', ['parent_id', 'created_at'])
+    # (content_id, created_at) deckt Lookups nach content_id mit ab
+    drop_index(connection, 'ix_comment_content_id')
+
+
+@migration('0011_roles_teams', transactional=False)
+def _roles_teams(connection):
+    """Rollen, API-Tokens und Teams (src/auth.py); Team-Filter der Content-Listen über den Index"""
+    from src.models.user import Team, team_member
+
+    Team.__table__.create(connection, checkfirst=True)
+    team_member.create(connection, checkfirst=True)
+    add_column(connection, 'user', 'role', "VARCHAR(20) NOT NULL DEFAULT 'observer'")
+    add_column(connection, 'user', 'api_token_hash', 'VARCHAR(64)')
+    add_column(connection, 'content', 'team_id', 'INTEGER REFERENCES team (id)')
+    create_index(connection, 'ix_user_api_token_hash', 'user', ['api_token_hash'], unique=True)
+    # Teams eines Benutzers beim Aufbau der Berechtigungen
+    create_index(connection, 'ix_team_member_user', 'team_member', ['user_id'])
+    # team_id IS NULL OR team_id IN (...): je Zweig ein Indexbereich, danach Typ/Status/Datum wie
+    # ix_content_type_status_created
+    create_index(connection, 'ix_content_team_type_status_created', 'content',
+                 ['team_id', 'content_type', 'status', 'created_at'])
+
+
+@migration('0012_audit_log')
+def _audit_log(connection):
+    """Änderungsprotokoll (src/services/audit.py)"""
+    from src.models.trend_management import AuditLog
+
+    AuditLog.__table__.create(connection, checkfirst=True)
+
+
+@migration('0013_report_job_teams')
+def _report_job_teams(connection):
+    """Team-Sichtbarkeit der Report-Aufträge; bestehende Aufträge aus ihrer Spezifikation füllen"""
+    import json
+
+    from src.services.reports import encode_teams
+
+    add_column(connection, 'report_job', 'teams', 'TEXT')
+    for report_id, spec in connection.execute(text('SELECT id, spec FROM report_job WHERE teams IS NULL')).all():
+        teams = json.loads(spec).get('filters', {}).get('teams')
+        if teams is not None:
+            connection.execute(text('UPDATE report_job SET teams = :teams WHERE id = :id'),
+                               {'teams': encode_teams(teams), 'id': report_id})
+
+
+@migration('0014_auth_version')
+def _auth_version(connection):
+    """Zählerzeilen für ``auth_version`` (Invalidierung der Berechtigungs-Caches aller Worker)"""
+    from src.services.counters import reconcile
+
+    reconcile(connection)
+
+
+@migration('0015_report_job_lease')
+def _report_job_lease(connection):
+    """Lease der Report-Aufträge: der Renderer verlängert ihn, neu eingereiht wird erst nach Ablauf"""
+    add_column(connection, 'report_job', 'lease_until', 'TIMESTAMP')
+
+
+if __name__ == '__main__':
+    from src.main import create_app
+    from src.models.__init__ import db
+
+    app = create_app({'STARTUP_TASKS': False})
+    with app.app_context():
+        with schema_lock(db.engine):
+            ids = run_migrations(db.engine)
+    print(f'{len(ids)} migrations applied' + (f': {", ".join(ids)}' if ids else ''))
@@ -1,3 +1,4 @@
+from flask import current_app, has_app_context
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 from .__init__ import db
@@ -23,6 +24,7 @@ class Content(db.Model):
     external_source_urls = db.Column(db.Text, nullable=True)  # JSON-Array von URLs
     sentiment_score = db.Column(db.Float, nullable=True)  # -1.0 bis 1.0
     confidence_level = db.Column(db.Float, default=0.5)  # 0.0 bis 1.0
+    team_id = db.Column(db.Integer, db.ForeignKey('team.id'), nullable=True)  # None = für alle sichtbar (src/auth.py)
     
     # Relationships
     creator = db.relationship('User', backref=db.backref('contents', lazy=True))
@@ -50,6 +52,7 @@ class Content(db.Model):
             'industry': self.industry,
             'time_horizon': self.time_horizon,
             'status': self.status,
+            'team_id': self.team_id,
             'average_rating': self.get_average_rating(),
             'rating_count': len(self.ratings),
             'comment_count': len(self.comments),
@@ -58,17 +61,59 @@ class Content(db.Model):
             'trend_phase_name': self.trend_phase.name if hasattr(self, 'trend_phase') and self.trend_phase else None,
             'priority_score': self.priority_score,
             'last_monitored_at': self.last_monitored_at.isoformat() if self.last_monitored_at else None,
+            'external_source_urls': self.get_external_source_urls(),
             'sentiment_score': self.sentiment_score,
             'confidence_level': self.confidence_level,
             'trend_tags': [tag.to_dict() for tag in self.trend_tags] if hasattr(self, 'trend_tags') else [],
             'trend_scores': self.get_trend_scores_summary()
         }
     
+    def get_external_source_urls(self):
+        from src.services.source_monitor import parse_urls
+
+        return parse_urls(self.external_source_urls)
+    
     def get_average_rating(self):
         if not self.ratings:
             return 0
         return sum(rating.value for rating in self.ratings) / len(self.ratings)
 
+    def get_trend_scores_summary(self):
+        """Gibt eine Zusammenfassung der Trend-Scores zurück"""
+        if not hasattr(self, 'trend_scores'):
+            return {}
+        
+        scores = {}
+        for score in self.trend_scores:
+            scores[score.score_type] = {
+                'value': score.value,
+                'calculated_at': score.calculated_at.isoformat() if score.calculated_at else None,
+                'is_automatic': score.is_automatic
+            }
+        return scores
+    
+    def calculate_priority_score(self, mode=None):
+        """Berechnet den Prioritäts-Score aus dem Konsens der Analysten je Score-Typ
+
+        ``mode`` (``mean``, ``median``, ``trimmed_mean``) überschreibt
+        ``PRIORITY_AGGREGATION``; Gewichtungen siehe src/services/consensus.py.
+        """
+        from src.services import consensus
+
+        if not hasattr(self, 'score_consensus'):
+            return 0.0
+        trim = consensus.DEFAULT_TRIM
+        if has_app_context():
+            mode = mode or current_app.config.get('PRIORITY_AGGREGATION', consensus.DEFAULT_AGGREGATION)
+            trim = current_app.config.get('CONSENSUS_TRIM', trim)
+        # Normalisierung auf 0-5 Skala
+        return consensus.priority_score(self.score_consensus, mode or consensus.DEFAULT_AGGREGATION, trim)
+    
+    def update_priority_score(self):
+        """Aktualisiert den Prioritäts-Score und speichert ihn"""
+        self.priority_score = self.calculate_priority_score()
+        return self.priority_score
+
 class Rating(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     content_id = db.Column(db.Integer, db.ForeignKey('content.id'), nullable=False)
@@ -100,23 +145,98 @@ class Comment(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     text = db.Column(db.Text, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Threads (src/services/comments.py); parent_id ohne FK, da die Content-Cascade
+    # Kommentare in beliebiger Reihenfolge löscht
+    parent_id = db.Column(db.Integer, nullable=True)
+    reply_count = db.Column(db.Integer, nullable=False, default=0)  # direkte Antworten, beim Einfügen gepflegt
     
     # Relationships
     user = db.relationship('User', backref=db.backref('comments', lazy=True))
     
     def __repr__(self):
-        return f'<Comment by {self.user.username if self.user else "Unknown"} on Content {self.content_id}>'
+        return f'<Comment {self.id} by User {self.user_id} on Content {self.content_id}>'
     
-    def to_dict(self):
+    def to_dict(self, usernames=None):
+        """``usernames`` (``{user_id: username}``) erspart das Nachladen von ``user`` je Kommentar"""
+        if usernames is not None:
+            username = usernames.get(self.user_id)
+        else:
+            username = self.user.username if self.user else None
         return {
             'id': self.id,
             'content_id': self.content_id,
             'user_id': self.user_id,
-            'username': self.user.username if self.user else None,
+            'username': username,
             'text': self.text,
+            'parent_id': self.parent_id,
+            'reply_count': self.reply_count or 0,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
+class ContentSignature(db.Model):
+    """MinHash-Signatur eines Contents für die Near-Duplicate-Erkennung"""
+    content_id = db.Column(db.Integer, db.ForeignKey('content.id'), primary_key=True)
+    signature = db.Column(db.LargeBinary, nullable=False)  # uint32-Array, leer bei Content ohne Text
+    
+    # Relationships
+    content = db.relationship('Content', backref=db.backref('minhash', uselist=False, lazy=True,
+                                                            cascade='all, delete-orphan'))
+    
+    def __repr__(self):
+        return f'<ContentSignature for Content {self.content_id}>'
+
+class ContentSentiment(db.Model):
+    """Sentiment-Bestandteile eines Contents; ``Content.sentiment_score`` ist ihr gewichtetes Mittel"""
+    __tablename__ = 'content_sentiment'
+    content_id = db.Column(db.Integer, db.ForeignKey('content.id'), primary_key=True)
+    text_score = db.Column(db.Float, nullable=True)  # Titel + Beschreibungen, None = ohne Lexikon-Treffer
+    language = db.Column(db.String(2), nullable=True)
+    comment_score = db.Column(db.Float, nullable=True)  # Mittel der Kommentare mit Treffern
+    comment_count = db.Column(db.Integer, nullable=False, default=0)
+    source_score = db.Column(db.Float, nullable=True)  # Texte der externen Quellen
+    source_count = db.Column(db.Integer, nullable=False, default=0)
+    score = db.Column(db.Float, nullable=True)
+    scored_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # Relationships
+    content = db.relationship('Content', backref=db.backref('sentiment', uselist=False, lazy=True,
+                                                            cascade='all, delete-orphan'))
+
+    def __repr__(self):
+        return f'<ContentSentiment {self.score} for Content {self.content_id}>'
+
+    def to_dict(self):
+        return {
+            'content_id': self.content_id,
+            'score': self.score,
+            'text_score': self.text_score,
+            'language': self.language,
+            'comment_score': self.comment_score,
+            'comment_count': self.comment_count,
+            'source_score': self.source_score,
+            'source_count': self.source_count,
+            'scored_at': self.scored_at.isoformat() if self.scored_at else None
+        }
+
+class CommentSentiment(db.Model):
+    """Sentiment eines Kommentars (Kommentare sind unveränderlich: einmal bewertet)
+
+    Ohne Fremdschlüssel: beim Löschen von Kommentaren bzw. Contents räumt das
+    ``after_flush``-Event in ``src/services/sentiment.py`` die Zeilen in einem
+    Statement ab, statt sie per ORM-Cascade einzeln zu laden.
+    """
+    __tablename__ = 'comment_sentiment'
+    comment_id = db.Column(db.Integer, primary_key=True)
+    content_id = db.Column(db.Integer, nullable=False, index=True)
+    score = db.Column(db.Float, nullable=True)  # None = ohne Lexikon-Treffer
+    language = db.Column(db.String(2), nullable=True)
+
+class SentimentQueue(db.Model):
+    """Contents, deren Sentiment seit dem letzten Lauf neu zu berechnen ist"""
+    __tablename__ = 'sentiment_queue'
+    content_id = db.Column(db.Integer, primary_key=True)  # ohne FK: Löschen des Contents bleibt unberührt
+    queued_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
 class OpportunitySpace(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
@@ -140,54 +260,12 @@ class OpportunitySpace(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
+class PlatformCounter(db.Model):
+    """Laufend gepflegte Zähler für /api/stats (src/services/counters.py)"""
+    __tablename__ = 'platform_counter'
+    name = db.Column(db.String(50), primary_key=True)
+    shard = db.Column(db.Integer, primary_key=True)  # verteilt parallele Inkremente auf mehrere Zeilen
+    value = db.Column(db.BigInteger, nullable=False, default=0)
 
-    def get_trend_scores_summary(self):
-        """Gibt eine Zusammenfassung der Trend-Scores zurück"""
-        if not hasattr(self, 'trend_scores'):
-            return {}
-        
-        scores = {}
-        for score in self.trend_scores:
-            scores[score.score_type] = {
-                'value': score.value,
-                'calculated_at': score.calculated_at.isoformat() if score.calculated_at else None,
-                'is_automatic': score.is_automatic
-            }
-        return scores
-    
-    def calculate_priority_score(self):
-        """Berechnet den Prioritäts-Score basierend auf verschiedenen Faktoren"""
-        if not hasattr(self, 'trend_scores'):
-            return 0.0
-        
-        # Gewichtungen für verschiedene Score-Typen
-        weights = {
-            'relevance': 0.25,
-            'impact': 0.30,
-            'urgency': 0.20,
-            'feasibility': 0.15,
-            'risk': 0.10
-        }
-        
-        total_score = 0.0
-        total_weight = 0.0
-        
-        for score in self.trend_scores:
-            if score.score_type in weights:
-                weight = weights[score.score_type]
-                total_score += score.value * weight
-                total_weight += weight
-        
-        # Normalisierung auf 0-5 Skala
-        if total_weight > 0:
-            return total_score / total_weight
-        return 0.0
-    
-    def update_priority_score(self):
-        """Aktualisiert den Prioritäts-Score und speichert ihn"""
-        self.priority_score = self.calculate_priority_score()
-        return self.priority_score
-
-
-
-
+    def __repr__(self):
+        return f'<PlatformCounter {self.name}[{self.shard}]={self.value}>'
@@ -1,5 +1,7 @@
 from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime
+import json
+import struct
+from datetime import datetime, timedelta
 from src.models.user import db
 from src.models.content import Content
 
@@ -61,7 +63,7 @@ class TrendAlert(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     content_id = db.Column(db.Integer, db.ForeignKey('content.id'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    alert_type = db.Column(db.String(50), nullable=False)  # 'score_change', 'phase_change', 'new_content'
+    alert_type = db.Column(db.String(50), nullable=False)  # 'score_change', 'phase_change', 'new_content', 'burst'
     threshold = db.Column(db.Float, nullable=True)  # Schwellenwert für numerische Alerts
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -199,3 +201,337 @@ class TrendTag(db.Model):
         }
 
 
+
+class ContentSimilarity(db.Model):
+    """Vorberechnete Top-k-Nachbarn je Content (TF-IDF-Kosinusähnlichkeit)"""
+    id = db.Column(db.Integer, primary_key=True)
+    content_id = db.Column(db.Integer, db.ForeignKey('content.id'), nullable=False)
+    similar_id = db.Column(db.Integer, db.ForeignKey('content.id'), nullable=False, index=True)
+    rank = db.Column(db.Integer, nullable=False)  # 1 = ähnlichster Content
+    score = db.Column(db.Float, nullable=False)  # 0.0 bis 1.0
+    calculated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_content_similarity_content_rank', 'content_id', 'rank'),
+    )
+
+    # Relationships
+    content = db.relationship('Content', foreign_keys=[content_id],
+                              backref=db.backref('similarities', lazy=True, cascade='all, delete-orphan'))
+    similar = db.relationship('Content', foreign_keys=[similar_id])
+
+    def __repr__(self):
+        return f'<ContentSimilarity {self.content_id}->{self.similar_id}: {self.score}>'
+
+    def to_dict(self):
+        return {
+            'content_id': self.similar_id,
+            'title': self.similar.title if self.similar else None,
+            'content_type': self.similar.content_type if self.similar else None,
+            'rank': self.rank,
+            'score': self.score,
+            'calculated_at': self.calculated_at.isoformat() if self.calculated_at else None
+        }
+
+class ScoreType(db.Model):
+    """Integer-Code je Score-Typ für die kompakte Score-Historie"""
+    id = db.Column(db.SmallInteger, primary_key=True, autoincrement=False)  # vergeben in score_history._type_id
+    name = db.Column(db.String(50), unique=True, nullable=False)
+
+    def __repr__(self):
+        return f'<ScoreType {self.id}:{self.name}>'
+
+class TrendScoreSeries(db.Model):
+    """Append-only Score-Historie, blockweise kodiert (src/services/score_history.py)
+
+    Ein Block hält bis zu ``CHUNK_POINTS`` Werte einer Reihe (Content, Score-Typ,
+    Bewerter): Zeitstempel als uint32-Sekunden-Deltas zum Vorgänger ab
+    ``start_ts``, Werte als float32 (je Punkt 8 Byte).
+    """
+    content_id = db.Column(db.Integer, db.ForeignKey('content.id'), primary_key=True)
+    score_type_id = db.Column(db.SmallInteger, db.ForeignKey('score_type.id'), primary_key=True)
+    scorer_id = db.Column(db.Integer, primary_key=True, autoincrement=False)  # 0 = automatisch/ohne User
+    chunk = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    start_ts = db.Column(db.BigInteger, nullable=False)  # Unix-Sekunden (UTC) des ersten Punkts
+    end_ts = db.Column(db.BigInteger, nullable=False)  # Unix-Sekunden des letzten Punkts
+    count = db.Column(db.Integer, nullable=False)
+    deltas = db.Column(db.LargeBinary, nullable=False)  # uint32 little-endian, erster Wert 0
+    values = db.Column(db.LargeBinary, nullable=False)  # float32 little-endian
+
+    # Relationships
+    content = db.relationship('Content', backref=db.backref('score_series', lazy=True, cascade='all, delete-orphan'))
+
+    def __repr__(self):
+        return f'<TrendScoreSeries {self.content_id}/{self.score_type_id}/{self.scorer_id}#{self.chunk}>'
+
+class ScoreConsensus(db.Model):
+    """Konsens der Analysten je Content und Score-Typ (src/services/consensus.py)
+
+    Inkrementell bei jedem Score gepflegt: Anzahl, Summe und Quadratsumme für
+    Mittelwert/Varianz, dazu eine Quantil-Skizze für Median und getrimmten
+    Mittelwert.
+    """
+    __tablename__ = 'trend_score_consensus'
+    content_id = db.Column(db.Integer, db.ForeignKey('content.id'), primary_key=True)
+    score_type = db.Column(db.String(50), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Float, nullable=False, default=0.0)
+    total_sq = db.Column(db.Float, nullable=False, default=0.0)
+    sketch = db.Column(db.LargeBinary, nullable=False)  # belegte Log-Buckets, siehe QuantileSketch
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # Relationships
+    content = db.relationship('Content', backref=db.backref('score_consensus', lazy=True, cascade='all, delete-orphan'))
+
+    def __repr__(self):
+        return f'<ScoreConsensus {self.score_type}:{self.count} for Content {self.content_id}>'
+
+    def to_dict(self):
+        from src.services.consensus import statistics
+
+        return {
+            'content_id': self.content_id,
+            'score_type': self.score_type,
+            **(statistics(self) or {'count': 0}),
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+class TrendForecast(db.Model):
+    """Zwischengespeicherte Prognose einer Metrik-Reihe (src/services/forecasting.py)
+
+    ``data_points``/``last_metric_id`` halten den Stand der Reihe bei der
+    Berechnung fest; weicht er ab, wird die Prognose neu gerechnet.
+    """
+    content_id = db.Column(db.Integer, db.ForeignKey('content.id'), primary_key=True)
+    metric_type = db.Column(db.String(50), primary_key=True)
+    model = db.Column(db.String(20), nullable=False)  # 'holt', 'linear' oder 'linear_seasonal'
+    data_points = db.Column(db.Integer, nullable=False)
+    last_metric_id = db.Column(db.Integer, nullable=False)
+    last_period_start = db.Column(db.DateTime, nullable=False)
+    step_seconds = db.Column(db.BigInteger, nullable=False)  # Abstand der Perioden
+    period_seconds = db.Column(db.BigInteger, nullable=False)  # Länge einer Periode
+    level = db.Column(db.Float, nullable=False)  # Niveau der Prognoseintervalle, z.B. 0.95
+    rmse = db.Column(db.Float, nullable=False)
+    values = db.Column(db.LargeBinary, nullable=False)  # float64 little-endian, je Horizont-Schritt
+    lower = db.Column(db.LargeBinary, nullable=False)
+    upper = db.Column(db.LargeBinary, nullable=False)
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # Relationships
+    content = db.relationship('Content', backref=db.backref('forecasts', lazy=True, cascade='all, delete-orphan'))
+
+    def __repr__(self):
+        return f'<TrendForecast {self.metric_type}/{self.model} for Content {self.content_id}>'
+
+    def to_dict(self, horizon=None):
+        count = len(self.values) // 8
+        values, lower, upper = (struct.unpack(f'<{count}d', data) for data in (self.values, self.lower, self.upper))
+        points = []
+        for step in range(min(count, horizon or count)):
+            start = self.last_period_start + timedelta(seconds=self.step_seconds * (step + 1))
+            points.append({
+                'period_start': start.isoformat(),
+                'period_end': (start + timedelta(seconds=self.period_seconds)).isoformat(),
+                'value': round(values[step], 4),
+                'lower': round(lower[step], 4),
+                'upper': round(upper[step], 4)
+            })
+        return {
+            'content_id': self.content_id,
+            'metric_type': self.metric_type,
+            'model': self.model,
+            'data_points': self.data_points,
+            'level': self.level,
+            'rmse': round(self.rmse, 4),
+            'forecast': points,
+            'computed_at': self.computed_at.isoformat() if self.computed_at else None
+        }
+
+class MetricStreamState(db.Model):
+    """Zustand des Burst-Detektors je Metrik-Reihe (src/services/bursts.py)
+
+    Konstante Größe: EWMA von Mittelwert und Varianz, einseitige CUSUM-Summe.
+    """
+    __tablename__ = 'metric_stream_state'
+    content_id = db.Column(db.Integer, db.ForeignKey('content.id'), primary_key=True)
+    metric_type = db.Column(db.String(50), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    mean = db.Column(db.Float, nullable=False, default=0.0)
+    variance = db.Column(db.Float, nullable=False, default=0.0)
+    cusum = db.Column(db.Float, nullable=False, default=0.0)
+    last_period_start = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # Relationships
+    content = db.relationship('Content', backref=db.backref('stream_states', lazy=True, cascade='all, delete-orphan'))
+
+    def __repr__(self):
+        return f'<MetricStreamState {self.metric_type}:{self.count} for Content {self.content_id}>'
+
+class TrendBurst(db.Model):
+    """Erkannter Ausschlag einer Metrik-Reihe (z.B. sprunghaft steigende Mentions)"""
+    id = db.Column(db.Integer, primary_key=True)
+    content_id = db.Column(db.Integer, db.ForeignKey('content.id'), nullable=False)
+    metric_type = db.Column(db.String(50), nullable=False)
+    metric_id = db.Column(db.Integer, nullable=True)  # auslösender trend_metrics-Eintrag
+    period_start = db.Column(db.DateTime, nullable=False)
+    value = db.Column(db.Float, nullable=False)
+    baseline = db.Column(db.Float, nullable=False)  # EWMA-Mittelwert vor dem Punkt
+    stddev = db.Column(db.Float, nullable=False)
+    zscore = db.Column(db.Float, nullable=False)
+    cusum = db.Column(db.Float, nullable=False)
+    detector = db.Column(db.String(10), nullable=False)  # 'zscore' oder 'cusum'
+    alerts_triggered = db.Column(db.Integer, nullable=False, default=0)
+    detected_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_trend_burst_detected', 'detected_at'),
+        db.Index('ix_trend_burst_content', 'content_id', 'period_start'),
+    )
+
+    # Relationships
+    content = db.relationship('Content', backref=db.backref('bursts', lazy=True, cascade='all, delete-orphan'))
+
+    def __repr__(self):
+        return f'<TrendBurst {self.metric_type} z={self.zscore:.1f} for Content {self.content_id}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'content_id': self.content_id,
+            'metric_type': self.metric_type,
+            'metric_id': self.metric_id,
+            'period_start': self.period_start.isoformat() if self.period_start else None,
+            'value': self.value,
+            'baseline': round(self.baseline, 4),
+            'stddev': round(self.stddev, 4),
+            'zscore': round(self.zscore, 2),
+            'cusum': round(self.cusum, 2),
+            'detector': self.detector,
+            'alerts_triggered': self.alerts_triggered,
+            'detected_at': self.detected_at.isoformat() if self.detected_at else None
+        }
+
+class SourceState(db.Model):
+    """Abrufzustand einer externen Quelle eines Trends (src/services/source_monitor.py)"""
+    __tablename__ = 'source_state'
+    id = db.Column(db.Integer, primary_key=True)
+    content_id = db.Column(db.Integer, db.ForeignKey('content.id'), nullable=False)
+    url = db.Column(db.String(2000), nullable=False)
+    etag = db.Column(db.String(500), nullable=True)
+    last_modified = db.Column(db.String(100), nullable=True)  # Header-Wert für If-Modified-Since
+    content_hash = db.Column(db.String(40), nullable=True)  # SHA-1 des extrahierten Texts
+    sentiment = db.Column(db.Float, nullable=True)
+    status_code = db.Column(db.Integer, nullable=True)
+    check_count = db.Column(db.Integer, nullable=False, default=0)
+    change_count = db.Column(db.Integer, nullable=False, default=0)
+    error_count = db.Column(db.Integer, nullable=False, default=0)  # Fehler in Folge
+    last_error = db.Column(db.String(500), nullable=True)
+    last_checked_at = db.Column(db.DateTime, nullable=True)
+    last_changed_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.UniqueConstraint('content_id', 'url', name='uq_source_state_content_url'),
+    )
+
+    # Relationships
+    content = db.relationship('Content', backref=db.backref('source_states', lazy=True, cascade='all, delete-orphan'))
+
+    def __repr__(self):
+        return f'<SourceState {self.url} for Content {self.content_id}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'content_id': self.content_id,
+            'url': self.url,
+            'etag': self.etag,
+            'last_modified': self.last_modified,
+            'sentiment': self.sentiment,
+            'status_code': self.status_code,
+            'check_count': self.check_count,
+            'change_count': self.change_count,
+            'error_count': self.error_count,
+            'last_error': self.last_error,
+            'last_checked_at': self.last_checked_at.isoformat() if self.last_checked_at else None,
+            'last_changed_at': self.last_changed_at.isoformat() if self.last_changed_at else None
+        }
+
+class ReportJob(db.Model):
+    """Report-Auftrag und zugleich Index der Artefakte im Report-Cache (src/services/reports.py)
+
+    Die ID leitet sich aus Filter-Hash und Datenstand ab: gleiche Anfragen bei
+    unverändertem Datenstand treffen denselben Auftrag bzw. dieselbe Datei.
+    """
+    __tablename__ = 'report_job'
+    id = db.Column(db.String(32), primary_key=True)
+    filter_hash = db.Column(db.String(64), nullable=False, index=True)  # Filter, Format und Titel
+    data_version = db.Column(db.BigInteger, nullable=False)
+    format = db.Column(db.String(10), nullable=False)  # 'pdf', 'xlsx'
+    spec = db.Column(db.Text, nullable=False)  # JSON: filters, format, title
+    # Sichtbare Teams des Anfragenden, z.B. '1,4' ('' = nur Contents ohne Team, NULL = alle Teams)
+    teams = db.Column(db.Text, nullable=True)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # 'queued', 'running', 'done', 'failed'
+    row_count = db.Column(db.Integer, nullable=True)
+    size_bytes = db.Column(db.Integer, nullable=True)
+    error = db.Column(db.String(500), nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    # Wartend/laufend bis hierhin gültig; der Renderer verlängert ihn, danach gilt der Auftrag als verwaist
+    lease_until = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f'<ReportJob {self.id} {self.format} {self.status}>'
+
+    def to_dict(self):
+        spec = json.loads(self.spec)
+        return {
+            'id': self.id,
+            'format': self.format,
+            'title': spec.get('title'),
+            'filters': spec.get('filters'),
+            'data_version': self.data_version,
+            'status': self.status,
+            'row_count': self.row_count,
+            'size_bytes': self.size_bytes,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'download_url': f'/api/api/reports/{self.id}/download' if self.status == 'done' else None
+        }
+
+class AuditLog(db.Model):
+    """Protokoll aller Änderungen, write-behind geschrieben (src/services/audit.py)"""
+    __tablename__ = 'audit_log'
+    id = db.Column(db.Integer, primary_key=True)
+    event_id = db.Column(db.String(32), nullable=False, unique=True)  # macht das Nachspielen ausgelagerter Einträge idempotent
+    occurred_at = db.Column(db.DateTime, nullable=False)
+    user_id = db.Column(db.Integer, nullable=True)  # Token-Benutzer; None = anonym, Admin-Token oder Hintergrundjob
+    endpoint = db.Column(db.String(100), nullable=True)
+    action = db.Column(db.String(20), nullable=False)  # 'insert', 'update', 'delete', 'bulk_update', 'bulk_delete'
+    entity = db.Column(db.String(50), nullable=False)  # Tabellenname
+    entity_id = db.Column(db.String(64), nullable=True)  # Primärschlüssel, zusammengesetzt mit ':'
+    changes = db.Column(db.Text, nullable=True)  # JSON: Werte (insert/delete) bzw. {Spalte: [alt, neu]}
+
+    __table_args__ = (
+        db.Index('ix_audit_log_entity', 'entity', 'entity_id', 'occurred_at'),
+        db.Index('ix_audit_log_user', 'user_id', 'occurred_at'),
+        db.Index('ix_audit_log_occurred', 'occurred_at'),
+    )
+
+    def __repr__(self):
+        return f'<AuditLog {self.action} {self.entity} {self.entity_id}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'occurred_at': self.occurred_at.isoformat() if self.occurred_at else None,
+            'user_id': self.user_id,
+            'endpoint': self.endpoint,
+            'action': self.action,
+            'entity': self.entity,
+            'entity_id': self.entity_id,
+            'changes': json.loads(self.changes) if self.changes else None
+        }
@@ -1,9 +1,24 @@
+from datetime import datetime
+
 from .__init__ import db
 
+# Teams eines Benutzers (Sichtbarkeit von Contents, src/auth.py)
+team_member = db.Table(
+    'team_member',
+    db.Column('team_id', db.Integer, db.ForeignKey('team.id'), primary_key=True),
+    db.Column('user_id', db.Integer, db.ForeignKey('user.id'), primary_key=True)
+)
+
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
+    # Rolle nach Abschnitt 10: observer | analyst | manager | admin (src/auth.py)
+    role = db.Column(db.String(20), nullable=False, default='observer', server_default='observer')
+    api_token_hash = db.Column(db.String(64), nullable=True)  # SHA-256 des API-Tokens, Index per Migration
+
+    teams = db.relationship('Team', secondary=team_member, lazy=True,
+                            backref=db.backref('members', lazy=True))
 
     def __repr__(self):
         return f'<User {self.username}>'
@@ -12,5 +27,24 @@ class User(db.Model):
         return {
             'id': self.id,
             'username': self.username,
-            'email': self.email
+            'email': self.email,
+            'role': self.role
+        }
+
+class Team(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), unique=True, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<Team {self.name}>'
+
+    def to_dict(self, member_ids=None):
+        data = {
+            'id': self.id,
+            'name': self.name,
+            'created_at': self.created_at.isoformat() if self.created_at else None
         }
+        if member_ids is not None:
+            data['member_ids'] = member_ids
+        return data
@@ -0,0 +1,269 @@
+"""Prometheus-Metriken und Health-Checks.
+
+Zähler und Histogramme werden pro Thread in einem eigenen Shard (einfaches
+Dict) geführt: Ein Inkrement ist ein Dict-Update ohne Lock. Erst beim Scrape
+von ``/metrics`` werden alle Shards summiert; Shards beendeter Threads werden
+dabei in einen Sammel-Shard übernommen, damit Zähler monoton bleiben.
+Momentanwerte (Pool-Auslastung, Queue-Tiefe) liefern Collector-Funktionen,
+die erst beim Scrape aufgerufen werden.
+
+Jeder gunicorn-Worker hat eigene Zähler; ein Scrape sieht nur den Worker, der
+ihn beantwortet (``worker``-Label ist die PID).
+
+Health-Checks (``register_health_check``) melden ``(ok, detail)`` und werden
+von ``/health/deep`` ausgewertet.
+"""
+import bisect
+import os
+import threading
+import time
+
+from flask import g, request
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()  # nur für Shard-Registrierung und Scrape
+        self._shards = []  # (Thread, Shard)
+        self._retired = {}
+        self._meta = {}  # Name -> (Typ, Hilfetext, Buckets)
+        self._collectors = {}
+
+    # --- Registrierung ---
+    def counter(self, name, help_text):
+        self._meta[name] = ('counter', help_text, None)
+
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self._meta[name] = ('histogram', help_text, tuple(buckets))
+
+    def gauge(self, name, help_text):
+        self._meta[name] = ('gauge', help_text, None)
+
+    def register_collector(self, key, fn):
+        """``fn()`` liefert beim Scrape ``[(name, labels, value), ...]`` für Gauges."""
+        self._collectors[key] = fn
+
+    # --- Schreiben (lock-frei, pro Thread) ---
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    def inc(self, name, labels=(), value=1):
+        shard = self._shard()
+        key = (name, labels)
+        shard[key] = shard.get(key, 0) + value
+
+    def observe(self, name, value, labels=()):
+        shard = self._shard()
+        key = (name, labels)
+        cells = shard.get(key)
+        buckets = self._meta[name][2]
+        if cells is None:
+            # je Bucket ein Zähler, dann +Inf, Summe
+            cells = shard[key] = [0] * (len(buckets) + 1) + [0.0]
+        cells[bisect.bisect_left(buckets, value)] += 1
+        cells[-1] += value
+
+    # --- Lesen ---
+    @staticmethod
+    def _merge(target, shard):
+        for key, value in shard.items():
+            if isinstance(value, list):
+                cells = target.get(key)
+                if cells is None:
+                    target[key] = list(value)
+                else:
+                    for i, cell in enumerate(value):
+                        cells[i] += cell
+            else:
+                target[key] = target.get(key, 0) + value
+
+    def snapshot(self):
+        """Summe aller Shards: ``{(name, labels): Wert oder Histogramm-Zellen}``."""
+        with self._lock:
+            alive = []
+            for thread, shard in self._shards:
+                if thread.is_alive():
+                    alive.append((thread, shard))
+                else:
+                    self._merge(self._retired, shard.copy())
+            self._shards = alive
+            total = {}
+            self._merge(total, self._retired)
+            for _, shard in alive:
+                # dict.copy() ist unter dem GIL atomar; der Besitzer-Thread schreibt weiter
+                self._merge(total, shard.copy())
+        return total
+
+    def render(self):
+        """Prometheus-Textformat (Version 0.0.4)."""
+        values = self.snapshot()
+        gauges = {}
+        for collector in list(self._collectors.values()):
+            try:
+                for name, labels, value in collector():
+                    gauges[(name, labels)] = value
+            except Exception:
+                # ein defekter Collector darf den Scrape nicht verhindern
+                continue
+
+        by_name = {}
+        for (name, labels), value in list(values.items()) + list(gauges.items()):
+            by_name.setdefault(name, []).append((labels, value))
+
+        worker = ('worker', str(os.getpid()))
+        lines = []
+        for name in sorted(by_name):
+            kind, help_text, buckets = self._meta.get(name, ('gauge', '', None))
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for labels, value in sorted(by_name[name], key=lambda item: item[0]):
+                labels = labels + (worker,)
+                if kind == 'histogram':
+                    cumulative = 0
+                    for bound, count in zip(buckets + (float('inf'),), value[:-1]):
+                        cumulative += count
+                        le = '+Inf' if bound == float('inf') else repr(bound)
+                        lines.append(f'{name}_bucket{_labels(labels + (("le", le),))} {cumulative}')
+                    lines.append(f'{name}_sum{_labels(labels)} {value[-1]:.6f}')
+                    lines.append(f'{name}_count{_labels(labels)} {cumulative}')
+                else:
+                    lines.append(f'{name}{_labels(labels)} {_number(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    escaped = (f'{key}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+               for key, value in labels)
+    return '{' + ','.join(escaped) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+metrics = MetricsRegistry()
+metrics.counter('rei_http_requests_total', 'HTTP-Requests nach Route, Methode und Status')
+metrics.counter('rei_http_request_errors_total', 'HTTP-Requests mit Status >= 500 oder Exception')
+metrics.histogram('rei_http_request_duration_seconds', 'Dauer der HTTP-Requests nach Route')
+metrics.counter('rei_cache_requests_total', 'Zugriffe auf In-Process-Caches und -Indizes (hit/miss)')
+metrics.histogram('rei_preview_fetch_duration_seconds', 'Dauer der URL-Preview-Abrufe',
+                  buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0))
+metrics.histogram('rei_source_fetch_duration_seconds', 'Dauer der Abrufe externer Trend-Quellen nach Ergebnis',
+                  buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0))
+metrics.counter('rei_audit_entries_total', 'Audit-Einträge nach Verbleib (written, spilled_*, replayed)')
+metrics.histogram('rei_report_render_seconds', 'Dauer der Report-Erzeugung nach Format und Ergebnis',
+                  buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0))
+
+
+def cache_access(cache, hit):
+    metrics.inc('rei_cache_requests_total', (('cache', cache), ('result', 'hit' if hit else 'miss')))
+
+
+# --- Health-Checks ---
+_health_checks = {}
+
+
+def register_health_check(name, fn):
+    """``fn()`` liefert ``(ok, detail)``; wird von ``/health/deep`` aufgerufen."""
+    _health_checks[name] = fn
+
+
+def run_health_checks():
+    results = {}
+    for name, fn in _health_checks.items():
+        start = time.perf_counter()
+        try:
+            ok, detail = fn()
+        except Exception as e:
+            ok, detail = False, str(e)
+        results[name] = {'ok': bool(ok), 'detail': detail,
+                         'duration_ms': round((time.perf_counter() - start) * 1000, 2)}
+    return results
+
+
+# --- Flask-Request-Hooks ---
+def init_app(app):
+    from src.models.__init__ import db
+
+    @app.before_request
+    def _start_timer():
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def _remember_status(response):
+        g.metrics_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def _record_request(exc):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return
+        status = 500 if exc is not None else g.pop('metrics_status', 500)
+        endpoint = ('endpoint', request.endpoint or 'unmatched')
+        method = ('method', request.method)
+        metrics.observe('rei_http_request_duration_seconds', time.perf_counter() - started, (endpoint, method))
+        metrics.inc('rei_http_requests_total', (endpoint, method, ('status', str(status))))
+        if status >= 500:
+            metrics.inc('rei_http_request_errors_total', (endpoint, method))
+
+    engine = None
+    with app.app_context():
+        engine = db.engine
+
+    def pool_usage():
+        pool = engine.pool
+        if not hasattr(pool, 'checkedout'):
+            return []
+        return [
+            ('rei_db_pool_size', (), pool.size()),
+            ('rei_db_pool_checked_out', (), pool.checkedout()),
+            ('rei_db_pool_overflow', (), max(0, pool.overflow())),
+        ]
+
+    metrics.gauge('rei_db_pool_size', 'Konfigurierte Größe des DB-Pools')
+    metrics.gauge('rei_db_pool_checked_out', 'Aktuell ausgeliehene DB-Verbindungen')
+    metrics.gauge('rei_db_pool_overflow', 'Verbindungen über der Pool-Größe')
+    metrics.register_collector('db_pool', pool_usage)
+
+    def database_round_trip():
+        start = time.perf_counter()
+        with engine.connect() as connection:
+            connection.exec_driver_sql('SELECT 1')
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        limit = app.config['HEALTH_DB_MAX_MS']
+        return elapsed_ms <= limit, f'{elapsed_ms:.1f} ms (max {limit} ms)'
+
+    register_health_check('database', database_round_trip)
+
+    from src.services.write_queue import write_queue
+
+    metrics.gauge('rei_write_queue_depth', 'Wartende Mutationen in der Write-Queue')
+    metrics.register_collector('write_queue', lambda: [('rei_write_queue_depth', (), write_queue.depth())])
+
+    def writer_alive():
+        state = write_queue.state()
+        return state != 'dead', state
+
+    register_health_check('write_queue', writer_alive)
+
+    from src.services.audit import audit_trail
+
+    metrics.gauge('rei_audit_buffer_depth', 'Audit-Einträge im Puffer, noch nicht geschrieben')
+    metrics.register_collector('audit', lambda: [('rei_audit_buffer_depth', (), audit_trail.depth())])
+
+    def audit_writer_alive():
+        state = audit_trail.state()
+        return state != 'dead', state
+
+    register_health_check('audit', audit_writer_alive)
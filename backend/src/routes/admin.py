@@ -0,0 +1,102 @@
+from datetime import datetime
+from functools import wraps
+
+from flask import Blueprint, current_app, jsonify, request
+
+from src.auth import admin_allowed
+from src.instrumentation import slow_requests
+from src.models.__init__ import db
+from src.models.trend_management import AuditLog
+from src.services.audit import audit_trail
+from src.services.counters import reconcile
+from src.services.leaderboards import leaderboards
+
+admin_bp = Blueprint('admin', __name__)
+
+
+def admin_required(view):
+    """Erlaubt den Zugriff nur mit ``X-Admin-Token`` == ``ADMIN_TOKEN`` oder einem API-Token der Rolle admin."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not admin_allowed():
+            return jsonify({'error': 'Forbidden'}), 403
+        return view(*args, **kwargs)
+    return wrapper
+
+# ============================================================
+# GET/DELETE /api/admin/slow-requests – Ringpuffer langsamer Requests
+# ============================================================
+@admin_bp.get('/admin/slow-requests')
+@admin_required
+def get_slow_requests():
+    limit = request.args.get('limit', type=int)
+    return jsonify({
+        'sample_rate': current_app.config['PERF_SAMPLE_RATE'],
+        'slow_ms': current_app.config['PERF_SLOW_MS'],
+        'ring_size': current_app.config['PERF_RING_SIZE'],
+        'requests': slow_requests.entries(limit)
+    })
+
+@admin_bp.delete('/admin/slow-requests')
+@admin_required
+def clear_slow_requests():
+    slow_requests.clear()
+    return '', 204
+
+# ============================================================
+# POST /api/admin/counters/reconcile – Plattform-Zähler nachzählen
+# ?dry_run=1: nur Abweichungen melden
+# ============================================================
+@admin_bp.post('/admin/counters/reconcile')
+@admin_required
+def reconcile_counters():
+    dry_run = request.args.get('dry_run') in ('1', 'true')
+    with db.engine.connect() as connection:
+        drift = reconcile(connection, repair=not dry_run)
+        if dry_run:
+            connection.rollback()
+        else:
+            connection.commit()
+    return jsonify({'repaired': not dry_run, 'drift': drift})
+
+# ============================================================
+# POST /api/admin/leaderboards/check – Ranglisten gegen die DB prüfen
+# ?repair=1: bei Abweichungen neu aufbauen
+# ============================================================
+@admin_bp.post('/admin/leaderboards/check')
+@admin_required
+def check_leaderboards():
+    repair = request.args.get('repair') in ('1', 'true')
+    return jsonify({'repaired': repair, **leaderboards.check(repair=repair)})
+
+# ============================================================
+# GET /api/admin/audit – Änderungsprotokoll, neueste zuerst
+# ?entity=content&entity_id=42&user_id=7&action=update&since=<ISO>&before_id=<id>&limit=100
+# flush=1: vorher den Puffer schreiben (sonst bis AUDIT_FLUSH_INTERVAL Verzug)
+# ============================================================
+@admin_bp.get('/admin/audit')
+@admin_required
+def get_audit_log():
+    if request.args.get('flush') in ('1', 'true'):
+        audit_trail.flush()
+    limit = min(max(request.args.get('limit', 100, type=int), 1), 1000)
+    query = AuditLog.query
+    for key in ('entity', 'entity_id', 'action'):
+        if request.args.get(key):
+            query = query.filter(getattr(AuditLog, key) == request.args[key])
+    if request.args.get('user_id', type=int) is not None:
+        query = query.filter(AuditLog.user_id == request.args.get('user_id', type=int))
+    if request.args.get('since'):
+        try:
+            query = query.filter(AuditLog.occurred_at >= datetime.fromisoformat(request.args['since']))
+        except ValueError:
+            return jsonify({'error': 'since must be an ISO timestamp'}), 400
+    before_id = request.args.get('before_id', type=int)
+    if before_id is not None:
+        query = query.filter(AuditLog.id < before_id)
+    entries = query.order_by(AuditLog.id.desc()).limit(limit).all()
+    return jsonify({
+        'entries': [entry.to_dict() for entry in entries],
+        'next_before_id': entries[-1].id if len(entries) == limit else None,
+        'pending': audit_trail.depth()
+    })
@@ -1,22 +1,48 @@
 from flask import Blueprint, request, jsonify
 from werkzeug.utils import secure_filename
-from src.models.user import db, User
-from src.models.content import Content, Rating, Comment, OpportunitySpace
+from src import auth
+from src.auth import Permission, requires
+from src.models.user import db, User, Team
+from src.models.content import Content, Rating, Comment, OpportunitySpace, ContentSignature
+from src.models.trend_management import ContentSimilarity
+from src.services.tag_index import tag_index
+from src.services.similarity import similarity_service
+from src.services.duplicates import duplicate_index, compute_signature, content_signature
+from src.services.write_queue import write_queue, insert
+from src.services import comments
+from src.services.counters import read_counters, count_live
+from src.services.source_monitor import schedule as monitor_schedule, validate_urls
+from src.monitoring import metrics
+from src.serialization import stream_query
+from sqlalchemy.orm import selectinload
 from datetime import datetime
+import json
 import os
 import pathlib
 import re
-
-# Für URL-Preview
-import requests
-from bs4 import BeautifulSoup
+import time
 
 content_bp = Blueprint('content', __name__)
 
+# Eager Loading für Content.to_dict() in Listen (selectinload: kompatibel mit yield_per)
+CONTENT_LIST_LOADS = (
+    selectinload(Content.creator),
+    selectinload(Content.ratings),
+    selectinload(Content.comments),
+    selectinload(Content.trend_phase),
+    selectinload(Content.trend_tags),
+    selectinload(Content.trend_scores),
+)
+
 # ============================================================
 # Hilfsfunktion – einfache OpenGraph/Meta-Extraktion
 # ============================================================
 def _extract_meta(url: str):
+    # Erst hier importiert: nur die Preview-Route braucht requests/bs4 (Kaltstart)
+    import requests
+    from bs4 import BeautifulSoup
+
+    start = time.perf_counter()
     try:
         resp = requests.get(
             url,
@@ -25,6 +51,7 @@ def _extract_meta(url: str):
         )
         resp.raise_for_status()
     except Exception as e:
+        metrics.observe('rei_preview_fetch_duration_seconds', time.perf_counter() - start, (('outcome', 'error'),))
         return {
             "title": None,
             "description": None,
@@ -33,6 +60,7 @@ def _extract_meta(url: str):
             "error": str(e),
         }
 
+    metrics.observe('rei_preview_fetch_duration_seconds', time.perf_counter() - start, (('outcome', 'ok'),))
     soup = BeautifulSoup(resp.text, "html.parser")
 
     def meta(name):
@@ -45,6 +73,53 @@ def _extract_meta(url: str):
     site = meta("og:site_name")
     return {"title": title, "description": desc, "image": image, "site": site}
 
+# ============================================================
+# Hilfsfunktionen – Near-Duplicate-Prüfung (MinHash/LSH)
+# ============================================================
+def _duplicate_candidates(signature, exclude=None, limit=10):
+    found = duplicate_index.candidates(signature, exclude=exclude)
+    if not found:
+        return []
+    # Der Index kennt keine Teams: Kandidaten fremder Teams erst hier aussortieren
+    query = db.session.query(Content.id, Content.title).filter(Content.id.in_([cid for cid, _ in found]))
+    scope = auth.content_scope(Content.team_id, auth.team_ids())
+    if scope is not None:
+        query = query.filter(scope)
+    titles = dict(query)
+    return [{'content_id': cid, 'title': titles[cid], 'similarity': round(estimate, 3)}
+            for cid, estimate in found if cid in titles][:limit]
+
+def _store_signature(content, signature):
+    blob = signature.tobytes() if signature is not None else b''
+    if content.minhash is None:
+        content.minhash = ContentSignature(signature=blob)
+    else:
+        content.minhash.signature = blob
+
+def _team_error(team_id):
+    """Fehlerantwort, falls ``team_id`` ungültig oder für den Request nicht erlaubt ist"""
+    if team_id is None:
+        return None
+    if not isinstance(team_id, int) or isinstance(team_id, bool) or db.session.get(Team, team_id) is None:
+        return jsonify({'error': 'Team not found'}), 404
+    if not auth.sees_team(team_id):
+        return jsonify({'error': 'Forbidden'}), 403
+    return None
+
+# ============================================================
+# POST /api/content/duplicates – Duplikat-Prüfung vor dem Anlegen
+# ============================================================
+@content_bp.post('/content/duplicates')
+@requires(Permission.VIEW)
+def content_duplicates():
+    data = request.get_json(force=True, silent=True) or {}
+    signature = compute_signature(
+        data.get('title'),
+        data.get('summary') or data.get('short_description'),
+        data.get('long_description')
+    )
+    return jsonify({'duplicate_candidates': _duplicate_candidates(signature)}), 200
+
 # ============================================================
 # GET /api/content/preview – URL-Vorschau für das Frontend
 # ============================================================
@@ -61,6 +136,7 @@ def content_preview():
 # nimmt status: draft | approved
 # ============================================================
 @content_bp.post('/content')
+@requires(Permission.CREATE)
 def content_create_slim():
     try:
         data = request.get_json(force=True, silent=True) or {}
@@ -74,7 +150,7 @@ def content_create_slim():
         if status not in {'draft', 'approved'}:
             return jsonify({'error': 'invalid status'}), 400
 
-        created_by = data.get('created_by')
+        created_by = auth.acting_user_id(data.get('created_by'))
         user = None
         if created_by is not None:
             user = User.query.get(created_by)
@@ -90,12 +166,22 @@ def content_create_slim():
             created_by=(created_by if user else None),
             industry=None,
             time_horizon=None,
-            status=status
+            status=status,
+            team_id=data.get('team_id')
         )
+        error = _team_error(content.team_id)
+        if error:
+            return error
 
-        db.session.add(content)
-        db.session.commit()
-        return jsonify(content.to_dict()), 201
+        signature = content_signature(content)
+        duplicates = _duplicate_candidates(signature)
+        if duplicates and data.get('reject_duplicates'):
+            return jsonify({'error': 'Possible duplicate', 'duplicate_candidates': duplicates}), 409
+        _store_signature(content, signature)
+
+        created = write_queue.execute(insert, content)
+        similarity_service.update_content(created['id'])
+        return jsonify({**created, 'duplicate_candidates': duplicates}), 201
 
     except Exception as e:
         db.session.rollback()
@@ -106,6 +192,7 @@ def content_create_slim():
 # nimmt status: draft | approved
 # ============================================================
 @content_bp.post('/content/upload')
+@requires(Permission.CREATE)
 def content_upload():
     try:
         if 'file' not in request.files:
@@ -124,7 +211,7 @@ def content_upload():
             return jsonify({'error': 'invalid status'}), 400
 
         title = (request.form.get('title') or '').strip()
-        created_by = request.form.get('created_by')
+        created_by = auth.acting_user_id(request.form.get('created_by'))
         user = None
         if created_by is not None:
             try:
@@ -134,6 +221,15 @@ def content_upload():
                     return jsonify({'error': 'User not found'}), 404
             except ValueError:
                 return jsonify({'error': 'created_by must be integer'}), 400
+        team_id = request.form.get('team_id', type=int)
+        error = _team_error(team_id)
+        if error:
+            return error
+
+        signature = compute_signature(title or secure_filename(f.filename))
+        duplicates = _duplicate_candidates(signature)
+        if duplicates and request.form.get('reject_duplicates') in ('1', 'true'):
+            return jsonify({'error': 'Possible duplicate', 'duplicate_candidates': duplicates}), 409
 
         # Datei speichern – Render: /tmp ist beschreibbar
         upload_dir = pathlib.Path(os.getenv('DATA_DIR', '/tmp')) / 'uploads'
@@ -151,12 +247,15 @@ def content_upload():
             created_by=(user.id if user else None),
             industry=None,
             time_horizon=None,
-            status=status
+            status=status,
+            team_id=team_id
         )
-        db.session.add(content)
-        db.session.commit()
+        _store_signature(content, signature)
+        created = write_queue.execute(insert, content)
+        similarity_service.update_content(created['id'])
 
-        return jsonify({'ok': True, 'filename': filename, 'content': content.to_dict()}), 201
+        return jsonify({'ok': True, 'filename': filename, 'content': created,
+                        'duplicate_candidates': duplicates}), 201
 
     except Exception as e:
         db.session.rollback()
@@ -179,6 +278,10 @@ def get_contents():
         # Build query
         query = Content.query
         
+        # Team-Sichtbarkeit als Prädikat (Index ix_content_team_type_status_created)
+        scope = auth.content_scope(Content.team_id, auth.team_ids())
+        if scope is not None:
+            query = query.filter(scope)
         if content_type:
             query = query.filter(Content.content_type == content_type)
         if industry:
@@ -192,17 +295,20 @@ def get_contents():
                 Content.long_description.contains(search)
             )
         
-        contents = query.order_by(Content.created_at.desc()).all()
-        return jsonify([content.to_dict() for content in contents])
+        # Beziehungen für to_dict() batchweise laden statt pro Content (N+1)
+        query = query.options(*CONTENT_LIST_LOADS)
+        return stream_query(query.order_by(Content.created_at.desc()))
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @content_bp.route('/contents', methods=['POST'])
+@requires(Permission.CREATE)
 def create_content():
     """Create new content"""
     try:
         data = request.get_json()
+        auth.bind_acting_user(data, 'created_by')
         
         # Validate required fields
         required_fields = ['title', 'content_type', 'created_by']
@@ -230,13 +336,31 @@ def create_content():
             created_by=data['created_by'],
             industry=data.get('industry'),
             time_horizon=data.get('time_horizon'),
-            status=data.get('status', 'draft')
+            status=data.get('status', 'draft'),
+            team_id=data.get('team_id')
         )
+        error = _team_error(content.team_id)
+        if error:
+            return error
+        if data.get('external_source_urls'):
+            try:
+                content.external_source_urls = json.dumps(validate_urls(data['external_source_urls']))
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+        
+        # Near-Duplicate-Prüfung (optional ablehnen statt nur melden)
+        signature = content_signature(content)
+        duplicates = _duplicate_candidates(signature)
+        if duplicates and data.get('reject_duplicates'):
+            return jsonify({'error': 'Possible duplicate', 'duplicate_candidates': duplicates}), 409
+        _store_signature(content, signature)
         
-        db.session.add(content)
-        db.session.commit()
+        created = write_queue.execute(insert, content)
+        similarity_service.update_content(created['id'])
+        if content.external_source_urls:
+            monitor_schedule.invalidate()
         
-        return jsonify(content.to_dict()), 201
+        return jsonify({**created, 'duplicate_candidates': duplicates}), 201
     
     except Exception as e:
         db.session.rollback()
@@ -253,54 +377,104 @@ def get_content(content_id):
         return jsonify({'error': str(e)}), 500
 
 @content_bp.route('/contents/<int:content_id>', methods=['PUT'])
+@requires(Permission.EDIT_OWN)
 def update_content(content_id):
     """Update existing content"""
     try:
         content = Content.query.get_or_404(content_id)
+        if not auth.may_edit(content):
+            return jsonify({'error': 'Forbidden'}), 403
         data = request.get_json()
         
         # Update fields if provided
-        if 'title' in data:
-            content.title = data['title']
-        if 'short_description' in data:
-            content.short_description = data['short_description']
-        if 'long_description' in data:
-            content.long_description = data['long_description']
-        if 'image_url' in data:
-            content.image_url = data['image_url']
-        if 'industry' in data:
-            content.industry = data['industry']
-        if 'time_horizon' in data:
-            content.time_horizon = data['time_horizon']
-        if 'status' in data:
-            content.status = data['status']
+        changes = {field: data[field] for field in UPDATABLE_FIELDS if field in data}
+        if 'external_source_urls' in data:
+            try:
+                urls = validate_urls(data['external_source_urls'] or [])
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            changes['external_source_urls'] = json.dumps(urls) if urls else None
+        if 'team_id' in data:
+            error = _team_error(data['team_id'])
+            if error:
+                return error
+            changes['team_id'] = data['team_id']
         
-        db.session.commit()
-        return jsonify(content.to_dict())
+        updated = write_queue.execute(_update_content, content_id, changes)
+        if updated is None:
+            return jsonify({'error': 'Content not found'}), 404
+        if TEXT_FIELDS & changes.keys():
+            similarity_service.update_content(content_id)
+        if 'external_source_urls' in data:
+            monitor_schedule.invalidate()
+        return jsonify(updated)
     
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+UPDATABLE_FIELDS = ('title', 'short_description', 'long_description', 'image_url', 'industry',
+                    'time_horizon', 'status')
+TEXT_FIELDS = {'title', 'short_description', 'long_description'}
+
+def _update_content(session, content_id, changes):
+    content = session.get(Content, content_id)
+    if content is None:
+        return None
+    for field, value in changes.items():
+        setattr(content, field, value)
+    if TEXT_FIELDS & changes.keys():
+        _store_signature(content, content_signature(content))
+    session.flush()
+    return content.to_dict()
+
 @content_bp.route('/contents/<int:content_id>', methods=['DELETE'])
+@requires(Permission.DELETE)
 def delete_content(content_id):
     """Delete content"""
     try:
-        content = Content.query.get_or_404(content_id)
-        db.session.delete(content)
-        db.session.commit()
+        Content.query.get_or_404(content_id)
+        write_queue.execute(_delete_content, content_id)
+        tag_index.remove_content(content_id)
+        similarity_service.remove_content(content_id)
         return jsonify({'message': 'Content deleted successfully'})
     
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+def _delete_content(session, content_id):
+    content = session.get(Content, content_id)
+    if content is not None:
+        session.delete(content)
+
+@content_bp.route('/contents/<int:content_id>/similar', methods=['GET'])
+def get_similar_contents(content_id):
+    """Get precomputed most similar contents (TF-IDF) for specific content"""
+    try:
+        Content.query.get_or_404(content_id)
+        limit = request.args.get('limit', 10, type=int)
+        neighbours = ContentSimilarity.query.options(
+            db.joinedload(ContentSimilarity.similar).load_only(Content.title, Content.content_type),
+            db.defaultload(ContentSimilarity.similar).lazyload(Content.trend_tags)
+        ).filter_by(content_id=content_id)
+        visible = auth.visible_content_filter(ContentSimilarity.similar_id)
+        if visible is not None:
+            neighbours = neighbours.filter(visible)
+        neighbours = neighbours.order_by(ContentSimilarity.rank).limit(limit).all()
+        return jsonify([neighbour.to_dict() for neighbour in neighbours])
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @content_bp.route('/contents/<int:content_id>/ratings', methods=['POST'])
+@requires(Permission.RATE)
 def rate_content(content_id):
     """Rate content"""
     try:
         content = Content.query.get_or_404(content_id)
         data = request.get_json()
+        auth.bind_acting_user(data, 'user_id')
         
         # Validate required fields
         if 'user_id' not in data or 'value' not in data:
@@ -315,74 +489,119 @@ def rate_content(content_id):
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
-        # Check if user already rated this content
-        existing_rating = Rating.query.filter_by(
-            content_id=content_id, 
-            user_id=data['user_id'],
-            criteria=data.get('criteria')
-        ).first()
-        
-        if existing_rating:
-            # Update existing rating
-            existing_rating.value = data['value']
-            rating = existing_rating
-        else:
-            # Create new rating
-            rating = Rating(
-                content_id=content_id,
-                user_id=data['user_id'],
-                value=data['value'],
-                criteria=data.get('criteria')
-            )
-            db.session.add(rating)
-        
-        db.session.commit()
-        return jsonify(rating.to_dict()), 201
+        # Upsert läuft im Writer-Thread (Group Commit), siehe _upsert_rating
+        rating = write_queue.execute(_upsert_rating, content_id, data['user_id'], data['value'], data.get('criteria'))
+        return jsonify(rating), 201
     
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+def _upsert_rating(session, content_id, user_id, value, criteria):
+    # Check if user already rated this content
+    rating = session.query(Rating).filter_by(
+        content_id=content_id,
+        user_id=user_id,
+        criteria=criteria
+    ).first()
+    
+    if rating:
+        # Update existing rating
+        rating.value = value
+    else:
+        # Create new rating
+        rating = Rating(content_id=content_id, user_id=user_id, value=value, criteria=criteria)
+        session.add(rating)
+    
+    session.flush()
+    return rating.to_dict()
+
 @content_bp.route('/contents/<int:content_id>/comments', methods=['POST'])
+@requires(Permission.COMMENT)
 def comment_content(content_id):
-    """Comment on content"""
+    """Comment on content (parent_id: Antwort auf einen Kommentar desselben Contents)"""
     try:
         content = Content.query.get_or_404(content_id)
         data = request.get_json()
+        auth.bind_acting_user(data, 'user_id')
         
         # Validate required fields
         if 'user_id' not in data or 'text' not in data:
             return jsonify({'error': 'Missing required fields: user_id, text'}), 400
+        parent_id = data.get('parent_id')
+        if parent_id is not None and (not isinstance(parent_id, int) or isinstance(parent_id, bool)):
+            return jsonify({'error': 'parent_id must be an integer'}), 400
         
         # Check if user exists
         user = User.query.get(data['user_id'])
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
-        # Create new comment
-        comment = Comment(
-            content_id=content_id,
-            user_id=data['user_id'],
-            text=data['text']
-        )
-        
-        db.session.add(comment)
-        db.session.commit()
+        # Create new comment (im Writer-Thread, erhöht reply_count des Elternkommentars)
+        comment = write_queue.execute(comments.insert, content_id, user.id, data['text'], parent_id, user.username)
         
-        return jsonify(comment.to_dict()), 201
+        return jsonify(comment), 201
     
+    except LookupError as e:
+        return jsonify({'error': str(e)}), 404
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+def _comment_page_args():
+    limit = request.args.get('limit', comments.DEFAULT_LIMIT, type=int)
+    return min(max(limit, 1), comments.MAX_LIMIT), request.args.get('cursor') or None
+
 @content_bp.route('/contents/<int:content_id>/comments', methods=['GET'])
 def get_content_comments(content_id):
-    """Get comments for specific content"""
+    """Kommentare eines Contents, neueste zuerst, seitenweise per Cursor
+
+    ?limit=50&cursor=<next_cursor>; threaded=1: nur oberste Ebene (mit reply_count),
+    replies=N: zusätzlich die ersten N Antworten je Kommentar
+    """
     try:
-        content = Content.query.get_or_404(content_id)
-        comments = Comment.query.filter_by(content_id=content_id).order_by(Comment.created_at.desc()).all()
-        return jsonify([comment.to_dict() for comment in comments])
+        if db.session.query(Content.id).filter_by(id=content_id).first() is None:
+            return jsonify({'error': 'Content not found'}), 404
+        limit, cursor = _comment_page_args()
+        threaded = request.args.get('threaded') in ('1', 'true')
+        criteria = [Comment.content_id == content_id]
+        if threaded:
+            criteria.append(Comment.parent_id.is_(None))
+        page, next_cursor = comments.page(db.session, criteria, limit, cursor)
+        replies = {}
+        if threaded:
+            per_parent = min(request.args.get('replies', 0, type=int), comments.MAX_REPLIES)
+            replies = comments.first_replies(db.session, [c.id for c in page if c.reply_count], per_parent)
+        return jsonify({
+            'comments': comments.serialize(db.session, page, replies),
+            'next_cursor': next_cursor,
+            'limit': limit
+        })
+    
+    except comments.CursorError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@content_bp.route('/comments/<int:comment_id>/replies', methods=['GET'])
+def get_comment_replies(comment_id):
+    """Antworten auf einen Kommentar, älteste zuerst, seitenweise per Cursor (?limit&cursor)"""
+    try:
+        found = db.session.query(Content.team_id).join(Comment, Comment.content_id == Content.id).filter(
+            Comment.id == comment_id).first()
+        if found is None or not auth.sees_team(found.team_id):
+            return jsonify({'error': 'Comment not found'}), 404
+        limit, cursor = _comment_page_args()
+        page, next_cursor = comments.page(db.session, [Comment.parent_id == comment_id], limit, cursor,
+                                          descending=False)
+        return jsonify({
+            'comments': comments.serialize(db.session, page),
+            'next_cursor': next_cursor,
+            'limit': limit
+        })
     
+    except comments.CursorError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -397,10 +616,12 @@ def get_opportunity_spaces():
         return jsonify({'error': str(e)}), 500
 
 @content_bp.route('/opportunity-spaces', methods=['POST'])
+@requires(Permission.CREATE)
 def create_opportunity_space():
     """Create new opportunity space"""
     try:
         data = request.get_json()
+        auth.bind_acting_user(data, 'created_by')
         
         # Validate required fields
         required_fields = ['title', 'created_by']
@@ -420,10 +641,7 @@ def create_opportunity_space():
             created_by=data['created_by']
         )
         
-        db.session.add(space)
-        db.session.commit()
-        
-        return jsonify(space.to_dict()), 201
+        return jsonify(write_queue.execute(insert, space)), 201
     
     except Exception as e:
         db.session.rollback()
@@ -433,15 +651,8 @@ def create_opportunity_space():
 def get_stats():
     """Get platform statistics"""
     try:
-        stats = {
-            'total_contents': Content.query.count(),
-            'trends': Content.query.filter_by(content_type='trend').count(),
-            'technologies': Content.query.filter_by(content_type='technology').count(),
-            'inspirations': Content.query.filter_by(content_type='inspiration').count(),
-            'total_ratings': Rating.query.count(),
-            'total_comments': Comment.query.count(),
-            'opportunity_spaces': OpportunitySpace.query.count()
-        }
+        # Eine Abfrage auf platform_counter statt COUNT(*) je Tabelle (src/services/counters.py)
+        stats = read_counters(db.session) or count_live(db.session)
         return jsonify(stats)
     
     except Exception as e:
@@ -0,0 +1,32 @@
+from flask import Blueprint, Response, current_app, jsonify, request
+
+from src.monitoring import metrics, run_health_checks
+
+monitoring_bp = Blueprint('monitoring', __name__)
+
+# ============================================================
+# GET /health – Liveness (ohne Abhängigkeiten, für Load-Balancer)
+# ============================================================
+@monitoring_bp.get('/health')
+def health():
+    return {"status": "ok"}
+
+# ============================================================
+# GET /health/deep – Readiness: DB-Roundtrip, Writer-Thread, weitere Checks
+# 200 wenn alle Checks ok, sonst 503
+# ============================================================
+@monitoring_bp.get('/health/deep')
+def health_deep():
+    checks = run_health_checks()
+    healthy = all(check['ok'] for check in checks.values())
+    return jsonify({'status': 'ok' if healthy else 'degraded', 'checks': checks}), 200 if healthy else 503
+
+# ============================================================
+# GET /metrics – Prometheus-Textformat (optional mit METRICS_TOKEN als Bearer)
+# ============================================================
+@monitoring_bp.get('/metrics')
+def prometheus_metrics():
+    token = current_app.config.get('METRICS_TOKEN')
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return jsonify({'error': 'Forbidden'}), 403
+    return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -1,12 +1,27 @@
-from flask import Blueprint, request, jsonify
-from src.models.user import db
+from flask import Blueprint, abort, current_app, request, jsonify, send_file
+from src import auth
+from src.auth import Permission, requires
+from src.models.user import db, User
 from src.models.content import Content
 from src.models.trend_management import (
     TrendPhase, TrendScore, TrendAlert, TrendCorrelation, 
-    TrendHistory, TrendMetrics, TrendTag
+    TrendHistory, TrendMetrics, TrendTag, ScoreConsensus, TrendBurst, SourceState, ReportJob
 )
+from src.services.tag_index import tag_index, TagQueryError
+from src.services.similarity import similarity_service
+from src.services.duplicates import duplicate_index, backfill_signatures
+from src.services.write_queue import write_queue, insert
+from src.services.leaderboards import leaderboards, SCOPES
+from src.services import (bursts, consensus, forecasting, reports, score_history, sentiment, source_monitor,
+                          trend_search)
+from src.serialization import stream_query
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 from datetime import datetime, timedelta
+from itertools import islice
 import json
+import math
+import os
 
 trend_bp = Blueprint('trend', __name__)
 
@@ -18,6 +33,7 @@ def get_trend_phases():
     return jsonify([phase.to_dict() for phase in phases])
 
 @trend_bp.route('/api/trend-phases', methods=['POST'])
+@requires(Permission.MANAGE)
 def create_trend_phase():
     """Neue Trend-Phase erstellen"""
     data = request.get_json()
@@ -29,10 +45,7 @@ def create_trend_phase():
         color=data.get('color', '#6B7280')
     )
     
-    db.session.add(phase)
-    db.session.commit()
-    
-    return jsonify(phase.to_dict()), 201
+    return jsonify(write_queue.execute(insert, phase)), 201
 
 # Trend Scoring
 @trend_bp.route('/api/contents/<int:content_id>/scores', methods=['GET'])
@@ -43,23 +56,33 @@ def get_content_scores(content_id):
     return jsonify([score.to_dict() for score in scores])
 
 @trend_bp.route('/api/contents/<int:content_id>/scores', methods=['POST'])
+@requires(Permission.SCORE)
 def create_content_score(content_id):
     """Neuen Score für Content erstellen"""
     content = Content.query.get_or_404(content_id)
     data = request.get_json()
+    auth.bind_acting_user(data, 'calculated_by')
+    
+    # Upsert und Priority-Neuberechnung in einer Transaktion (Writer-Thread)
+    score = write_queue.execute(_upsert_score, content_id, data)
+    
+    return jsonify(score), 201
+
+def _upsert_score(session, content_id, data):
+    content = session.get(Content, content_id)
     
     # Prüfen ob bereits ein Score dieses Typs existiert
-    existing_score = TrendScore.query.filter_by(
+    score = session.query(TrendScore).filter_by(
         content_id=content_id,
         score_type=data['score_type'],
         calculated_by=data.get('calculated_by')
     ).first()
     
-    if existing_score:
+    previous = score.value if score else None
+    if score:
         # Score aktualisieren
-        existing_score.value = data['value']
-        existing_score.calculated_at = datetime.utcnow()
-        score = existing_score
+        score.value = data['value']
+        score.calculated_at = datetime.utcnow()
     else:
         # Neuen Score erstellen
         score = TrendScore(
@@ -69,43 +92,326 @@ def create_content_score(content_id):
             calculated_by=data.get('calculated_by'),
             is_automatic=data.get('is_automatic', False)
         )
-        db.session.add(score)
+        session.add(score)
+    session.flush()
     
-    db.session.commit()
+    # Verlauf append-only mitschreiben (trend_score hält nur den aktuellen Wert)
+    score_history.append(session, content_id, score.score_type, score.value, score.calculated_by,
+                         at=score.calculated_at)
+    # Konsens je Score-Typ inkrementell nachführen (überschriebener Wert fällt heraus)
+    consensus.record(session, content, score.score_type, score.value, previous)
     
     # Priority Score neu berechnen
     content.update_priority_score()
-    db.session.commit()
+    session.flush()
     
-    return jsonify(score.to_dict()), 201
+    return score.to_dict()
+
+MAX_SCORE_BATCH = 5000
+
+@trend_bp.route('/api/trends/scores/batch', methods=['POST'])
+@requires(Permission.SCORE)
+def create_scores_batch():
+    """Viele Scores in einer Transaktion: {"scores": [{content_id, score_type, value, calculated_by, is_automatic}]}
+
+    Ergebnis je Eintrag in derselben Reihenfolge (created/updated/error);
+    fehlerhafte Einträge werden übersprungen, der Rest wird geschrieben.
+    """
+    data = request.get_json(silent=True) or {}
+    items = data.get('scores')
+    if not isinstance(items, list) or not items or len(items) > MAX_SCORE_BATCH:
+        return jsonify({'error': f'scores must be a list of 1 to {MAX_SCORE_BATCH} entries'}), 400
+    
+    results = [None] * len(items)
+    parsed = {}
+    for index, item in enumerate(items):
+        try:
+            if not isinstance(item, dict):
+                raise TypeError('expected an object')
+            claimed = item.get('calculated_by')
+            if claimed is not None and (not isinstance(claimed, int) or isinstance(claimed, bool)):
+                raise ValueError('calculated_by must be a user id')
+            score = {
+                'content_id': int(item['content_id']),
+                'score_type': str(item['score_type']).strip(),
+                'value': float(item['value']),
+                'calculated_by': auth.acting_user_id(claimed),
+                'is_automatic': bool(item.get('is_automatic', False))
+            }
+            if not score['score_type'] or len(score['score_type']) > 50:
+                raise ValueError('score_type must have 1 to 50 characters')
+            if not math.isfinite(score['value']):
+                raise ValueError('value must be a finite number')
+        except (KeyError, TypeError, ValueError) as e:
+            results[index] = {'index': index, 'status': 'error', 'error': f'invalid score: {e}'}
+            continue
+        parsed[index] = score
+    
+    # Contents (inkl. Team-Sichtbarkeit) und Bewerter mit je einer Abfrage prüfen
+    content_ids = sorted({score['content_id'] for score in parsed.values()})
+    query = db.select(Content.id).where(Content.id.in_(content_ids))
+    scope = auth.content_scope(Content.team_id, auth.team_ids())
+    if scope is not None:
+        query = query.where(scope)  # Contents fremder Teams gelten als unbekannt
+    known_contents = set(db.session.execute(query).scalars())
+    user_ids = sorted({score['calculated_by'] for score in parsed.values() if score['calculated_by'] is not None})
+    known_users = set(db.session.execute(db.select(User.id).where(User.id.in_(user_ids))).scalars())
+    valid = []
+    for index, score in parsed.items():
+        if score['content_id'] not in known_contents:
+            results[index] = {'index': index, 'status': 'error', 'error': 'Content not found'}
+        elif score['calculated_by'] is not None and score['calculated_by'] not in known_users:
+            results[index] = {'index': index, 'status': 'error', 'error': 'User not found'}
+        else:
+            valid.append((index, score))
+    
+    priorities = {}
+    if valid:
+        written, priorities = write_queue.execute(_upsert_scores, [score for _, score in valid])
+        for (index, _), result in zip(valid, written):
+            results[index] = {'index': index, **result}
+    counts = {status: sum(1 for result in results if result['status'] == status)
+              for status in ('created', 'updated', 'error')}
+    status = 400 if not valid else (201 if not counts['error'] else 207)
+    return jsonify({'results': results, **counts, 'priority_scores': priorities}), status
+
+def _upsert_scores(session, items):
+    """Batch-Variante von ``_upsert_score``: Scores, Historie und Konsens mit je einer Abfrage
+    vorladen, in wenigen Statements schreiben, Priority je Content einmal neu berechnen."""
+    now = datetime.utcnow()
+    content_ids = sorted({item['content_id'] for item in items})
+    contents = {content.id: content for content in session.query(Content).filter(Content.id.in_(content_ids))}
+    existing = {}
+    for score in session.query(TrendScore).filter(
+            TrendScore.content_id.in_(content_ids),
+            TrendScore.score_type.in_(sorted({item['score_type'] for item in items}))).order_by(TrendScore.id):
+        existing.setdefault((score.content_id, score.score_type, score.calculated_by), score)
+    
+    written, created, changes, points = [], {}, [], []
+    for item in items:
+        if item['content_id'] not in contents:
+            written.append({'status': 'error', 'error': 'Content not found'})  # zwischenzeitlich gelöscht
+            continue
+        key = (item['content_id'], item['score_type'], item['calculated_by'])
+        # Mehrfach genannte Scores wirken nacheinander wie einzelne Requests
+        if key in existing:
+            score = existing[key]
+            previous, score.value, score.calculated_at = score.value, item['value'], now
+        elif key in created:
+            score = created[key]
+            previous, score['value'] = score['value'], item['value']
+        else:
+            score = created[key] = {**item, 'calculated_at': now}
+            previous = None
+        written.append({'status': 'updated' if previous is not None else 'created', 'score': score})
+        changes.append((item['content_id'], item['score_type'], item['value'], previous))
+        points.append((item['content_id'], item['score_type'], item['value'], item['calculated_by'], now))
+    if not changes:
+        return written, {}
+    
+    if created:
+        # Core-Insert ohne sort_by_parameter_order: SQLite schreibt sonst Zeile für Zeile;
+        # IDs über den Schlüssel zuordnen (je Schlüssel höchstens eine neue Zeile)
+        table = TrendScore.__table__
+        for score_id, content_id, score_type, calculated_by in session.execute(
+                table.insert().returning(table.c.id, table.c.content_id, table.c.score_type, table.c.calculated_by),
+                list(created.values())):
+            created[(content_id, score_type, calculated_by)]['id'] = score_id
+    session.flush()
+    
+    score_history.append_many(session, points)
+    touched = {content_id: contents[content_id] for content_id, _, _, _ in changes}
+    consensus.record_many(session, touched, changes)
+    priorities = {content_id: content.update_priority_score() for content_id, content in touched.items()}
+    session.flush()
+    
+    # Bewerter mit einer Abfrage statt je Score (calculator in to_dict())
+    calculators = {user.id: user for user in session.query(User).filter(User.id.in_(
+        sorted({item['calculated_by'] for item in items if item['calculated_by'] is not None})))}
+    for result in written:
+        if 'score' in result:
+            score = result['score']
+            if isinstance(score, dict):
+                score = TrendScore(**score)  # nur zur Ausgabe, nicht in der Session
+            set_committed_value(score, 'calculator', calculators.get(score.calculated_by))
+            result['score'] = score.to_dict()
+    return written, priorities
+
+# Score-Historie (append-only, src/services/score_history.py)
+MAX_HISTORY_CONTENTS = 500
+
+@trend_bp.route('/api/contents/<int:content_id>/score-history', methods=['GET'])
+def get_content_score_history(content_id):
+    """Score-Verlauf eines Contents (optional verdichtet)"""
+    Content.query.get_or_404(content_id)
+    return _score_history_response([content_id])
+
+@trend_bp.route('/api/trends/score-history', methods=['GET'])
+def get_trends_score_history():
+    """Score-Verläufe mehrerer Trends: ?content_ids=1,2,3"""
+    try:
+        content_ids = [int(cid) for cid in request.args.get('content_ids', '').split(',') if cid.strip()]
+    except ValueError:
+        return jsonify({'error': 'content_ids must be a comma-separated list of integers'}), 400
+    if not content_ids or len(content_ids) > MAX_HISTORY_CONTENTS:
+        return jsonify({'error': f'content_ids must contain 1 to {MAX_HISTORY_CONTENTS} ids'}), 400
+    # Contents fremder Teams fehlen in der Antwort wie unbekannte IDs
+    visible = auth.visible_content_ids(db.session, content_ids)
+    return _score_history_response([content_id for content_id in content_ids if content_id in visible])
+
+def _score_history_response(content_ids):
+    """Gemeinsame Parameter: score_types, calculated_by, start, end, points, agg"""
+    score_types = [t.strip() for t in request.args.get('score_types', '').split(',') if t.strip()]
+    agg = request.args.get('agg', 'mean')
+    points = request.args.get('points', type=int)
+    if agg not in score_history.AGGREGATES:
+        return jsonify({'error': f'agg must be one of {list(score_history.AGGREGATES)}'}), 400
+    if points is not None and points < 1:
+        return jsonify({'error': 'points must be positive'}), 400
+    try:
+        start = datetime.fromisoformat(request.args['start']) if request.args.get('start') else None
+        end = datetime.fromisoformat(request.args['end']) if request.args.get('end') else None
+    except ValueError:
+        return jsonify({'error': 'start/end must be ISO timestamps'}), 400
+    
+    series = score_history.trajectories(
+        db.session.connection(), content_ids, score_types=score_types or None,
+        calculated_by=request.args.get('calculated_by', type=int), start=start, end=end, points=points, agg=agg)
+    return jsonify({
+        'contents': {str(content_id): series[content_id] for content_id in content_ids if content_id in series},
+        'points': points,
+        'agg': agg
+    })
+
+# Konsens der Analysten (src/services/consensus.py)
+@trend_bp.route('/api/contents/<int:content_id>/consensus', methods=['GET'])
+def get_content_consensus(content_id):
+    """Konsens und Streuung der Scores je Score-Typ"""
+    content = Content.query.get_or_404(content_id)
+    rows = ScoreConsensus.query.filter_by(content_id=content_id).order_by(ScoreConsensus.score_type).all()
+    mode = current_app.config.get('PRIORITY_AGGREGATION', consensus.DEFAULT_AGGREGATION)
+    return jsonify({
+        'content_id': content_id,
+        'aggregation': mode,
+        'priority_score': content.priority_score,
+        'score_types': [row.to_dict() for row in rows]
+    })
+
+@trend_bp.route('/api/trends/consensus/disagreements', methods=['GET'])
+def get_consensus_disagreements():
+    """Content/Score-Typ-Paare mit der größten Uneinigkeit zur Überprüfung"""
+    score_type = request.args.get('score_type')
+    min_count = max(2, request.args.get('min_count', 3, type=int))
+    limit = min(max(1, request.args.get('limit', 50, type=int)), 500)
+    
+    # Varianz aus Summe und Quadratsumme direkt in SQL sortieren
+    variance = (ScoreConsensus.total_sq - ScoreConsensus.total * ScoreConsensus.total / ScoreConsensus.count) \
+        / ScoreConsensus.count
+    query = ScoreConsensus.query.options(selectinload(ScoreConsensus.content)) \
+        .filter(ScoreConsensus.count >= min_count)
+    if score_type:
+        query = query.filter(ScoreConsensus.score_type == score_type)
+    visible = auth.visible_content_filter(ScoreConsensus.content_id)
+    if visible is not None:
+        query = query.filter(visible)
+    rows = query.order_by(variance.desc(), ScoreConsensus.content_id).limit(limit).all()
+    
+    return jsonify([{
+        **row.to_dict(),
+        'title': row.content.title,
+        'content_type': row.content.content_type
+    } for row in rows])
+
+# Ranglisten (src/services/leaderboards.py)
+def _contents_in_order(content_ids):
+    """Lädt Contents per ID und behält die Reihenfolge der Rangliste bei"""
+    if not content_ids:
+        return []
+    contents = {content.id: content for content in Content.query.filter(Content.id.in_(content_ids))}
+    return [contents[content_id] for content_id in content_ids if content_id in contents]
+
+@trend_bp.route('/api/trends/leaderboard', methods=['GET'])
+def get_trend_leaderboard():
+    """Top-Trends global bzw. je Phase (key=phase_id), Branche (key=Name) oder Tag (key=tag_id)"""
+    scope = request.args.get('scope', 'global')
+    key = request.args.get('key')
+    limit = min(max(1, request.args.get('limit', 10, type=int)), 500)
+    offset = max(0, request.args.get('offset', 0, type=int))
+    if scope not in SCOPES:
+        return jsonify({'error': f'scope must be one of {list(SCOPES)}'}), 400
+    if scope != 'global' and not key:
+        return jsonify({'error': f'key is required for scope {scope}'}), 400
+    if scope in ('phase', 'tag'):
+        if not key.isdigit():
+            return jsonify({'error': 'key must be an integer id'}), 400
+        key = int(key)
+    
+    total, items = leaderboards.top(scope, key, limit=limit, offset=offset, teams=auth.team_ids())
+    titles = dict(db.session.execute(
+        db.select(Content.id, Content.title).where(Content.id.in_([content_id for content_id, _ in items]))
+    ).all()) if items else {}
+    return jsonify({
+        'scope': scope,
+        'key': None if scope == 'global' else key,
+        'total': total,
+        'entries': [{
+            'rank': offset + position + 1,
+            'content_id': content_id,
+            'title': titles.get(content_id),
+            'priority_score': score
+        } for position, (content_id, score) in enumerate(items)]
+    })
+
+@trend_bp.route('/api/contents/<int:content_id>/rank', methods=['GET'])
+def get_content_rank(content_id):
+    """Rang eines Trends in allen Ranglisten, in denen er vorkommt"""
+    Content.query.get_or_404(content_id)
+    ranks = leaderboards.ranks(content_id, teams=auth.team_ids())
+    if ranks is None:
+        return jsonify({'error': 'Content is not a trend'}), 404
+    return jsonify({
+        'content_id': content_id,
+        'ranks': [{'scope': scope, 'key': key, **rank} for (scope, key), rank in ranks.items()]
+    })
 
 # Trend Analytics
 @trend_bp.route('/api/trends/analytics/dashboard', methods=['GET'])
 def get_trend_dashboard():
     """Dashboard-Daten für Trendanalyse"""
+    # Alle Kennzahlen nur über die für den Request sichtbaren Teams
+    teams = auth.team_ids()
+    scope = auth.content_scope(Content.team_id, teams)
+    
     # Trend-Verteilung nach Phasen
+    phase_join = TrendPhase.id == Content.trend_phase_id
     phase_distribution = db.session.query(
         TrendPhase.name,
         db.func.count(Content.id).label('count')
-    ).outerjoin(Content).group_by(TrendPhase.id, TrendPhase.name).all()
+    ).outerjoin(Content, phase_join if scope is None else db.and_(phase_join, scope)) \
+        .group_by(TrendPhase.id, TrendPhase.name).all()
     
-    # Top-Trends nach Priority Score
-    top_trends = Content.query.filter(
-        Content.content_type == 'trend'
-    ).order_by(Content.priority_score.desc()).limit(10).all()
+    # Top-Trends nach Priority Score (In-Memory-Rangliste statt ORDER BY über die Tabelle)
+    _, top = leaderboards.top('global', limit=10, teams=teams)
+    top_trends = _contents_in_order([content_id for content_id, _ in top])
     
     # Trend-Aktivität der letzten 30 Tage
     thirty_days_ago = datetime.utcnow() - timedelta(days=30)
     recent_activity = Content.query.filter(
         Content.content_type == 'trend',
         Content.created_at >= thirty_days_ago
-    ).count()
+    )
+    if scope is not None:
+        recent_activity = recent_activity.filter(scope)
+    recent_activity = recent_activity.count()
     
     # Durchschnittliche Scores
     avg_scores = db.session.query(
         TrendScore.score_type,
         db.func.avg(TrendScore.value).label('avg_value')
-    ).group_by(TrendScore.score_type).all()
+    )
+    if scope is not None:
+        avg_scores = avg_scores.join(Content, Content.id == TrendScore.content_id).filter(scope)
+    avg_scores = avg_scores.group_by(TrendScore.score_type).all()
     
     return jsonify({
         'phase_distribution': [{'name': name, 'count': count} for name, count in phase_distribution],
@@ -118,13 +424,18 @@ def get_trend_dashboard():
 @trend_bp.route('/api/trends/correlations', methods=['GET'])
 def get_trend_correlations():
     """Trend-Korrelationen abrufen"""
-    correlations = TrendCorrelation.query.filter(
-        TrendCorrelation.correlation_strength.isnot(None)
-    ).order_by(TrendCorrelation.correlation_strength.desc()).limit(50).all()
+    query = TrendCorrelation.query.filter(TrendCorrelation.correlation_strength.isnot(None))
+    # Nur Paare, deren beide Trends sichtbar sind
+    for column in (TrendCorrelation.trend_a_id, TrendCorrelation.trend_b_id):
+        visible = auth.visible_content_filter(column)
+        if visible is not None:
+            query = query.filter(visible)
+    correlations = query.order_by(TrendCorrelation.correlation_strength.desc()).limit(50).all()
     
     return jsonify([corr.to_dict() for corr in correlations])
 
 @trend_bp.route('/api/trends/correlations', methods=['POST'])
+@requires(Permission.SCORE)
 def create_trend_correlation():
     """Neue Trend-Korrelation erstellen"""
     data = request.get_json()
@@ -137,16 +448,17 @@ def create_trend_correlation():
         confidence_score=data.get('confidence_score')
     )
     
-    db.session.add(correlation)
-    db.session.commit()
-    
-    return jsonify(correlation.to_dict()), 201
+    return jsonify(write_queue.execute(insert, correlation)), 201
 
 # Trend Alerts
 @trend_bp.route('/api/trend-alerts', methods=['GET'])
 def get_trend_alerts():
     """Alle aktiven Trend-Alerts abrufen"""
     user_id = request.args.get('user_id')
+    # Ohne ADMIN nur die eigenen Alerts
+    principal = auth.current_principal()
+    if principal is not None and principal.user_id is not None and not principal.can(Permission.ADMIN):
+        user_id = principal.user_id
     
     query = TrendAlert.query.filter_by(is_active=True)
     if user_id:
@@ -156,9 +468,11 @@ def get_trend_alerts():
     return jsonify([alert.to_dict() for alert in alerts])
 
 @trend_bp.route('/api/trend-alerts', methods=['POST'])
+@requires(Permission.ALERT)
 def create_trend_alert():
     """Neuen Trend-Alert erstellen"""
     data = request.get_json()
+    auth.bind_acting_user(data, 'user_id')
     
     alert = TrendAlert(
         content_id=data['content_id'],
@@ -168,40 +482,45 @@ def create_trend_alert():
         is_active=data.get('is_active', True)
     )
     
-    db.session.add(alert)
-    db.session.commit()
-    
-    return jsonify(alert.to_dict()), 201
+    return jsonify(write_queue.execute(insert, alert)), 201
 
 @trend_bp.route('/api/trend-alerts/<int:alert_id>', methods=['PUT'])
+@requires(Permission.ALERT)
 def update_trend_alert(alert_id):
     """Trend-Alert aktualisieren"""
     alert = TrendAlert.query.get_or_404(alert_id)
+    principal = auth.current_principal()
+    if principal is not None and principal.user_id not in (None, alert.user_id) and not principal.can(Permission.ADMIN):
+        return jsonify({'error': 'Forbidden'}), 403
     data = request.get_json()
     
+    return jsonify(write_queue.execute(_update_alert, alert_id, data))
+
+def _update_alert(session, alert_id, data):
+    alert = session.get(TrendAlert, alert_id)
     alert.is_active = data.get('is_active', alert.is_active)
     alert.threshold = data.get('threshold', alert.threshold)
-    
-    db.session.commit()
-    
-    return jsonify(alert.to_dict())
+    session.flush()
+    return alert.to_dict()
 
 # Trend History
 @trend_bp.route('/api/contents/<int:content_id>/history', methods=['GET'])
 def get_content_history(content_id):
     """Trend-Historie für Content abrufen"""
     content = Content.query.get_or_404(content_id)
-    history = TrendHistory.query.filter_by(content_id=content_id).order_by(
-        TrendHistory.changed_at.desc()
-    ).all()
+    history = TrendHistory.query.filter_by(content_id=content_id).options(
+        selectinload(TrendHistory.phase), selectinload(TrendHistory.changer)
+    ).order_by(TrendHistory.changed_at.desc())
     
-    return jsonify([entry.to_dict() for entry in history])
+    return stream_query(history)
 
 @trend_bp.route('/api/contents/<int:content_id>/history', methods=['POST'])
+@requires(Permission.SCORE)
 def create_history_entry(content_id):
     """Neuen Historie-Eintrag erstellen"""
     content = Content.query.get_or_404(content_id)
     data = request.get_json()
+    auth.bind_acting_user(data, 'changed_by')
     
     history_entry = TrendHistory(
         content_id=content_id,
@@ -213,19 +532,16 @@ def create_history_entry(content_id):
         notes=data.get('notes')
     )
     
-    db.session.add(history_entry)
-    db.session.commit()
-    
-    return jsonify(history_entry.to_dict()), 201
+    return jsonify(write_queue.execute(insert, history_entry)), 201
 
 # Trend Tags
 @trend_bp.route('/api/trend-tags', methods=['GET'])
 def get_trend_tags():
     """Alle Trend-Tags abrufen"""
-    tags = TrendTag.query.all()
-    return jsonify([tag.to_dict() for tag in tags])
+    return stream_query(TrendTag.query.order_by(TrendTag.id))
 
 @trend_bp.route('/api/trend-tags', methods=['POST'])
+@requires(Permission.MANAGE)
 def create_trend_tag():
     """Neuen Trend-Tag erstellen"""
     data = request.get_json()
@@ -236,13 +552,11 @@ def create_trend_tag():
         color=data.get('color', '#6B7280')
     )
     
-    db.session.add(tag)
-    db.session.commit()
-    
-    return jsonify(tag.to_dict()), 201
+    return jsonify(write_queue.execute(insert, tag)), 201
 
 # Content-Tag Zuordnung
 @trend_bp.route('/api/contents/<int:content_id>/tags', methods=['POST'])
+@requires(Permission.SCORE)
 def add_tag_to_content(content_id):
     """Tag zu Content hinzufügen"""
     content = Content.query.get_or_404(content_id)
@@ -250,31 +564,52 @@ def add_tag_to_content(content_id):
     
     tag = TrendTag.query.get_or_404(data['tag_id'])
     
-    if tag not in content.trend_tags:
-        content.trend_tags.append(tag)
-        db.session.commit()
+    changed, result = write_queue.execute(_set_tag, content_id, tag.id, True)
+    if changed:
+        tag_index.add(content_id, tag.name)
+        similarity_service.update_content(content_id)
     
-    return jsonify(content.to_dict())
+    return jsonify(result)
 
 @trend_bp.route('/api/contents/<int:content_id>/tags/<int:tag_id>', methods=['DELETE'])
+@requires(Permission.SCORE)
 def remove_tag_from_content(content_id, tag_id):
     """Tag von Content entfernen"""
     content = Content.query.get_or_404(content_id)
     tag = TrendTag.query.get_or_404(tag_id)
     
-    if tag in content.trend_tags:
-        content.trend_tags.remove(tag)
-        db.session.commit()
+    changed, result = write_queue.execute(_set_tag, content_id, tag_id, False)
+    if changed:
+        tag_index.discard(content_id, tag.name)
+        similarity_service.update_content(content_id)
     
-    return jsonify(content.to_dict())
+    return jsonify(result)
+
+def _set_tag(session, content_id, tag_id, present):
+    """Ordnet den Tag zu (``present``) oder entfernt ihn; liefert ``(geändert, content.to_dict())``"""
+    content = session.get(Content, content_id)
+    tag = session.get(TrendTag, tag_id)
+    changed = (tag in content.trend_tags) != present
+    if changed and present:
+        content.trend_tags.append(tag)
+    elif changed:
+        content.trend_tags.remove(tag)
+    session.flush()
+    return changed, content.to_dict()
 
 # Trend Phase Update
 @trend_bp.route('/api/contents/<int:content_id>/phase', methods=['PUT'])
+@requires(Permission.MANAGE)
 def update_content_phase(content_id):
     """Trend-Phase für Content aktualisieren"""
-    content = Content.query.get_or_404(content_id)
+    Content.query.get_or_404(content_id)
     data = request.get_json()
+    auth.bind_acting_user(data, 'changed_by')
     
+    return jsonify(write_queue.execute(_update_phase, content_id, data))
+
+def _update_phase(session, content_id, data):
+    content = session.get(Content, content_id)
     old_phase_id = content.trend_phase_id
     new_phase_id = data['phase_id']
     
@@ -282,8 +617,8 @@ def update_content_phase(content_id):
     
     # Historie-Eintrag erstellen
     if old_phase_id != new_phase_id:
-        old_phase = TrendPhase.query.get(old_phase_id) if old_phase_id else None
-        new_phase = TrendPhase.query.get(new_phase_id) if new_phase_id else None
+        old_phase = session.get(TrendPhase, old_phase_id) if old_phase_id else None
+        new_phase = session.get(TrendPhase, new_phase_id) if new_phase_id else None
         
         history_entry = TrendHistory(
             content_id=content_id,
@@ -294,11 +629,10 @@ def update_content_phase(content_id):
             new_value=new_phase.name if new_phase else 'None',
             notes=data.get('notes')
         )
-        db.session.add(history_entry)
-    
-    db.session.commit()
+        session.add(history_entry)
     
-    return jsonify(content.to_dict())
+    session.flush()
+    return content.to_dict()
 
 # Trend Metrics
 @trend_bp.route('/api/contents/<int:content_id>/metrics', methods=['GET'])
@@ -307,34 +641,228 @@ def get_content_metrics(content_id):
     content = Content.query.get_or_404(content_id)
     metrics = TrendMetrics.query.filter_by(content_id=content_id).order_by(
         TrendMetrics.period_start.desc()
-    ).all()
+    )
     
-    return jsonify([metric.to_dict() for metric in metrics])
+    return stream_query(metrics)
 
 @trend_bp.route('/api/contents/<int:content_id>/metrics', methods=['POST'])
+@requires(Permission.SCORE)
 def create_content_metric(content_id):
     """Neue Metrik für Content erstellen"""
     content = Content.query.get_or_404(content_id)
     data = request.get_json()
     
-    metric = TrendMetrics(
+    metric = write_queue.execute(_insert_metric, TrendMetrics(
         content_id=content_id,
         metric_type=data['metric_type'],
         value=data['value'],
         period_start=datetime.fromisoformat(data['period_start']),
         period_end=datetime.fromisoformat(data['period_end'])
-    )
+    ))
     
-    db.session.add(metric)
-    db.session.commit()
-    
-    return jsonify(metric.to_dict()), 201
+    return jsonify(metric), 201
+
+def _insert_metric(session, metric):
+    session.add(metric)
+    session.flush()
+    # Burst-Erkennung im selben Commit (src/services/bursts.py)
+    bursts.ingest(session, [{'metric_id': metric.id, 'content_id': metric.content_id, 'metric_type': metric.metric_type,
+                             'value': metric.value, 'period_start': metric.period_start}])
+    return metric.to_dict()
+
+MAX_METRIC_BATCH = 10000
+
+@trend_bp.route('/api/trends/metrics/batch', methods=['POST'])
+@requires(Permission.SCORE)
+def create_metrics_batch():
+    """Mehrere Metrik-Punkte in einem Commit anlegen: {"metrics": [{content_id, metric_type, value, period_start, period_end}]}"""
+    data = request.get_json(silent=True) or {}
+    items = data.get('metrics')
+    if not isinstance(items, list) or not items or len(items) > MAX_METRIC_BATCH:
+        return jsonify({'error': f'metrics must be a list of 1 to {MAX_METRIC_BATCH} entries'}), 400
+    try:
+        rows = [{
+            'content_id': int(item['content_id']),
+            'metric_type': str(item['metric_type']),
+            'value': float(item['value']),
+            'period_start': datetime.fromisoformat(item['period_start']),
+            'period_end': datetime.fromisoformat(item['period_end'])
+        } for item in items]
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'error': f'invalid metric: {e}'}), 400
+    
+    content_ids = sorted({row['content_id'] for row in rows})
+    query = db.select(Content.id).where(Content.id.in_(content_ids))
+    scope = auth.content_scope(Content.team_id, auth.team_ids())
+    if scope is not None:
+        query = query.where(scope)  # Contents fremder Teams gelten als unbekannt
+    existing = set(db.session.execute(query).scalars())
+    if len(existing) != len(content_ids):
+        return jsonify({'error': f'unknown content ids: {sorted(set(content_ids) - existing)[:20]}'}), 400
+    
+    result = write_queue.execute(_insert_metrics, rows)
+    return jsonify(result), 201
+
+def _insert_metrics(session, rows):
+    table = TrendMetrics.__table__
+    now = datetime.utcnow()
+    # executemany mit RETURNING (SQLite >= 3.35, PostgreSQL) in wenigen Multi-VALUES-Statements;
+    # die Reihenfolge der Rückgabe ist dabei nicht garantiert -> IDs über die Schlüsselspalten zuordnen
+    returned = session.execute(
+        table.insert().returning(table.c.id, table.c.content_id, table.c.metric_type, table.c.period_start),
+        [{**row, 'calculated_at': now} for row in rows]
+    ).all()
+    ids = {}
+    for metric_id, content_id, metric_type, period_start in returned:
+        ids.setdefault((content_id, metric_type, period_start), []).append(metric_id)
+    points = [{**row, 'metric_id': ids[(row['content_id'], row['metric_type'], row['period_start'])].pop()}
+              for row in rows]
+    found = bursts.ingest(session, points)
+    return {
+        'inserted': len(returned),
+        'bursts': [{**burst, 'period_start': burst['period_start'].isoformat(),
+                    'detected_at': burst['detected_at'].isoformat()} for burst in found[:100]],
+        'burst_count': len(found)
+    }
+
+# Bursts (src/services/bursts.py)
+@trend_bp.route('/api/trends/bursts', methods=['GET'])
+def get_trend_bursts():
+    """Zuletzt erkannte Bursts (?since=ISO, ?metric_type=..., ?limit=...)"""
+    limit = min(max(1, request.args.get('limit', 100, type=int)), 1000)
+    query = TrendBurst.query.options(selectinload(TrendBurst.content))
+    try:
+        if request.args.get('since'):
+            query = query.filter(TrendBurst.detected_at >= datetime.fromisoformat(request.args['since']))
+    except ValueError:
+        return jsonify({'error': 'since must be an ISO timestamp'}), 400
+    if request.args.get('metric_type'):
+        query = query.filter(TrendBurst.metric_type == request.args['metric_type'])
+    visible = auth.visible_content_filter(TrendBurst.content_id)
+    if visible is not None:
+        query = query.filter(visible)
+    bursts_found = query.order_by(TrendBurst.detected_at.desc(), TrendBurst.id.desc()).limit(limit).all()
+    
+    return jsonify([{
+        **burst.to_dict(),
+        'title': burst.content.title,
+        'trend_phase_id': burst.content.trend_phase_id
+    } for burst in bursts_found])
+
+@trend_bp.route('/api/contents/<int:content_id>/bursts', methods=['GET'])
+def get_content_bursts(content_id):
+    """Bursts eines Contents, neueste zuerst"""
+    Content.query.get_or_404(content_id)
+    bursts_found = TrendBurst.query.filter_by(content_id=content_id) \
+        .order_by(TrendBurst.period_start.desc(), TrendBurst.id.desc()).limit(500).all()
+    return jsonify([burst.to_dict() for burst in bursts_found])
+
+# Prognosen (src/services/forecasting.py)
+@trend_bp.route('/api/contents/<int:content_id>/forecast', methods=['GET'])
+def get_content_forecast(content_id):
+    """Prognose der Metriken eines Trends aus dem Cache (?metric_type=..., ?horizon=...)"""
+    Content.query.get_or_404(content_id)
+    metric_type = request.args.get('metric_type')
+    horizon = request.args.get('horizon', type=int)
+    if horizon is not None and horizon < 1:
+        return jsonify({'error': 'horizon must be positive'}), 400
+    
+    forecasts = forecasting.forecasts_for(content_id)
+    return jsonify({
+        'content_id': content_id,
+        'forecasts': [forecast.to_dict(horizon) for forecast in forecasts
+                      if not metric_type or forecast.metric_type == metric_type]
+    })
+
+# Sentiment (src/services/sentiment.py)
+@trend_bp.route('/api/contents/<int:content_id>/sentiment', methods=['GET'])
+def get_content_sentiment(content_id):
+    """Sentiment eines Contents samt Bestandteilen (Beschreibung, Kommentare, Quellen)"""
+    Content.query.get_or_404(content_id)
+    return jsonify(sentiment.sentiment_for(content_id))
+
+# Externe Quellen (src/services/source_monitor.py)
+@trend_bp.route('/api/contents/<int:content_id>/sources', methods=['GET'])
+def get_content_sources(content_id):
+    """Quellen eines Trends mit Abrufzustand und nächster geplanter Prüfung"""
+    content = Content.query.get_or_404(content_id)
+    states = {state.url: state for state in SourceState.query.filter_by(content_id=content_id)}
+    next_check = source_monitor.schedule.due_of(content_id)
+    return jsonify({
+        'content_id': content_id,
+        'last_monitored_at': content.last_monitored_at.isoformat() if content.last_monitored_at else None,
+        'next_check_at': next_check.isoformat() if next_check and next_check != datetime.min else None,
+        'sources': [states[url].to_dict() if url in states else {'url': url, 'check_count': 0}
+                    for url in content.get_external_source_urls()]
+    })
+
+@trend_bp.route('/api/contents/<int:content_id>/sources/check', methods=['POST'])
+@requires(Permission.MANAGE)
+def check_content_sources(content_id):
+    """Quellen eines Trends sofort prüfen (außerhalb der Planung)"""
+    content = Content.query.get_or_404(content_id)
+    if not content.get_external_source_urls():
+        return jsonify({'error': 'Content has no external sources'}), 400
+    return jsonify(source_monitor.run_cycle(content_ids=[content_id]))
 
 # Bulk Operations
+@trend_bp.route('/api/trends/bulk/monitor', methods=['POST'])
+@requires(Permission.MANAGE)
+def bulk_monitor():
+    """Einen Monitor-Zyklus ausführen: die fälligsten Trends prüfen (limit=... Trends)"""
+    data = request.get_json(silent=True) or {}
+    limit = data.get('limit')
+    if limit is not None and (not isinstance(limit, int) or limit < 1):
+        return jsonify({'error': 'limit must be a positive integer'}), 400
+    result = source_monitor.run_cycle(limit)
+    
+    return jsonify({
+        'message': f"{result['trends']} trends checked",
+        **result
+    })
+
+@trend_bp.route('/api/trends/bulk/sentiment', methods=['POST'])
+@requires(Permission.MANAGE)
+def bulk_sentiment():
+    """Vorgemerkte Contents und neue Kommentare bewerten (all=true: alles neu bewerten)"""
+    data = request.get_json(silent=True) or {}
+    if data.get('all'):
+        write_queue.execute(_rescore_sentiment)
+    result = sentiment.run()
+    
+    return jsonify({
+        'message': f"{result['contents']} contents scored",
+        **result
+    })
+
+def _rescore_sentiment(session):
+    sentiment.rescore_all(session.connection())
+
+@trend_bp.route('/api/trends/bulk/forecast', methods=['POST'])
+@requires(Permission.MANAGE)
+def bulk_forecast():
+    """Prognosen aller Metrik-Reihen mit neuen Datenpunkten neu rechnen (force=true: alle)"""
+    data = request.get_json(silent=True) or {}
+    result = forecasting.refresh(force=bool(data.get('force')))
+    
+    return jsonify({
+        'message': f"{result['series']} series forecast",
+        **result
+    })
+
 @trend_bp.route('/api/trends/bulk/recalculate-scores', methods=['POST'])
+@requires(Permission.MANAGE)
 def bulk_recalculate_scores():
     """Alle Priority Scores neu berechnen"""
-    trends = Content.query.filter_by(content_type='trend').all()
+    updated_count, total = write_queue.execute(_recalculate_priorities)
+    
+    return jsonify({
+        'message': f'{updated_count} trends updated',
+        'total_trends': total
+    })
+
+def _recalculate_priorities(session):
+    trends = session.query(Content).options(selectinload(Content.score_consensus)).filter_by(content_type='trend').all()
     updated_count = 0
     
     for trend in trends:
@@ -343,66 +871,72 @@ def bulk_recalculate_scores():
         if old_score != new_score:
             updated_count += 1
     
-    db.session.commit()
+    return updated_count, len(trends)
+
+@trend_bp.route('/api/trends/bulk/recompute-similarities', methods=['POST'])
+@requires(Permission.MANAGE)
+def bulk_recompute_similarities():
+    """TF-IDF-Vektoren und Top-k-Nachbarn aller Contents neu berechnen"""
+    result = similarity_service.rebuild()
     
     return jsonify({
-        'message': f'{updated_count} trends updated',
-        'total_trends': len(trends)
+        'message': f"{result['pairs']} similarities computed",
+        **result
     })
 
-# Search and Filter
-@trend_bp.route('/api/trends/search', methods=['GET'])
-def search_trends():
-    """Erweiterte Trend-Suche"""
-    query = request.args.get('q', '')
-    phase_id = request.args.get('phase_id')
-    min_score = request.args.get('min_score', type=float)
-    max_score = request.args.get('max_score', type=float)
-    tags = request.args.getlist('tags')
-    
-    # Basis-Query
-    trends_query = Content.query.filter_by(content_type='trend')
-    
-    # Text-Suche
-    if query:
-        trends_query = trends_query.filter(
-            db.or_(
-                Content.title.contains(query),
-                Content.short_description.contains(query),
-                Content.long_description.contains(query)
-            )
-        )
+@trend_bp.route('/api/trends/bulk/detect-duplicates', methods=['POST'])
+@requires(Permission.MANAGE)
+def bulk_detect_duplicates():
+    """Near-Duplicates über alle Contents gruppieren (MinHash/LSH)"""
+    data = request.get_json(silent=True) or {}
     
-    # Phase-Filter
-    if phase_id:
-        trends_query = trends_query.filter_by(trend_phase_id=phase_id)
+    created = backfill_signatures()
+    clusters = duplicate_index.clusters(threshold=data.get('threshold'))
     
-    # Score-Filter
-    if min_score is not None:
-        trends_query = trends_query.filter(Content.priority_score >= min_score)
-    if max_score is not None:
-        trends_query = trends_query.filter(Content.priority_score <= max_score)
+    ids = [content_id for cluster in clusters for content_id in cluster]
+    titles = dict(db.session.query(Content.id, Content.title).filter(Content.id.in_(ids))) if ids else {}
     
-    # Tag-Filter
-    if tags:
-        trends_query = trends_query.join(Content.trend_tags).filter(
-            TrendTag.name.in_(tags)
-        )
-    
-    # Sortierung
-    sort_by = request.args.get('sort_by', 'priority_score')
-    sort_order = request.args.get('sort_order', 'desc')
-    
-    if hasattr(Content, sort_by):
-        if sort_order == 'desc':
-            trends_query = trends_query.order_by(getattr(Content, sort_by).desc())
-        else:
-            trends_query = trends_query.order_by(getattr(Content, sort_by).asc())
-    
-    # Paginierung
+    return jsonify({
+        'message': f'{len(clusters)} duplicate clusters found',
+        'signatures_created': created,
+        'clusters': [
+            [{'content_id': content_id, 'title': titles.get(content_id)} for content_id in cluster]
+            for cluster in clusters
+        ]
+    })
+
+# Search and Filter
+@trend_bp.route('/api/trends/search', methods=['GET'])
+def search_trends():
+    """Erweiterte Trend-Suche (Filter: src/services/trend_search.py)"""
+    filters = trend_search.parse_filters(request.args)
+    filters['teams'] = auth.team_ids()
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
     
+    # Nur Score-Sortierung (optional Phase/Score-Bereich): direkt aus der Rangliste
+    if trend_search.uses_leaderboard(filters):
+        phase_id = filters['phase_id']
+        size = per_page if per_page > 0 else 20  # wie paginate(error_out=False)
+        total, items = leaderboards.top(
+            'phase' if phase_id else 'global', int(phase_id) if phase_id else None,
+            limit=size, offset=(max(page, 1) - 1) * size,
+            min_score=filters['min_score'], max_score=filters['max_score'],
+            ascending=filters['sort_order'] != 'desc')
+        return jsonify({
+            'trends': [trend.to_dict() for trend in _contents_in_order([content_id for content_id, _ in items])],
+            'total': total,
+            'pages': -(-total // size),
+            'current_page': page,
+            'per_page': per_page
+        })
+    
+    try:
+        trends_query = trend_search.filter_query(filters)
+    except TagQueryError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # Paginierung
     trends = trends_query.paginate(
         page=page, per_page=per_page, error_out=False
     )
@@ -415,3 +949,54 @@ def search_trends():
         'per_page': per_page
     })
 
+
+# Reports (src/services/reports.py)
+@trend_bp.route('/api/reports', methods=['POST'])
+@requires(Permission.REPORT)
+def create_report():
+    """Report anfordern: {"format": "pdf"|"xlsx", "filters": {...wie /trends/search}, "title": ...}
+
+    200 mit fertigem Report aus dem Cache, sonst 202 mit dem (laufenden) Auftrag.
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        job, ready = reports.request_report(data.get('filters'), data.get('format'), data.get('title'),
+                                            teams=auth.team_ids())
+    except (ValueError, TagQueryError) as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({**job, 'cached': ready}), 200 if ready else 202
+
+@trend_bp.route('/api/reports', methods=['GET'])
+def get_reports():
+    """Zuletzt angeforderte Reports (limit, Default 50)"""
+    limit = min(max(request.args.get('limit', 50, type=int), 1), 500)
+    teams = auth.team_ids()
+    query = ReportJob.query.order_by(ReportJob.created_at.desc())
+    if teams is None:
+        jobs = query.limit(limit).all()
+    else:
+        # Teilmengen-Prüfung der Team-Listen in Python, ohne Einschränkung erstellte Reports per SQL ausschließen
+        jobs = list(islice((job for job in query.filter(ReportJob.teams.isnot(None)).yield_per(limit)
+                            if reports.visible(job, teams)), limit))
+    return jsonify([job.to_dict() for job in jobs])
+
+def _visible_report(report_id):
+    """Report-Auftrag; 404 auch dann, wenn er Contents nicht sichtbarer Teams enthalten kann"""
+    job = db.get_or_404(ReportJob, report_id)
+    if not reports.visible(job, auth.team_ids()):
+        abort(404)
+    return job
+
+@trend_bp.route('/api/reports/<report_id>', methods=['GET'])
+def get_report(report_id):
+    return jsonify(_visible_report(report_id).to_dict())
+
+@trend_bp.route('/api/reports/<report_id>/download', methods=['GET'])
+def download_report(report_id):
+    job = _visible_report(report_id)
+    path = reports.artifact_path(job.id, job.format)
+    if job.status != 'done' or not os.path.exists(path):
+        return jsonify({'error': f'Report is {job.status}', 'status': job.status}), 409
+    title = ''.join(char if char.isalnum() else '-' for char in json.loads(job.spec)['title']).strip('-') or 'report'
+    return send_file(path, mimetype=reports.FORMATS[job.format], as_attachment=True,
+                     download_name=f'{title}-{job.finished_at:%Y%m%d}.{job.format}', max_age=3600)
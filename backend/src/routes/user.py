@@ -1,22 +1,24 @@
 from flask import Blueprint, jsonify, request
-from src.models.user import User
+from sqlalchemy import select
+from src.auth import Permission, ROLES, current_principal, new_token, requires
+from src.models.user import User, Team, team_member
 from src.models.__init__ import db
+from src.serialization import stream_query
+from src.services.write_queue import write_queue, insert
 
 user_bp = Blueprint('user', __name__)
 
 @user_bp.route('/users', methods=['GET'])
 def get_users():
-    users = User.query.all()
-    return jsonify([user.to_dict() for user in users])
+    return stream_query(User.query.order_by(User.id))
 
 @user_bp.route('/users', methods=['POST'])
+@requires(Permission.ADMIN)
 def create_user():
     
     data = request.json
     user = User(username=data['username'], email=data['email'])
-    db.session.add(user)
-    db.session.commit()
-    return jsonify(user.to_dict()), 201
+    return jsonify(write_queue.execute(insert, user)), 201
 
 @user_bp.route('/users/<int:user_id>', methods=['GET'])
 def get_user(user_id):
@@ -24,17 +26,124 @@ def get_user(user_id):
     return jsonify(user.to_dict())
 
 @user_bp.route('/users/<int:user_id>', methods=['PUT'])
+@requires(Permission.VIEW)
 def update_user(user_id):
-    user = User.query.get_or_404(user_id)
-    data = request.json
+    principal = current_principal()
+    if principal is not None and principal.user_id != user_id and not principal.can(Permission.ADMIN):
+        return jsonify({'error': 'Forbidden'}), 403
+    User.query.get_or_404(user_id)
+    return jsonify(write_queue.execute(_update_user, user_id, request.json))
+
+def _update_user(session, user_id, data):
+    user = session.get(User, user_id)
     user.username = data.get('username', user.username)
     user.email = data.get('email', user.email)
-    db.session.commit()
-    return jsonify(user.to_dict())
+    session.flush()
+    return user.to_dict()
 
 @user_bp.route('/users/<int:user_id>', methods=['DELETE'])
+@requires(Permission.ADMIN)
 def delete_user(user_id):
-    user = User.query.get_or_404(user_id)
-    db.session.delete(user)
-    db.session.commit()
+    User.query.get_or_404(user_id)
+    write_queue.execute(_delete_user, user_id)
     return '', 204
+
+def _delete_user(session, user_id):
+    user = session.get(User, user_id)
+    if user is not None:
+        session.delete(user)
+
+def _set_user(session, user_id, values):
+    user = session.get(User, user_id)
+    for field, value in values.items():
+        setattr(user, field, value)
+    session.flush()
+    return user.to_dict()
+
+# ============================================================
+# Rollen, API-Tokens und Teams (src/auth.py)
+# ============================================================
+@user_bp.get('/me')
+def get_me():
+    """Rechte des Requests (ohne Token: anonym)"""
+    principal = current_principal()
+    return jsonify(principal.to_dict() if principal else {'user_id': None, 'role': None, 'permissions': [],
+                                                          'team_ids': []})
+
+@user_bp.put('/users/<int:user_id>/role')
+@requires(Permission.ADMIN)
+def set_user_role(user_id):
+    User.query.get_or_404(user_id)
+    role = (request.get_json(silent=True) or {}).get('role')
+    if role not in ROLES:
+        return jsonify({'error': f"role must be one of: {', '.join(ROLES)}"}), 400
+    return jsonify(write_queue.execute(_set_user, user_id, {'role': role}))
+
+@user_bp.post('/users/<int:user_id>/token')
+@requires(Permission.ADMIN)
+def issue_user_token(user_id):
+    """Neues API-Token (ersetzt das bisherige); der Klartext wird nur hier ausgegeben"""
+    User.query.get_or_404(user_id)
+    token, token_hash = new_token()
+    write_queue.execute(_set_user, user_id, {'api_token_hash': token_hash})
+    return jsonify({'user_id': user_id, 'token': token}), 201
+
+@user_bp.delete('/users/<int:user_id>/token')
+@requires(Permission.ADMIN)
+def revoke_user_token(user_id):
+    User.query.get_or_404(user_id)
+    write_queue.execute(_set_user, user_id, {'api_token_hash': None})
+    return '', 204
+
+@user_bp.get('/teams')
+def get_teams():
+    members = {}
+    for team_id, user_id in db.session.execute(
+            select(team_member.c.team_id, team_member.c.user_id).order_by(team_member.c.user_id)):
+        members.setdefault(team_id, []).append(user_id)
+    return jsonify([team.to_dict(members.get(team.id, [])) for team in Team.query.order_by(Team.name)])
+
+@user_bp.post('/teams')
+@requires(Permission.ADMIN)
+def create_team():
+    name = ((request.get_json(silent=True) or {}).get('name') or '').strip()
+    if not name:
+        return jsonify({'error': 'Missing required field: name'}), 400
+    if Team.query.filter_by(name=name).first():
+        return jsonify({'error': 'Team already exists'}), 409
+    team = write_queue.execute(_insert_team, name)
+    return jsonify(team), 201
+
+def _insert_team(session, name):
+    team = Team(name=name)
+    session.add(team)
+    session.flush()
+    return team.to_dict([])
+
+@user_bp.put('/teams/<int:team_id>/members')
+@requires(Permission.ADMIN)
+def update_team_members(team_id):
+    """Mitglieder hinzufügen/entfernen: {"add": [user_id, ...], "remove": [user_id, ...]}"""
+    Team.query.get_or_404(team_id)
+    data = request.get_json(silent=True) or {}
+    add, remove = data.get('add') or [], data.get('remove') or []
+    if not isinstance(add, list) or not isinstance(remove, list) or not all(
+            isinstance(i, int) and not isinstance(i, bool) for i in add + remove):
+        return jsonify({'error': 'add and remove must be lists of user ids'}), 400
+    found = set(db.session.execute(select(User.id).where(User.id.in_(set(add)))).scalars())
+    missing = sorted(set(add) - found)
+    if missing:
+        return jsonify({'error': f'Users not found: {missing}'}), 404
+    return jsonify(write_queue.execute(_update_members, team_id, add, remove))
+
+def _update_members(session, team_id, add, remove):
+    team = session.get(Team, team_id)
+    users = {user.id: user for user in session.query(User).filter(User.id.in_(set(add) | set(remove)))}
+    for user_id in add:
+        if user_id in users and team not in users[user_id].teams:
+            users[user_id].teams.append(team)
+    for user_id in remove:
+        if user_id in users and team in users[user_id].teams:
+            users[user_id].teams.remove(team)
+    session.flush()
+    return team.to_dict(sorted(member.id for member in team.members))
@@ -0,0 +1,89 @@
+"""JSON-Serialisierung: schneller Encoder und gestreamte Listen-Antworten.
+
+``JSONProvider`` ersetzt Flasks Standard-Provider und kodiert mit ``orjson``
+(falls installiert), mit denselben Regeln wie Flask: sortierte Schlüssel,
+``datetime`` als HTTP-Datum, Dezimalzahlen als String. Unterschiede: Umlaute
+werden als UTF-8 statt ``\\uXXXX`` ausgegeben, NaN als ``null``. Ohne orjson
+bleibt es beim Standard-Encoder.
+
+``stream_query`` liefert große Listen als chunked Response: Die Zeilen kommen
+batchweise aus einem serverseitigen Cursor (``yield_per``, ``STREAM_BATCH_SIZE``
+Zeilen, Default 500), jedes Element
+wird einzeln kodiert und in Blöcken von ``STREAM_CHUNK_BYTES`` geschrieben.
+Der Speicherbedarf hängt damit von der Batch-Größe ab, nicht von der Anzahl
+der Zeilen, und das erste Byte geht raus, sobald der erste Batch geladen ist.
+
+Fehler vor dem ersten Element (z.B. ungültige Filter) führen wie bisher zu
+einer Fehler-Antwort; danach ist der Status schon gesendet, ein Abbruch
+beendet die Verbindung mit unvollständigem JSON. Statements, die erst
+während des Streamings laufen, fehlen im ``Server-Timing``-Header
+(src/instrumentation.py), da die Header vorher gesendet werden.
+"""
+from flask import Response, current_app, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional, siehe requirements.txt
+    orjson = None
+
+if orjson is not None:
+    _ORJSON_OPTIONS = (orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+                       | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS)
+
+
+class JSONProvider(DefaultJSONProvider):
+    """Flask-JSON-Provider mit orjson; Pretty-Print (Debug) über den Standard-Encoder."""
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs.get('indent') is not None:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=_ORJSON_OPTIONS).decode()
+
+
+def dumps_bytes(obj):
+    """Kodiert ``obj`` als UTF-8-JSON (ohne Umweg über ``str`` bei orjson)."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=DefaultJSONProvider.default, option=_ORJSON_OPTIONS)
+    return current_app.json.dumps(obj).encode()
+
+
+def _chunks(first, rest, serialize, chunk_bytes):
+    buffer = bytearray(b'[')
+    buffer += dumps_bytes(serialize(first))
+    for item in rest:
+        buffer += b','
+        buffer += dumps_bytes(serialize(item))
+        if len(buffer) >= chunk_bytes:
+            yield bytes(buffer)
+            buffer.clear()
+    buffer += b']'
+    yield bytes(buffer)
+
+
+def stream_json_array(items, serialize):
+    """Streamt ``[serialize(item), ...]`` als chunked JSON-Response.
+
+    Das erste Element wird sofort geholt, damit Fehler beim Ausführen der
+    Abfrage noch im Request (und nicht mitten im Body) auftreten.
+    """
+    iterator = iter(items)
+    first = next(iterator, _EMPTY)
+    if first is _EMPTY:
+        return current_app.response_class(b'[]', mimetype='application/json')
+    chunk_bytes = current_app.config.get('STREAM_CHUNK_BYTES', 64 * 1024)
+    body = stream_with_context(_chunks(first, iterator, serialize, chunk_bytes))
+    return Response(body, mimetype='application/json')
+
+
+def stream_query(query, serialize=lambda obj: obj.to_dict()):
+    """Streamt ein ORM-Query batchweise (``yield_per``) als JSON-Array.
+
+    Eager Loading im Query muss ``selectinload`` verwenden; ``subqueryload``
+    und ``joinedload`` für Collections sind mit ``yield_per`` nicht kombinierbar.
+    """
+    batch_size = current_app.config.get('STREAM_BATCH_SIZE', 500)
+    return stream_json_array(query.yield_per(batch_size), serialize)
+
+
+_EMPTY = object()
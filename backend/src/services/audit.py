@@ -0,0 +1,463 @@
+"""Änderungsprotokoll (Audit-Log) mit Write-Behind.
+
+Jede Mutation an den fachlichen Tabellen (``AUDITED``: Benutzer, Teams,
+Contents, Ratings, Kommentare, Trend-Daten) wird über Session-Events erfasst,
+unabhängig davon, welche Route oder welcher Job sie auslöst:
+``after_flush`` liest neue, geänderte und gelöschte Objekte samt
+Attribut-Historie, ``after_execute`` der Verbindung erfasst Core-Statements
+außerhalb des Flush (Bulk-Inserts, ``UPDATE ... WHERE``), egal ob über
+``Session.execute`` oder direkt auf der Connection. Die Einträge liegen bis
+zum Commit in ``session.info`` bzw. ``connection.info``; der Commit übergibt
+sie an einen begrenzten Puffer im Speicher, ein Rollback verwirft sie. Ein
+Request zahlt damit nur das Erfassen, keinen zusätzlichen Roundtrip.
+
+(Kein ``do_orm_execute``: Sobald dort ein Listener hängt, reicht SQLAlchemy
+``yield_per`` an ``selectinload``-Abfragen weiter, und ``stream_query``
+scheitert.)
+
+Ein Hintergrund-Thread je Prozess schreibt den Puffer in Batches
+(``AUDIT_BATCH``, spätestens alle ``AUDIT_FLUSH_INTERVAL`` Sekunden) über die
+Write-Queue nach ``audit_log``. Ist der Puffer voll (``AUDIT_QUEUE_SIZE``)
+oder schlägt das Schreiben fehl, landen die Einträge als JSON-Lines unter
+``AUDIT_DIR`` (Default ``DATA_DIR/audit``), ebenso der Rest beim Beenden
+des Prozesses. Der Writer spielt solche Dateien beim Start und danach
+regelmäßig nach; ``event_id`` ist eindeutig, doppelt geschriebene Einträge
+werden ignoriert.
+
+Handelnder Benutzer und Route kommen aus dem Request (Token-Benutzer aus
+``src/auth.py``); Mutationen der Write-Queue tragen den Kontext des
+einreichenden Requests mit (``bind_context``).
+
+Nachträglich schreiben bzw. prüfen::
+
+    python -m src.services.audit --replay
+"""
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import date, datetime
+
+from flask import current_app, g, has_app_context, has_request_context, request
+from sqlalchemy import LargeBinary, event, inspect
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import Pool
+from sqlalchemy.sql.dml import UpdateBase
+
+from src.models.user import db
+from src.models.trend_management import AuditLog
+from src.monitoring import metrics
+
+DEFAULTS = {
+    'AUDIT_ENABLED': True,
+    'AUDIT_QUEUE_SIZE': 50000,
+    'AUDIT_BATCH': 500,
+    'AUDIT_FLUSH_INTERVAL': 1.0,
+    'AUDIT_DIR': None,
+    'AUDIT_MAX_VALUE': 500,
+}
+# Fachliche Tabellen; abgeleitete Daten (Signaturen, Ähnlichkeiten, Konsens,
+# Sentiment, Prognosen, Zähler, Report-Aufträge) werden nicht protokolliert
+AUDITED = frozenset({
+    'user', 'team', 'team_member', 'content', 'rating', 'comment', 'opportunity_space',
+    'trend_phase', 'trend_score', 'trend_alert', 'trend_correlation', 'trend_history',
+    'trend_metrics', 'trend_tag', 'content_trend_tags',
+})
+# Werte dieser Spalten erscheinen nur als geändert, nie im Klartext
+REDACTED = frozenset({'api_token_hash'})
+REPLAY_INTERVAL = 60
+
+_audit = AuditLog.__table__
+_local = threading.local()
+
+
+def _config(key):
+    if not has_app_context():
+        return DEFAULTS[key]
+    return current_app.config.get(key, DEFAULTS[key])
+
+
+def spill_dir():
+    path = _config('AUDIT_DIR') or os.path.join(os.getenv('DATA_DIR', '/tmp'), 'audit')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+# ============================================================
+# Kontext: handelnder Benutzer und Route
+# ============================================================
+def current_context():
+    """``(user_id, endpoint)`` des laufenden Requests bzw. des gebundenen Kontexts."""
+    bound = getattr(_local, 'context', None)
+    if bound is not None:
+        return bound
+    if has_request_context():
+        principal = g.get('principal')
+        return principal.user_id if principal is not None else None, request.endpoint
+    return None, None
+
+
+class bind_context:
+    """Ordnet Mutationen eines anderen Threads (Writer-Thread) dem einreichenden Request zu."""
+    __slots__ = ('context', 'previous')
+
+    def __init__(self, context):
+        self.context = context
+
+    def __enter__(self):
+        self.previous = getattr(_local, 'context', None)
+        _local.context = self.context
+
+    def __exit__(self, *exc):
+        _local.context = self.previous
+
+
+# ============================================================
+# Erfassen (Session-Events)
+# ============================================================
+def _value(value, max_chars):
+    if isinstance(value, str) and len(value) > max_chars:
+        return value[:max_chars] + '...'
+    if isinstance(value, bytes):
+        return f'<{len(value)} bytes>'
+    return value
+
+
+def _snapshot(state, max_chars):
+    """Geladene Spaltenwerte (ohne Nachladen)."""
+    loaded = state.dict
+    return {attr.key: '***' if attr.key in REDACTED else _value(loaded[attr.key], max_chars)
+            for attr in state.mapper.column_attrs
+            if attr.key in loaded and loaded[attr.key] is not None
+            and not isinstance(attr.columns[0].type, LargeBinary)}
+
+
+def _diff(state, max_chars):
+    """``{Spalte: [alt, neu]}`` und Zu-/Abgänge von Many-to-Many-Beziehungen."""
+    changes = {}
+    for attr in state.mapper.column_attrs:
+        history = state.attrs[attr.key].history
+        if history.has_changes():
+            old = history.deleted[0] if history.deleted else None
+            new = history.added[0] if history.added else None
+            if attr.key in REDACTED:
+                old, new = old and '***', new and '***'
+            changes[attr.key] = [_value(old, max_chars), _value(new, max_chars)]
+    for relationship in state.mapper.relationships:
+        if relationship.secondary is None or relationship.secondary.name not in AUDITED:
+            continue
+        history = state.attrs[relationship.key].history
+        if history.has_changes():
+            changes[relationship.key] = {
+                'added': [inspect(obj).identity[0] for obj in history.added if inspect(obj).identity],
+                'removed': [inspect(obj).identity[0] for obj in history.deleted if inspect(obj).identity],
+            }
+    return changes
+
+
+def _entity_id(state):
+    key = state.identity or state.mapper.primary_key_from_instance(state.obj())
+    return ':'.join(str(part) for part in key)
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_flush(session, flush_context):
+    if not _config('AUDIT_ENABLED'):
+        return
+    entries = None
+    now = datetime.utcnow()
+    user_id, endpoint = current_context()
+    max_chars = _config('AUDIT_MAX_VALUE')
+    for action, objects in (('insert', session.new), ('update', session.dirty), ('delete', session.deleted)):
+        for obj in objects:
+            table = getattr(obj, '__table__', None)
+            if table is None or table.name not in AUDITED:
+                continue
+            state = inspect(obj)
+            changes = _diff(state, max_chars) if action == 'update' else _snapshot(state, max_chars)
+            if action == 'update' and not changes:
+                continue  # nur als dirty markiert, nichts geändert
+            if entries is None:
+                entries = session.info.setdefault('audit_entries', [])
+            entries.append((now, user_id, endpoint, action, table.name, _entity_id(state), changes))
+
+
+@event.listens_for(Session, 'before_flush')
+def _flush_started(session, flush_context, instances):
+    # Statements des Flush erfasst _collect_flush über die Objekte
+    _local.flushing = True
+
+
+@event.listens_for(Session, 'after_flush_postexec')
+def _flush_finished(session, flush_context):
+    _local.flushing = False
+
+
+@event.listens_for(Engine, 'after_execute')
+def _collect_statement(connection, statement, multiparams, params, execution_options, result):
+    if not isinstance(statement, UpdateBase) or getattr(_local, 'flushing', False):
+        return
+    table = getattr(statement, 'table', None)
+    if getattr(table, 'name', None) not in AUDITED or not _config('AUDIT_ENABLED'):
+        return
+    now = datetime.utcnow()
+    user_id, endpoint = current_context()
+    max_chars = _config('AUDIT_MAX_VALUE')
+    rows = multiparams or ([params] if params else [])
+    entries = connection.info.setdefault('audit_entries', [])
+    if statement.is_insert:
+        # Core-Insert (z.B. Metrik-Batch): ein Eintrag je Zeile, IDs vergibt erst die DB
+        entries.extend((now, user_id, endpoint, 'insert', table.name, None,
+                        {key: _value(value, max_chars) for key, value in row.items() if value is not None})
+                       for row in rows or [{}])
+        return
+    action = 'bulk_update' if statement.is_update else 'bulk_delete'
+    changes = {'rows': result.rowcount}
+    if len(rows) == 1:
+        changes['parameters'] = {key: _value(value, max_chars) for key, value in rows[0].items()}
+    elif rows:
+        changes['parameter_sets'] = len(rows)
+    entries.append((now, user_id, endpoint, action, table.name, None, changes))
+
+
+@event.listens_for(Engine, 'commit')
+def _publish_statements(connection):
+    entries = connection.info.pop('audit_entries', None)
+    if entries:
+        audit_trail.record(entries)
+
+
+@event.listens_for(Engine, 'rollback')
+def _discard_statements(connection):
+    connection.info.pop('audit_entries', None)
+
+
+@event.listens_for(Pool, 'reset')
+def _discard_on_reset(dbapi_connection, connection_record, reset_state):
+    # Verbindung ohne Commit/Rollback zurückgegeben
+    connection_record.info.pop('audit_entries', None)
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish(session):
+    entries = session.info.pop('audit_entries', None)
+    if entries:
+        audit_trail.record(entries)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard(session):
+    _local.flushing = False
+    session.info.pop('audit_entries', None)
+
+
+# ============================================================
+# Puffer und Writer-Thread
+# ============================================================
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def _row(entry):
+    occurred_at, user_id, endpoint, action, entity, entity_id, changes = entry
+    return {
+        'event_id': uuid.uuid4().hex,
+        'occurred_at': occurred_at,
+        'user_id': user_id,
+        'endpoint': endpoint,
+        'action': action,
+        'entity': entity,
+        'entity_id': entity_id,
+        'changes': json.dumps(changes, default=_json_default, separators=(',', ':')) if changes else None,
+    }
+
+
+def _insert_rows(session, rows):
+    connection = session.connection()
+    dialect = postgresql if connection.dialect.name == 'postgresql' else sqlite
+    session.execute(dialect.insert(_audit).on_conflict_do_nothing(index_elements=[_audit.c.event_id]), rows)
+    return len(rows)
+
+
+class AuditTrail:
+    """Begrenzter Puffer erfasster Einträge und Writer-Thread, der sie batchweise schreibt."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._buffer = deque()
+        self._thread = None
+        self._app = None
+        self._stopping = False
+        self._writing = False
+        self._directory = None
+        self._next_replay = 0.0
+        atexit.register(self.stop)
+
+    def record(self, entries):
+        """Übernimmt Einträge nach dem Commit; ist der Puffer voll, direkt auf die Platte."""
+        limit = _config('AUDIT_QUEUE_SIZE')
+        with self._lock:
+            room = max(0, limit - len(self._buffer))
+            self._buffer.extend(entries[:room])
+            if len(self._buffer) >= _config('AUDIT_BATCH'):
+                self._ready.notify()
+        if len(entries) > room:
+            self._spill([_row(entry) for entry in entries[room:]], 'overflow')
+        if has_app_context():
+            self._ensure_started()
+
+    def depth(self):
+        return len(self._buffer)
+
+    def state(self):
+        """``idle`` (noch nicht gestartet), ``running`` oder ``dead`` (Writer-Thread beendet)."""
+        thread = self._thread
+        if thread is None:
+            return 'idle'
+        return 'running' if thread.is_alive() else 'dead'
+
+    def _ensure_started(self):
+        # Start erst beim ersten Eintrag, also nach dem Fork der gunicorn-Worker
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if (self._thread is not None and self._thread.is_alive()) or self._stopping:
+                return
+            self._app = current_app._get_current_object()
+            self._directory = spill_dir()
+            self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+            self._thread.start()
+
+    def flush(self, timeout=10):
+        """Wartet, bis der Puffer geschrieben ist (Tests, Benchmarks, Admin-Abfragen)."""
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            self._ready.notify()
+        while (self._buffer or self._writing) and time.monotonic() < deadline:
+            if self.state() != 'running':
+                return False
+            time.sleep(0.005)
+        return not self._buffer
+
+    def stop(self, timeout=10):
+        """Beendet den Writer; was noch im Puffer liegt, wird auf die Platte ausgelagert."""
+        with self._lock:
+            self._stopping = True
+            thread, self._thread = self._thread, None
+            self._ready.notify()
+        if thread is not None and thread.is_alive():
+            thread.join(timeout)
+        with self._lock:
+            rest = list(self._buffer)
+            self._buffer.clear()
+            self._stopping = False
+        if rest:
+            self._spill([_row(entry) for entry in rest], 'shutdown')
+
+    # --- Writer-Thread ---
+    def _run(self):
+        app = self._app
+        batch_size = app.config.get('AUDIT_BATCH', DEFAULTS['AUDIT_BATCH'])
+        interval = app.config.get('AUDIT_FLUSH_INTERVAL', DEFAULTS['AUDIT_FLUSH_INTERVAL'])
+        with app.app_context():
+            self._replay()
+            while True:
+                with self._lock:
+                    if len(self._buffer) < batch_size and not self._stopping:
+                        self._ready.wait(interval)
+                    if self._stopping:
+                        return  # Rest lagert stop() aus
+                    batch = [self._buffer.popleft() for _ in range(min(batch_size, len(self._buffer)))]
+                    self._writing = bool(batch)
+                try:
+                    if batch:
+                        self._write([_row(entry) for entry in batch])
+                    if time.monotonic() >= self._next_replay:
+                        self._replay()
+                finally:
+                    self._writing = False
+                    db.session.remove()
+
+    def _write(self, rows):
+        from src.services.write_queue import write_queue
+
+        try:
+            write_queue.execute(_insert_rows, rows)
+        except Exception:
+            self._app.logger.exception('audit: %d entries could not be written, spilling to disk', len(rows))
+            self._spill(rows, 'error')
+            return False
+        metrics.inc('rei_audit_entries_total', (('outcome', 'written'),), len(rows))
+        return True
+
+    # --- Auslagern und Nachspielen ---
+    def _spill(self, rows, reason):
+        directory = self._directory or spill_dir()
+        name = f'audit-{os.getpid()}-{time.time_ns()}.jsonl'
+        temporary = os.path.join(directory, name + '.tmp')
+        with open(temporary, 'w', encoding='utf-8') as out:
+            for row in rows:
+                out.write(json.dumps(row, default=_json_default, separators=(',', ':')) + '\n')
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(temporary, os.path.join(directory, name))
+        metrics.inc('rei_audit_entries_total', (('outcome', f'spilled_{reason}'),), len(rows))
+
+    def _replay(self):
+        """Schreibt ausgelagerte Dateien nach (auch die anderer bzw. früherer Prozesse)."""
+        self._next_replay = time.monotonic() + REPLAY_INTERVAL
+        replayed = 0
+        for path in sorted(glob.glob(os.path.join(self._directory or spill_dir(), 'audit-*.jsonl'))):
+            claimed = f'{path}.replay-{os.getpid()}'
+            try:
+                os.rename(path, claimed)  # atomar: jede Datei spielt genau ein Prozess nach
+            except FileNotFoundError:
+                continue
+            with open(claimed, encoding='utf-8') as source:
+                rows = [json.loads(line) for line in source if line.strip()]
+            for row in rows:
+                row['occurred_at'] = datetime.fromisoformat(row['occurred_at'])
+            from src.services.write_queue import write_queue
+
+            try:
+                for start in range(0, len(rows), DEFAULTS['AUDIT_BATCH']):
+                    write_queue.execute(_insert_rows, rows[start:start + DEFAULTS['AUDIT_BATCH']])
+            except Exception:
+                os.rename(claimed, path)  # beim nächsten Mal erneut
+                self._app.logger.exception('audit: replay of %s failed', path)
+                return replayed
+            os.remove(claimed)
+            replayed += len(rows)
+        if replayed:
+            metrics.inc('rei_audit_entries_total', (('outcome', 'replayed'),), replayed)
+        return replayed
+
+
+audit_trail = AuditTrail()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    from src.main import create_app
+
+    parser = argparse.ArgumentParser(description='Audit-Log: ausgelagerte Einträge nachspielen')
+    parser.add_argument('--replay', action='store_true', help='Dateien unter AUDIT_DIR in die DB schreiben')
+    args = parser.parse_args()
+
+    app = create_app({'STARTUP_TASKS': False})
+    with app.app_context():
+        if args.replay:
+            audit_trail._app = app
+            print(f'{audit_trail._replay()} entries replayed')
+        pending = glob.glob(os.path.join(spill_dir(), 'audit-*.jsonl'))
+        print(f'{len(pending)} spill files pending in {spill_dir()}')
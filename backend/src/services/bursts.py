@@ -0,0 +1,187 @@
+"""Burst-Erkennung auf den eingehenden Trend-Metriken.
+
+Jeder neue ``trend_metrics``-Punkt einer überwachten Reihe
+(``BURST_METRIC_TYPES``, Default ``mentions,engagement``) läuft in derselben
+Transaktion durch einen Online-Detektor mit konstantem Zustand je (Content,
+Metrik-Typ) in ``metric_stream_state``:
+
+* EWMA von Mittelwert und Varianz (Gewicht ``BURST_LAMBDA``) als Basislinie,
+* z-Wert des neuen Punkts gegen die Basislinie *vor* dem Punkt,
+* einseitige CUSUM-Summe ``S = max(0, S + z - k)`` für anhaltende, einzeln
+  noch unauffällige Anstiege.
+
+Ein Burst wird gemeldet, sobald ``z >= BURST_Z`` oder ``S >= BURST_CUSUM_H``
+(nach ``BURST_WARMUP`` Punkten); danach beginnt die CUSUM-Summe von vorn. Die
+Standardabweichung ist nach unten auf 10 % des Mittelwerts begrenzt, damit
+eine bisher konstante Reihe nicht bei jeder Schwankung anschlägt. Punkte, die
+zeitlich vor dem letzten verarbeiteten liegen (Nachlieferungen), ändern den
+Zustand nicht.
+
+Bursts landen in ``trend_burst``; mit ``BURST_ALERTS`` (Default an) lösen sie
+aktive ``TrendAlert``s vom Typ ``burst`` des Contents aus (``threshold`` =
+Mindest-z-Wert, leer = jeder Burst).
+"""
+import math
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import bindparam, select, tuple_, update
+
+from src.models.trend_management import MetricStreamState, TrendAlert, TrendBurst, TrendMetrics
+
+DEFAULTS = {
+    'BURST_METRIC_TYPES': 'mentions,engagement',
+    'BURST_LAMBDA': 0.2,
+    'BURST_Z': 3.0,
+    'BURST_CUSUM_K': 0.5,
+    'BURST_CUSUM_H': 5.0,
+    'BURST_WARMUP': 4,
+    'BURST_ALERTS': True,
+}
+MIN_RELATIVE_SD = 0.1
+
+_states = MetricStreamState.__table__
+_bursts = TrendBurst.__table__
+_alerts = TrendAlert.__table__
+_metrics = TrendMetrics.__table__
+
+
+class BurstDetector:
+    """Reine Detektor-Logik; Zustand ``[count, mean, variance, cusum]`` je Reihe."""
+    __slots__ = ('lam', 'z', 'k', 'h', 'warmup')
+
+    def __init__(self, lam=0.2, z=3.0, k=0.5, h=5.0, warmup=4):
+        self.lam, self.z, self.k, self.h, self.warmup = lam, z, k, h, warmup
+
+    @classmethod
+    def from_config(cls, config):
+        get = lambda key: config.get(key, DEFAULTS[key])
+        return cls(get('BURST_LAMBDA'), get('BURST_Z'), get('BURST_CUSUM_K'), get('BURST_CUSUM_H'), get('BURST_WARMUP'))
+
+    def step(self, state, value):
+        """Verarbeitet einen Punkt (ändert ``state``); gibt bei einem Burst ``(z, cusum, mean, sd, detector)`` zurück."""
+        count, mean, variance, cusum = state
+        burst = None
+        if count == 0:
+            state[:] = [1, value, 0.0, 0.0]
+            return None
+        if count >= self.warmup:
+            sd = max(math.sqrt(variance), MIN_RELATIVE_SD * abs(mean), 1e-9)
+            z = (value - mean) / sd
+            cusum = max(0.0, cusum + z - self.k)
+            if z >= self.z or cusum >= self.h:
+                burst = (z, cusum, mean, sd, 'zscore' if z >= self.z else 'cusum')
+                cusum = 0.0
+        diff = value - mean
+        increment = self.lam * diff
+        state[:] = [count + 1, mean + increment, (1 - self.lam) * (variance + diff * increment), cusum]
+        return burst
+
+
+def _watched(config):
+    types = config.get('BURST_METRIC_TYPES', DEFAULTS['BURST_METRIC_TYPES'])
+    return {t.strip() for t in types.split(',') if t.strip()} if isinstance(types, str) else set(types)
+
+
+def ingest(session, points):
+    """Führt neue Metrik-Punkte durch den Detektor (in der Transaktion von ``session``).
+
+    ``points``: Dicts mit ``content_id``, ``metric_type``, ``value``,
+    ``period_start`` und optional ``metric_id``. Gibt die erkannten Bursts zurück.
+    """
+    config = current_app.config
+    watched = _watched(config)
+    points = sorted((p for p in points if p['metric_type'] in watched), key=lambda p: p['period_start'])
+    if not points:
+        return []
+    detector = BurstDetector.from_config(config)
+
+    keys = sorted({(p['content_id'], p['metric_type']) for p in points})
+    states, known = {}, set()
+    for start in range(0, len(keys), 500):
+        for cid, mtype, count, mean, variance, cusum, last in session.execute(
+                select(_states.c.content_id, _states.c.metric_type, _states.c.count, _states.c.mean,
+                       _states.c.variance, _states.c.cusum, _states.c.last_period_start)
+                .where(tuple_(_states.c.content_id, _states.c.metric_type).in_(keys[start:start + 500]))
+                .with_for_update()):
+            states[(cid, mtype)] = ([count, mean, variance, cusum], last)
+            known.add((cid, mtype))
+
+    now = datetime.utcnow()
+    bursts = []
+    for point in points:
+        key = (point['content_id'], point['metric_type'])
+        state, last = states.get(key) or ([0, 0.0, 0.0, 0.0], None)
+        if last is not None and point['period_start'] < last:
+            continue  # Nachlieferung
+        burst = detector.step(state, float(point['value']))
+        states[key] = (state, point['period_start'])
+        if burst:
+            z, cusum, mean, sd, kind = burst
+            bursts.append({'content_id': key[0], 'metric_type': key[1], 'metric_id': point.get('metric_id'),
+                           'period_start': point['period_start'], 'value': point['value'], 'baseline': mean,
+                           'stddev': sd, 'zscore': z, 'cusum': cusum, 'detector': kind, 'alerts_triggered': 0,
+                           'detected_at': now})
+
+    rows = [{'cid': cid, 'mtype': mtype, 'count': s[0], 'mean': s[1], 'variance': s[2], 'cusum': s[3],
+             'last': last, 'now': now} for (cid, mtype), (s, last) in states.items()]
+    changed = [row for row in rows if (row['cid'], row['mtype']) in known]
+    if changed:
+        session.execute(
+            update(_states)
+            .where(_states.c.content_id == bindparam('cid'), _states.c.metric_type == bindparam('mtype'))
+            .values(count=bindparam('count'), mean=bindparam('mean'), variance=bindparam('variance'),
+                    cusum=bindparam('cusum'), last_period_start=bindparam('last'), updated_at=bindparam('now')),
+            changed)
+    new = [{'content_id': row['cid'], 'metric_type': row['mtype'], 'count': row['count'], 'mean': row['mean'],
+            'variance': row['variance'], 'cusum': row['cusum'], 'last_period_start': row['last'],
+            'updated_at': now} for row in rows if (row['cid'], row['mtype']) not in known]
+    if new:
+        session.execute(_states.insert(), new)
+
+    if bursts:
+        if config.get('BURST_ALERTS', DEFAULTS['BURST_ALERTS']):
+            _trigger_alerts(session, bursts, now)
+        session.execute(_bursts.insert(), bursts)
+    return bursts
+
+
+def _trigger_alerts(session, bursts, now):
+    content_ids = sorted({b['content_id'] for b in bursts})
+    alerts = {}
+    for start in range(0, len(content_ids), 500):
+        for alert_id, cid, threshold in session.execute(
+                select(_alerts.c.id, _alerts.c.content_id, _alerts.c.threshold)
+                .where(_alerts.c.content_id.in_(content_ids[start:start + 500]),
+                       _alerts.c.alert_type == 'burst', _alerts.c.is_active.is_(True))):
+            alerts.setdefault(cid, []).append((alert_id, threshold))
+    triggered = set()
+    for burst in bursts:
+        for alert_id, threshold in alerts.get(burst['content_id'], ()):
+            if threshold is None or burst['zscore'] >= threshold:
+                triggered.add(alert_id)
+                burst['alerts_triggered'] += 1
+    if triggered:
+        session.execute(update(_alerts).where(_alerts.c.id.in_(sorted(triggered))).values(last_triggered=now))
+
+
+def replay(connection, config=DEFAULTS):
+    """Baut ``metric_stream_state`` aus allen vorhandenen Metriken neu auf (ohne Bursts zu melden)."""
+    detector = BurstDetector.from_config(config)
+    states = {}
+    for cid, mtype, value, period_start in connection.execute(
+            select(_metrics.c.content_id, _metrics.c.metric_type, _metrics.c.value, _metrics.c.period_start)
+            .where(_metrics.c.metric_type.in_(sorted(_watched(config))))
+            .order_by(_metrics.c.content_id, _metrics.c.metric_type, _metrics.c.period_start, _metrics.c.id)):
+        state = states.setdefault((cid, mtype), [[0, 0.0, 0.0, 0.0], None])
+        detector.step(state[0], float(value))
+        state[1] = period_start
+    # die Historie zählt als bereits gesehen: keine offene CUSUM-Summe übernehmen
+    now = datetime.utcnow()
+    rows = [{'content_id': cid, 'metric_type': mtype, 'count': s[0], 'mean': s[1], 'variance': s[2],
+             'cusum': 0.0, 'last_period_start': last, 'updated_at': now}
+            for (cid, mtype), (s, last) in states.items()]
+    connection.execute(_states.delete())
+    for start in range(0, len(rows), 5000):
+        connection.execute(_states.insert(), rows[start:start + 5000])
+    return len(rows)
@@ -0,0 +1,113 @@
+"""Kommentare: Cursor-Paginierung, Threads und Benutzernamen je Seite.
+
+Seiten werden per Keyset auf ``(created_at, id)`` geblättert (Index
+``ix_comment_content_created`` bzw. ``ix_comment_parent_created``): Der
+Cursor ist die Position des letzten Kommentars der Seite, kodiert als
+URL-sicheres Base64. Anders als mit OFFSET kostet jede Seite gleich viel,
+und neue Kommentare verschieben keine bereits gelesenen Seiten.
+
+Threads: ``parent_id`` verweist auf den beantworteten Kommentar (beliebige
+Tiefe), ``reply_count`` zählt seine direkten Antworten und wird beim
+Einfügen in derselben Transaktion erhöht. Eine Seite enthält wahlweise
+alle Kommentare (flach) oder nur die obersten Ebene, optional mit den
+ersten ``replies`` Antworten je Kommentar (eine Abfrage mit
+``ROW_NUMBER``). Benutzernamen aller Kommentare einer Seite kommen aus
+einer einzigen Abfrage.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from sqlalchemy import func, select, tuple_, update
+
+from src.models.user import User
+from src.models.content import Comment
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+MAX_REPLIES = 20
+
+_comment = Comment.__table__
+
+
+class CursorError(ValueError):
+    pass
+
+
+def encode_cursor(comment):
+    raw = json.dumps([comment.created_at.isoformat(), comment.id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        created_at, comment_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return datetime.fromisoformat(created_at), int(comment_id)
+    except (binascii.Error, ValueError, TypeError) as e:
+        raise CursorError('Invalid cursor') from e
+
+
+def usernames(session, user_ids):
+    """``{user_id: username}`` mit einer Abfrage."""
+    ids = sorted(set(user_ids))
+    if not ids:
+        return {}
+    return dict(session.execute(select(User.id, User.username).where(User.id.in_(ids))).all())
+
+
+def page(session, criteria, limit=DEFAULT_LIMIT, cursor=None, descending=True):
+    """Eine Seite Kommentare zu ``criteria`` (Filterausdrücke); gibt ``(kommentare, next_cursor)`` zurück."""
+    position = tuple_(Comment.created_at, Comment.id)
+    query = select(Comment).where(*criteria)
+    if cursor:
+        after = tuple_(*decode_cursor(cursor))
+        query = query.where(position < after if descending else position > after)
+    order = (Comment.created_at.desc(), Comment.id.desc()) if descending else (Comment.created_at, Comment.id)
+    comments = session.execute(query.order_by(*order).limit(limit + 1)).scalars().all()
+    if len(comments) > limit:
+        return comments[:limit], encode_cursor(comments[limit - 1])
+    return comments, None
+
+
+def first_replies(session, parent_ids, per_parent):
+    """Die ersten ``per_parent`` Antworten je Kommentar (chronologisch), eine Abfrage."""
+    if not parent_ids or per_parent < 1:
+        return {}
+    number = func.row_number().over(partition_by=Comment.parent_id,
+                                    order_by=(Comment.created_at, Comment.id)).label('number')
+    ranked = select(Comment.id, number).where(Comment.parent_id.in_(parent_ids)).subquery()
+    replies = {}
+    for reply in session.execute(
+            select(Comment).join(ranked, ranked.c.id == Comment.id).where(ranked.c.number <= per_parent)
+            .order_by(Comment.parent_id, Comment.created_at, Comment.id)).scalars():
+        replies.setdefault(reply.parent_id, []).append(reply)
+    return replies
+
+
+def serialize(session, comments, replies=None):
+    """Kommentare als Dicts; Benutzernamen (inkl. Antworten) aus einer Abfrage."""
+    replies = replies or {}
+    names = usernames(session, [c.user_id for c in comments]
+                      + [r.user_id for items in replies.values() for r in items])
+    result = []
+    for comment in comments:
+        data = comment.to_dict(names)
+        if comment.id in replies:
+            data['replies'] = [reply.to_dict(names) for reply in replies[comment.id]]
+        result.append(data)
+    return result
+
+
+def insert(session, content_id, user_id, text, parent_id=None, username=None):
+    """Legt einen Kommentar an (im Writer-Thread) und erhöht ``reply_count`` des Elternkommentars."""
+    if parent_id is not None:
+        updated = session.execute(
+            update(_comment).where(_comment.c.id == parent_id, _comment.c.content_id == content_id)
+            .values(reply_count=_comment.c.reply_count + 1)).rowcount
+        if not updated:
+            raise LookupError('Parent comment not found for this content')
+    comment = Comment(content_id=content_id, user_id=user_id, text=text, parent_id=parent_id)
+    session.add(comment)
+    session.flush()
+    return comment.to_dict({user_id: username} if username is not None else None)
@@ -0,0 +1,247 @@
+"""Konsens der Analysten je (Content, Score-Typ), inkrementell gepflegt.
+
+``trend_score`` hält pro Bewerter einen aktuellen Wert. ``trend_score_consensus``
+fasst diese Werte je Content und Score-Typ zusammen, ohne sie neu zu laden:
+Anzahl, Summe und Quadratsumme (exakter Mittelwert und Varianz) sowie eine
+Quantil-Skizze für Median, getrimmten Mittelwert und Quartile.
+
+Die Skizze arbeitet wie DDSketch mit logarithmischen Buckets (relativer Fehler
+höchstens ``ALPHA`` = 1 %) und speichert nur belegte Buckets (7 Byte je
+Bucket). Anders als bei Stichproben-Skizzen lassen sich Werte wieder
+herausnehmen – nötig, weil ein Analyst seinen Score überschreibt. Bei ein oder
+zwei Werten sind Median und getrimmter Mittelwert exakt (= Mittelwert).
+
+Welcher Wert in den Priority Score eingeht, bestimmt ``PRIORITY_AGGREGATION``
+(``mean``, ``median``, ``trimmed_mean``; Default ``trimmed_mean`` mit
+``CONSENSUS_TRIM`` = 0,25 je Seite).
+"""
+import math
+import struct
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.orm.attributes import set_committed_value
+
+from src.models.trend_management import ScoreConsensus, TrendScore
+
+ALPHA = 0.01
+AGGREGATIONS = ('mean', 'median', 'trimmed_mean')
+DEFAULT_AGGREGATION = 'trimmed_mean'
+DEFAULT_TRIM = 0.25
+# Gewichtungen der Score-Typen im Priority Score
+WEIGHTS = {
+    'relevance': 0.25,
+    'impact': 0.30,
+    'urgency': 0.20,
+    'feasibility': 0.15,
+    'risk': 0.10
+}
+
+_GAMMA = (1 + ALPHA) / (1 - ALPHA)
+_LOG_GAMMA = math.log(_GAMMA)
+_MIN_VALUE = 1e-9  # |Wert| darunter zählt als 0
+_BIN = struct.Struct('<bhI')  # Vorzeichen, Bucket-Index, Anzahl
+
+
+class QuantileSketch:
+    """Log-Bucket-Histogramm mit Einfügen und Entfernen; Schlüssel ``(vorzeichen, index)``."""
+    __slots__ = ('bins', 'count')
+
+    def __init__(self, bins=None):
+        self.bins = bins or {}
+        self.count = sum(self.bins.values())
+
+    @staticmethod
+    def _key(value):
+        if abs(value) < _MIN_VALUE:
+            return 0, 0
+        return (1 if value > 0 else -1), math.ceil(math.log(abs(value)) / _LOG_GAMMA)
+
+    @staticmethod
+    def _value(key):
+        sign, index = key
+        # Mittelpunkt des Buckets (gamma^(i-1), gamma^i] mit relativem Fehler <= ALPHA
+        return sign * 2 * _GAMMA ** index / (_GAMMA + 1)
+
+    def add(self, value):
+        key = self._key(value)
+        self.bins[key] = self.bins.get(key, 0) + 1
+        self.count += 1
+
+    def remove(self, value):
+        key = self._key(value)
+        if self.bins.get(key):
+            self.bins[key] -= 1
+            self.count -= 1
+            if not self.bins[key]:
+                del self.bins[key]
+
+    def _ordered(self):
+        # aufsteigend nach Wert: negative (großer Index zuerst), 0, positive
+        return sorted(self.bins.items(), key=lambda item: (item[0][0], item[0][1] * item[0][0]))
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for key, count in self._ordered():
+            seen += count
+            if seen > rank:
+                return self._value(key)
+        return self._value(key)
+
+    def trimmed_mean(self, trim):
+        """Mittelwert ohne die untersten und obersten ``trim`` Anteile."""
+        cut = int(self.count * trim)
+        keep = self.count - 2 * cut
+        if keep <= 0:
+            return self.quantile(0.5)
+        total = seen = 0
+        for key, count in self._ordered():
+            # Überlappung des Buckets mit dem Rangbereich [cut, cut + keep)
+            inside = max(0, min(seen + count, cut + keep) - max(seen, cut))
+            total += inside * self._value(key)
+            seen += count
+        return total / keep
+
+    def encode(self):
+        return b''.join(_BIN.pack(sign, index, count) for (sign, index), count in self.bins.items())
+
+    @classmethod
+    def decode(cls, data):
+        return cls({(sign, index): count for sign, index, count in _BIN.iter_unpack(bytes(data or b''))})
+
+
+def statistics(row, trim=DEFAULT_TRIM):
+    """Kennzahlen eines ``ScoreConsensus``-Eintrags (bzw. ``None`` ohne Werte)."""
+    if not row.count:
+        return None
+    mean = row.total / row.count
+    variance = max(0.0, row.total_sq / row.count - mean * mean)
+    sketch = QuantileSketch.decode(row.sketch)
+    if row.count <= 2:
+        # exakt: Median und getrimmter Mittelwert fallen mit dem Mittelwert zusammen
+        median = trimmed = mean
+    else:
+        median, trimmed = sketch.quantile(0.5), sketch.trimmed_mean(trim)
+    q25, q75 = (mean, mean) if row.count == 1 else (sketch.quantile(0.25), sketch.quantile(0.75))
+    return {
+        'count': row.count,
+        'mean': round(mean, 4),
+        'median': round(median, 4),
+        'trimmed_mean': round(trimmed, 4),
+        'variance': round(variance, 4),
+        'stddev': round(math.sqrt(variance), 4),
+        'q25': round(q25, 4),
+        'q75': round(q75, 4),
+        'iqr': round(q75 - q25, 4),
+        # Abstand von Mittelwert und Median: hoch, wenn einzelne Ausreißer den Mittelwert ziehen
+        'outlier_skew': round(abs(mean - median), 4)
+    }
+
+
+def aggregate(row, mode=DEFAULT_AGGREGATION, trim=DEFAULT_TRIM):
+    """Konsenswert eines Eintrags gemäß ``mode``."""
+    if mode not in AGGREGATIONS:
+        raise ValueError(f'unknown aggregation {mode!r}, expected one of {AGGREGATIONS}')
+    if not row.count:
+        return None
+    if mode == 'mean' or row.count <= 2:
+        return row.total / row.count
+    sketch = QuantileSketch.decode(row.sketch)
+    return sketch.quantile(0.5) if mode == 'median' else sketch.trimmed_mean(trim)
+
+
+def priority_score(rows, mode=DEFAULT_AGGREGATION, trim=DEFAULT_TRIM):
+    """Gewichteter Konsens über die Score-Typen, Skala 0-5."""
+    total_score = total_weight = 0.0
+    for row in rows:
+        weight = WEIGHTS.get(row.score_type)
+        value = aggregate(row, mode, trim) if weight else None
+        if value is not None:
+            total_score += value * weight
+            total_weight += weight
+    return total_score / total_weight if total_weight else 0.0
+
+
+def _new_row(session, content, score_type):
+    row = ScoreConsensus(content=content, score_type=score_type, count=0, total=0.0, total_sq=0.0, sketch=b'')
+    session.add(row)
+    return row
+
+
+def _book(row, sketch, value, previous):
+    if previous is not None and row.count:
+        sketch.remove(previous)
+        row.count, row.total, row.total_sq = row.count - 1, row.total - previous, row.total_sq - previous * previous
+    sketch.add(value)
+    row.count, row.total, row.total_sq = row.count + 1, row.total + value, row.total_sq + value * value
+
+
+def record(session, content, score_type, value, previous=None):
+    """Bucht einen neuen Score (und nimmt den überschriebenen ``previous`` heraus)."""
+    row = (session.query(ScoreConsensus)
+           .filter_by(content_id=content.id, score_type=score_type)
+           .with_for_update().populate_existing().first())
+    if row is None:
+        row = _new_row(session, content, score_type)
+    sketch = QuantileSketch.decode(row.sketch)
+    _book(row, sketch, value, previous)
+    row.sketch = sketch.encode()
+    row.updated_at = datetime.utcnow()
+    return row
+
+
+def record_many(session, contents, changes):
+    """Bucht ``[(content_id, score_type, value, previous), ...]`` für ``{id: Content}`` (Batch-Scoring).
+
+    Alle Konsens-Einträge der Contents kommen aus einer Abfrage und landen
+    zugleich in ``content.score_consensus`` (kein Nachladen für den Priority
+    Score); jede Skizze wird einmal dekodiert und einmal kodiert.
+    """
+    rows = {content_id: [] for content_id in contents}
+    for row in session.execute(
+            select(ScoreConsensus).where(ScoreConsensus.content_id.in_(list(contents)))
+            .with_for_update().execution_options(populate_existing=True)).scalars():
+        rows[row.content_id].append(row)
+    for content_id, loaded in rows.items():
+        set_committed_value(contents[content_id], 'score_consensus', loaded)
+    by_key = {(row.content_id, row.score_type): row for loaded in rows.values() for row in loaded}
+    sketches = {}
+    for content_id, score_type, value, previous in changes:
+        key = (content_id, score_type)
+        row = by_key.get(key)
+        if row is None:
+            row = by_key[key] = _new_row(session, contents[content_id], score_type)
+        if key not in sketches:
+            sketches[key] = QuantileSketch.decode(row.sketch)
+        _book(row, sketches[key], value, previous)
+    now = datetime.utcnow()
+    for key, sketch in sketches.items():
+        by_key[key].sketch = sketch.encode()
+        by_key[key].updated_at = now
+    return len(sketches)
+
+
+def rebuild(connection):
+    """Baut alle Konsens-Einträge aus ``trend_score`` neu auf (Migration, Bulk-Importe)."""
+    table = ScoreConsensus.__table__
+    scores = TrendScore.__table__
+    groups = {}
+    for content_id, score_type, value in connection.execute(
+            select(scores.c.content_id, scores.c.score_type, scores.c.value)):
+        groups.setdefault((content_id, score_type), []).append(value)
+    now = datetime.utcnow()
+    rows = []
+    for (content_id, score_type), values in groups.items():
+        sketch = QuantileSketch()
+        for value in values:
+            sketch.add(value)
+        rows.append({'content_id': content_id, 'score_type': score_type, 'count': len(values),
+                     'total': sum(values), 'total_sq': sum(v * v for v in values),
+                     'sketch': sketch.encode(), 'updated_at': now})
+    connection.execute(table.delete())
+    for start in range(0, len(rows), 5000):
+        connection.execute(table.insert(), rows[start:start + 5000])
+    return len(rows)
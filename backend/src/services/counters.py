@@ -0,0 +1,247 @@
+"""Plattform-Zähler für ``/api/stats`` ohne ``COUNT(*)`` pro Aufruf.
+
+Die Tabelle ``platform_counter`` hält je Kennzahl ``SHARDS`` Zeilen; gelesen
+wird die Summe in einer einzigen Abfrage. Gepflegt werden die Zähler über ein
+``after_flush``-Event auf allen ORM-Sessions (auch denen der Write-Queue):
+Neue und gelöschte Contents, Ratings, Kommentare und Opportunity Spaces (inkl.
+Cascade-Deletes) sowie Typwechsel eines Contents werden in derselben
+Transaktion auf eine zufällige Shard-Zeile gebucht. Parallele Schreiber auf
+PostgreSQL warten so selten auf dieselbe Zeilensperre.
+
+Schreibzugriffe am ORM vorbei (Core-Inserts, ``query.delete()``, manuelles
+SQL) erfassen die Zähler nicht. ``reconcile`` zählt deshalb nach, meldet
+Abweichungen und korrigiert sie; es sperrt dazu alle Zählerzeilen, damit
+gleichzeitige Inkremente weder verloren gehen noch doppelt zählen. Aufruf
+per Cron bzw. nach Bulk-Importen::
+
+    python -m src.services.counters          # prüfen und reparieren
+    python -m src.services.counters --check  # nur prüfen
+
+oder über ``POST /api/admin/counters/reconcile``.
+
+Zusätzlich zählt ``data_version`` jeden Flush, der Contents (inkl. ihrer
+MinHash-Signatur), Ratings, Phasen oder Tags ändert (kein ``COUNT(*)``-Gegenstück, nur monoton steigend). Die
+Report-Caches (src/services/reports.py) verwenden die Summe als Datenstand;
+Core-Schreiber, die Content-Spalten ändern, rufen ``bump_data_version`` auf,
+``reconcile`` zählt sie nach Bulk-Importen einmal hoch. ``auth_version``
+zählt Rollen-, Token- und Teamänderungen (src/auth.py).
+
+Für die prozesslokalen Strukturen (Ranglisten, Tag-Index, Duplikat- und
+Ähnlichkeitsindex, Berechtigungs-Cache) liefert ``foreign_versions`` die
+Versionen ohne die ORM-Flushes, die dieser Prozess selbst committet hat: Die
+Strukturen übernehmen eigene Änderungen inkrementell und bauen nur neu auf,
+wenn ein anderer Worker-Prozess (oder ein Core-Schreiber) den Stand geändert
+hat. Gelesen wird mit einer Abfrage, innerhalb eines Requests nur einmal.
+"""
+import random
+import threading
+
+from flask import g, has_request_context
+from sqlalchemy import bindparam, case, event, func, inspect, select, update
+from sqlalchemy.orm import Session
+
+from src.models.content import Content, ContentSignature, Rating, Comment, OpportunitySpace, PlatformCounter
+from src.models.trend_management import TrendPhase, TrendTag
+
+SHARDS = 8
+DATA_VERSION = 'data_version'
+AUTH_VERSION = 'auth_version'
+VERSIONS = (DATA_VERSION, AUTH_VERSION)
+_VERSIONED = (Content, ContentSignature, Rating, TrendPhase, TrendTag)
+CONTENT_TYPES = {'trend': 'trends', 'technology': 'technologies', 'inspiration': 'inspirations'}
+
+_counter = PlatformCounter.__table__
+
+# Kennzahl -> Zählabfrage (Reihenfolge = Reihenfolge in /api/stats)
+COUNTERS = {
+    'total_contents': select(func.count()).select_from(Content.__table__),
+    **{name: select(func.count()).select_from(Content.__table__).where(Content.content_type == ctype)
+       for ctype, name in CONTENT_TYPES.items()},
+    'total_ratings': select(func.count()).select_from(Rating.__table__),
+    'total_comments': select(func.count()).select_from(Comment.__table__),
+    'opportunity_spaces': select(func.count()).select_from(OpportunitySpace.__table__),
+}
+_SIMPLE = {Rating: 'total_ratings', Comment: 'total_comments', OpportunitySpace: 'opportunity_spaces'}
+
+_increment = (update(_counter)
+              .where(_counter.c.name == bindparam('counter'), _counter.c.shard == bindparam('shard_no'))
+              .values(value=_counter.c.value + bindparam('delta')))
+
+# Committete Versionsschritte aus ORM-Flushes dieses Prozesses
+_local_versions = dict.fromkeys(VERSIONS, 0)
+_local_lock = threading.Lock()
+
+
+def _content_deltas(deltas, obj, sign):
+    deltas['total_contents'] = deltas.get('total_contents', 0) + sign
+    name = CONTENT_TYPES.get(obj.content_type)
+    if name:
+        deltas[name] = deltas.get(name, 0) + sign
+
+
+def _collect_deltas(session):
+    deltas = {}
+    for objects, sign in ((session.new, 1), (session.deleted, -1)):
+        for obj in objects:
+            if isinstance(obj, Content):
+                _content_deltas(deltas, obj, sign)
+            else:
+                name = _SIMPLE.get(type(obj))
+                if name:
+                    deltas[name] = deltas.get(name, 0) + sign
+    for obj in session.dirty:
+        if isinstance(obj, Content):
+            history = inspect(obj).attrs.content_type.history
+            if history.has_changes():
+                for old in history.deleted:
+                    if old in CONTENT_TYPES:
+                        deltas[CONTENT_TYPES[old]] = deltas.get(CONTENT_TYPES[old], 0) - 1
+                for new in history.added:
+                    if new in CONTENT_TYPES:
+                        deltas[CONTENT_TYPES[new]] = deltas.get(CONTENT_TYPES[new], 0) + 1
+    if any(isinstance(obj, _VERSIONED) for objects in (session.new, session.dirty, session.deleted)
+           for obj in objects):
+        deltas[DATA_VERSION] = 1
+    return {name: delta for name, delta in deltas.items() if delta}
+
+
+@event.listens_for(Session, 'after_flush')
+def _book_counters(session, flush_context):
+    # new/deleted/dirty zeigen in after_flush noch den Stand vor dem Flush
+    deltas = _collect_deltas(session)
+    if deltas:
+        shard = random.randrange(SHARDS)
+        session.connection().execute(_increment, [
+            {'counter': name, 'shard_no': shard, 'delta': delta} for name, delta in deltas.items()
+        ])
+        if DATA_VERSION in deltas:
+            _note_local(session, DATA_VERSION)
+
+
+def _note_local(session, name):
+    pending = session.info.setdefault('local_versions', {})
+    pending[name] = pending.get(name, 0) + 1
+
+
+def book_version(session, name):
+    """Erhöht ``name`` im laufenden Flush; nach dem Commit gilt der Schritt als prozesslokal."""
+    session.connection().execute(_increment, {'counter': name, 'shard_no': random.randrange(SHARDS), 'delta': 1})
+    _note_local(session, name)
+
+
+@event.listens_for(Session, 'after_commit')
+def _commit_versions(session):
+    pending = session.info.pop('local_versions', None)
+    if pending:
+        with _local_lock:
+            for name, delta in pending.items():
+                _local_versions[name] += delta
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_versions(session):
+    session.info.pop('local_versions', None)
+
+
+def read_counters(session):
+    """Alle Kennzahlen mit einer Abfrage; ``None``, solange die Zähler nicht initialisiert sind."""
+    rows = dict(session.execute(select(_counter.c.name, func.sum(_counter.c.value)).group_by(_counter.c.name)).all())
+    if not set(COUNTERS) <= rows.keys():
+        return None
+    return {name: int(rows[name]) for name in COUNTERS}
+
+
+def read_data_version(session):
+    """Aktueller Datenstand (0, solange die Zeilen fehlen)."""
+    return int(session.execute(select(func.coalesce(func.sum(_counter.c.value), 0))
+                               .where(_counter.c.name == DATA_VERSION)).scalar())
+
+
+def foreign_versions(session):
+    """``{name: version}`` ohne die eigenen committeten ORM-Flushes (pro Request einmal gelesen).
+
+    Ändert sich ein Wert, hat ein anderer Prozess bzw. ein Core-Schreiber
+    geschrieben. Eigene Commits verschieben die Werte nicht; sie zwischen
+    Commit und ``after_commit`` zu sehen, löst höchstens einen unnötigen
+    Neuaufbau aus.
+    """
+    if has_request_context() and 'foreign_versions' in g:
+        return g.foreign_versions
+    with _local_lock:
+        local = dict(_local_versions)
+    totals = dict(session.execute(select(_counter.c.name, func.sum(_counter.c.value))
+                                  .where(_counter.c.name.in_(VERSIONS)).group_by(_counter.c.name)).all())
+    versions = {name: int(totals.get(name) or 0) - local[name] for name in VERSIONS}
+    if has_request_context():
+        g.foreign_versions = versions
+    return versions
+
+
+def foreign_data_version(session):
+    """``data_version`` aus ``foreign_versions``: Freshness-Marke der prozesslokalen Indizes."""
+    return foreign_versions(session)[DATA_VERSION]
+
+
+def bump_data_version(connection):
+    """Datenstand nach Schreibzugriffen am ORM vorbei erhöhen (in derselben Transaktion)."""
+    connection.execute(_increment, {'counter': DATA_VERSION, 'shard_no': random.randrange(SHARDS), 'delta': 1})
+
+
+def count_live(session):
+    """Kennzahlen per ``COUNT(*)`` (Fallback ohne Zählertabelle, Abgleich)."""
+    return {name: session.execute(query).scalar() for name, query in COUNTERS.items()}
+
+
+def reconcile(connection, repair=True):
+    """Vergleicht die Zähler mit ``COUNT(*)`` und korrigiert Abweichungen.
+
+    Muss in einer Transaktion laufen. Gibt ``{name: {'counter': alt, 'actual': neu}}``
+    für alle abweichenden (bzw. fehlenden) Kennzahlen zurück.
+    """
+    # Erstes Statement sperrt alle Zählerzeilen (SQLite: Schreibsperre der DB) bis
+    # zum Commit. Laufende Transaktionen, die schon gebucht haben, sind danach
+    # committet und in COUNT(*) sichtbar; spätere buchen auf den korrigierten Wert.
+    connection.execute(update(_counter).values(value=_counter.c.value))
+    existing = set(connection.execute(select(_counter.c.name, _counter.c.shard)))
+    missing = [{'name': name, 'shard': shard, 'value': 0}
+               for name in (*COUNTERS, *VERSIONS) for shard in range(SHARDS) if (name, shard) not in existing]
+    if missing and repair:
+        connection.execute(_counter.insert(), missing)
+    current = dict(connection.execute(select(_counter.c.name, func.sum(_counter.c.value)).group_by(_counter.c.name)).all())
+    drift = {}
+    for name, query in COUNTERS.items():
+        actual = connection.execute(query).scalar()
+        counter = current.get(name)
+        if counter is not None and int(counter) == actual:
+            continue
+        drift[name] = {'counter': None if counter is None else int(counter), 'actual': actual}
+        if repair:
+            connection.execute(update(_counter).where(_counter.c.name == name).values(
+                value=case((_counter.c.shard == 0, actual), else_=0)))
+    if repair:
+        # Bulk-Importe am ORM vorbei sind im Datenstand sonst nicht sichtbar
+        bump_data_version(connection)
+    return drift
+
+
+if __name__ == '__main__':
+    import argparse
+
+    from src.main import create_app
+    from src.models.__init__ import db
+
+    parser = argparse.ArgumentParser(description='Plattform-Zähler prüfen und reparieren')
+    parser.add_argument('--check', action='store_true', help='nur prüfen, nichts ändern')
+    args = parser.parse_args()
+
+    app = create_app({'STARTUP_TASKS': False})
+    with app.app_context():
+        with db.engine.connect() as connection:
+            drift = reconcile(connection, repair=not args.check)
+            if args.check:
+                connection.rollback()
+            else:
+                connection.commit()
+    for name, values in drift.items():
+        print(f'{name:<20} Zähler {values["counter"]} -> tatsächlich {values["actual"]}')
+    print(f'{len(drift)} Abweichungen' + ('' if args.check or not drift else ' korrigiert'))
@@ -0,0 +1,254 @@
+"""Near-Duplicate-Erkennung für Contents über MinHash und LSH.
+
+Jeder Content erhält eine MinHash-Signatur (``NUM_PERM`` Werte, uint32) über
+Wort-Shingles aus Titel, Kurz- und Langbeschreibung; sie wird in
+``content_signature`` gespeichert. Im Speicher liegt ein LSH-Index mit
+``BANDS`` Bändern zu je ``ROWS`` Werten: Zwei Contents werden Kandidaten,
+sobald ein Band übereinstimmt; der Anteil gleicher Signaturwerte schätzt ihre
+Jaccard-Ähnlichkeit. Eine Prüfung kostet damit ``BANDS`` Dict-Zugriffe.
+
+Gepflegt wird der Index wie die Ranglisten über Session-Events: ``after_flush``
+merkt sich neue, geänderte und gelöschte Signaturen, ``after_commit``
+übernimmt sie. Schreibzugriffe anderer Worker-Prozesse erkennt
+``ensure_fresh`` am fremden Datenstand (``foreign_data_version``,
+src/services/counters.py) und baut dann neu auf; sonst fragt eine Prüfung
+die Datenbank nicht ab.
+"""
+import re
+import threading
+import zlib
+from functools import lru_cache
+
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from src.lazy import lazy_module
+from src.monitoring import cache_access
+from src.models.user import db
+from src.models.content import Content, ContentSignature
+from src.services.counters import foreign_data_version
+from src.services.write_queue import write_queue
+
+NUM_PERM = 128
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+
+np = lazy_module('numpy')
+_WORD_RE = re.compile(r'\w+')
+
+
+@lru_cache(maxsize=None)
+def _permutations():
+    """Feste Hash-Permutationen ``(a, b, p)``, erst beim ersten Gebrauch erzeugt."""
+    rng = np.random.default_rng(0x5EED)
+    # a < 2**31 und Shingle-Hashes < 2**32 halten a * x + b unterhalb von 2**64
+    a = rng.integers(1, 1 << 31, NUM_PERM, dtype=np.uint64)
+    b = rng.integers(0, 1 << 31, NUM_PERM, dtype=np.uint64)
+    return a, b, np.uint64((1 << 61) - 1)
+
+
+def shingles(*texts):
+    """CRC32-Hashes aller Wort-Shingles (``SHINGLE_SIZE`` Wörter) der Texte."""
+    words = [word for text in texts if text for word in _WORD_RE.findall(text.lower())]
+    if not words:
+        return np.empty(0, dtype=np.uint64)
+    size = min(SHINGLE_SIZE, len(words))
+    grams = {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+    return np.fromiter((zlib.crc32(gram.encode()) for gram in grams), dtype=np.uint64, count=len(grams))
+
+
+def compute_signature(*texts):
+    """MinHash-Signatur der Texte oder ``None``, wenn kein Text vorhanden ist."""
+    hashes = shingles(*texts)
+    if not hashes.size:
+        return None
+    a, b, prime = _permutations()
+    permuted = (np.outer(hashes, a) + b) % prime
+    return (permuted.min(axis=0) & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+
+
+def content_signature(content):
+    return compute_signature(content.title, content.short_description, content.long_description)
+
+
+class DuplicateIndex:
+    """LSH-Bänder -> Content-IDs plus Signaturen, pro Prozess im Speicher gehalten."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._bands = [{} for _ in range(BANDS)]
+        self._signatures = {}
+        self._version = None  # fremder Datenstand beim Aufbau; None = neu aufbauen
+
+    # --- Aufbau & Pflege ---
+    def _insert(self, content_id, signature):
+        self._signatures[content_id] = signature
+        for band, buckets in enumerate(self._bands):
+            buckets.setdefault(signature[band * ROWS:(band + 1) * ROWS].tobytes(), set()).add(content_id)
+
+    def build(self, version=None):
+        with self._lock:
+            if version is None:
+                version = foreign_data_version(db.session)  # vor dem Laden lesen
+            self._bands = [{} for _ in range(BANDS)]
+            self._signatures = {}
+            for content_id, blob in db.session.execute(
+                    db.select(ContentSignature.content_id, ContentSignature.signature)):
+                if blob:
+                    self._insert(content_id, np.frombuffer(blob, dtype=np.uint32))
+            self._version = version
+
+    def ensure_fresh(self):
+        version = foreign_data_version(db.session)
+        with self._lock:
+            stale = self._version is None or self._version != version
+            cache_access('duplicate_index', not stale)
+            if stale:
+                self.build(version)
+
+    def apply(self, changes):
+        """Übernimmt committete Signaturen ``(content_id, blob)``; ``blob`` leer/None = entfernen."""
+        with self._lock:
+            if self._version is None:
+                return
+            for content_id, blob in changes:
+                self.remove(content_id)
+                if blob:
+                    self._insert(content_id, np.frombuffer(blob, dtype=np.uint32))
+
+    def remove(self, content_id):
+        with self._lock:
+            signature = self._signatures.pop(content_id, None)
+            if signature is None:
+                return
+            for band, buckets in enumerate(self._bands):
+                key = signature[band * ROWS:(band + 1) * ROWS].tobytes()
+                bucket = buckets.get(key)
+                if bucket:
+                    bucket.discard(content_id)
+                    if not bucket:
+                        del buckets[key]
+
+    # --- Abfragen ---
+    def candidates(self, signature, threshold=None, exclude=None):
+        """Wahrscheinliche Duplikate als ``[(content_id, geschätzte Ähnlichkeit)]``, absteigend."""
+        if signature is None:
+            return []
+        if threshold is None:
+            threshold = current_app.config.get('DUPLICATE_THRESHOLD', 0.6)
+        self.ensure_fresh()
+        with self._lock:
+            ids = set()
+            for band, buckets in enumerate(self._bands):
+                ids.update(buckets.get(signature[band * ROWS:(band + 1) * ROWS].tobytes(), ()))
+            ids.discard(exclude)
+            found = []
+            for content_id in ids:
+                estimate = float(np.count_nonzero(self._signatures[content_id] == signature)) / NUM_PERM
+                if estimate >= threshold:
+                    found.append((content_id, estimate))
+        found.sort(key=lambda pair: -pair[1])
+        return found
+
+    def clusters(self, threshold=None):
+        """Gruppiert alle Contents, deren geschätzte Ähnlichkeit die Schwelle erreicht (Union-Find)."""
+        if threshold is None:
+            threshold = current_app.config.get('DUPLICATE_THRESHOLD', 0.6)
+        self.ensure_fresh()
+        parent = {}
+
+        def find(x):
+            parent.setdefault(x, x)
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        with self._lock:
+            checked = set()
+            for buckets in self._bands:
+                for bucket in buckets.values():
+                    if len(bucket) < 2:
+                        continue
+                    members = sorted(bucket)
+                    for i, a in enumerate(members):
+                        for b in members[i + 1:]:
+                            if (a, b) in checked:
+                                continue
+                            checked.add((a, b))
+                            same = np.count_nonzero(self._signatures[a] == self._signatures[b])
+                            if same / NUM_PERM >= threshold:
+                                root_a, root_b = find(a), find(b)
+                                if root_a != root_b:
+                                    parent[max(root_a, root_b)] = min(root_a, root_b)
+
+        groups = {}
+        for content_id in parent:
+            groups.setdefault(find(content_id), []).append(content_id)
+        return sorted((sorted(group) for group in groups.values() if len(group) > 1),
+                      key=lambda group: (-len(group), group[0]))
+
+
+def backfill_signatures(batch_size=1000):
+    """Erzeugt fehlende Signaturen (z.B. für Contents von vor der Einführung)."""
+    created = 0
+    while True:
+        rows = db.session.execute(
+            db.select(Content.id, Content.title, Content.short_description, Content.long_description)
+            .outerjoin(ContentSignature, ContentSignature.content_id == Content.id)
+            .where(ContentSignature.content_id.is_(None))
+            .order_by(Content.id).limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        signatures = []
+        for content_id, title, short, long in rows:
+            signature = compute_signature(title, short, long)
+            # Leere Signatur speichern, damit der Content nicht erneut geprüft wird
+            signatures.append(ContentSignature(
+                content_id=content_id,
+                signature=signature.tobytes() if signature is not None else b''
+            ))
+        write_queue.execute(_add_signatures, signatures)
+        created += len(rows)
+    return created
+
+
+def _add_signatures(session, signatures):
+    session.add_all(signatures)
+
+
+duplicate_index = DuplicateIndex()
+
+
+# ============================================================
+# Session-Events
+# ============================================================
+@event.listens_for(Session, 'after_flush')
+def _collect_changes(session, flush_context):
+    changes = None
+    for objects, deleted in ((session.new, False), (session.dirty, False), (session.deleted, True)):
+        for obj in objects:
+            if isinstance(obj, ContentSignature):
+                entry = (obj.content_id, None if deleted else obj.signature)
+            elif isinstance(obj, Content) and deleted:
+                entry = (obj.id, None)  # Signatur nicht geladen: Cascade in SQL
+            else:
+                continue
+            if changes is None:
+                changes = session.info.setdefault('duplicate_changes', [])
+            changes.append(entry)
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_changes(session):
+    changes = session.info.pop('duplicate_changes', None)
+    if changes:
+        duplicate_index.apply(changes)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_changes(session):
+    session.info.pop('duplicate_changes', None)
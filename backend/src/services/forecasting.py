@@ -0,0 +1,249 @@
+"""Prognosen für die Metrik-Reihen der Trends (``trend_metrics``).
+
+Jede Reihe (Content, Metrik-Typ) wird als Folge gleich langer Perioden
+betrachtet. Zwei leichte Modelle werden für alle Reihen gemeinsam als
+NumPy-Operationen über eine aufgefüllte Matrix (Reihen × Perioden, mit Maske)
+angepasst:
+
+* ``holt`` – exponentielle Glättung mit Trend; α und β werden je Reihe aus
+  einem Raster gewählt (kleinster Ein-Schritt-Fehler), alle Rasterpunkte
+  laufen parallel.
+* ``linear_seasonal`` – lineare Regression auf Zeit plus Saisonterme
+  (Sinus/Kosinus mit ``FORECAST_SEASON_LENGTH`` Perioden, erst ab zwei vollen
+  Saisons, vorher ``linear``); gelöst als gestapelte Normalgleichungen.
+
+Je Reihe gewinnt das Modell mit dem kleineren Residualfehler. Prognosen samt
+Intervallen (``FORECAST_LEVEL``, Default 95 %) für ``FORECAST_HORIZON``
+Perioden liegen in ``trend_forecast``; eine Reihe wird nur neu gerechnet, wenn
+sich Anzahl oder höchste ID ihrer Datenpunkte geändert haben::
+
+    python -m src.services.forecasting          # veraltete Reihen neu rechnen
+    python -m src.services.forecasting --force  # alle Reihen
+"""
+import struct
+from datetime import datetime
+from statistics import NormalDist
+
+from flask import current_app
+from sqlalchemy import func, select, tuple_
+
+from src.lazy import lazy_module
+from src.models.user import db
+from src.models.trend_management import TrendForecast, TrendMetrics
+
+np = lazy_module('numpy')
+
+DEFAULT_HORIZON = 6
+DEFAULT_LEVEL = 0.95
+DEFAULT_SEASON_LENGTH = 12
+MIN_POINTS = 3
+MAX_POINTS = 120  # längere Reihen: nur die jüngsten Perioden
+ALPHAS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9)
+BETAS = (0.01, 0.05, 0.1, 0.2, 0.3)
+_RIDGE = 1e-9
+
+_metrics = TrendMetrics.__table__
+_forecasts = TrendForecast.__table__
+
+
+# ============================================================
+# Modelle (gestapelt über alle Reihen)
+# ============================================================
+def _fit_holt(Y, mask, lengths, horizon):
+    """Holt-Glättung; gibt ``(prognose, varianz, rmse)`` mit Form (n, h) bzw. (n,) zurück."""
+    alpha, beta = (grid.ravel() for grid in np.meshgrid(ALPHAS, BETAS, indexing='ij'))
+    level = np.repeat(Y[:, 1:2], len(alpha), axis=1)
+    trend = np.repeat(Y[:, 1:2] - Y[:, 0:1], len(alpha), axis=1)
+    sse = np.zeros_like(level)
+    for t in range(2, Y.shape[1]):
+        valid = mask[:, t:t + 1]
+        err = Y[:, t:t + 1] - (level + trend)
+        sse += np.where(valid, err * err, 0.0)
+        level = np.where(valid, level + trend + alpha * err, level)
+        trend = np.where(valid, trend + alpha * beta * err, trend)
+
+    rows = np.arange(len(Y))
+    best = np.argmin(sse, axis=1)
+    a, b = alpha[best][:, None], beta[best][:, None]
+    steps = np.arange(1, horizon + 1)
+    forecast = level[rows, best][:, None] + steps * trend[rows, best][:, None]
+    sigma2 = sse[rows, best] / np.maximum(1, lengths - 2)
+    # Varianz des h-Schritt-Fehlers: sigma² (1 + Σ_{j<h} (α (1 + j β))²)
+    c2 = (a * (1 + steps[:-1] * b)) ** 2
+    variance = sigma2[:, None] * (1 + np.concatenate([np.zeros((len(Y), 1)), np.cumsum(c2, axis=1)], axis=1))
+    return forecast, variance, np.sqrt(sigma2)
+
+
+def _fit_linear_seasonal(Y, mask, lengths, horizon, season):
+    """Lineare Regression mit Saisontermen; Rückgabe wie ``_fit_holt``."""
+    n, T = Y.shape
+
+    def design(t):
+        return np.stack([np.ones_like(t), t, np.sin(2 * np.pi * t / season), np.cos(2 * np.pi * t / season)], axis=-1)
+
+    columns = np.ones((n, 4))
+    columns[lengths < 2 * season, 2:] = 0.0  # zu kurz für Saison: nur Niveau und Steigung
+    X = design(np.arange(T, dtype=np.float64))[None] * mask[..., None] * columns[:, None, :]
+    # gestrichene Spalten: 1 auf der Diagonale, damit das System lösbar bleibt (Koeffizient 0)
+    XtX = np.einsum('ntk,ntj->nkj', X, X) + np.eye(4) * (1 - columns[:, None, :]) + np.eye(4) * _RIDGE
+    Xty = np.einsum('ntk,nt->nk', X, np.where(mask, Y, 0.0))
+    inverse = np.linalg.inv(XtX)
+    coef = np.einsum('nkj,nj->nk', inverse, Xty)
+
+    residual = np.where(mask, Y - np.einsum('ntk,nk->nt', X, coef), 0.0)
+    sigma2 = (residual ** 2).sum(axis=1) / np.maximum(1, lengths - columns.sum(axis=1))
+    future = design((lengths - 1)[:, None] + np.arange(1, horizon + 1)[None, :].astype(np.float64)) * columns[:, None, :]
+    forecast = np.einsum('nhk,nk->nh', future, coef)
+    # Vorhersagevarianz: sigma² (1 + x0' (X'X)^-1 x0)
+    variance = sigma2[:, None] * (1 + np.einsum('nhk,nkj,nhj->nh', future, inverse, future))
+    return forecast, variance, np.sqrt(sigma2)
+
+
+def fit(series, horizon=DEFAULT_HORIZON, level=DEFAULT_LEVEL, season=DEFAULT_SEASON_LENGTH):
+    """Passt beide Modelle an alle Reihen an; ``series`` ist eine Liste von Wertefolgen.
+
+    Gibt je Reihe ``(model, prognose, untere, obere Grenze, rmse)`` zurück
+    (Arrays der Länge ``horizon``); Reihen mit weniger als ``MIN_POINTS``
+    Werten ergeben ``None``.
+    """
+    usable = [i for i, values in enumerate(series) if len(values) >= MIN_POINTS]
+    results = [None] * len(series)
+    if not usable:
+        return results
+    lengths = np.array([min(len(series[i]), MAX_POINTS) for i in usable])
+    Y = np.zeros((len(usable), lengths.max()))
+    for row, i in enumerate(usable):
+        Y[row, :lengths[row]] = series[i][-lengths[row]:]
+    mask = np.arange(Y.shape[1])[None, :] < lengths[:, None]
+
+    holt = _fit_holt(Y, mask, lengths, horizon)
+    linear = _fit_linear_seasonal(Y, mask, lengths, horizon, season)
+    use_linear = linear[2] < holt[2]
+    forecast = np.where(use_linear[:, None], linear[0], holt[0])
+    spread = NormalDist().inv_cdf((1 + level) / 2) * np.sqrt(np.where(use_linear[:, None], linear[1], holt[1]))
+    rmse = np.where(use_linear, linear[2], holt[2])
+    for row, i in enumerate(usable):
+        model = ('linear_seasonal' if lengths[row] >= 2 * season else 'linear') if use_linear[row] else 'holt'
+        results[i] = (model, forecast[row],
+                      forecast[row] - spread[row], forecast[row] + spread[row], float(rmse[row]))
+    return results
+
+
+# ============================================================
+# Cache (trend_forecast)
+# ============================================================
+def _state_query(content_ids=None):
+    query = select(_metrics.c.content_id, _metrics.c.metric_type, func.count(), func.max(_metrics.c.id)) \
+        .group_by(_metrics.c.content_id, _metrics.c.metric_type)
+    if content_ids is not None:
+        query = query.where(_metrics.c.content_id.in_(content_ids))
+    return query
+
+
+def stale_series(session, content_ids=None, force=False):
+    """``(veraltet, verwaist)``: Reihen mit neuen Datenpunkten bzw. Prognosen ohne Reihe."""
+    # Reihen mit weniger als MIN_POINTS Werten haben keine Prognose und gelten nie als veraltet
+    current = {(cid, mtype): (count, last_id)
+               for cid, mtype, count, last_id in session.execute(_state_query(content_ids)) if count >= MIN_POINTS}
+    cached_query = select(_forecasts.c.content_id, _forecasts.c.metric_type,
+                          _forecasts.c.data_points, _forecasts.c.last_metric_id)
+    if content_ids is not None:
+        cached_query = cached_query.where(_forecasts.c.content_id.in_(content_ids))
+    cached = {(cid, mtype): (count, last_id) for cid, mtype, count, last_id in session.execute(cached_query)}
+    stale = set(current) if force else {key for key, state in current.items() if cached.get(key) != state}
+    return stale, set(cached) - set(current)
+
+
+def _load(session, keys):
+    """Datenpunkte der Reihen ``keys`` in zeitlicher Reihenfolge."""
+    content_ids = sorted({cid for cid, _ in keys})
+    series = {}
+    for start in range(0, len(content_ids), 500):
+        for cid, mtype, metric_id, value, period_start, period_end in session.execute(
+                select(_metrics.c.content_id, _metrics.c.metric_type, _metrics.c.id, _metrics.c.value,
+                       _metrics.c.period_start, _metrics.c.period_end)
+                .where(_metrics.c.content_id.in_(content_ids[start:start + 500]))
+                .order_by(_metrics.c.content_id, _metrics.c.metric_type, _metrics.c.period_start, _metrics.c.id)):
+            if (cid, mtype) in keys:
+                series.setdefault((cid, mtype), []).append((metric_id, value, period_start, period_end))
+    return series
+
+
+def _pack(values):
+    return struct.pack(f'<{len(values)}d', *(float(v) for v in values))
+
+
+def compute(session, keys):
+    """Berechnet Prognosezeilen für die Reihen ``keys`` (ohne zu schreiben)."""
+    config = current_app.config
+    series = _load(session, keys)
+    ordered = list(series)
+    results = fit([[value for _, value, _, _ in series[key]] for key in ordered],
+                  horizon=config.get('FORECAST_HORIZON', DEFAULT_HORIZON),
+                  level=config.get('FORECAST_LEVEL', DEFAULT_LEVEL),
+                  season=config.get('FORECAST_SEASON_LENGTH', DEFAULT_SEASON_LENGTH))
+    now = datetime.utcnow()
+    rows = []
+    for key, result in zip(ordered, results):
+        if result is None:
+            continue
+        points = series[key]
+        starts = [start for _, _, start, _ in points]
+        gaps = sorted((b - a).total_seconds() for a, b in zip(starts, starts[1:]))
+        model, forecast, lower, upper, rmse = result
+        rows.append({
+            'content_id': key[0], 'metric_type': key[1], 'model': model,
+            'data_points': len(points), 'last_metric_id': max(metric_id for metric_id, _, _, _ in points),
+            'last_period_start': starts[-1],
+            'step_seconds': int(gaps[len(gaps) // 2]),
+            'period_seconds': int((points[-1][3] - points[-1][2]).total_seconds()),
+            'level': config.get('FORECAST_LEVEL', DEFAULT_LEVEL), 'rmse': rmse,
+            'values': _pack(forecast), 'lower': _pack(lower), 'upper': _pack(upper), 'computed_at': now
+        })
+    return rows
+
+
+def store(session, keys, rows):
+    """Ersetzt die Prognosen der Reihen ``keys`` durch ``rows`` (z.B. über die Write-Queue)."""
+    keys = sorted(keys)
+    for start in range(0, len(keys), 500):
+        session.execute(_forecasts.delete().where(
+            tuple_(_forecasts.c.content_id, _forecasts.c.metric_type).in_(keys[start:start + 500])))
+    for start in range(0, len(rows), 5000):
+        session.execute(_forecasts.insert(), rows[start:start + 5000])
+    return len(rows)
+
+
+def refresh(content_ids=None, force=False):
+    """Rechnet veraltete Prognosen (aller bzw. der angegebenen Contents) neu."""
+    from src.services.write_queue import write_queue
+
+    stale, orphaned = stale_series(db.session, content_ids, force)
+    if not stale and not orphaned:
+        return {'series': 0, 'forecasts': 0}
+    rows = compute(db.session, stale)
+    # Lesetransaktion beenden, bevor der Writer schreibt (SQLite)
+    db.session.rollback()
+    written = write_queue.execute(store, stale | orphaned, rows)
+    return {'series': len(stale), 'forecasts': written}
+
+
+def forecasts_for(content_id):
+    """Prognosen eines Contents aus dem Cache; veraltete Reihen werden vorher neu gerechnet."""
+    refresh([content_id])
+    return TrendForecast.query.filter_by(content_id=content_id).order_by(TrendForecast.metric_type).all()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    from src.main import create_app
+
+    parser = argparse.ArgumentParser(description='Prognosen der Trend-Metriken aktualisieren')
+    parser.add_argument('--force', action='store_true', help='alle Reihen neu rechnen')
+    args = parser.parse_args()
+
+    app = create_app({'STARTUP_TASKS': False})
+    with app.app_context():
+        result = refresh(force=args.force)
+    print(f"{result['series']} Reihen neu gerechnet, {result['forecasts']} Prognosen gespeichert")
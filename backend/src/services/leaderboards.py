@@ -0,0 +1,306 @@
+"""Ranglisten der Trends nach Priority Score, pro Prozess im Speicher.
+
+Je eine Rangliste global, pro Phase, pro Branche und pro Tag. Eine Rangliste
+ist eine sortierte Liste von Schlüsseln ``(-priority_score, content_id)``:
+Top-k ist ein Slice, der Rang eines Trends bzw. die Anzahl im Score-Bereich
+eine Binärsuche (O(log n)). Einfügen und Entfernen verschieben den Listenrest
+per ``memmove`` und bleiben auch bei 100k Trends im Mikrosekundenbereich.
+Für team-beschränkte Requests (``teams``) filtern ``top`` und ``ranks`` die
+Rangliste linear nach dem Team jedes Eintrags.
+
+Gepflegt wird über Session-Events: ``after_flush`` merkt sich neue, geänderte
+und gelöschte Contents (Typ, Score, Phase, Branche, Tag-Änderungen) in
+``session.info``, ``after_commit`` übernimmt sie, ``after_rollback`` verwirft
+sie. Damit sind alle ORM-Schreibpfade erfasst, auch die Write-Queue.
+Schreibzugriffe anderer Worker-Prozesse oder am ORM vorbei erkennt
+``ensure_fresh`` am fremden Datenstand (``foreign_data_version``,
+src/services/counters.py) und baut neu auf; ``check`` vergleicht die
+Ranglisten mit der Datenbank.
+"""
+import threading
+from bisect import bisect_left, bisect_right, insort
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from src.models.user import db
+from src.models.associations import content_trend_tags
+from src.models.content import Content
+from src.monitoring import cache_access
+from src.services.counters import foreign_data_version
+
+SCOPES = ('global', 'phase', 'industry', 'tag')
+# Größere Transaktionen (Bulk-Neuberechnung) bauen beim nächsten Zugriff neu auf
+MAX_INCREMENTAL_CHANGES = 1000
+
+
+class Leaderboard:
+    """Sortierte Schlüssel ``(-score, content_id)`` plus aktueller Score je Content."""
+    __slots__ = ('_keys', '_scores')
+
+    def __init__(self):
+        self._keys = []
+        self._scores = {}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, content_id):
+        return content_id in self._scores
+
+    def update(self, content_id, score):
+        old = self._scores.get(content_id)
+        if old is not None:
+            if old == score:
+                return
+            del self._keys[bisect_left(self._keys, (-old, content_id))]
+        self._scores[content_id] = score
+        insort(self._keys, (-score, content_id))
+
+    def remove(self, content_id):
+        old = self._scores.pop(content_id, None)
+        if old is not None:
+            del self._keys[bisect_left(self._keys, (-old, content_id))]
+
+    def _bounds(self, min_score=None, max_score=None):
+        # Schlüssel sind absteigend nach Score sortiert: max_score begrenzt den Anfang
+        start = 0 if max_score is None else bisect_left(self._keys, (-max_score,))
+        end = len(self._keys) if min_score is None else bisect_right(self._keys, (-min_score, float('inf')))
+        return start, max(start, end)
+
+    def top(self, limit, offset=0, min_score=None, max_score=None, ascending=False):
+        """``[(content_id, score), ...]`` ab Position ``offset``."""
+        start, end = self._bounds(min_score, max_score)
+        if ascending:
+            keys = self._keys[max(start, end - offset - limit):end - offset][::-1] if offset < end - start else []
+        else:
+            keys = self._keys[start + offset:min(end, start + offset + limit)]
+        return [(content_id, -neg) for neg, content_id in keys]
+
+    def count(self, min_score=None, max_score=None):
+        start, end = self._bounds(min_score, max_score)
+        return end - start
+
+    def rank(self, content_id):
+        """1-basierter Rang (höchster Score = 1) oder ``None``."""
+        score = self._scores.get(content_id)
+        if score is None:
+            return None
+        return bisect_left(self._keys, (-score, content_id)) + 1
+
+    def items(self):
+        return dict(self._scores)
+
+
+def _score(value):
+    return float(value or 0.0)
+
+
+class Leaderboards:
+    """Alle Ranglisten eines Prozesses; Schlüssel ``(scope, key)``."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._boards = {}
+        self._members = {}  # content_id -> (score, phase_id, industry, frozenset(tag_ids), team_id)
+        self._version = None  # fremder Datenstand beim Aufbau; None = neu aufbauen
+
+    # --- Aufbau & Pflege ---
+    @staticmethod
+    def _load():
+        members = {}
+        for content_id, score, phase_id, industry, team_id in db.session.execute(
+                select(Content.id, Content.priority_score, Content.trend_phase_id, Content.industry, Content.team_id)
+                .where(Content.content_type == 'trend')):
+            members[content_id] = (_score(score), phase_id, industry, set(), team_id)
+        for content_id, tag_id in db.session.execute(
+                select(content_trend_tags.c.content_id, content_trend_tags.c.trend_tag_id)):
+            if content_id in members:
+                members[content_id][3].add(tag_id)
+        return {cid: (score, phase, industry, frozenset(tags), team)
+                for cid, (score, phase, industry, tags, team) in members.items()}
+
+    @staticmethod
+    def _board_keys(member):
+        _, phase_id, industry, tags, _ = member
+        keys = [('global', None)]
+        if phase_id is not None:
+            keys.append(('phase', phase_id))
+        if industry:
+            keys.append(('industry', industry))
+        keys.extend(('tag', tag_id) for tag_id in tags)
+        return keys
+
+    def build(self, version=None):
+        if version is None:
+            version = foreign_data_version(db.session)  # vor dem Laden lesen
+        members = self._load()
+        # Ranglisten ohne Sperre aufbauen (einmal sortieren statt insort je Eintrag)
+        entries = {}
+        for content_id, member in members.items():
+            for key in self._board_keys(member):
+                entries.setdefault(key, []).append((content_id, member[0]))
+        boards = {}
+        for key, items in entries.items():
+            board = boards[key] = Leaderboard()
+            board._scores = dict(items)
+            board._keys = sorted((-score, content_id) for content_id, score in items)
+        with self._lock:
+            self._boards, self._members = boards, members
+            self._version = version
+
+    def invalidate(self):
+        with self._lock:
+            self._version = None
+
+    def ensure_fresh(self):
+        version = foreign_data_version(db.session)
+        with self._lock:
+            stale = self._version is None or self._version != version
+            cache_access('leaderboards', not stale)
+            if stale:
+                self.build(version)
+
+    def _set(self, content_id, member):
+        old = self._members.pop(content_id, None)
+        keys = self._board_keys(member) if member else []
+        for key in self._board_keys(old) if old else ():
+            board = self._boards.get(key)
+            if key not in keys and board is not None:
+                board.remove(content_id)
+                if not board:
+                    del self._boards[key]
+        if member is not None:
+            self._members[content_id] = member
+            for key in keys:
+                self._boards.setdefault(key, Leaderboard()).update(content_id, member[0])
+
+    def apply(self, changes):
+        """Übernimmt committete Änderungen ``(content_id, state, tags_added, tags_removed)``."""
+        with self._lock:
+            if self._version is None:
+                return
+            if len(changes) > MAX_INCREMENTAL_CHANGES:
+                self._version = None
+                return
+            for content_id, state, added, removed in changes:
+                if state is None or state['content_type'] != 'trend':
+                    self._set(content_id, None)
+                    continue
+                old = self._members.get(content_id)
+                if old is None and not state['new']:
+                    # bestehender Content wird zum Trend: Tags unbekannt -> neu aufbauen
+                    self._version = None
+                    return
+                tags = (old[3] if old else frozenset()) - removed | added
+                self._set(content_id, (_score(state['priority_score']), state['trend_phase_id'],
+                                       state['industry'], tags, state['team_id']))
+
+    # --- Abfragen ---
+    def _visible(self, entries, teams):
+        # Einträge ohne Team sind für alle sichtbar (wie src.auth.content_scope)
+        allowed = frozenset(teams)
+        members = self._members
+        return [(content_id, score) for content_id, score in entries
+                if members[content_id][4] is None or members[content_id][4] in allowed]
+
+    def top(self, scope='global', key=None, limit=10, offset=0, min_score=None, max_score=None, ascending=False,
+            teams=None):
+        """``(total, [(content_id, score), ...])`` einer Rangliste, optional nur für ``teams``."""
+        self.ensure_fresh()
+        with self._lock:
+            board = self._boards.get((scope, None if scope == 'global' else key))
+            if board is None:
+                return 0, []
+            if teams is not None:
+                entries = self._visible(board.top(len(board), 0, min_score, max_score, ascending), teams)
+                return len(entries), entries[offset:offset + limit]
+            return (board.count(min_score, max_score),
+                    board.top(limit, offset, min_score, max_score, ascending))
+
+    def ranks(self, content_id, teams=None):
+        """Rang eines Trends in allen Ranglisten, in denen er vorkommt (optional nur unter ``teams``)."""
+        self.ensure_fresh()
+        with self._lock:
+            member = self._members.get(content_id)
+            if member is None:
+                return None
+            if teams is None:
+                return {key: {'rank': self._boards[key].rank(content_id), 'total': len(self._boards[key])}
+                        for key in self._board_keys(member)}
+            ranks = {}
+            for key in self._board_keys(member):
+                board = self._boards[key]
+                visible = [cid for cid, _ in self._visible(board.top(len(board)), teams)]
+                ranks[key] = {'rank': visible.index(content_id) + 1, 'total': len(visible)}
+            return ranks
+
+    def check(self, repair=False):
+        """Vergleicht alle Ranglisten mit der Datenbank; gibt die Abweichungen zurück."""
+        self.ensure_fresh()
+        expected = self._load()
+        with self._lock:
+            actual = dict(self._members)
+            boards = {key: board.items() for key, board in self._boards.items()}
+        expected_boards = {}
+        for content_id, member in expected.items():
+            for key in self._board_keys(member):
+                expected_boards.setdefault(key, {})[content_id] = member[0]
+        missing = sorted(expected.keys() - actual.keys())
+        unexpected = sorted(actual.keys() - expected.keys())
+        changed = sorted(cid for cid in expected.keys() & actual.keys() if expected[cid] != actual[cid])
+        mismatched = sorted(f'{scope}:{key}' if key is not None else scope
+                            for scope, key in boards.keys() | expected_boards.keys()
+                            if boards.get((scope, key)) != expected_boards.get((scope, key)))
+        if repair and (missing or unexpected or changed or mismatched):
+            self.build()
+        return {
+            'consistent': not (missing or unexpected or changed or mismatched),
+            'trends': len(expected),
+            'boards': len(expected_boards),
+            'missing': missing[:100],
+            'unexpected': unexpected[:100],
+            'changed': changed[:100],
+            'mismatched_boards': mismatched[:100]
+        }
+
+
+leaderboards = Leaderboards()
+
+
+# ============================================================
+# Session-Events
+# ============================================================
+@event.listens_for(Session, 'after_flush')
+def _collect_changes(session, flush_context):
+    changes = None
+    for objects, deleted in ((session.new, False), (session.dirty, False), (session.deleted, True)):
+        for obj in objects:
+            if not isinstance(obj, Content):
+                continue
+            if changes is None:
+                changes = session.info.setdefault('leaderboard_changes', [])
+            if deleted:
+                changes.append((obj.id, None, frozenset(), frozenset()))
+                continue
+            tags = inspect(obj).attrs.trend_tags.history
+            changes.append((obj.id, {
+                'new': obj in session.new,
+                'content_type': obj.content_type,
+                'priority_score': obj.priority_score,
+                'trend_phase_id': obj.trend_phase_id,
+                'industry': obj.industry,
+                'team_id': obj.team_id,
+            }, frozenset(tag.id for tag in tags.added), frozenset(tag.id for tag in tags.deleted)))
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_changes(session):
+    changes = session.info.pop('leaderboard_changes', None)
+    if changes:
+        leaderboards.apply(changes)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_changes(session):
+    session.info.pop('leaderboard_changes', None)
@@ -0,0 +1,293 @@
+"""Gestreamte Ausgabe von Tabellen als XLSX und PDF (ohne Zusatzbibliotheken).
+
+Beide Writer nehmen die Zeilen als Iterator und schreiben sie sofort in die
+Datei; der Speicherbedarf hängt nicht von der Zeilenzahl ab.
+
+- ``write_xlsx``: Office-Open-XML-Arbeitsmappe (ZIP). Das Tabellenblatt wird
+  zeilenweise in den ZIP-Eintrag komprimiert, Texte stehen als Inline-Strings
+  in den Zellen (keine Shared-Strings-Tabelle, die alle Texte im Speicher
+  halten müsste). Kopfzeile fixiert, Autofilter, Datumsformat; ein zweites
+  Blatt enthält die Angaben aus ``info``.
+- ``write_pdf``: PDF 1.4, A4 quer, Standardschriften (Helvetica/Courier,
+  WinAnsi). Jede Seite wird komprimiert geschrieben, sobald sie voll ist; nur
+  die Byte-Offsets der Objekte bleiben für die Xref-Tabelle im Speicher. Die
+  Tabelle nutzt Courier, damit Spaltenbreiten in Zeichen exakt passen.
+"""
+import re
+import zipfile
+import zlib
+from collections import namedtuple
+from datetime import date, datetime
+from xml.sax.saxutils import escape
+
+Column = namedtuple('Column', 'label kind width')  # kind: 'int', 'float', 'text', 'datetime'; width in Zeichen
+
+_ILLEGAL_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff]')
+_EXCEL_EPOCH = datetime(1899, 12, 30)
+MAX_CELL = 32767  # Excel-Grenze für Text in einer Zelle
+
+
+# ============================================================
+# XLSX
+# ============================================================
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet2.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>')
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/></Relationships>')
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet2.xml"/>'
+    '<Relationship Id="rId3" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/></Relationships>')
+# Formate: 0 Standard, 1 Kopfzeile fett, 2 Datum/Uhrzeit, 3 zwei Nachkommastellen
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<numFmts count="1"><numFmt numFmtId="164" formatCode="yyyy-mm-dd hh:mm"/></numFmts>'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="4"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+    '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="2" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>')
+_SHEET_START = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">')
+
+
+def _column_letter(index):
+    letters = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def _xml_text(value):
+    return escape(_ILLEGAL_XML.sub('', str(value))[:MAX_CELL])
+
+
+def _xlsx_cell(ref, value, kind, style=0):
+    if value is None or value == '':
+        return ''
+    if kind == 'datetime' and isinstance(value, (datetime, date)):
+        if not isinstance(value, datetime):
+            value = datetime(value.year, value.month, value.day)
+        return f'<c r="{ref}" s="2"><v>{(value - _EXCEL_EPOCH).total_seconds() / 86400:.6f}</v></c>'
+    if kind in ('int', 'float') and isinstance(value, (int, float)) and value == value:
+        number_style = ' s="3"' if kind == 'float' else ''
+        return f'<c r="{ref}"{number_style}><v>{value!r}</v></c>'
+    style_attr = f' s="{style}"' if style else ''
+    return f'<c r="{ref}" t="inlineStr"{style_attr}><is><t xml:space="preserve">{_xml_text(value)}</t></is></c>'
+
+
+def _xlsx_row(number, letters, values, kinds, style=0):
+    cells = ''.join(_xlsx_cell(f'{letter}{number}', value, kind, style)
+                    for letter, value, kind in zip(letters, values, kinds))
+    return f'<row r="{number}">{cells}</row>'
+
+
+def write_xlsx(path, columns, rows, sheet_name='Trends', info=(), flush_rows=256):
+    """Schreibt ``rows`` (Iterator von Wertelisten) als Arbeitsmappe; gibt die Zeilenzahl zurück."""
+    letters = [_column_letter(i) for i in range(len(columns))]
+    kinds = [column.kind for column in columns]
+    count = 0
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED, compresslevel=6) as archive:
+        archive.writestr('[Content_Types].xml', _CONTENT_TYPES)
+        archive.writestr('_rels/.rels', _ROOT_RELS)
+        archive.writestr('xl/_rels/workbook.xml.rels', _WORKBOOK_RELS)
+        archive.writestr('xl/styles.xml', _STYLES)
+
+        with archive.open('xl/worksheets/sheet1.xml', 'w') as sheet:
+            # Datumsspalten zeigen in Excel auch die Uhrzeit (yyyy-mm-dd hh:mm)
+            widths = ''.join(f'<col min="{i + 1}" max="{i + 1}" '
+                             f'width="{max(column.width, 16) + 2 if column.kind == "datetime" else column.width + 2}" '
+                             'customWidth="1"/>' for i, column in enumerate(columns))
+            header = _xlsx_row(1, letters, [column.label for column in columns], ['text'] * len(columns), style=1)
+            sheet.write((_SHEET_START + '<sheetViews><sheetView workbookViewId="0">'
+                         '<pane ySplit="1" topLeftCell="A2" activePane="bottomLeft" state="frozen"/>'
+                         f'</sheetView></sheetViews><cols>{widths}</cols><sheetData>{header}').encode())
+            buffer = []
+            for values in rows:
+                count += 1
+                buffer.append(_xlsx_row(count + 1, letters, values, kinds))
+                if len(buffer) >= flush_rows:
+                    sheet.write(''.join(buffer).encode())
+                    buffer.clear()
+            last = f'{letters[-1]}{count + 1}'
+            buffer.append(f'</sheetData><autoFilter ref="A1:{last}"/></worksheet>')
+            sheet.write(''.join(buffer).encode())
+
+        info_rows = ''.join(_xlsx_row(i + 1, 'AB', pair, ['text', 'text'], style=0)
+                            for i, pair in enumerate(info))
+        archive.writestr('xl/worksheets/sheet2.xml', (
+            f'{_SHEET_START}<cols><col min="1" max="1" width="20" customWidth="1"/>'
+            f'<col min="2" max="2" width="80" customWidth="1"/></cols><sheetData>{info_rows}</sheetData></worksheet>'))
+        archive.writestr('xl/workbook.xml', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            f'<sheets><sheet name="{_xml_text(sheet_name)}" sheetId="1" r:id="rId1"/>'
+            '<sheet name="Info" sheetId="2" r:id="rId2"/></sheets>'
+            '<definedNames><definedName name="_xlnm._FilterDatabase" localSheetId="0" hidden="1">'
+            f"'{_xml_text(sheet_name)}'!$A$1:${letters[-1]}${count + 1}</definedName></definedNames>"
+            '</workbook>'))
+    return count
+
+
+# ============================================================
+# PDF
+# ============================================================
+PAGE_WIDTH, PAGE_HEIGHT = 842, 595  # A4 quer, in Punkt
+MARGIN = 36
+FONT_SIZE = 7
+LEADING = 9
+_CHAR_WIDTH = FONT_SIZE * 0.6  # Courier: 600/1000 em
+
+
+def _pdf_string(text):
+    data = str(text).encode('cp1252', errors='replace')
+    return b'(' + data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+
+def _fit(text, width, right=False):
+    text = ' '.join(str(text).split())
+    if len(text) > width:
+        text = text[:width - 1] + '…'
+    return text.rjust(width) if right else text.ljust(width)
+
+
+def _pdf_value(value, kind):
+    if value is None:
+        return ''
+    if kind == 'float' and isinstance(value, (int, float)):
+        return '' if value != value else f'{value:.2f}'
+    if kind == 'datetime' and isinstance(value, (datetime, date)):
+        return value.strftime('%Y-%m-%d')
+    return value
+
+
+class _PdfWriter:
+    """Schreibt Objekte fortlaufend und merkt sich nur ihre Offsets."""
+
+    def __init__(self, file):
+        self.file = file
+        self.offsets = {}
+        self.position = 0
+        self._write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+
+    def _write(self, data):
+        self.file.write(data)
+        self.position += len(data)
+
+    def object(self, number, body):
+        self.offsets[number] = self.position
+        self._write(b'%d 0 obj\n' % number + body + b'\nendobj\n')
+
+    def stream(self, number, data):
+        compressed = zlib.compress(data, 6)
+        self.object(number, b'<< /Length %d /Filter /FlateDecode >>\nstream\n' % len(compressed)
+                    + compressed + b'\nendstream')
+
+    def finish(self, root, info):
+        size = max(self.offsets) + 1
+        xref = self.position
+        lines = [b'xref\n0 %d\n' % size, b'0000000000 65535 f\r\n']
+        lines += [b'%010d 00000 n\r\n' % self.offsets[n] if n in self.offsets else b'0000000000 65535 f\r\n'
+                  for n in range(1, size)]
+        self._write(b''.join(lines))
+        self._write(b'trailer\n<< /Size %d /Root %d 0 R /Info %d 0 R >>\nstartxref\n%d\n%%%%EOF\n'
+                    % (size, root, info, xref))
+
+
+# Objektnummern: 1 Katalog, 2 Seitenbaum, 3 Info, 4-7 Schriften, ab 8 Inhalt/Seite im Wechsel
+_FONTS = {b'F1': b'Helvetica', b'F2': b'Helvetica-Bold', b'F3': b'Courier', b'F4': b'Courier-Bold'}
+
+
+def write_pdf(path, columns, rows, title, subtitle='', footer=''):
+    """Schreibt ``rows`` als Tabelle über beliebig viele Seiten; gibt die Zeilenzahl zurück."""
+    kinds = [column.kind for column in columns]
+    right = [kind in ('int', 'float') for kind in kinds]
+    header = ' '.join(_fit(column.label, column.width, r) for column, r in zip(columns, right))
+    table_width = len(header) * _CHAR_WIDTH
+    top = PAGE_HEIGHT - MARGIN
+    first_row = top - 50
+    rows_per_page = int((first_row - MARGIN - 12) // LEADING) + 1
+    pages = []
+    count = 0
+
+    with open(path, 'wb') as file:
+        pdf = _PdfWriter(file)
+        for number, (name, base) in enumerate(_FONTS.items(), start=4):
+            pdf.object(number, b'<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>' % base)
+        resources = b'<< /Font << ' + b' '.join(b'/%s %d 0 R' % (name, number)
+                                                 for number, name in enumerate(_FONTS, start=4)) + b' >> >>'
+
+        def page_start(page_no):
+            return [
+                b'BT /F2 13 Tf %d %d Td %s Tj ET' % (MARGIN, top - 12, _pdf_string(title)),
+                b'BT /F1 8 Tf %d %d Td %s Tj ET' % (MARGIN, top - 26, _pdf_string(subtitle)),
+                b'BT /F1 7 Tf %d %d Td %s Tj ET' % (MARGIN, MARGIN - 14, _pdf_string(f'{footer}  –  Seite {page_no}')),
+                b'0.85 g %d %.1f %.1f %d re f 0 g' % (MARGIN - 2, first_row + LEADING - 2.5, table_width + 4, LEADING),
+                b'BT /F4 %d Tf %d %d Td %s Tj ET' % (FONT_SIZE, MARGIN, first_row + LEADING, _pdf_string(header)),
+            ]
+
+        def flush(operations):
+            number = 8 + 2 * len(pages)
+            pdf.stream(number, b'\n'.join(operations))
+            pdf.object(number + 1, b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] /Resources %s /Contents %d 0 R >>'
+                       % (PAGE_WIDTH, PAGE_HEIGHT, resources, number))
+            pages.append(number + 1)
+
+        operations = page_start(1)
+        line = 0
+        for values in rows:
+            if line == rows_per_page:
+                flush(operations)
+                operations = page_start(len(pages) + 1)
+                line = 0
+            y = first_row - line * LEADING
+            if line % 2:
+                operations.append(b'0.95 g %d %.1f %.1f %d re f 0 g' % (MARGIN - 2, y - 2.5, table_width + 4, LEADING))
+            text = ' '.join(_fit(_pdf_value(value, kind), column.width, r)
+                            for value, kind, column, r in zip(values, kinds, columns, right))
+            operations.append(b'BT /F3 %d Tf %d %.1f Td %s Tj ET' % (FONT_SIZE, MARGIN, y, _pdf_string(text)))
+            line += 1
+            count += 1
+        if not count:
+            operations.append(b'BT /F1 9 Tf %d %d Td %s Tj ET' % (MARGIN, first_row, _pdf_string('Keine Einträge.')))
+        flush(operations)
+
+        pdf.object(2, b'<< /Type /Pages /Kids [%s] /Count %d >>'
+                   % (b' '.join(b'%d 0 R' % page for page in pages), len(pages)))
+        pdf.object(1, b'<< /Type /Catalog /Pages 2 0 R >>')
+        pdf.object(3, b'<< /Title %s /Producer (REI Report Engine) /CreationDate (D:%s) >>'
+                   % (_pdf_string(title), datetime.utcnow().strftime('%Y%m%d%H%M%SZ').encode()))
+        pdf.finish(root=1, info=3)
+    return count
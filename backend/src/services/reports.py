@@ -0,0 +1,454 @@
+"""Reports (PDF/XLSX) über gefilterte Trends: im Hintergrund erzeugt, auf Platte gecacht.
+
+Ein Report ist durch Filter (wie ``GET /api/trends/search``, siehe
+src/services/trend_search.py), Format und Titel bestimmt. ``request_report``
+bildet daraus einen Hash und kombiniert ihn mit dem Datenstand
+(``data_version``, src/services/counters.py) zur Auftrags-ID:
+
+- liegt die Datei zu dieser ID schon vor, ist der Report sofort fertig
+  (eine Abfrage, kein Schreibzugriff);
+- wartet oder läuft ein Auftrag mit dieser ID, wird er zurückgegeben;
+- sonst wird ein Auftrag angelegt und an den Report-Worker übergeben.
+
+Ändern sich Contents, Ratings, Phasen oder Tags, steigt der Datenstand und
+dieselbe Anfrage erzeugt einen neuen Report; ältere Artefakte desselben
+Reports löscht der Worker, sobald der neue fertig ist.
+
+Die sichtbaren Teams des Anfragenden gehören zur Spezifikation und stehen
+zusätzlich in ``report_job.teams``: Liste, Status und Download eines Reports
+sieht nur, wer mindestens diese Teams sehen darf (``visible``).
+
+Der Worker (``REPORT_WORKERS`` Threads pro Prozess, gestartet beim ersten
+Auftrag) liest die Trends batchweise (``REPORT_BATCH`` Zeilen, Tags je Batch
+mit einer Abfrage) und schreibt sie sofort in die Datei
+(src/services/report_formats.py); der Speicherbedarf hängt nur von der
+Batch-Größe ab. Dateien liegen unter ``REPORT_DIR`` (Default
+``DATA_DIR/reports``) und werden erst nach dem vollständigen Schreiben unter
+ihren Namen verschoben.
+
+Jeder wartende oder laufende Auftrag hat einen Lease (``report_job.lease_until``):
+beim Einreihen ``REPORT_JOB_TIMEOUT`` Sekunden, beim Start ``REPORT_LEASE``
+Sekunden. Während der Erzeugung verlängert ein Heartbeat-Thread ihn alle
+``REPORT_HEARTBEAT`` Sekunden. Erst wenn der Lease abgelaufen ist (Prozess
+beendet, Worker hängt), reiht die nächste gleiche Anfrage den Auftrag neu
+ein; ein Renderer, dessen Auftrag so neu vergeben wurde, bricht ab.
+
+Geplante Reports per Cron (aus ``backend/``)::
+
+    python -m src.services.reports --format xlsx --filter min_score=3 --filter tags=proptech --out top.xlsx
+"""
+import atexit
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+from itertools import islice
+
+from flask import current_app
+from sqlalchemy import delete, func, select, update
+
+from src.models.user import db
+from src.models.associations import content_trend_tags
+from src.models.content import Content, Rating
+from src.models.trend_management import ReportJob, TrendPhase, TrendTag
+from src.monitoring import cache_access, metrics
+from src.services import trend_search
+from src.services.counters import read_data_version
+from src.services.report_formats import Column, write_pdf, write_xlsx
+from src.services.write_queue import write_queue
+
+DEFAULTS = {
+    'REPORT_WORKERS': 1,
+    'REPORT_BATCH': 500,
+    'REPORT_JOB_TIMEOUT': 600,
+    'REPORT_LEASE': 60,
+    'REPORT_HEARTBEAT': 15,
+    'REPORT_DIR': None,
+}
+FORMATS = {
+    'pdf': 'application/pdf',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+COLUMNS = (
+    Column('ID', 'int', 6),
+    Column('Titel', 'text', 36),
+    Column('Phase', 'text', 14),
+    Column('Score', 'float', 6),
+    Column('Sentiment', 'float', 9),
+    Column('Ø Rating', 'float', 8),
+    Column('Ratings', 'int', 7),
+    Column('Branche', 'text', 16),
+    Column('Horizont', 'text', 8),
+    Column('Status', 'text', 9),
+    Column('Tags', 'text', 28),
+    Column('Erstellt', 'datetime', 10),
+    Column('Geprüft', 'datetime', 10),
+)
+
+_job = ReportJob.__table__
+_STOP = object()
+
+
+def _config(key):
+    return current_app.config.get(key, DEFAULTS[key])
+
+
+def report_dir():
+    path = _config('REPORT_DIR') or os.path.join(os.getenv('DATA_DIR', '/tmp'), 'reports')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def artifact_path(report_id, fmt):
+    return os.path.join(report_dir(), f'{report_id}.{fmt}')
+
+
+def make_spec(filters, fmt, title=None, teams=None):
+    """Normalisierte Beschreibung eines Reports; ``ValueError``/``TagQueryError`` bei ungültigen Angaben."""
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(FORMATS)}")
+    if title is not None and not isinstance(title, str):
+        raise ValueError('title must be a string')
+    if filters is not None and not isinstance(filters, dict) and not hasattr(filters, 'getlist'):
+        raise ValueError('filters must be an object')
+    normalized = trend_search.parse_filters(filters)
+    normalized['tags'] = sorted(normalized['tags'])  # mehrere tags-Parameter: OR, Reihenfolge egal
+    if teams is not None:
+        normalized['teams'] = sorted(teams)  # Team-Sichtbarkeit des Anfragenden (src/auth.py)
+    trend_search.filter_query(normalized)  # ungültige Tag-Ausdrücke sofort melden
+    return {'filters': normalized, 'format': fmt, 'title': (title or 'Trend-Report').strip()[:200]}
+
+
+def spec_hash(spec):
+    return hashlib.sha256(json.dumps(spec, sort_keys=True, separators=(',', ':')).encode()).hexdigest()
+
+
+def report_id_for(filter_hash, data_version):
+    return hashlib.sha256(f'{filter_hash}:{data_version}'.encode()).hexdigest()[:32]
+
+
+def encode_teams(teams):
+    """Team-Menge für ``report_job.teams`` (``None`` = keine Einschränkung)."""
+    return None if teams is None else ','.join(str(team_id) for team_id in sorted(teams))
+
+
+def visible(job, teams):
+    """Darf ein Request mit den Teams ``teams`` (``src.auth.team_ids()``) den Report sehen?"""
+    if teams is None:
+        return True
+    if job.teams is None:
+        return False
+    return {int(team_id) for team_id in job.teams.split(',') if team_id} <= set(teams)
+
+
+def describe(filters):
+    """Filter als kurze Zeile für Kopfzeilen (nur gesetzte Werte)."""
+    parts = [f"{key}={', '.join(map(str, value)) if isinstance(value, list) else value}"
+             for key, value in filters.items() if value not in (None, '', [])]
+    return '; '.join(parts)
+
+
+# ============================================================
+# Aufträge
+# ============================================================
+def _lease(key, now):
+    return now + timedelta(seconds=_config(key))
+
+
+def _stale(job, now):
+    if job.lease_until is None:  # Auftrag von vor 0015_report_job_lease
+        return (now - (job.started_at or job.created_at)).total_seconds() > _config('REPORT_JOB_TIMEOUT')
+    return now > job.lease_until
+
+
+def request_report(filters, fmt, title=None, teams=None):
+    """Liefert ``(auftrag, fertig)``: aus dem Cache, einen laufenden oder einen neuen Auftrag."""
+    spec = make_spec(filters, fmt, title, teams)
+    filter_hash = spec_hash(spec)
+    version = read_data_version(db.session)
+    report_id = report_id_for(filter_hash, version)
+    job = db.session.get(ReportJob, report_id)
+    if job is not None and job.status == 'done' and os.path.exists(artifact_path(job.id, job.format)):
+        cache_access('report_cache', True)
+        return job.to_dict(), True
+    cache_access('report_cache', False)
+    if job is not None and job.status in ('queued', 'running') and not _stale(job, datetime.utcnow()):
+        return job.to_dict(), False
+
+    db.session.rollback()
+    result, submit = write_queue.execute(_enqueue_job, report_id, filter_hash, version, spec)
+    if submit:
+        worker.submit(report_id)
+    return result, False
+
+
+def _enqueue_job(session, report_id, filter_hash, data_version, spec):
+    job = session.get(ReportJob, report_id)
+    now = datetime.utcnow()
+    if job is None:
+        job = ReportJob(id=report_id, filter_hash=filter_hash, data_version=data_version, format=spec['format'],
+                        spec=json.dumps(spec, sort_keys=True), teams=encode_teams(spec['filters'].get('teams')),
+                        created_at=now, lease_until=_lease('REPORT_JOB_TIMEOUT', now))
+        session.add(job)
+    elif job.status in ('queued', 'running') and not _stale(job, now):
+        return job.to_dict(), False  # gleichzeitige Anfrage war schneller
+    else:
+        job.status, job.error, job.created_at, job.started_at, job.finished_at = 'queued', None, now, None, None
+        job.lease_until = _lease('REPORT_JOB_TIMEOUT', now)
+    session.flush()
+    return job.to_dict(), True
+
+
+def _claim(session, report_id):
+    """Startet einen wartenden Auftrag; gibt ``started_at`` als Kennung des Laufs zurück (None: vergeben)."""
+    now = datetime.utcnow()
+    claimed = session.execute(update(_job).where(_job.c.id == report_id, _job.c.status == 'queued')
+                              .values(status='running', started_at=now, lease_until=_lease('REPORT_LEASE', now)))
+    return now if claimed.rowcount == 1 else None
+
+
+def _renew(session, report_id, started_at):
+    """Verlängert den Lease; False, falls der Auftrag inzwischen neu vergeben oder abgeschlossen wurde."""
+    now = datetime.utcnow()
+    return session.execute(update(_job).where(_job.c.id == report_id, _job.c.status == 'running',
+                                              _job.c.started_at == started_at)
+                           .values(lease_until=_lease('REPORT_LEASE', now))).rowcount == 1
+
+
+def _finish(session, report_id, started_at, fmt, status, row_count=None, size_bytes=None, error=None):
+    """Schließt den Lauf ``started_at`` ab; gibt ``(id, format)`` der zu löschenden Dateien zurück."""
+    job = session.get(ReportJob, report_id)
+    if job is None:  # inzwischen von einem neueren Report abgelöst
+        return [(report_id, fmt)] if status == 'done' else []
+    if job.started_at != started_at:  # nach abgelaufenem Lease neu vergeben: der neue Lauf schließt ab
+        return []
+    job.status, job.row_count, job.size_bytes, job.error = status, row_count, size_bytes, error
+    job.finished_at, job.lease_until = datetime.utcnow(), None
+    if status != 'done':
+        return []
+    superseded = session.execute(select(_job.c.id, _job.c.format).where(
+        _job.c.filter_hash == job.filter_hash, _job.c.data_version < job.data_version)).all()
+    if superseded:
+        session.execute(delete(_job).where(_job.c.id.in_([old_id for old_id, _ in superseded])))
+    return [tuple(row) for row in superseded]
+
+
+# ============================================================
+# Erzeugung
+# ============================================================
+def _rows(session, filters, batch_size):
+    """Tabellenzeilen in Report-Reihenfolge, batchweise gelesen."""
+    average = (select(func.avg(Rating.value)).where(Rating.content_id == Content.id)
+               .correlate(Content).scalar_subquery())
+    count = (select(func.count()).where(Rating.content_id == Content.id)
+             .correlate(Content).scalar_subquery())
+    query = (trend_search.filter_query(filters, tie_break=True)
+             .outerjoin(TrendPhase, TrendPhase.id == Content.trend_phase_id)
+             .with_entities(Content.id, Content.title, TrendPhase.name, Content.priority_score,
+                            Content.sentiment_score, average, count, Content.industry, Content.time_horizon,
+                            Content.status, Content.created_at, Content.last_monitored_at))
+    results = iter(query.yield_per(batch_size))
+    while batch := list(islice(results, batch_size)):
+        tags = {}
+        for content_id, name in session.execute(
+                select(content_trend_tags.c.content_id, TrendTag.name)
+                .join(TrendTag, TrendTag.id == content_trend_tags.c.trend_tag_id)
+                .where(content_trend_tags.c.content_id.in_([row[0] for row in batch]))
+                .order_by(TrendTag.name)):
+            tags.setdefault(content_id, []).append(name)
+        for (content_id, title, phase, score, sentiment_score, rating, ratings, industry, horizon, status,
+             created_at, monitored_at) in batch:
+            yield [content_id, title, phase, score, sentiment_score,
+                   None if rating is None else round(float(rating), 2), ratings, industry, horizon, status,
+                   ', '.join(tags.get(content_id, ())), created_at, monitored_at]
+
+
+class LeaseLost(Exception):
+    """Der Lease ist abgelaufen und der Auftrag wurde neu vergeben."""
+
+
+class _Heartbeat:
+    """Verlängert den Lease eines laufenden Auftrags, solange der ``with``-Block läuft."""
+
+    def __init__(self, report_id, started_at):
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f'report-lease-{report_id[:8]}', daemon=True,
+                                        args=(current_app._get_current_object(), report_id, started_at))
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self, app, report_id, started_at):
+        with app.app_context():
+            try:
+                while not self._stop.wait(_config('REPORT_HEARTBEAT')):
+                    if not write_queue.execute(_renew, report_id, started_at):
+                        self.lost = True
+                        return
+            except Exception:
+                app.logger.exception('lease of report %s not renewed', report_id)
+            finally:
+                db.session.remove()
+
+    def check(self, rows):
+        """Reicht ``rows`` durch und bricht ab, sobald der Lease verloren ist."""
+        for row in rows:
+            if self.lost:
+                raise LeaseLost
+            yield row
+
+
+def render(report_id):
+    """Erzeugt den Report eines wartenden Auftrags (im Worker oder direkt, z.B. per CLI)."""
+    started_at = write_queue.execute(_claim, report_id)
+    if started_at is None:
+        return None  # schon vergeben, fertig oder abgelöst
+    job = db.session.get(ReportJob, report_id)
+    spec, fmt, version = json.loads(job.spec), job.format, job.data_version
+    path = artifact_path(report_id, fmt)
+    temporary = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    generated = datetime.utcnow()
+    footer = f"{spec['title']} – Datenstand {version}, erstellt {generated:%Y-%m-%d %H:%M} UTC"
+    start = time.perf_counter()
+    try:
+        with _Heartbeat(report_id, started_at) as heartbeat:
+            rows = heartbeat.check(_rows(db.session, spec['filters'], _config('REPORT_BATCH')))
+            if fmt == 'xlsx':
+                info = [('Titel', spec['title']), ('Erstellt (UTC)', f'{generated:%Y-%m-%d %H:%M:%S}'),
+                        ('Datenstand', str(version)), ('Filter', describe(spec['filters']))]
+                row_count = write_xlsx(temporary, COLUMNS, rows, info=info)
+            else:
+                row_count = write_pdf(temporary, COLUMNS, rows, spec['title'],
+                                      subtitle=f"Filter: {describe(spec['filters'])}", footer=footer)
+        os.replace(temporary, path)
+    except LeaseLost:
+        # Ein anderer Renderer hat den Auftrag übernommen und schließt ihn ab
+        db.session.rollback()
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        return None
+    except Exception as e:
+        db.session.rollback()
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        write_queue.execute(_finish, report_id, started_at, fmt, 'failed', error=f'{type(e).__name__}: {e}'[:500])
+        metrics.observe('rei_report_render_seconds', time.perf_counter() - start, (('format', fmt), ('status', 'failed')))
+        raise
+    db.session.rollback()
+    size = os.path.getsize(path)
+    for old_id, old_format in write_queue.execute(_finish, report_id, started_at, fmt, 'done', row_count, size):
+        try:
+            os.remove(artifact_path(old_id, old_format))
+        except FileNotFoundError:
+            pass
+    elapsed = time.perf_counter() - start
+    metrics.observe('rei_report_render_seconds', elapsed, (('format', fmt), ('status', 'done')))
+    return {'id': report_id, 'rows': row_count, 'size_bytes': size, 'seconds': round(elapsed, 3)}
+
+
+class ReportWorker:
+    """Hintergrund-Threads, die wartende Aufträge dieses Prozesses erzeugen."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queue = None
+        self._threads = []
+        self._app = None
+
+    def _ensure_started(self):
+        # Start erst beim ersten Auftrag, also nach dem Fork der gunicorn-Worker
+        with self._lock:
+            if any(thread.is_alive() for thread in self._threads):
+                return
+            self._app = current_app._get_current_object()
+            self._queue = queue.Queue()
+            self._threads = [threading.Thread(target=self._run, name=f'report-worker-{i}', daemon=True)
+                             for i in range(max(1, _config('REPORT_WORKERS')))]
+            for thread in self._threads:
+                thread.start()
+            atexit.register(self.stop)
+
+    def submit(self, report_id):
+        self._ensure_started()
+        self._queue.put(report_id)
+
+    def depth(self):
+        """Anzahl wartender Aufträge (ungefähr, ``queue.Queue.qsize``)."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def join(self):
+        """Wartet, bis alle eingereihten Aufträge erledigt sind (Benchmarks, CLI)."""
+        if self._queue is not None:
+            self._queue.join()
+
+    def stop(self, timeout=30):
+        """Arbeitet die Queue ab und beendet die Threads."""
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self._queue.put(_STOP)
+        for thread in threads:
+            thread.join(timeout)
+
+    def _run(self):
+        while True:
+            report_id = self._queue.get()
+            try:
+                if report_id is _STOP:
+                    return
+                with self._app.app_context():
+                    try:
+                        render(report_id)
+                    except Exception:
+                        self._app.logger.exception('report %s failed', report_id)
+                    finally:
+                        db.session.remove()
+            finally:
+                self._queue.task_done()
+
+
+worker = ReportWorker()
+
+
+if __name__ == '__main__':
+    import argparse
+    import shutil
+
+    from src.main import create_app
+
+    parser = argparse.ArgumentParser(description='Trend-Report erzeugen (aus dem Cache, falls aktuell)')
+    parser.add_argument('--format', choices=FORMATS, default='xlsx')
+    parser.add_argument('--title')
+    parser.add_argument('--filter', action='append', default=[], metavar='KEY=VALUE',
+                        help='Suchparameter wie bei /api/trends/search, mehrfach möglich')
+    parser.add_argument('--out', help='Zieldatei (sonst nur Pfad im Cache ausgeben)')
+    args = parser.parse_args()
+
+    filters = {}
+    for item in args.filter:
+        key, _, value = item.partition('=')
+        filters.setdefault(key, []).append(value)
+    app = create_app()
+    with app.app_context():
+        job, ready = request_report(filters, args.format, args.title)
+        worker.join()
+        db.session.rollback()
+        job = db.session.get(ReportJob, job['id'])
+        if job is None or job.status != 'done':
+            raise SystemExit(f"report {job.id if job else '?'}: {job.status if job else 'superseded'}"
+                             f"{f' ({job.error})' if job is not None and job.error else ''}")
+        path = artifact_path(job.id, job.format)
+        if args.out:
+            shutil.copyfile(path, args.out)
+        print(f"{'cached' if ready else 'rendered'}: {job.row_count} rows, {job.size_bytes} bytes -> {args.out or path}")
+        worker.stop()
+        write_queue.stop()
@@ -0,0 +1,251 @@
+"""Append-only Score-Historie mit kompakter Speicherung und Verlaufsabfragen.
+
+``trend_score`` hält weiterhin nur den aktuellen Wert je (Content, Typ,
+Bewerter). Jede Bewertung wird zusätzlich in ``trend_score_series``
+angehängt: Reihen sind nach (Content, Score-Typ-Code, Bewerter) getrennt und
+in Blöcken zu ``CHUNK_POINTS`` Punkten gespeichert, Zeitstempel als
+uint32-Deltas (Sekunden) zum Vorgänger, Werte als float32 – 8 Byte pro Punkt
+statt einer ORM-Zeile. Anhängen liest und erweitert nur den jüngsten Block
+der Reihe.
+
+Abfragen laufen über Core und NumPy ohne ORM-Objekte: Blöcke im Zeitfenster
+laden, dekodieren, Reihen mehrerer Bewerter zusammenführen und bei Bedarf
+auf höchstens ``points`` Zeit-Buckets verdichten (``mean``, ``min``, ``max``
+oder ``last`` je Bucket).
+"""
+import calendar
+import struct
+from datetime import datetime
+
+from sqlalchemy import and_, bindparam, func, select
+
+from src.lazy import lazy_module
+from src.models.trend_management import ScoreType, TrendScore, TrendScoreSeries
+
+np = lazy_module('numpy')
+
+CHUNK_POINTS = 512
+AGGREGATES = ('mean', 'min', 'max', 'last')
+
+_series = TrendScoreSeries.__table__
+_types = ScoreType.__table__
+# Name -> Code; nur Einträge, die garantiert committet sind
+_type_ids = {}
+
+
+def to_epoch(dt):
+    """Naive UTC-``datetime`` -> Unix-Sekunden."""
+    return calendar.timegm(dt.utctimetuple())
+
+
+def _type_id(session, name):
+    type_id = _type_ids.get(name)
+    if type_id is not None:
+        return type_id
+    created = session.info.setdefault('new_score_types', set())
+    type_id = session.execute(select(_types.c.id).where(_types.c.name == name)).scalar()
+    if type_id is None:
+        next_id = (session.execute(select(_types.c.id).order_by(_types.c.id.desc()).limit(1)).scalar() or 0) + 1
+        session.execute(_types.insert().values(id=next_id, name=name))
+        created.add(name)
+        type_id = next_id
+    elif name not in created:
+        # erst cachen, wenn der Eintrag nicht aus der laufenden (evtl. zurückgerollten) Transaktion stammt
+        _type_ids[name] = type_id
+    return type_id
+
+
+def append(session, content_id, score_type, value, calculated_by=None, at=None):
+    """Hängt einen Score an die Reihe an (in der Transaktion von ``session``)."""
+    key = (content_id, _type_id(session, score_type), calculated_by or 0)
+    ts = to_epoch(at or datetime.utcnow())
+    where = (_series.c.content_id == key[0], _series.c.score_type_id == key[1], _series.c.scorer_id == key[2])
+    last = session.execute(
+        select(_series.c.chunk, _series.c.count, _series.c.end_ts, _series.c.deltas, _series.c['values'])
+        .where(*where).order_by(_series.c.chunk.desc()).limit(1).with_for_update()
+    ).first()
+    if last is None or last[1] >= CHUNK_POINTS:
+        session.execute(_series.insert().values(
+            content_id=key[0], score_type_id=key[1], scorer_id=key[2], chunk=0 if last is None else last[0] + 1,
+            start_ts=ts, end_ts=ts, count=1, deltas=struct.pack('<I', 0), values=struct.pack('<f', value)))
+        return
+    chunk, count, end_ts, deltas, values = last
+    # Uhr zurückgestellt: Delta 0 statt negativer Werte, die Reihe bleibt monoton
+    delta = max(0, ts - end_ts)
+    session.execute(_series.update().where(*where, _series.c.chunk == chunk).values(
+        end_ts=end_ts + delta, count=count + 1,
+        deltas=bytes(deltas) + struct.pack('<I', delta), values=bytes(values) + struct.pack('<f', value)))
+
+
+def append_many(session, points):
+    """Hängt ``[(content_id, score_type, value, calculated_by, at), ...]`` an (Batch-Scoring).
+
+    Die jüngsten Blöcke aller betroffenen Reihen kommen aus einer Abfrage;
+    jeder Block wird einmal geschrieben, egal wie viele Punkte er erhält.
+    """
+    type_ids = {score_type: _type_id(session, score_type) for score_type in {point[1] for point in points}}
+    series = {}
+    for content_id, score_type, value, calculated_by, at in points:
+        key = (content_id, type_ids[score_type], calculated_by or 0)
+        series.setdefault(key, []).append((to_epoch(at or datetime.utcnow()), value))
+    if not series:
+        return 0
+    content_ids, type_ids, scorer_ids = ({key[i] for key in series} for i in range(3))
+    columns = (_series.c.content_id, _series.c.score_type_id, _series.c.scorer_id)
+    newest = (select(*columns, func.max(_series.c.chunk).label('chunk'))
+              .where(_series.c.content_id.in_(content_ids), _series.c.score_type_id.in_(type_ids),
+                     _series.c.scorer_id.in_(scorer_ids))
+              .group_by(*columns).subquery())
+    last = {}
+    for row in session.execute(
+            select(*columns, _series.c.chunk, _series.c.count, _series.c.end_ts, _series.c.deltas,
+                   _series.c['values'])
+            .join(newest, and_(*(column == newest.c[column.key] for column in columns),
+                               _series.c.chunk == newest.c.chunk))
+            .with_for_update(of=_series)):
+        last[tuple(row[:3])] = row[3:]
+
+    inserts, updates = [], []
+    for key, appended in series.items():
+        current = last.get(key)
+        blocks = []
+        if current is not None and current[1] < CHUNK_POINTS:
+            # jüngsten Block fortsetzen
+            chunk, count, end_ts, deltas, values = current
+            blocks.append({'chunk': chunk, 'end_ts': end_ts, 'count': count,
+                           'deltas': bytearray(deltas), 'values': bytearray(values)})
+        next_chunk = 0 if current is None else current[0] + 1
+        for ts, value in appended:
+            if not blocks or blocks[-1]['count'] >= CHUNK_POINTS:
+                blocks.append({'chunk': next_chunk, 'start_ts': ts, 'end_ts': ts, 'count': 0,
+                               'deltas': bytearray(), 'values': bytearray()})
+                next_chunk += 1
+            block = blocks[-1]
+            # Uhr zurückgestellt: Delta 0 statt negativer Werte, die Reihe bleibt monoton
+            delta = max(0, ts - block['end_ts'])
+            block['end_ts'] += delta
+            block['count'] += 1
+            block['deltas'] += struct.pack('<I', delta)
+            block['values'] += struct.pack('<f', value)
+        for block in blocks:
+            block['deltas'], block['values'] = bytes(block['deltas']), bytes(block['values'])
+            if 'start_ts' in block:
+                inserts.append({'content_id': key[0], 'score_type_id': key[1], 'scorer_id': key[2], **block})
+            else:
+                # Schlüssel als eigene Parameter: Spaltennamen sind im SET belegt
+                updates.append({'key_content': key[0], 'key_type': key[1], 'key_scorer': key[2],
+                                'key_chunk': block.pop('chunk'), **block})
+    if updates:
+        session.execute(_series.update().where(
+            _series.c.content_id == bindparam('key_content'), _series.c.score_type_id == bindparam('key_type'),
+            _series.c.scorer_id == bindparam('key_scorer'), _series.c.chunk == bindparam('key_chunk')), updates)
+    if inserts:
+        session.execute(_series.insert(), inserts)
+    return len(points)
+
+
+def encode_series(points):
+    """Kodiert ``[(epoch, value), ...]`` (zeitlich sortiert) in Block-Spalten."""
+    chunks = []
+    for number, start in enumerate(range(0, len(points), CHUNK_POINTS)):
+        block = points[start:start + CHUNK_POINTS]
+        times = [ts for ts, _ in block]
+        deltas = [0] + [max(0, b - a) for a, b in zip(times, times[1:])]
+        chunks.append({'chunk': number, 'start_ts': times[0], 'end_ts': times[0] + sum(deltas), 'count': len(block),
+                       'deltas': struct.pack(f'<{len(block)}I', *deltas),
+                       'values': struct.pack(f'<{len(block)}f', *(value for _, value in block))})
+    return chunks
+
+
+def backfill(connection):
+    """Legt für jeden vorhandenen ``trend_score``-Eintrag ohne Historie einen Startpunkt an."""
+    scores = TrendScore.__table__
+    type_ids = dict(connection.execute(select(_types.c.name, _types.c.id)).all())
+    for (name,) in connection.execute(select(scores.c.score_type).distinct()).all():
+        if name not in type_ids:
+            type_ids[name] = max(type_ids.values(), default=0) + 1
+            connection.execute(_types.insert().values(id=type_ids[name], name=name))
+    existing = set(connection.execute(
+        select(_series.c.content_id, _series.c.score_type_id, _series.c.scorer_id).distinct()).all())
+    series = {}
+    for content_id, name, scorer, value, at in connection.execute(
+            select(scores.c.content_id, scores.c.score_type, scores.c.calculated_by, scores.c.value,
+                   scores.c.calculated_at).order_by(scores.c.calculated_at)):
+        key = (content_id, type_ids[name], scorer or 0)
+        if key not in existing:
+            series.setdefault(key, []).append((to_epoch(at or datetime.utcnow()), value))
+    rows = [{'content_id': key[0], 'score_type_id': key[1], 'scorer_id': key[2], **chunk}
+            for key, points in series.items() for chunk in encode_series(points)]
+    for start in range(0, len(rows), 5000):
+        connection.execute(_series.insert(), rows[start:start + 5000])
+    return len(rows)
+
+
+# --- Abfragen ---
+def _downsample(times, values, points, agg):
+    span = int(times[-1] - times[0]) + 1
+    buckets = (times - times[0]) * points // span
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(times)]
+    if agg == 'last':
+        return times[ends - 1], values[ends - 1]
+    sizes = ends - starts
+    bucket_times = np.add.reduceat(times, starts) // sizes
+    if agg == 'mean':
+        return bucket_times, np.add.reduceat(values.astype(np.float64), starts) / sizes
+    reduce = np.minimum if agg == 'min' else np.maximum
+    return bucket_times, reduce.reduceat(values, starts)
+
+
+def trajectories(connection, content_ids, score_types=None, calculated_by=None, start=None, end=None,
+                 points=None, agg='mean'):
+    """Score-Verläufe ``{content_id: {score_type: {'timestamps': [...], 'values': [...]}}}``.
+
+    ``start``/``end`` sind naive UTC-``datetime``; ``calculated_by`` filtert auf
+    einen Bewerter (0 = automatisch). Reihen mit mehr als ``points`` Punkten
+    werden auf ``points`` Zeit-Buckets verdichtet.
+    """
+    names = dict(connection.execute(select(_types.c.id, _types.c.name)).all())
+    query = select(_series.c.content_id, _series.c.score_type_id, _series.c.start_ts,
+                   _series.c.deltas, _series.c['values']).where(_series.c.content_id.in_(content_ids))
+    if score_types:
+        wanted = [type_id for type_id, name in names.items() if name in score_types]
+        query = query.where(_series.c.score_type_id.in_(wanted))
+    if calculated_by is not None:
+        query = query.where(_series.c.scorer_id == calculated_by)
+    start_ts = to_epoch(start) if start else None
+    end_ts = to_epoch(end) if end else None
+    if start_ts is not None:
+        query = query.where(_series.c.end_ts >= start_ts)
+    if end_ts is not None:
+        query = query.where(_series.c.start_ts <= end_ts)
+
+    parts = {}
+    for content_id, type_id, first, deltas, values in connection.execute(
+            query.order_by(_series.c.content_id, _series.c.score_type_id, _series.c.scorer_id, _series.c.chunk)):
+        times = first + np.cumsum(np.frombuffer(deltas, dtype='<u4'), dtype=np.int64)
+        parts.setdefault((content_id, type_id), []).append((times, np.frombuffer(values, dtype='<f4')))
+
+    result = {}
+    for (content_id, type_id), chunks in parts.items():
+        times = np.concatenate([t for t, _ in chunks])
+        values = np.concatenate([v for _, v in chunks])
+        if len(chunks) > 1:
+            # mehrere Bewerter: nach Zeit zusammenführen
+            order = np.argsort(times, kind='stable')
+            times, values = times[order], values[order]
+        mask = np.ones(len(times), dtype=bool)
+        if start_ts is not None:
+            mask &= times >= start_ts
+        if end_ts is not None:
+            mask &= times <= end_ts
+        times, values = times[mask], values[mask]
+        if not len(times):
+            continue
+        if points and len(times) > points:
+            times, values = _downsample(times, values, points, agg)
+        result.setdefault(content_id, {})[names[type_id]] = {
+            'timestamps': np.datetime_as_string(times.astype('datetime64[s]')).tolist(),
+            'values': np.round(values.astype(np.float64), 4).tolist(),
+        }
+    return result
@@ -0,0 +1,454 @@
+"""Lexikonbasiertes Sentiment (Deutsch/Englisch) für Contents und Kommentare.
+
+Bewertet werden Titel und Beschreibungen eines Contents, jeder Kommentar und
+die Texte externer Quellen (``record_source``), ohne Netzwerk und ohne
+Modell-Download (Lexika in ``sentiment_lexicon.py``). ``score_texts``
+tokenisiert einen Stapel Texte einmal in Python; Spracherkennung (Stoppwörter),
+Valenzen, Verstärker, Verneinung (die nächsten ``NEGATION_WINDOW`` Wörter) und
+Gewichtung um "aber"/"but" laufen danach als NumPy-Operationen über alle
+Tokens des Stapels. Die Summe je Text wird wie bei VADER auf [-1, 1]
+normiert; Texte ohne Lexikon-Treffer bleiben ohne Score.
+
+Inkrementell über die Warteschlange ``sentiment_queue``: Ein
+``after_flush``-Event merkt Contents mit neuem bzw. geändertem Text und
+Contents mit neuen oder gelöschten Kommentaren vor. ``run`` arbeitet sie
+stapelweise ab, bewertet nur noch nicht bewertete Kommentare
+(``comment_sentiment``) und schreibt ``content_sentiment``,
+``Content.sentiment_score`` und je Trend und Tag eine ``sentiment``-Zeile in
+``trend_metrics``. Aufruf per Cron, Bulk-Endpunkt oder::
+
+    python -m src.services.sentiment          # Warteschlange abarbeiten
+    python -m src.services.sentiment --all    # alle Contents neu bewerten
+
+Schreibzugriffe am ORM vorbei (Core-Inserts) merkt das Event nicht vor; dafür
+gibt es ``enqueue``/``enqueue_all``.
+"""
+import re
+import threading
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+from flask import current_app
+from sqlalchemy import bindparam, func, literal, select, true, update
+from sqlalchemy import DateTime, event, inspect
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from src.lazy import lazy_module
+from src.models.content import Comment, CommentSentiment, Content, ContentSentiment, SentimentQueue
+from src.models.trend_management import TrendMetrics
+from src.services import sentiment_lexicon as lexicon
+from src.services.counters import bump_data_version
+
+np = lazy_module('numpy')
+
+DEFAULTS = {
+    'SENTIMENT_BATCH': 1000,
+    'SENTIMENT_DESCRIPTION_WEIGHT': 2.0,
+    'SENTIMENT_SOURCE_WEIGHT': 2.0,
+    'SENTIMENT_LEXICON': None,
+}
+TEXT_FIELDS = ('title', 'short_description', 'long_description')
+NEGATION_WINDOW = 3
+NEGATION_SCALE = -0.74
+CONTRAST_BEFORE, CONTRAST_AFTER = 0.5, 1.5
+NORMALIZE_ALPHA = 15.0
+MAX_TOKEN_CACHE = 500_000
+
+_TOKEN_RE = re.compile(r"[^\W\d_]+(?:'[^\W\d_]+)?")
+_content = Content.__table__
+_comment = Comment.__table__
+_content_sentiment = ContentSentiment.__table__
+_comment_sentiment = CommentSentiment.__table__
+_queue = SentimentQueue.__table__
+_metrics = TrendMetrics.__table__
+_run_lock = threading.Lock()
+
+
+def _config(key):
+    return current_app.config.get(key, DEFAULTS[key])
+
+
+# ============================================================
+# Bewertung
+# ============================================================
+class Vocabulary:
+    """Wort -> Index plus Arrays ``[Sprache, Index]``; Index 0 = unbekanntes Wort."""
+
+    def __init__(self, valence):
+        words = set()
+        for table in (valence, lexicon.NEGATIONS, lexicon.BOOSTERS, lexicon.CONTRASTS, lexicon.STOPWORDS):
+            for entries in table.values():
+                words.update(entries)
+        self.index = {word: i for i, word in enumerate(sorted(words), 1)}
+        self._stems = {word for entries in valence.values() for word in entries}
+        self._cache = {}
+        shape = (len(lexicon.LANGUAGES), len(self.index) + 1)
+        self.valence = np.zeros(shape)
+        self.booster = np.ones(shape)
+        self.negation = np.zeros(shape, dtype=bool)
+        self.contrast = np.zeros(shape, dtype=bool)
+        self.stopword = np.zeros(shape)
+        for lang_no, lang in enumerate(lexicon.LANGUAGES):
+            for word, value in valence.get(lang, {}).items():
+                self.valence[lang_no, self.index[word]] = value
+            for word, factor in lexicon.BOOSTERS[lang].items():
+                self.booster[lang_no, self.index[word]] = factor
+            for column, words in ((self.negation, lexicon.NEGATIONS[lang]), (self.contrast, lexicon.CONTRASTS[lang]),
+                                  (self.stopword, lexicon.STOPWORDS[lang])):
+                column[lang_no, [self.index[word] for word in words]] = 1
+
+    def lookup(self, token):
+        token_id = self._cache.get(token)
+        if token_id is None:
+            token_id = self.index.get(token, 0)
+            if not token_id:
+                # flektierte Form: Endung abschneiden, solange eine Grundform mit Valenz übrig bleibt
+                for suffix in lexicon.SUFFIXES:
+                    stem = token[:-len(suffix)]
+                    if token.endswith(suffix) and len(stem) > 2 and stem in self._stems:
+                        token_id = self.index[stem]
+                        break
+            if len(self._cache) >= MAX_TOKEN_CACHE:
+                self._cache.clear()
+            self._cache[token] = token_id
+        return token_id
+
+
+@lru_cache(maxsize=4)
+def vocabulary(path=None):
+    """Vokabular aus den eingebauten Lexika plus optionaler TSV-Datei (``SENTIMENT_LEXICON``)."""
+    valence = {lang: dict(words) for lang, words in lexicon.VALENCE.items()}
+    if path:
+        with open(path, encoding='utf-8') as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                lang, word, value = line.split('\t')
+                if lang not in valence:
+                    raise ValueError(f'{path}:{line_no}: unknown language {lang!r}')
+                valence[lang][word.lower()] = float(value)
+    return Vocabulary(valence)
+
+
+def score_texts(texts, vocab=None):
+    """Bewertet einen Stapel Texte.
+
+    Gibt ``(scores, hits, languages)`` zurück: Score je Text in [-1, 1] (NaN
+    ohne Lexikon-Treffer), Anzahl der Treffer und Sprachcode.
+    """
+    vocab = vocab or vocabulary(_config('SENTIMENT_LEXICON'))
+    lookup = vocab.lookup
+    ids, lengths = [], []
+    for text in texts:
+        tokens = _TOKEN_RE.findall(text.lower()) if text else ()
+        ids.extend(map(lookup, tokens))
+        lengths.append(len(tokens))
+    count = len(lengths)
+    if not ids:
+        return np.full(count, np.nan), np.zeros(count, dtype=int), [lexicon.LANGUAGES[0]] * count
+
+    ids = np.asarray(ids, dtype=np.int64)
+    lengths = np.asarray(lengths)
+    doc = np.repeat(np.arange(count), lengths)
+    starts = np.cumsum(lengths) - lengths
+    position = np.arange(ids.size) - starts[doc]
+
+    # Sprache je Text: meiste Stoppwörter, bei Gleichstand (z.B. Stichworte ohne Funktionswörter)
+    # die meisten Lexikon-Treffer, sonst die erste Sprache
+    evidence = vocab.stopword[:, ids] + (vocab.valence[:, ids] != 0) / (ids.size + 1)
+    language = np.stack([np.bincount(doc, weights=row, minlength=count) for row in evidence]).argmax(axis=0)
+    lang = language[doc]
+
+    valence = vocab.valence[lang, ids]
+    value = valence.copy()
+    # Verstärker wirkt auf das folgende Wort desselben Texts
+    booster = vocab.booster[lang, ids]
+    value[1:] *= np.where(position[1:] > 0, booster[:-1], 1.0)
+    # Verneinung in den vorangehenden NEGATION_WINDOW Wörtern desselben Texts
+    negator = vocab.negation[lang, ids]
+    negated = np.zeros(ids.size, dtype=bool)
+    for shift in range(1, NEGATION_WINDOW + 1):
+        negated[shift:] |= negator[:-shift] & (position[shift:] >= shift)
+    value[negated] *= NEGATION_SCALE
+    # Vor dem letzten "aber" halb, ab dort anderthalbfach gewichten
+    contrast = vocab.contrast[lang, ids].astype(np.int64)
+    seen = np.cumsum(contrast)
+    seen -= (seen - contrast)[starts[doc]]
+    total = np.bincount(doc, weights=contrast, minlength=count)[doc]
+    value *= np.where(total > 0, np.where(seen < total, CONTRAST_BEFORE, CONTRAST_AFTER), 1.0)
+
+    sums = np.bincount(doc, weights=value, minlength=count)
+    hits = np.bincount(doc, weights=valence != 0, minlength=count).astype(int)
+    with np.errstate(invalid='ignore'):
+        scores = np.where(hits > 0, sums / np.sqrt(sums * sums + NORMALIZE_ALPHA), np.nan)
+    return scores, hits, [lexicon.LANGUAGES[i] for i in language]
+
+
+def _optional(value):
+    return None if value != value else round(float(value), 4)  # NaN -> None
+
+
+def combine(text_score, comment_score, comment_count, source_score, source_count,
+            description_weight=DEFAULTS['SENTIMENT_DESCRIPTION_WEIGHT'], source_weight=DEFAULTS['SENTIMENT_SOURCE_WEIGHT']):
+    """Gewichtetes Mittel: Beschreibung und Quellen zählen wie ``*_weight`` Kommentare."""
+    parts = [(text_score, description_weight), (comment_score, comment_count),
+             (source_score, source_weight if source_count else 0)]
+    parts = [(score, weight) for score, weight in parts if score is not None and weight > 0]
+    if not parts:
+        return None
+    return round(sum(score * weight for score, weight in parts) / sum(weight for _, weight in parts), 4)
+
+
+# ============================================================
+# Warteschlange
+# ============================================================
+def _upsert(connection, table):
+    return (postgresql if connection.dialect.name == 'postgresql' else sqlite).insert(table)
+
+
+def enqueue(connection, content_ids):
+    """Merkt Contents zur Neuberechnung vor (erneutes Vormerken setzt nur ``queued_at``)."""
+    ids = sorted(set(content_ids))
+    if not ids:
+        return
+    stmt = _upsert(connection, _queue)
+    stmt = stmt.on_conflict_do_update(index_elements=[_queue.c.content_id], set_={'queued_at': stmt.excluded.queued_at})
+    now = datetime.utcnow()
+    for start in range(0, len(ids), 5000):
+        connection.execute(stmt, [{'content_id': content_id, 'queued_at': now} for content_id in ids[start:start + 5000]])
+
+
+def enqueue_all(connection):
+    """Merkt alle Contents vor (nach Core-Importen oder Lexikon-Änderungen)."""
+    stmt = _upsert(connection, _queue)
+    # WHERE true: SQLite verlangt es bei INSERT ... SELECT ... ON CONFLICT
+    stmt = stmt.from_select(['content_id', 'queued_at'],
+                            select(_content.c.id, literal(datetime.utcnow(), DateTime)).where(true()))
+    connection.execute(stmt.on_conflict_do_update(index_elements=[_queue.c.content_id],
+                                                  set_={'queued_at': stmt.excluded.queued_at}))
+
+
+def rescore_all(connection):
+    """Verwirft alle Kommentar-Scores und merkt alle Contents vor."""
+    connection.execute(_comment_sentiment.delete())
+    enqueue_all(connection)
+
+
+@event.listens_for(Session, 'after_flush')
+def _queue_changes(session, flush_context):
+    queued, removed_comments = set(), set()
+    removed_contents = {obj.id for obj in session.deleted if isinstance(obj, Content)}
+    for obj in session.new:
+        if isinstance(obj, Content):
+            queued.add(obj.id)
+        elif isinstance(obj, Comment):
+            queued.add(obj.content_id)
+    for obj in session.dirty:
+        if isinstance(obj, Content) and any(inspect(obj).attrs[field].history.has_changes() for field in TEXT_FIELDS):
+            queued.add(obj.id)
+    for obj in session.deleted:
+        if isinstance(obj, Comment):
+            removed_comments.add(obj.id)
+            queued.add(obj.content_id)
+    queued -= removed_contents
+    queued.discard(None)
+    if not (queued or removed_comments or removed_contents):
+        return
+    connection = session.connection()
+    if removed_comments:
+        connection.execute(_comment_sentiment.delete().where(_comment_sentiment.c.comment_id.in_(removed_comments)))
+    if removed_contents:
+        connection.execute(_comment_sentiment.delete().where(_comment_sentiment.c.content_id.in_(removed_contents)))
+        connection.execute(_queue.delete().where(_queue.c.content_id.in_(removed_contents)))
+    enqueue(connection, queued)
+
+
+# ============================================================
+# Pipeline
+# ============================================================
+def compute(session, content_ids=None, limit=None):
+    """Liest einen Stapel der Warteschlange und bewertet die betroffenen Texte (nur lesend)."""
+    query = select(_queue.c.content_id, _queue.c.queued_at).order_by(_queue.c.queued_at, _queue.c.content_id)
+    if content_ids is not None:
+        query = query.where(_queue.c.content_id.in_(content_ids))
+    queued = session.execute(query.limit(limit or _config('SENTIMENT_BATCH'))).all()
+    if not queued:
+        return None
+    ids = [content_id for content_id, _ in queued]
+    contents = session.execute(
+        select(_content.c.id, _content.c.content_type, *(_content.c[field] for field in TEXT_FIELDS))
+        .where(_content.c.id.in_(ids))).all()
+    # nur Kommentare ohne Score: bereits bewertete werden nicht erneut gelesen
+    comments = session.execute(
+        select(_comment.c.id, _comment.c.content_id, _comment.c.text)
+        .outerjoin(_comment_sentiment, _comment_sentiment.c.comment_id == _comment.c.id)
+        .where(_comment.c.content_id.in_(ids), _comment_sentiment.c.comment_id.is_(None))).all()
+
+    texts = [' '.join(filter(None, row[2:])) for row in contents] + [text for _, _, text in comments]
+    scores, _, languages = score_texts(texts)
+    return {
+        'queued': queued,
+        'contents': [{'content_id': row[0], 'content_type': row[1], 'text_score': _optional(score), 'language': lang}
+                     for row, score, lang in zip(contents, scores, languages)],
+        'comments': [{'comment_id': comment_id, 'content_id': content_id, 'score': _optional(score), 'language': lang}
+                     for (comment_id, content_id, _), score, lang
+                     in zip(comments, scores[len(contents):], languages[len(contents):])],
+    }
+
+
+def store(session, batch, weights):
+    """Schreibt einen bewerteten Stapel (im Writer-Thread) und leert die Warteschlange dafür."""
+    now = datetime.utcnow()
+    connection = session.connection()
+    if batch['comments']:
+        connection.execute(_upsert(connection, _comment_sentiment).on_conflict_do_nothing(), batch['comments'])
+
+    ids = [row['content_id'] for row in batch['contents']]
+    comments = {content_id: (mean, count) for content_id, mean, count in session.execute(
+        select(_comment_sentiment.c.content_id, func.avg(_comment_sentiment.c.score), func.count(_comment_sentiment.c.score))
+        .where(_comment_sentiment.c.content_id.in_(ids), _comment_sentiment.c.score.isnot(None))
+        .group_by(_comment_sentiment.c.content_id))}
+    sources = {content_id: (score, count) for content_id, score, count in session.execute(
+        select(_content_sentiment.c.content_id, _content_sentiment.c.source_score, _content_sentiment.c.source_count)
+        .where(_content_sentiment.c.content_id.in_(ids)))}
+
+    rows = []
+    for content in batch['contents']:
+        content_id = content['content_id']
+        comment_score, comment_count = comments.get(content_id, (None, 0))
+        source_score, source_count = sources.get(content_id, (None, 0))
+        comment_score = None if comment_score is None else round(float(comment_score), 4)
+        rows.append({'cid': content_id, 'text_score': content['text_score'], 'language': content['language'],
+                     'comment_score': comment_score, 'comment_count': comment_count,
+                     'source_score': source_score, 'source_count': source_count, 'now': now,
+                     'score': combine(content['text_score'], comment_score, comment_count, source_score,
+                                      source_count, *weights)})
+    existing = [row for row in rows if row['cid'] in sources]
+    if existing:
+        connection.execute(
+            update(_content_sentiment).where(_content_sentiment.c.content_id == bindparam('cid'))
+            .values(text_score=bindparam('text_score'), language=bindparam('language'),
+                    comment_score=bindparam('comment_score'), comment_count=bindparam('comment_count'),
+                    score=bindparam('score'), scored_at=bindparam('now')),
+            existing)
+    new = [{'content_id': row['cid'], 'text_score': row['text_score'], 'language': row['language'],
+            'comment_score': row['comment_score'], 'comment_count': row['comment_count'], 'source_score': None,
+            'source_count': 0, 'score': row['score'], 'scored_at': now} for row in rows if row['cid'] not in sources]
+    if new:
+        connection.execute(_upsert(connection, _content_sentiment).on_conflict_do_nothing(), new)
+    if rows:
+        connection.execute(update(_content).where(_content.c.id == bindparam('cid'))
+                           .values(sentiment_score=bindparam('score')), rows)
+        bump_data_version(connection)  # Report-Caches (src/services/reports.py)
+
+    trends = {row['content_id'] for row in batch['contents'] if row['content_type'] == 'trend'}
+    _store_metrics(session, [row for row in rows if row['cid'] in trends and row['score'] is not None], now)
+
+    # nur Einträge löschen, die seit dem Lesen nicht erneut vorgemerkt wurden
+    connection.execute(
+        _queue.delete().where(_queue.c.content_id == bindparam('cid'), _queue.c.queued_at <= bindparam('queued')),
+        [{'cid': content_id, 'queued': queued_at} for content_id, queued_at in batch['queued']])
+    return len(rows)
+
+
+def _store_metrics(session, rows, now):
+    """Eine ``sentiment``-Metrik je Trend und Tag (UTC); spätere Läufe am selben Tag überschreiben sie."""
+    if not rows:
+        return
+    day = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    existing = dict(session.execute(
+        select(_metrics.c.content_id, func.max(_metrics.c.id))
+        .where(_metrics.c.content_id.in_([row['cid'] for row in rows]), _metrics.c.metric_type == 'sentiment',
+               _metrics.c.period_start == day)
+        .group_by(_metrics.c.content_id)).all())
+    updates = [{'metric_id': existing[row['cid']], 'value': row['score'], 'now': now}
+               for row in rows if row['cid'] in existing]
+    if updates:
+        session.execute(update(_metrics).where(_metrics.c.id == bindparam('metric_id'))
+                        .values(value=bindparam('value'), calculated_at=bindparam('now')), updates)
+    inserts = [{'content_id': row['cid'], 'metric_type': 'sentiment', 'value': row['score'], 'period_start': day,
+                'period_end': day + timedelta(days=1), 'calculated_at': now} for row in rows if row['cid'] not in existing]
+    if inserts:
+        session.execute(_metrics.insert(), inserts)
+
+
+def run(content_ids=None, max_batches=None):
+    """Arbeitet die Warteschlange (bzw. die angegebenen Contents) stapelweise ab."""
+    from src.models.user import db
+    from src.services.write_queue import write_queue
+
+    weights = (_config('SENTIMENT_DESCRIPTION_WEIGHT'), _config('SENTIMENT_SOURCE_WEIGHT'))
+    result = {'contents': 0, 'comments': 0, 'batches': 0}
+    # gezielte Läufe (einzelner Content) warten nicht auf einen laufenden Gesamtlauf
+    with _run_lock if content_ids is None else nullcontext():
+        while max_batches is None or result['batches'] < max_batches:
+            batch = compute(db.session, content_ids)
+            # Lesetransaktion beenden, bevor der Writer schreibt (SQLite)
+            db.session.rollback()
+            if batch is None:
+                break
+            result['contents'] += write_queue.execute(store, batch, weights)
+            result['comments'] += len(batch['comments'])
+            result['batches'] += 1
+    return result
+
+
+def record_source(session, content_id, texts):
+    """Bewertet die Texte externer Quellen eines Contents und merkt ihn zur Neuberechnung vor."""
+    scores, _, _ = score_texts(texts)
+    scored = scores[~np.isnan(scores)]
+    score = round(float(scored.mean()), 4) if scored.size else None
+    set_source_scores(session.connection(), {content_id: (score, int(scored.size))})
+    return score
+
+
+def set_source_scores(connection, scores):
+    """Übernimmt Quellen-Scores ``{content_id: (score, anzahl)}`` und merkt die Contents vor."""
+    if not scores:
+        return
+    stmt = _upsert(connection, _content_sentiment)
+    connection.execute(
+        stmt.on_conflict_do_update(index_elements=[_content_sentiment.c.content_id],
+                                   set_={'source_score': stmt.excluded.source_score,
+                                         'source_count': stmt.excluded.source_count}),
+        [{'content_id': content_id, 'source_score': score, 'source_count': count, 'comment_count': 0,
+          'scored_at': datetime.utcnow()} for content_id, (score, count) in scores.items()])
+    enqueue(connection, scores)
+
+
+def sentiment_for(content_id):
+    """Gespeicherte Sentiment-Bestandteile eines Contents, nur lesend.
+
+    ``status``: ``scored``; ``pending``, solange der Content vorgemerkt ist (der
+    gespeicherte Score fehlt oder ist veraltet, bis ``run`` ihn bewertet hat);
+    ``unscored`` ohne Score und ohne Vormerkung.
+    """
+    stored = ContentSentiment.query.get(content_id)
+    result = stored.to_dict() if stored else {'content_id': content_id, 'score': None, 'scored_at': None}
+    if SentimentQueue.query.get(content_id) is not None:
+        result['status'] = 'pending'
+    else:
+        result['status'] = 'scored' if stored else 'unscored'
+    return result
+
+
+if __name__ == '__main__':
+    import argparse
+
+    from src.main import create_app
+    from src.models.user import db
+
+    parser = argparse.ArgumentParser(description='Sentiment der vorgemerkten Contents berechnen')
+    parser.add_argument('--all', action='store_true', help='alle Contents und Kommentare neu bewerten')
+    args = parser.parse_args()
+
+    app = create_app({'STARTUP_TASKS': False})
+    with app.app_context():
+        if args.all:
+            with db.engine.begin() as connection:
+                rescore_all(connection)
+        result = run()
+    print(f"{result['contents']} Contents, {result['comments']} Kommentare in {result['batches']} Stapeln bewertet")
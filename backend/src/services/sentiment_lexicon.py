@@ -0,0 +1,107 @@
+"""Sentiment-Lexika (Deutsch/Englisch) für ``src.services.sentiment``.
+
+Valenzen von -3 (sehr negativ) bis +3 (sehr positiv), Grundformen in
+Kleinschreibung; flektierte Formen findet der Tokenizer über
+``SUFFIXES``. Eigene Einträge ergänzt bzw. überschreibt eine TSV-Datei
+(``SENTIMENT_LEXICON``, Zeilen ``sprache<TAB>wort<TAB>valenz``).
+"""
+
+LANGUAGES = ('de', 'en')
+
+VALENCE = {
+    'de': {
+        # positiv
+        'gut': 2.0, 'super': 2.5, 'toll': 2.5, 'hervorragend': 3.0, 'ausgezeichnet': 3.0, 'exzellent': 3.0,
+        'großartig': 3.0, 'positiv': 2.0, 'erfolgreich': 2.0, 'erfolg': 2.0, 'vorteil': 1.5,
+        'vorteilhaft': 1.5, 'chance': 1.5, 'chancen': 1.5, 'potenzial': 1.5, 'vielversprechend': 2.5,
+        'innovativ': 1.5, 'nachhaltig': 1.0, 'effizient': 1.5, 'effizienz': 1.0, 'wirtschaftlich': 1.0,
+        'rentabel': 2.0, 'profitabel': 2.0, 'gewinn': 1.5, 'wachstum': 1.5, 'stark': 1.5, 'stabil': 1.0,
+        'zuverlässig': 2.0, 'attraktiv': 2.0, 'beliebt': 1.5, 'gefragt': 1.5, 'überzeugend': 2.0,
+        'überzeugt': 2.0, 'begeistert': 3.0, 'freuen': 2.0, 'freude': 2.5, 'zufrieden': 2.0,
+        'hilfreich': 2.0, 'nützlich': 1.5, 'einfach': 1.0, 'praktisch': 1.5, 'günstig': 1.5,
+        'spannend': 2.0, 'interessant': 1.5, 'bewährt': 1.5, 'robust': 1.5, 'zukunftsfähig': 2.0,
+        'zukunftssicher': 2.0, 'lohnend': 2.0, 'lohnt': 2.0, 'empfehlenswert': 2.5, 'empfehlen': 2.0,
+        'verbessert': 2.0, 'verbesserung': 2.0, 'verbessern': 1.5, 'besser': 1.5, 'beste': 2.5,
+        'optimal': 2.0, 'ideal': 2.0, 'gelungen': 2.5, 'sinnvoll': 1.5, 'transparent': 1.0,
+        'einsparung': 1.5, 'einsparungen': 1.5, 'sparen': 1.5, 'durchbruch': 2.5, 'gewinner': 2.0,
+        'souverän': 1.5, 'wertvoll': 2.0, 'wertsteigerung': 2.0, 'entlastet': 1.5, 'komfortabel': 1.5,
+        # negativ
+        'schlecht': -2.0, 'schlimm': -2.5, 'katastrophal': -3.0, 'miserabel': -3.0, 'negativ': -2.0,
+        'problem': -1.5, 'probleme': -1.5, 'problematisch': -2.0, 'risiko': -1.5, 'risiken': -1.5,
+        'riskant': -2.0, 'gefahr': -2.0, 'gefährlich': -2.5, 'teuer': -1.5, 'kostspielig': -1.5,
+        'überteuert': -2.5, 'verlust': -2.0, 'verluste': -2.0, 'scheitern': -2.5, 'gescheitert': -2.5,
+        'fehler': -1.5, 'fehlerhaft': -2.0, 'mangel': -1.5, 'mängel': -1.5, 'mangelhaft': -2.5,
+        'schwach': -1.5, 'schwierig': -1.5, 'kompliziert': -1.5, 'aufwendig': -1.0, 'aufwändig': -1.0,
+        'unsicher': -1.5, 'unsicherheit': -1.5, 'unklar': -1.0, 'enttäuschend': -2.5, 'enttäuscht': -2.5,
+        'ärgerlich': -2.0, 'kritik': -1.5, 'kritisch': -1.0, 'bedenken': -1.0, 'zweifel': -1.5,
+        'zweifelhaft': -2.0, 'leerstand': -1.5, 'verzögerung': -1.5, 'verzögert': -1.5,
+        'ineffizient': -2.0, 'veraltet': -1.5, 'unrentabel': -2.0, 'überflüssig': -2.0, 'nutzlos': -2.5,
+        'hype': -1.0, 'blase': -1.5, 'einbruch': -2.0, 'rückgang': -1.5, 'stagnation': -1.5,
+        'insolvenz': -3.0, 'pleite': -3.0, 'ausfall': -2.0, 'störung': -1.5, 'schaden': -2.0,
+        'schäden': -2.0, 'beschwerde': -1.5, 'beschwerden': -1.5, 'krise': -2.5, 'bedrohung': -2.0,
+        'ärger': -2.0, 'chaos': -2.5, 'kaputt': -2.0, 'langsam': -1.0, 'belastung': -1.5,
+    },
+    'en': {
+        # positiv
+        'good': 2.0, 'great': 2.5, 'excellent': 3.0, 'outstanding': 3.0, 'amazing': 3.0, 'awesome': 3.0,
+        'positive': 2.0, 'success': 2.0, 'successful': 2.0, 'benefit': 1.5, 'advantage': 1.5,
+        'opportunity': 1.5, 'promising': 2.5, 'innovative': 1.5, 'sustainable': 1.0, 'efficient': 1.5,
+        'efficiency': 1.0, 'profitable': 2.0, 'profit': 1.5, 'growth': 1.5, 'strong': 1.5, 'stable': 1.0,
+        'reliable': 2.0, 'attractive': 2.0, 'popular': 1.5, 'convincing': 2.0, 'love': 3.0, 'enjoy': 2.0,
+        'happy': 2.5, 'satisfied': 2.0, 'helpful': 2.0, 'useful': 1.5, 'easy': 1.0, 'practical': 1.5,
+        'affordable': 1.5, 'exciting': 2.0, 'interesting': 1.5, 'proven': 1.5, 'robust': 1.5,
+        'valuable': 2.0, 'recommend': 2.0, 'improve': 1.5, 'improvement': 2.0, 'better': 1.5,
+        'best': 2.5, 'optimal': 2.0, 'ideal': 2.0, 'transparent': 1.0, 'savings': 1.5, 'save': 1.5,
+        'win': 2.0, 'thrive': 2.0, 'boost': 1.5, 'resilient': 1.5, 'seamless': 1.5, 'breakthrough': 2.5,
+        'comfortable': 1.5, 'impressive': 2.5, 'solid': 1.0,
+        # negativ
+        'bad': -2.0, 'worse': -2.0, 'worst': -3.0, 'terrible': -3.0, 'awful': -3.0, 'poor': -2.0,
+        'negative': -2.0, 'problem': -1.5, 'problematic': -2.0, 'risk': -1.5, 'risky': -2.0,
+        'danger': -2.0, 'dangerous': -2.5, 'expensive': -1.5, 'costly': -1.5, 'overpriced': -2.5,
+        'loss': -2.0, 'fail': -2.5, 'failure': -2.5, 'error': -1.5, 'flaw': -1.5, 'flawed': -2.0,
+        'weak': -1.5, 'difficult': -1.5, 'complicated': -1.5, 'uncertain': -1.5, 'uncertainty': -1.5,
+        'unclear': -1.0, 'disappointing': -2.5, 'disappointed': -2.5, 'annoying': -2.0, 'concern': -1.0,
+        'doubt': -1.5, 'doubtful': -2.0, 'vacancy': -1.0, 'delay': -1.5, 'inefficient': -2.0,
+        'outdated': -1.5, 'obsolete': -2.0, 'useless': -2.5, 'hype': -1.0, 'bubble': -1.5,
+        'decline': -1.5, 'collapse': -2.5, 'bankruptcy': -3.0, 'outage': -2.0, 'damage': -2.0,
+        'complaint': -1.5, 'broken': -2.0, 'slow': -1.0, 'crisis': -2.5, 'threat': -2.0,
+        'struggle': -1.5, 'burden': -1.5, 'chaos': -2.5,
+    },
+}
+
+# Verneinung kehrt die Valenz der folgenden ``NEGATION_WINDOW`` Wörter (gedämpft) um
+NEGATIONS = {
+    'de': {'nicht', 'kein', 'keine', 'keinen', 'keiner', 'keines', 'keinem', 'nie', 'niemals', 'nichts',
+           'ohne', 'weder'},
+    'en': {'not', 'no', 'never', 'none', 'nothing', 'without', 'neither', 'nor', 'cannot', "isn't",
+           "aren't", "wasn't", "weren't", "don't", "doesn't", "didn't", "can't", "won't", "wouldn't",
+           "shouldn't", "hasn't", "haven't"},
+}
+
+# Verstärker/Abschwächer: Faktor auf die Valenz des nächsten Worts
+BOOSTERS = {
+    'de': {'sehr': 1.3, 'äußerst': 1.4, 'extrem': 1.4, 'besonders': 1.25, 'enorm': 1.3, 'wirklich': 1.2,
+           'total': 1.25, 'ziemlich': 1.1, 'absolut': 1.3, 'etwas': 0.8, 'kaum': 0.5, 'wenig': 0.7},
+    'en': {'very': 1.3, 'extremely': 1.4, 'really': 1.2, 'highly': 1.3, 'particularly': 1.25,
+           'incredibly': 1.4, 'quite': 1.1, 'absolutely': 1.3, 'somewhat': 0.8, 'slightly': 0.8,
+           'barely': 0.5, 'hardly': 0.5},
+}
+
+# Nach einem "aber" zählt der Rest des Texts stärker als der Teil davor
+CONTRASTS = {
+    'de': {'aber', 'jedoch', 'allerdings'},
+    'en': {'but', 'however', 'yet'},
+}
+
+# Häufige Funktionswörter zur Spracherkennung
+STOPWORDS = {
+    'de': {'der', 'die', 'das', 'und', 'ist', 'ein', 'eine', 'zu', 'mit', 'für', 'auf', 'im', 'den', 'von',
+           'sich', 'des', 'dem', 'auch', 'es', 'als', 'an', 'werden', 'wird', 'sind', 'bei', 'nach', 'wie',
+           'noch', 'aus', 'oder', 'wir', 'sie', 'ich', 'hat', 'dass', 'über', 'nur', 'nicht', 'sehr', 'aber'},
+    'en': {'the', 'and', 'is', 'of', 'to', 'in', 'a', 'that', 'it', 'for', 'on', 'with', 'as', 'was', 'are',
+           'be', 'this', 'by', 'an', 'at', 'from', 'or', 'have', 'has', 'which', 'were', 'will', 'can',
+           'their', 'they', 'we', 'you', 'its', 'our', 'not', 'very', 'but'},
+}
+
+# Flexionsendungen, die unbekannte Wörter auf eine Grundform im Lexikon zurückführen
+SUFFIXES = ('sten', 'ster', 'stes', 'ste', 'em', 'en', 'er', 'es', 'e', 'n', 's', 'ing', 'ed', 'd', 'ly')
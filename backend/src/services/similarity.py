@@ -0,0 +1,358 @@
+"""Ähnlichkeitsdienst ("Similar trends") über TF-IDF-Vektoren.
+
+Jeder Content wird als dünnbesetzter TF-IDF-Vektor aus Titel, Kurz- und
+Langbeschreibung plus seinen Tags (als eigene Terme ``#tagname``) dargestellt.
+``rebuild()`` berechnet Vokabular, IDF und die Top-k-Nachbarn aller Contents
+blockweise (``X[block] @ X.T``) und schreibt sie in ``content_similarity``;
+``/contents/<id>/similar`` liest danach nur noch k Zeilen über den Index.
+
+Bei Änderungen eines einzelnen Contents wird nur dessen Vektor neu berechnet
+(mit dem bestehenden Vokabular, neue Wörter zählen erst nach dem nächsten
+Rebuild) und seine Nachbarliste sowie die Listen der betroffenen Contents
+nachgezogen. Der neue Vektor landet zunächst in einer Liste geänderter Zeilen
+neben der CSR-Matrix; erst nach ``SIMILARITY_MERGE_ROWS`` Änderungen (Default
+256) wird die Matrix einmal neu zusammengesetzt. Die Nachbarlisten schreibt
+eine Mutation der Write-Queue (src/services/write_queue.py). Das Modell wird
+pro Prozess erst bei der ersten Änderung geladen und neu geladen, sobald ein
+anderer Worker-Prozess Contents oder Tags geändert hat (``data_version``,
+src/services/counters.py); ``rebuild`` zählt ``data_version`` dafür hoch.
+"""
+import math
+import re
+import threading
+from collections import Counter
+from datetime import datetime
+
+from flask import current_app
+
+from src.lazy import lazy_module
+from src.monitoring import cache_access
+from src.models.user import db
+from src.models.content import Content
+from src.models.associations import content_trend_tags
+from src.models.trend_management import TrendTag, ContentSimilarity
+from src.services.counters import DATA_VERSION, book_version, foreign_data_version
+from src.services.write_queue import write_queue
+
+np = lazy_module('numpy')
+sparse = lazy_module('scipy.sparse')
+_WORD_RE = re.compile(r'\w+')
+_STOPWORDS = frozenset("""
+    a an and are as at be by for from has have in is it its of on or that the this to was were will with
+    aber als am an auch auf aus bei bis das dass dem den der des die durch ein eine einem einen einer eines
+    es für hat im in ist mit nach nicht noch nur oder sich sie sind so um und von vor wie wird zu zum zur
+""".split())
+TAG_WEIGHT = 2.0
+MAX_DF = 0.5
+
+
+def content_terms(title, short_description, long_description, tag_names=()):
+    """Termhäufigkeiten eines Contents; Tags zählen als eigene, höher gewichtete Terme."""
+    counts = Counter()
+    for text in (title, short_description, long_description):
+        if not text:
+            continue
+        for word in _WORD_RE.findall(text.lower()):
+            if len(word) > 1 and not word.isdigit() and word not in _STOPWORDS:
+                counts[word] += 1
+    for name in tag_names:
+        counts[f'#{name.lower()}'] += TAG_WEIGHT
+    return counts
+
+
+def _top_k(cols, vals, k):
+    """Sortierte Top-k-Auswahl aus einer dünnbesetzten Zeile."""
+    if len(vals) > k:
+        keep = np.argpartition(-vals, k - 1)[:k]
+        cols, vals = cols[keep], vals[keep]
+    order = np.argsort(-vals, kind='stable')
+    return [(int(c), float(v)) for c, v in zip(cols[order], vals[order])]
+
+
+def _replace_lists(session, lists, now):
+    """Mutation: ersetzt die Nachbarlisten ``{content_id: [(similar_id, score)]}``."""
+    session.execute(db.delete(ContentSimilarity).where(ContentSimilarity.content_id.in_(list(lists))))
+    rows = [{'content_id': content_id, 'similar_id': similar_id, 'rank': rank, 'score': score,
+             'calculated_at': now}
+            for content_id, neighbours in lists.items()
+            for rank, (similar_id, score) in enumerate(neighbours, start=1)]
+    if rows:
+        session.execute(db.insert(ContentSimilarity), rows)
+
+
+def _replace_all(session, batches, now):
+    """Mutation: ersetzt die komplette Nachbartabelle durch ``batches`` von ``(content_id, similar_id, rank, score)``."""
+    session.execute(db.delete(ContentSimilarity))
+    book_version(session, DATA_VERSION)  # andere Worker laden ihr Modell neu
+    for batch in batches:
+        session.execute(db.insert(ContentSimilarity), [
+            {'content_id': content_id, 'similar_id': similar_id, 'rank': rank, 'score': score,
+             'calculated_at': now}
+            for content_id, similar_id, rank, score in batch
+        ])
+
+
+class SimilarityService:
+    """Hält Vokabular, IDF und die normierte TF-IDF-Matrix eines Prozesses."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._vocab = None          # term -> Spalte
+        self._idf = None            # IDF je Spalte
+        self._matrix = None         # csr_matrix, Zeilen L2-normiert
+        self._changed = {}          # Zeile -> neuer 1xV-Vektor, noch nicht in ``_matrix``
+        self._stacked = None        # (Zeilen, csr_matrix) aus ``_changed``, bei Bedarf gebaut
+        self._ids = []              # Zeile -> content_id
+        self._row_of = {}           # content_id -> Zeile
+        self._threshold = None      # Score des k-ten Nachbarn je Zeile (0, falls < k)
+        self._version = None        # fremder Datenstand beim Laden
+
+    # --- Korpus & Vektoren ---
+    def _load_corpus(self):
+        tag_names = dict(db.session.execute(db.select(TrendTag.id, TrendTag.name)).all())
+        tags_by_content = {}
+        for content_id, tag_id in db.session.execute(
+                db.select(content_trend_tags.c.content_id, content_trend_tags.c.trend_tag_id)):
+            if tag_id in tag_names:
+                tags_by_content.setdefault(content_id, []).append(tag_names[tag_id])
+
+        rows = db.session.execute(db.select(
+            Content.id, Content.title, Content.short_description, Content.long_description
+        ).order_by(Content.id))
+        return [(cid, content_terms(title, short, long, tags_by_content.get(cid, ())))
+                for cid, title, short, long in rows]
+
+    def _weights(self, counts):
+        """Spalten und L2-normierte TF-IDF-Gewichte (sublineare TF) eines Termzählers."""
+        cols, vals = [], []
+        for term, tf in counts.items():
+            col = self._vocab.get(term)
+            if col is not None:
+                cols.append(col)
+                vals.append((1.0 + math.log(tf)) * self._idf[col])
+        norm = math.sqrt(sum(v * v for v in vals))
+        return cols, [v / norm for v in vals] if norm else vals
+
+    def _vector(self, counts):
+        cols, vals = self._weights(counts)
+        return sparse.csr_matrix((np.asarray(vals, dtype=np.float32), cols, [0, len(cols)]),
+                                 shape=(1, len(self._vocab)))
+
+    def _fit(self, corpus):
+        n = len(corpus)
+        df = Counter()
+        for _, counts in corpus:
+            df.update(counts.keys())
+        max_df = max(2, MAX_DF * n)
+        terms = sorted(term for term, count in df.items() if count <= max_df)
+        self._vocab = {term: col for col, term in enumerate(terms)}
+        self._idf = [math.log((1 + n) / (1 + df[t])) + 1.0 for t in terms]
+        self._ids = [cid for cid, _ in corpus]
+        self._row_of = {cid: row for row, cid in enumerate(self._ids)}
+
+        indptr, indices, data = [0], [], []
+        for _, counts in corpus:
+            cols, vals = self._weights(counts)
+            indices.extend(cols)
+            data.extend(vals)
+            indptr.append(len(indices))
+        self._matrix = sparse.csr_matrix(
+            (np.asarray(data, dtype=np.float32), np.asarray(indices, dtype=np.int32), indptr),
+            shape=(n, len(terms)))
+        self._changed, self._stacked = {}, None
+
+    # --- Geänderte Zeilen ---
+    def _row_vector(self, row):
+        vec = self._changed.get(row)
+        return vec if vec is not None else self._matrix[row]
+
+    def _set_row(self, row, vec):
+        self._changed[row] = vec
+        self._stacked = None
+        if len(self._changed) >= current_app.config.get('SIMILARITY_MERGE_ROWS', 256):
+            self._merge()
+
+    def _merge(self):
+        """Übernimmt alle geänderten Zeilen mit einem Umbau in die CSR-Matrix."""
+        rows = np.fromiter(self._changed, dtype=np.int64, count=len(self._changed))
+        keep = np.ones(self._matrix.shape[0], dtype=np.float32)
+        keep[rows[rows < len(keep)]] = 0.0
+        base = (sparse.diags(keep, format='csr') @ self._matrix).tocsr()
+        base.eliminate_zeros()
+        base.resize((len(self._ids), base.shape[1]))
+        stacked = sparse.vstack([self._changed[row] for row in rows], format='coo')
+        changed = sparse.csr_matrix((stacked.data, (rows[stacked.row], stacked.col)), shape=base.shape)
+        self._matrix = (base + changed).tocsr()
+        self._changed, self._stacked = {}, None
+
+    def _similarities(self, vec):
+        """Kosinus-Ähnlichkeit von ``vec`` zu allen Zeilen als dichtes Array."""
+        sims = np.zeros(len(self._ids), dtype=np.float32)
+        sims[:self._matrix.shape[0]] = (self._matrix @ vec.T).toarray().ravel()
+        if self._changed:
+            if self._stacked is None:
+                rows = np.fromiter(self._changed, dtype=np.int64, count=len(self._changed))
+                self._stacked = rows, sparse.vstack([self._changed[row] for row in rows], format='csr')
+            rows, stacked = self._stacked
+            sims[rows] = (stacked @ vec.T).toarray().ravel()
+        return sims
+
+    def _terms_of(self, content_id):
+        """Termzähler eines Contents nach dem Commit, ``None`` falls gelöscht."""
+        row = db.session.execute(db.select(
+            Content.title, Content.short_description, Content.long_description
+        ).where(Content.id == content_id)).first()
+        if row is None:
+            return None
+        tag_names = db.session.execute(
+            db.select(TrendTag.name).join(content_trend_tags, content_trend_tags.c.trend_tag_id == TrendTag.id)
+            .where(content_trend_tags.c.content_id == content_id)
+        ).scalars().all()
+        return content_terms(*row, tag_names)
+
+    def _ensure_loaded(self):
+        version = foreign_data_version(db.session)
+        fresh = self._matrix is not None and self._version == version
+        cache_access('similarity_matrix', fresh)
+        if fresh:
+            return True
+        if not db.session.query(ContentSimilarity.query.exists()).scalar():
+            # Ohne initialen Rebuild gibt es keine Tabelle, die gepflegt werden müsste
+            return False
+        self._fit(self._load_corpus())
+        self._version = version
+        self._threshold = np.zeros(len(self._ids), dtype=np.float32)
+        k = current_app.config.get('SIMILARITY_TOP_K', 10)
+        for content_id, lowest, count in db.session.query(
+                ContentSimilarity.content_id, db.func.min(ContentSimilarity.score), db.func.count()
+        ).group_by(ContentSimilarity.content_id):
+            row = self._row_of.get(content_id)
+            if row is not None and count >= k:
+                self._threshold[row] = lowest
+        return True
+
+    # --- Nachbarn ---
+    def _neighbours_of_row(self, row, k):
+        sims = self._similarities(self._row_vector(row))
+        sims[row] = 0.0
+        nonzero = np.flatnonzero(sims > 0)
+        return _top_k(nonzero, sims[nonzero], k)
+
+    def _store(self, lists, row, neighbours, k):
+        """Merkt die neue Liste von ``row`` für ``_persist`` vor."""
+        lists[self._ids[row]] = [(self._ids[col], score) for col, score in neighbours]
+        self._threshold[row] = neighbours[-1][1] if len(neighbours) >= k else 0.0
+
+    def _persist(self, lists):
+        try:
+            write_queue.execute(_replace_lists, lists, datetime.utcnow())
+        except Exception:
+            self._matrix = None  # Modell und Tabelle passen nicht mehr zusammen: neu laden
+            raise
+
+    def rebuild(self):
+        """Berechnet Vektoren und die komplette Nachbartabelle neu (Batch-Job)."""
+        k = current_app.config.get('SIMILARITY_TOP_K', 10)
+        block_size = current_app.config.get('SIMILARITY_BLOCK_SIZE', 512)
+        with self._lock:
+            version = foreign_data_version(db.session)
+            self._fit(self._load_corpus())
+            self._version = version
+            n = len(self._ids)
+            self._threshold = np.zeros(n, dtype=np.float32)
+
+            transposed = self._matrix.T.tocsr()
+            batches, pairs = [], 0
+            for start in range(0, n, block_size):
+                block = (self._matrix[start:start + block_size] @ transposed).tocsr()
+                batch = []
+                for i in range(block.shape[0]):
+                    row = start + i
+                    lo, hi = block.indptr[i], block.indptr[i + 1]
+                    cols, vals = block.indices[lo:hi], block.data[lo:hi]
+                    mask = (cols != row) & (vals > 0)
+                    neighbours = _top_k(cols[mask], vals[mask], k)
+                    if len(neighbours) >= k:
+                        self._threshold[row] = neighbours[-1][1]
+                    batch.extend((self._ids[row], self._ids[col], rank, score)
+                                 for rank, (col, score) in enumerate(neighbours, start=1))
+                if batch:
+                    batches.append(batch)
+                    pairs += len(batch)
+            # Eine Transaktion für die ganze Tabelle; Batch-Job, daher ohne Timeout warten
+            write_queue.submit(_replace_all, batches, datetime.utcnow()).result()
+            return {'contents': n, 'pairs': pairs, 'vocabulary': len(self._vocab)}
+
+    def update_content(self, content_id):
+        """Aktualisiert Vektor und Nachbarlisten nach Anlage oder Änderung eines Contents."""
+        k = current_app.config.get('SIMILARITY_TOP_K', 10)
+        with self._lock:
+            if not self._ensure_loaded():
+                return
+            terms = self._terms_of(content_id)
+            if terms is None:
+                return
+            vec = self._vector(terms)
+            row = self._row_of.get(content_id)
+            if row is None:
+                row = len(self._ids)
+                self._ids.append(content_id)
+                self._row_of[content_id] = row
+                self._threshold = np.append(self._threshold, np.float32(0.0))
+            self._set_row(row, vec)
+            self._persist(self._refresh_around(row, k))
+
+    def remove_content(self, content_id):
+        """Nimmt einen gelöschten Content aus dem Modell und allen Nachbarlisten."""
+        k = current_app.config.get('SIMILARITY_TOP_K', 10)
+        with self._lock:
+            if self._matrix is None or content_id not in self._row_of:
+                return
+            row = self._row_of[content_id]
+            self._set_row(row, sparse.csr_matrix((1, self._matrix.shape[1]), dtype=np.float32))
+            self._persist(self._refresh_around(row, k))
+
+    def _refresh_around(self, row, k):
+        """Neue Listen für ``row`` und alle Listen, in denen ``row`` vorkommt oder neu hineingehört."""
+        lists = {}
+        content_id = self._ids[row]
+        sims = self._similarities(self._row_vector(row))
+        sims[row] = 0.0
+
+        nonzero = np.flatnonzero(sims > 0)
+        neighbours = _top_k(nonzero, sims[nonzero], k)
+        self._store(lists, row, neighbours, k)
+
+        # Listen, die den Content enthalten und deren Score sinkt, werden komplett
+        # neu bestimmt (der (k+1)-te Nachbar ist nicht gespeichert); in alle übrigen
+        # Listen mit gestiegenem Score oder neuem Aufrücken wird eingefügt
+        listed = dict(db.session.query(ContentSimilarity.content_id, ContentSimilarity.score)
+                      .filter(ContentSimilarity.similar_id == content_id))
+        merge = []
+        for other_id, old_score in listed.items():
+            other = self._row_of.get(other_id)
+            if other is None:
+                continue
+            if sims[other] < old_score:
+                self._store(lists, other, self._neighbours_of_row(other, k), k)
+            else:
+                merge.append(other)
+        merge.extend(int(r) for r in np.flatnonzero(sims > self._threshold) if self._ids[r] not in listed)
+        if not merge:
+            return lists
+
+        current = {}
+        for owner, similar, score in db.session.query(
+                ContentSimilarity.content_id, ContentSimilarity.similar_id, ContentSimilarity.score
+        ).filter(ContentSimilarity.content_id.in_([self._ids[r] for r in merge])):
+            current.setdefault(owner, []).append((self._row_of.get(similar), score))
+        for other in merge:
+            merged = [(col, score) for col, score in current.get(self._ids[other], [])
+                      if col is not None and col != row]
+            merged.append((row, float(sims[other])))
+            merged.sort(key=lambda pair: -pair[1])
+            self._store(lists, other, merged[:k], k)
+        return lists
+
+
+similarity_service = SimilarityService()
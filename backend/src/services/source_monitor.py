@@ -0,0 +1,465 @@
+"""Überwachung der externen Quellen (``Content.external_source_urls``) der Trends.
+
+Planung: ``MonitorSchedule`` hält alle Trends mit Quellen in einem Heap nach
+Fälligkeit ``last_monitored_at + MONITOR_INTERVAL / (1 + priority_score)``
+(mindestens ``MONITOR_MIN_INTERVAL``). Ein Trend mit Score 5 wird damit
+sechsmal so oft geprüft wie einer mit Score 0; nie geprüfte Trends kommen
+zuerst. Score-Änderungen und neue Quellen sieht der Heap nach
+``MONITOR_SCHEDULE_MAX_AGE`` Sekunden (Default 300) bzw. sofort nach
+``invalidate``.
+
+Ein Zyklus (``run_cycle``) nimmt bis zu ``MONITOR_BATCH`` fällige Trends und
+ruft ihre Quellen mit ``MONITOR_WORKERS`` Threads über eine gemeinsame
+``requests.Session`` (Connection-Pool je Host) ab. Je Host liegen mindestens
+``1 / MONITOR_HOST_RATE`` Sekunden zwischen zwei Anfragen. Abrufe sind bedingt
+(``If-None-Match``/``If-Modified-Since`` aus ``source_state``): 304 heißt
+unverändert, bei 200 entscheidet der SHA-1 des extrahierten Texts (Server
+ohne Validatoren, rotierende Skripte).
+
+Ergebnis je geprüftem Trend: eine ``source_changes``-Metrik (geänderte
+Quellen seit der letzten Prüfung; läuft durch die Burst-Erkennung), das
+Sentiment geänderter Texte (``sentiment.set_source_scores``) und
+``last_monitored_at``. Datenbankzugriffe laufen außerhalb der HTTP-Abrufe,
+geschrieben wird über die Write-Queue. Dauerbetrieb::
+
+    python -m src.services.source_monitor --loop
+"""
+import hashlib
+import heapq
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+
+from flask import current_app
+from sqlalchemy import bindparam, func, select, update
+
+from src.lazy import lazy_module
+from src.models.user import db
+from src.models.content import Content
+from src.models.trend_management import SourceState, TrendMetrics
+from src.monitoring import cache_access, metrics
+from src.services.counters import bump_data_version
+
+np = lazy_module('numpy')
+
+DEFAULTS = {
+    'MONITOR_INTERVAL': 43200,
+    'MONITOR_MIN_INTERVAL': 900,
+    'MONITOR_BATCH': 100,
+    'MONITOR_WORKERS': 8,
+    'MONITOR_HOST_RATE': 1.0,
+    'MONITOR_TIMEOUT': 10.0,
+    'MONITOR_SCHEDULE_MAX_AGE': 300,
+}
+USER_AGENT = 'Mozilla/5.0 (compatible; REI-Monitor/1.0)'
+MAX_BYTES = 2_000_000
+MAX_TEXT = 20_000
+MAX_URLS = 20
+
+_content = Content.__table__
+_state = SourceState.__table__
+_metrics = TrendMetrics.__table__
+_cycle_lock = threading.Lock()
+
+
+def _config(key):
+    return current_app.config.get(key, DEFAULTS[key])
+
+
+def parse_urls(value):
+    """Quellen-URLs aus der JSON-Spalte; ungültige Werte ergeben eine leere Liste."""
+    if not value:
+        return []
+    try:
+        urls = json.loads(value)
+    except ValueError:
+        return []
+    return [url for url in urls if isinstance(url, str)] if isinstance(urls, list) else []
+
+
+def validate_urls(urls):
+    """Prüft eine Liste von Quellen-URLs (http/https) und gibt sie ohne Duplikate zurück."""
+    if not isinstance(urls, list) or not all(isinstance(url, str) for url in urls):
+        raise ValueError('external_source_urls must be a list of URLs')
+    cleaned = list(dict.fromkeys(url.strip() for url in urls if url.strip()))
+    if len(cleaned) > MAX_URLS:
+        raise ValueError(f'at most {MAX_URLS} external_source_urls allowed')
+    for url in cleaned:
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https') or not parts.netloc:
+            raise ValueError(f'invalid source URL: {url}')
+    return cleaned
+
+
+# ============================================================
+# Planung
+# ============================================================
+def due_at(last_monitored_at, priority_score, interval, min_interval):
+    """Nächste Prüfung: je höher der Priority Score, desto kürzer der Abstand."""
+    if last_monitored_at is None:
+        return datetime.min
+    seconds = max(min_interval, interval / (1.0 + max(0.0, priority_score or 0.0)))
+    return last_monitored_at + timedelta(seconds=seconds)
+
+
+class MonitorSchedule:
+    """Heap ``(fällig_ab, content_id)`` aller Trends mit Quellen; veraltete Einträge werden übersprungen."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._heap = []
+        self._due = {}  # content_id -> aktuell gültige Fälligkeit
+        self._built_at = None
+
+    def build(self, session):
+        interval, min_interval = _config('MONITOR_INTERVAL'), _config('MONITOR_MIN_INTERVAL')
+        due = {content_id: due_at(last, score, interval, min_interval)
+               for content_id, score, last, urls in session.execute(
+                   select(_content.c.id, _content.c.priority_score, _content.c.last_monitored_at,
+                          _content.c.external_source_urls)
+                   .where(_content.c.content_type == 'trend', _content.c.external_source_urls.isnot(None)))
+               if parse_urls(urls)}
+        heap = [(at, content_id) for content_id, at in due.items()]
+        heapq.heapify(heap)
+        with self._lock:
+            self._heap, self._due = heap, due
+            self._built_at = time.monotonic()
+
+    def invalidate(self):
+        with self._lock:
+            self._built_at = None
+
+    def ensure_fresh(self, session):
+        with self._lock:
+            stale = self._built_at is None or time.monotonic() - self._built_at > _config('MONITOR_SCHEDULE_MAX_AGE')
+        cache_access('monitor_schedule', not stale)
+        if stale:
+            self.build(session)
+
+    def take(self, now, limit):
+        """Entnimmt bis zu ``limit`` fällige Trends (dringendste zuerst)."""
+        taken = []
+        with self._lock:
+            while self._heap and len(taken) < limit and self._heap[0][0] <= now:
+                at, content_id = heapq.heappop(self._heap)
+                if self._due.get(content_id) == at:
+                    del self._due[content_id]
+                    taken.append(content_id)
+        return taken
+
+    def reschedule(self, content_id, at):
+        with self._lock:
+            self._due[content_id] = at
+            heapq.heappush(self._heap, (at, content_id))
+            # Heap mit vielen übersprungenen Einträgen gelegentlich kompakt neu aufbauen
+            if len(self._heap) > 2 * len(self._due) + 1000:
+                self._heap = [(due, cid) for cid, due in self._due.items()]
+                heapq.heapify(self._heap)
+
+    def due_of(self, content_id):
+        with self._lock:
+            return self._due.get(content_id)
+
+    def next_due(self):
+        with self._lock:
+            while self._heap and self._due.get(self._heap[0][1]) != self._heap[0][0]:
+                heapq.heappop(self._heap)
+            return self._heap[0][0] if self._heap else None
+
+    def __len__(self):
+        return len(self._due)
+
+
+schedule = MonitorSchedule()
+
+
+# ============================================================
+# Abruf
+# ============================================================
+class HostRateLimiter:
+    """Mindestabstand zwischen zwei Anfragen an denselben Host, über alle Worker-Threads."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, host):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next.get(host, 0.0))
+            self._next[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+_http = None
+_http_pool_size = 0
+_http_lock = threading.Lock()
+_limiters = {}
+
+
+def http_session(pool_size):
+    """Gemeinsame ``requests.Session`` mit Connection-Pool (Keep-Alive je Host)."""
+    global _http, _http_pool_size
+    # Erst hier importiert: nur der Monitor braucht requests/urllib3 (Kaltstart)
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    with _http_lock:
+        if _http is None or _http_pool_size < pool_size:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=64, pool_maxsize=pool_size, max_retries=0)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers['User-Agent'] = USER_AGENT
+            _http, _http_pool_size = session, pool_size
+        return _http
+
+
+def extract_text(body, content_type):
+    """Vergleichbarer Text einer Antwort: bei HTML Titel, Beschreibung und sichtbarer Text."""
+    if 'html' not in (content_type or ''):
+        return body[:MAX_TEXT]
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(body, 'html.parser')
+    for tag in soup(['script', 'style', 'noscript', 'template']):
+        tag.decompose()
+    description = soup.find('meta', attrs={'name': 'description'}) or soup.find('meta', attrs={'property': 'og:description'})
+    parts = [soup.title.string if soup.title and soup.title.string else '',
+             description.get('content', '') if description else '',
+             soup.get_text(' ', strip=True)]
+    return ' '.join(part.strip() for part in parts if part)[:MAX_TEXT]
+
+
+def fetch(http, limiter, source, timeout):
+    """Bedingter Abruf einer Quelle; ``source`` und Ergebnis sind Dicts, ohne DB-Zugriff."""
+    import requests
+
+    headers = {}
+    if source.get('etag'):
+        headers['If-None-Match'] = source['etag']
+    if source.get('last_modified'):
+        headers['If-Modified-Since'] = source['last_modified']
+    result = {**source, 'outcome': 'error', 'text': None, 'error': None, 'status_code': None}
+    limiter.acquire(urlsplit(source['url']).netloc.lower())
+    start = time.perf_counter()
+    try:
+        with http.get(source['url'], headers=headers, timeout=timeout, stream=True) as response:
+            result['status_code'] = response.status_code
+            if response.status_code == 304:
+                result['outcome'] = 'not_modified'
+            elif response.ok:
+                body = b''
+                for chunk in response.iter_content(65536):
+                    body += chunk
+                    if len(body) >= MAX_BYTES:
+                        break
+                text = extract_text(body[:MAX_BYTES].decode(response.encoding or 'utf-8', errors='replace'),
+                                    response.headers.get('Content-Type'))
+                digest = hashlib.sha1(text.encode()).hexdigest()
+                result.update(etag=response.headers.get('ETag'), last_modified=response.headers.get('Last-Modified'),
+                              text=text, content_hash=digest,
+                              outcome=('new' if source.get('content_hash') is None else
+                                       'changed' if digest != source['content_hash'] else 'unchanged'))
+            else:
+                result['error'] = f'HTTP {response.status_code}'
+                # kleine Fehlerseiten lesen, damit die Verbindung in den Pool zurückgeht
+                if int(response.headers.get('Content-Length') or MAX_BYTES) <= 65536:
+                    response.content
+    except requests.RequestException as e:
+        result['error'] = str(e)[:500]
+    metrics.observe('rei_source_fetch_duration_seconds', time.perf_counter() - start,
+                    (('outcome', result['outcome']),))
+    return result
+
+
+def _interleave_hosts(sources):
+    """Reihenfolge reihum über die Hosts, damit sich die Worker nicht am selben Host stauen."""
+    by_host = {}
+    for source in sources:
+        by_host.setdefault(urlsplit(source['url']).netloc.lower(), []).append(source)
+    queues = list(by_host.values())
+    ordered = []
+    for i in range(max(map(len, queues), default=0)):
+        ordered.extend(queue[i] for queue in queues if i < len(queue))
+    return ordered
+
+
+def fetch_all(sources):
+    """Ruft alle Quellen parallel ab (Host-Limit und Pool aus der Config)."""
+    workers = _config('MONITOR_WORKERS')
+    http = http_session(workers)
+    # Limiter über Zyklen hinweg behalten: der Abstand gilt auch zwischen zwei Zyklen
+    rate = _config('MONITOR_HOST_RATE')
+    with _http_lock:
+        limiter = _limiters.setdefault(rate, HostRateLimiter(rate))
+    timeout = _config('MONITOR_TIMEOUT')
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='source-monitor') as pool:
+        return list(pool.map(lambda source: fetch(http, limiter, source, timeout), _interleave_hosts(sources)))
+
+
+# ============================================================
+# Zyklus
+# ============================================================
+def _load(session, content_ids):
+    """Trends samt Quellen und gespeichertem Abrufzustand."""
+    trends = {content_id: {'content_id': content_id, 'priority_score': score, 'last_monitored_at': last,
+                           'urls': parse_urls(urls)}
+              for content_id, score, last, urls in session.execute(
+                  select(_content.c.id, _content.c.priority_score, _content.c.last_monitored_at,
+                         _content.c.external_source_urls)
+                  .where(_content.c.id.in_(content_ids)))}
+    states = {(row.content_id, row.url): row for row in session.execute(
+        select(_state.c.id, _state.c.content_id, _state.c.url, _state.c.etag, _state.c.last_modified,
+               _state.c.content_hash).where(_state.c.content_id.in_(content_ids)))}
+    sources = []
+    for trend in trends.values():
+        for url in trend['urls']:
+            state = states.get((trend['content_id'], url))
+            sources.append({'content_id': trend['content_id'], 'url': url,
+                            'state_id': state.id if state else None,
+                            'etag': state.etag if state else None,
+                            'last_modified': state.last_modified if state else None,
+                            'content_hash': state.content_hash if state else None})
+    removed = [state.id for (content_id, url), state in states.items() if url not in trends[content_id]['urls']]
+    return trends, sources, removed
+
+
+def store(session, trends, results, removed, now):
+    """Schreibt Abrufzustand, Metriken, Sentiment und ``last_monitored_at`` (im Writer-Thread)."""
+    from src.services import bursts, sentiment
+
+    connection = session.connection()
+    if removed:
+        connection.execute(_state.delete().where(_state.c.id.in_(removed)))
+
+    rows = []
+    for result in results:
+        ok = result['error'] is None
+        has_text = result['outcome'] in ('new', 'changed', 'unchanged')
+        rows.append({
+            'state_id': result['state_id'], 'content_id': result['content_id'], 'url': result['url'],
+            'etag': result['etag'], 'last_modified': result['last_modified'], 'content_hash': result['content_hash'],
+            'sentiment': result.get('sentiment'), 'status_code': result['status_code'],
+            'changed': int(result['outcome'] in ('new', 'changed')), 'failed': int(not ok),
+            'last_error': result['error'], 'has_text': has_text, 'now': now,
+            'changed_at': now if result['outcome'] in ('new', 'changed') else None,
+        })
+    existing = [row for row in rows if row['state_id'] is not None]
+    if existing:
+        connection.execute(
+            update(_state).where(_state.c.id == bindparam('state_id')).values(
+                etag=bindparam('etag'), last_modified=bindparam('last_modified'),
+                content_hash=bindparam('content_hash'), status_code=bindparam('status_code'),
+                check_count=_state.c.check_count + 1, change_count=_state.c.change_count + bindparam('changed'),
+                error_count=(_state.c.error_count + 1) * bindparam('failed'), last_error=bindparam('last_error'),
+                last_checked_at=bindparam('now'),
+                last_changed_at=func.coalesce(bindparam('changed_at'), _state.c.last_changed_at)),
+            existing)
+        texts = [row for row in existing if row['changed']]
+        if texts:
+            connection.execute(update(_state).where(_state.c.id == bindparam('state_id'))
+                               .values(sentiment=bindparam('sentiment')), texts)
+    new = [{'content_id': row['content_id'], 'url': row['url'], 'etag': row['etag'],
+            'last_modified': row['last_modified'], 'content_hash': row['content_hash'], 'sentiment': row['sentiment'],
+            'status_code': row['status_code'], 'check_count': 1, 'change_count': row['changed'],
+            'error_count': row['failed'], 'last_error': row['last_error'], 'last_checked_at': now,
+            'last_changed_at': row['changed_at']} for row in rows if row['state_id'] is None]
+    if new:
+        connection.execute(_state.insert(), new)
+
+    # Änderungen je Trend; erste Prüfung legt nur den Ausgangszustand fest
+    changes = {}
+    for result in results:
+        changes[result['content_id']] = changes.get(result['content_id'], 0) + (result['outcome'] == 'changed')
+    points = [{'content_id': content_id, 'metric_type': 'source_changes', 'value': float(changes.get(content_id, 0)),
+               'period_start': trend['last_monitored_at'], 'period_end': now, 'calculated_at': now}
+              for content_id, trend in trends.items() if trend['last_monitored_at'] is not None]
+    if points:
+        ids = connection.execute(
+            _metrics.insert().returning(_metrics.c.id, _metrics.c.content_id), points).all()
+        metric_ids = {content_id: metric_id for metric_id, content_id in ids}
+        bursts.ingest(session, [{**point, 'metric_id': metric_ids.get(point['content_id'])} for point in points])
+
+    # Sentiment der Quellen neu mitteln, wo sich ein Text geändert hat
+    touched = sorted({row['content_id'] for row in rows if row['changed']})
+    if touched:
+        sentiment.set_source_scores(connection, {
+            content_id: (None if score is None else round(float(score), 4), count)
+            for content_id, score, count in session.execute(
+                select(_state.c.content_id, func.avg(_state.c.sentiment), func.count(_state.c.sentiment))
+                .where(_state.c.content_id.in_(touched)).group_by(_state.c.content_id))})
+
+    connection.execute(update(_content).where(_content.c.id.in_(list(trends))).values(last_monitored_at=now))
+    bump_data_version(connection)  # Report-Caches (src/services/reports.py)
+    summary = {'trends': len(trends), 'sources': len(results), 'removed': len(removed)}
+    for outcome in ('new', 'changed', 'unchanged', 'not_modified', 'error'):
+        summary[outcome] = sum(1 for result in results if result['outcome'] == outcome)
+    return summary
+
+
+def run_cycle(limit=None, content_ids=None, now=None):
+    """Prüft die fälligsten Trends (bzw. ``content_ids`` sofort) und plant sie neu ein.
+
+    ``now`` ersetzt die Uhr (Simulation/Tests).
+    """
+    from src.services.sentiment import score_texts
+    from src.services.write_queue import write_queue
+
+    with _cycle_lock:
+        now = now or datetime.utcnow()
+        if content_ids is None:
+            schedule.ensure_fresh(db.session)
+            content_ids = schedule.take(now, limit or _config('MONITOR_BATCH'))
+        if not content_ids:
+            db.session.rollback()
+            return {'trends': 0, 'sources': 0}
+        trends, sources, removed = _load(db.session, content_ids)
+        # Lesetransaktion vor den (langsamen) HTTP-Abrufen beenden
+        db.session.rollback()
+        interval, min_interval = _config('MONITOR_INTERVAL'), _config('MONITOR_MIN_INTERVAL')
+        try:
+            started = time.perf_counter()
+            results = fetch_all(sources)
+            texts = [result for result in results if result['outcome'] in ('new', 'changed')]
+            if texts:
+                scores, _, _ = score_texts([result['text'] for result in texts])
+                for result, score in zip(texts, scores):
+                    result['sentiment'] = None if np.isnan(score) else round(float(score), 4)
+            summary = write_queue.execute(store, trends, results, removed, now)
+            summary['seconds'] = round(time.perf_counter() - started, 3)
+        finally:
+            # auch nach Fehlern neu einplanen, sonst fiele der Trend bis zum Neuaufbau heraus
+            for content_id, trend in trends.items():
+                if trend['urls']:
+                    schedule.reschedule(content_id, due_at(now, trend['priority_score'], interval, min_interval))
+        return summary
+
+
+if __name__ == '__main__':
+    import argparse
+
+    from src.main import create_app
+
+    parser = argparse.ArgumentParser(description='Externe Quellen der Trends prüfen')
+    parser.add_argument('--loop', action='store_true', help='dauerhaft laufen, bis zur nächsten Fälligkeit schlafen')
+    parser.add_argument('--limit', type=int, help='Trends pro Zyklus (Default MONITOR_BATCH)')
+    args = parser.parse_args()
+
+    app = create_app({'STARTUP_TASKS': False})
+    with app.app_context():
+        while True:
+            result = run_cycle(args.limit)
+            if result['trends']:
+                print(' '.join(f'{key}={value}' for key, value in result.items()), flush=True)
+            if not args.loop:
+                break
+            if not result['trends']:
+                upcoming = schedule.next_due()
+                wait = 60 if upcoming is None else (upcoming - datetime.utcnow()).total_seconds()
+                time.sleep(min(60, max(1, wait)))
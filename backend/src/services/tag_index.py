@@ -0,0 +1,300 @@
+"""Invertierter Tag-Index für boolesche Tag-Abfragen.
+
+Abfragesprache (Parameter ``tags`` von ``/api/trends/search``)::
+
+    a AND (b OR c) NOT d
+
+``NOT`` bindet am stärksten, dann ``AND`` (auch implizit zwischen zwei
+Termen), dann ``OR``. Tag-Namen mit Leerzeichen können in Anführungszeichen
+gesetzt werden (``"smart home" OR proptech``). Enthält ein Wert keinerlei
+Operatoren, wird er unverändert als einzelner Tag-Name behandelt.
+
+Der Index hält pro Tag-Name eine Bitmap (Python-``int``, Bit *n* = Content-ID
+*n*). Schnitt, Vereinigung und Differenz laufen damit als C-Operationen über
+die gesamte Posting-Liste. NOT wird nicht gegen eine Grundmenge aller Contents
+ausgewertet, sondern als komplementäres Ergebnis an SQL weitergereicht
+(``id NOT IN (...)``), damit der Index keine Content-Inserts mitverfolgen muss.
+Trifft eine Abfrage mehr als ``TAG_INDEX_MAX_LITERAL_IDS`` Contents (Default
+2000), geht sie stattdessen als Unterabfragen auf ``content_trend_tags`` an
+SQL; eine ID-Liste dieser Größe wäre teurer zu parsen als der Indexbereich.
+"""
+import re
+import threading
+
+from flask import current_app
+from sqlalchemy import bindparam, select
+
+from src.models.user import db
+from src.monitoring import cache_access
+from src.models.associations import content_trend_tags
+from src.models.content import Content
+from src.models.trend_management import TrendTag
+from src.services.counters import foreign_data_version
+
+
+class TagQueryError(ValueError):
+    """Ungültige Tag-Abfrage (Syntaxfehler)."""
+
+
+_TOKEN_RE = re.compile(r'\s*(?:(\()|(\))|"([^"]*)"|([^\s()"]+))')
+_OPERATORS = {'AND', 'OR', 'NOT'}
+_HAS_SYNTAX_RE = re.compile(r'[()"]|(?:^|\s)(?:AND|OR|NOT)(?:\s|$)')
+
+# Bitpositionen je Byte-Wert, zum schnellen Dekodieren einer Bitmap
+_BYTE_BITS = [tuple(i for i in range(8) if value >> i & 1) for value in range(256)]
+
+
+# ============================================================
+# Parser
+# ============================================================
+def _tokenize(text):
+    tokens = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        match = _TOKEN_RE.match(text, pos)
+        if not match:
+            raise TagQueryError(f'Unexpected character at position {pos}')
+        lparen, rparen, quoted, word = match.groups()
+        if lparen:
+            tokens.append(('(', None))
+        elif rparen:
+            tokens.append((')', None))
+        elif quoted is not None:
+            tokens.append(('TAG', quoted))
+        elif word in _OPERATORS:
+            tokens.append((word, None))
+        else:
+            tokens.append(('TAG', word))
+        pos = match.end()
+    return tokens
+
+
+def parse_tag_query(text):
+    """Parst eine Tag-Abfrage in einen Ausdrucksbaum aus Tupeln.
+
+    Knoten: ``('tag', name)``, ``('not', expr)``, ``('and', a, b)``, ``('or', a, b)``.
+    """
+    text = (text or '').strip()
+    if not text:
+        raise TagQueryError('Empty tag query')
+    if not _HAS_SYNTAX_RE.search(text):
+        return ('tag', text)
+
+    tokens = _tokenize(text)
+    pos = 0
+
+    def peek():
+        return tokens[pos][0] if pos < len(tokens) else None
+
+    def parse_or():
+        nonlocal pos
+        node = parse_and()
+        while peek() == 'OR':
+            pos += 1
+            node = ('or', node, parse_and())
+        return node
+
+    def parse_and():
+        nonlocal pos
+        node = parse_unary()
+        while peek() in ('AND', 'NOT', 'TAG', '('):
+            if peek() == 'AND':
+                pos += 1
+            node = ('and', node, parse_unary())
+        return node
+
+    def parse_unary():
+        nonlocal pos
+        kind = peek()
+        if kind == 'NOT':
+            pos += 1
+            return ('not', parse_unary())
+        if kind == '(':
+            pos += 1
+            node = parse_or()
+            if peek() != ')':
+                raise TagQueryError('Missing closing parenthesis')
+            pos += 1
+            return node
+        if kind == 'TAG':
+            name = tokens[pos][1]
+            pos += 1
+            return ('tag', name)
+        raise TagQueryError(f'Unexpected token: {kind or "end of query"}')
+
+    tree = parse_or()
+    if pos != len(tokens):
+        raise TagQueryError(f'Unexpected token: {tokens[pos][0]}')
+    return tree
+
+
+def parse_tag_queries(values):
+    """Parst mehrere Abfragen (wiederholter ``tags``-Parameter) und verknüpft sie mit OR."""
+    tree = None
+    for value in values:
+        node = parse_tag_query(value)
+        tree = node if tree is None else ('or', tree, node)
+    if tree is None:
+        raise TagQueryError('Empty tag query')
+    return tree
+
+
+# ============================================================
+# Index
+# ============================================================
+def ids_to_bits(ids):
+    """Baut eine Bitmap aus IDs (über ein bytearray statt wiederholter int-Verknüpfungen)."""
+    if not ids:
+        return 0
+    data = bytearray(max(ids) // 8 + 1)
+    for content_id in ids:
+        data[content_id >> 3] |= 1 << (content_id & 7)
+    return int.from_bytes(data, 'little')
+
+
+def bits_to_ids(bits):
+    """Dekodiert eine Bitmap in eine aufsteigend sortierte Liste von IDs."""
+    if not bits:
+        return []
+    data = bits.to_bytes((bits.bit_length() + 7) // 8, 'little')
+    return [i * 8 + offset
+            for i, byte in enumerate(data) if byte
+            for offset in _BYTE_BITS[byte]]
+
+
+DEFAULT_MAX_LITERAL_IDS = 2000
+
+
+def sql_clause(node):
+    """Tag-Abfrage als SQL-Prädikat auf ``Content.id`` (je Tag eine Unterabfrage über ``ix_content_trend_tags_tag``)."""
+    kind = node[0]
+    if kind == 'tag':
+        return Content.id.in_(select(content_trend_tags.c.content_id)
+                              .join(TrendTag, TrendTag.id == content_trend_tags.c.trend_tag_id)
+                              .where(TrendTag.name == node[1]))
+    if kind == 'not':
+        return ~sql_clause(node[1])
+    left, right = sql_clause(node[1]), sql_clause(node[2])
+    return db.and_(left, right) if kind == 'and' else db.or_(left, right)
+
+
+class TagIndex:
+    """Tag-Name -> Bitmap der Content-IDs, pro Prozess im Speicher gehalten.
+
+    Änderungen über die Tag-Routen werden direkt nachgezogen. Schreibzugriffe
+    anderer Worker-Prozesse erkennt ``ensure_fresh`` am fremden Datenstand
+    (``foreign_data_version``) und baut den Index dann neu auf.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._postings = {}
+        self._version = None  # fremder Datenstand beim Aufbau; None = neu aufbauen
+
+    # --- Aufbau & Pflege ---
+    def build(self, version=None):
+        with self._lock:
+            if version is None:
+                version = foreign_data_version(db.session)  # vor dem Laden lesen
+            # Zuordnungstabelle ohne Join lesen; der Join auf trend_tag kostet
+            # bei SQLite ein Mehrfaches des reinen Tabellenscans
+            names = dict(db.session.execute(db.select(TrendTag.id, TrendTag.name)).all())
+            rows = db.session.execute(
+                db.select(content_trend_tags.c.trend_tag_id, content_trend_tags.c.content_id)
+            )
+
+            ids_by_tag = {}
+            for tag_id, content_id in rows:
+                ids_by_tag.setdefault(tag_id, []).append(content_id)
+            self._postings = {names[tag_id]: ids_to_bits(ids)
+                              for tag_id, ids in ids_by_tag.items() if tag_id in names}
+            self._version = version
+
+    def invalidate(self):
+        with self._lock:
+            self._version = None
+
+    def ensure_fresh(self):
+        version = foreign_data_version(db.session)
+        with self._lock:
+            stale = self._version is None or self._version != version
+            cache_access('tag_index', not stale)
+            if stale:
+                self.build(version)
+
+    def add(self, content_id, tag_name):
+        with self._lock:
+            if self._version is not None:
+                self._postings[tag_name] = self._postings.get(tag_name, 0) | (1 << content_id)
+
+    def discard(self, content_id, tag_name):
+        with self._lock:
+            if self._version is not None and tag_name in self._postings:
+                self._postings[tag_name] &= ~(1 << content_id)
+
+    def remove_content(self, content_id):
+        """Entfernt einen gelöschten Content aus allen Posting-Listen (IDs werden von SQLite wiederverwendet)."""
+        with self._lock:
+            if self._version is None:
+                return
+            mask = ~(1 << content_id)
+            for name, bits in self._postings.items():
+                if bits >> content_id & 1:
+                    self._postings[name] = bits & mask
+
+    # --- Auswertung ---
+    def _evaluate(self, node):
+        """Liefert ``(bitmap, negated)``; ``negated`` heißt "alle IDs außer bitmap"."""
+        kind = node[0]
+        if kind == 'tag':
+            return self._postings.get(node[1], 0), False
+        if kind == 'not':
+            bits, negated = self._evaluate(node[1])
+            return bits, not negated
+
+        a, neg_a = self._evaluate(node[1])
+        b, neg_b = self._evaluate(node[2])
+        if kind == 'and':
+            if not neg_a and not neg_b:
+                return a & b, False
+            if not neg_a:
+                return a & ~b, False
+            if not neg_b:
+                return b & ~a, False
+            return a | b, True
+        # 'or' – per De Morgan auf die komplementären Fälle abgebildet
+        if not neg_a and not neg_b:
+            return a | b, False
+        if not neg_a:
+            return b & ~a, True
+        if not neg_b:
+            return a & ~b, True
+        return a & b, True
+
+    def _bits(self, tree):
+        self.ensure_fresh()
+        with self._lock:
+            return self._evaluate(tree)
+
+    def match(self, query):
+        """Wertet eine Tag-Abfrage aus und gibt ``(sortierte IDs, negated)`` zurück."""
+        bits, negated = self._bits(parse_tag_query(query) if isinstance(query, str) else query)
+        return bits_to_ids(bits), negated
+
+    def filter_clause(self, query):
+        """SQL-Filter auf ``Content.id`` für eine Tag-Abfrage (ohne Join, daher duplikatfrei)."""
+        tree = parse_tag_query(query) if isinstance(query, str) else query
+        bits, negated = self._bits(tree)
+        if negated and not bits:
+            return db.true()
+        if bits.bit_count() > current_app.config.get('TAG_INDEX_MAX_LITERAL_IDS', DEFAULT_MAX_LITERAL_IDS):
+            return sql_clause(tree)
+        ids = bits_to_ids(bits)
+        # literal_execute rendert die IDs direkt ins SQL und umgeht so das
+        # Variablenlimit von SQLite bei großen Treffermengen
+        clause = Content.id.in_(bindparam('tag_ids', ids, expanding=True, literal_execute=True))
+        return ~clause if negated else clause
+
+
+tag_index = TagIndex()
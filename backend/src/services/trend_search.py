@@ -0,0 +1,88 @@
+"""Filter der Trend-Suche, gemeinsam für ``GET /api/trends/search`` und Reports.
+
+``parse_filters`` liest die Suchparameter (``q``, ``phase_id``, ``min_score``,
+``max_score``, ``tags``, ``sort_by``, ``sort_order``) aus ``request.args`` oder
+einem JSON-Objekt in ein normalisiertes Dict; ``filter_query`` baut daraus die
+Abfrage. Ungültige Zahlen werden wie bei ``request.args.get(type=float)``
+ignoriert, ungültige Tag-Ausdrücke lösen ``TagQueryError`` aus.
+
+``teams`` (sichtbare Team-IDs aus ``src.auth.team_ids()``) setzt nur der
+Aufrufer, nie der Query-String; ``None`` bzw. fehlend heißt ohne Einschränkung.
+"""
+from werkzeug.datastructures import MultiDict
+
+from src.models.user import db
+from src.models.content import Content
+from src.auth import content_scope
+from src.services.tag_index import tag_index, parse_tag_queries
+
+FILTER_KEYS = ('q', 'phase_id', 'min_score', 'max_score', 'tags', 'sort_by', 'sort_order')
+
+
+def parse_filters(args):
+    """Normalisierte Filter aus einer MultiDict (Query-String) oder einem Dict (JSON)."""
+    if not isinstance(args, MultiDict):
+        args = MultiDict([(key, value) for key, values in (args or {}).items()
+                          for value in (values if isinstance(values, list) else [values])
+                          if value is not None])
+    phase_id = args.get('phase_id')
+    return {
+        'q': str(args.get('q', '')),
+        'phase_id': str(phase_id) if phase_id not in (None, '') else None,
+        'min_score': args.get('min_score', type=float),
+        'max_score': args.get('max_score', type=float),
+        'tags': [str(tag) for tag in args.getlist('tags')],
+        'sort_by': str(args.get('sort_by', 'priority_score')),
+        'sort_order': str(args.get('sort_order', 'desc')),
+    }
+
+
+def uses_leaderboard(filters):
+    """Nur Score-Sortierung (optional Phase/Score-Bereich): direkt aus der Rangliste."""
+    phase_id = filters['phase_id']
+    # Ranglisten kennen keine Teams
+    return (filters.get('teams') is None and not filters['q'] and not filters['tags'] and filters['sort_by'] == 'priority_score'
+            and (not phase_id or phase_id.isdigit()))
+
+
+def filter_query(filters, tie_break=False):
+    """``Content.query`` der Trends für ``filters``; ``tie_break`` sortiert gleiche Werte nach ID."""
+    trends_query = Content.query.filter_by(content_type='trend')
+    
+    # Team-Sichtbarkeit
+    scope = content_scope(Content.team_id, filters.get('teams'))
+    if scope is not None:
+        trends_query = trends_query.filter(scope)
+
+    # Text-Suche
+    if filters['q']:
+        trends_query = trends_query.filter(
+            db.or_(
+                Content.title.contains(filters['q']),
+                Content.short_description.contains(filters['q']),
+                Content.long_description.contains(filters['q'])
+            )
+        )
+
+    # Phase-Filter
+    if filters['phase_id']:
+        trends_query = trends_query.filter_by(trend_phase_id=filters['phase_id'])
+
+    # Score-Filter
+    if filters['min_score'] is not None:
+        trends_query = trends_query.filter(Content.priority_score >= filters['min_score'])
+    if filters['max_score'] is not None:
+        trends_query = trends_query.filter(Content.priority_score <= filters['max_score'])
+
+    # Tag-Filter: boolesche Abfrage (z.B. "a AND (b OR c) NOT d") über den
+    # invertierten Tag-Index; mehrere tags-Parameter werden mit OR verknüpft
+    if filters['tags']:
+        trends_query = trends_query.filter(tag_index.filter_clause(parse_tag_queries(filters['tags'])))
+
+    # Sortierung
+    column = Content.__table__.c.get(filters['sort_by'])
+    if column is not None:
+        trends_query = trends_query.order_by(column.desc() if filters['sort_order'] == 'desc' else column.asc())
+    if tie_break:
+        trends_query = trends_query.order_by(Content.id)
+    return trends_query
@@ -0,0 +1,187 @@
+"""Single-Writer-Queue für Schreibzugriffe auf SQLite.
+
+Request-Threads reichen Mutationen als ``fn(session, *args)`` ein und erhalten
+ein ``concurrent.futures.Future``. Ein einzelner Writer-Thread pro Prozess
+besitzt eine eigene Schreibverbindung, sammelt wartende Mutationen ein und
+führt sie gemeinsam in einer Transaktion aus (Group Commit): ein Commit und
+eine Sperranforderung für bis zu ``WRITE_QUEUE_MAX_BATCH`` Mutationen statt je
+einer pro Request. Schlägt eine Mutation fehl, wird der Batch zurückgerollt
+und jede Mutation einzeln wiederholt, sodass der Fehler nur den betroffenen
+Aufrufer trifft; ``fn`` darf deshalb nur über die Session schreiben.
+Lesezugriffe laufen weiterhin über die normalen Pool-Verbindungen.
+
+Die Futures werden erst nach dem Commit erfüllt. Rückgabewerte müssen daher
+innerhalb von ``fn`` fertig berechnet werden (z.B. ``obj.to_dict()`` nach
+``session.flush()``). Ist die Queue deaktiviert (``WRITE_QUEUE_ENABLED``,
+Default nur für SQLite), läuft ``fn`` direkt in ``db.session``.
+"""
+import atexit
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from flask import current_app
+from sqlalchemy.orm import Session
+
+from src.instrumentation import bind_recorder, current_recorder
+from src.models.user import db
+from src.services.audit import bind_context, current_context
+
+_STOP = object()
+
+
+class _Mutation:
+    __slots__ = ('fn', 'args', 'future', 'recorder', 'audit_context')
+
+    def __init__(self, fn, args):
+        self.fn = fn
+        self.args = args
+        self.future = Future()
+        # Statements im Writer-Thread dem aufrufenden Request zurechnen (src/instrumentation.py)
+        self.recorder = current_recorder()
+        # Benutzer und Route des Requests für das Audit-Log (src/services/audit.py)
+        self.audit_context = current_context()
+
+
+class WriteQueue:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queue = None
+        self._thread = None
+        self._app = None
+
+    def _ensure_started(self):
+        # Start erst beim ersten Schreibzugriff, also nach dem Fork der gunicorn-Worker
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._app = current_app._get_current_object()
+            self._queue = queue.Queue(maxsize=self._app.config.get('WRITE_QUEUE_MAXSIZE', 10000))
+            self._thread = threading.Thread(target=self._run, name='sqlite-writer', daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+
+    def submit(self, fn, *args):
+        """Reiht eine Mutation ein und gibt ein Future auf ihr Ergebnis zurück."""
+        if not current_app.config.get('WRITE_QUEUE_ENABLED', False):
+            return self._run_inline(fn, args)
+        self._ensure_started()
+        mutation = _Mutation(fn, args)
+        self._queue.put(mutation, timeout=current_app.config.get('WRITE_QUEUE_TIMEOUT', 30))
+        return mutation.future
+
+    def execute(self, fn, *args):
+        """``submit`` und auf das Ergebnis warten."""
+        return self.submit(fn, *args).result(timeout=current_app.config.get('WRITE_QUEUE_TIMEOUT', 30))
+
+    def depth(self):
+        """Anzahl wartender Mutationen (ungefähr, ``queue.Queue.qsize``)."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def state(self):
+        """``idle`` (noch nicht gestartet), ``running`` oder ``dead`` (Writer-Thread beendet)."""
+        thread = self._thread
+        if thread is None:
+            return 'idle'
+        return 'running' if thread.is_alive() else 'dead'
+
+    def stop(self, timeout=10):
+        """Arbeitet die Queue ab und beendet den Writer-Thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None and thread.is_alive():
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    @staticmethod
+    def _run_inline(fn, args):
+        future = Future()
+        try:
+            result = fn(db.session, *args)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+        return future
+
+    # --- Writer-Thread ---
+    def _run(self):
+        app = self._app
+        max_batch = app.config.get('WRITE_QUEUE_MAX_BATCH', 200)
+        linger = app.config.get('WRITE_QUEUE_LINGER_MS', 0) / 1000
+
+        with app.app_context():
+            connection = db.engine.connect()
+        try:
+            while True:
+                first = self._queue.get()
+                if first is _STOP:
+                    return
+                batch = [first]
+                deadline = time.monotonic() + linger
+                stopping = False
+                while len(batch) < max_batch:
+                    try:
+                        item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+                    if item is _STOP:
+                        stopping = True
+                        break
+                    batch.append(item)
+                with app.app_context():
+                    self._apply(connection, batch)
+                if stopping:
+                    return
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _transaction(connection, mutations):
+        """Führt Mutationen in einer Transaktion aus; wirft beim ersten Fehler."""
+        session = Session(bind=connection, expire_on_commit=False)
+        try:
+            results = []
+            for mutation in mutations:
+                with bind_recorder(mutation.recorder), bind_context(mutation.audit_context):
+                    results.append(mutation.fn(session, *mutation.args))
+                    session.flush()  # Audit-Einträge noch im Kontext dieser Mutation erfassen
+            session.commit()
+            return results
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def _apply(self, connection, batch):
+        batch = [mutation for mutation in batch if mutation.future.set_running_or_notify_cancel()]
+        try:
+            results = self._transaction(connection, batch)
+        except Exception:
+            # Optimistisch ohne SAVEPOINTs (halbieren den Durchsatz); schlägt die
+            # gemeinsame Transaktion fehl, jede Mutation einzeln wiederholen,
+            # damit ein Fehler nur den betroffenen Aufrufer trifft
+            for mutation in batch:
+                try:
+                    result, = self._transaction(connection, [mutation])
+                except Exception as e:
+                    mutation.future.set_exception(e)
+                else:
+                    mutation.future.set_result(result)
+            return
+        for mutation, result in zip(batch, results):
+            mutation.future.set_result(result)
+
+
+def insert(session, obj):
+    """Mutation für einfache Inserts: ``write_queue.execute(insert, obj)`` liefert ``obj.to_dict()``."""
+    session.add(obj)
+    session.flush()
+    return obj.to_dict()
+
+
+write_queue = WriteQueue()
@@ -0,0 +1,82 @@
+"""Einmalige Startaufgaben: Schema anlegen, Migrationen, Default-Daten.
+
+``create_app()`` ruft ``run_startup_tasks`` genau einmal pro App auf, nicht
+mehr bei jedem Import von ``src.main``. Jede Aufgabe ist idempotent und prüft
+zuerst billig, ob überhaupt etwas zu tun ist (eine Abfrage auf die
+Tabellenliste, ``schema_migrations`` bzw. eine Zeile ``trend_phase``), sodass
+ein Kaltstart gegen eine bestehende Datenbank nur wenige Roundtrips kostet.
+Mehrere Instanzen serialisieren sich über ``schema_lock``.
+
+Mit ``STARTUP_TASKS=0`` startet die App ohne diese Aufgaben (z.B. wenn ein
+eigener Release-Schritt sie ausführt)::
+
+    python -m src.startup
+"""
+import os
+
+from sqlalchemy import inspect
+
+from src.models.__init__ import db
+from src.migrations import schema_lock, run_migrations, pending
+
+DEFAULT_PHASES = [
+    {'name': 'Emerging',   'description': 'Neue, schwache Signale',                'order': 1, 'color': '#EF4444'},
+    {'name': 'Growing',    'description': 'Wachsende Trends mit Evidenz',         'order': 2, 'color': '#F59E0B'},
+    {'name': 'Mainstream', 'description': 'Etablierte Trends, breite Adoption',   'order': 3, 'color': '#10B981'},
+    {'name': 'Declining',  'description': 'Abnehmende Relevanz',                  'order': 4, 'color': '#6B7280'},
+    {'name': 'Legacy',     'description': 'Historisch, für Referenz',             'order': 5, 'color': '#374151'},
+]
+
+
+def ensure_schema():
+    """Fehlende Tabellen anlegen und ausstehende Migrationen ausführen."""
+    # Alle Modelle registrieren, bevor die Metadaten verglichen werden
+    from src.models import user, content, trend_management  # noqa: F401
+
+    existing = set(inspect(db.engine).get_table_names())
+    if not set(db.metadata.tables) <= existing:
+        db.create_all()
+    if os.getenv('AUTO_MIGRATE', '1') != '0' and pending(db.engine):
+        run_migrations(db.engine)
+
+
+def seed_default_phases():
+    """Default-Phasen anlegen, falls noch keine existieren."""
+    from src.models.trend_management import TrendPhase
+
+    if db.session.query(TrendPhase.id).limit(1).first() is None:
+        for p in DEFAULT_PHASES:
+            db.session.add(TrendPhase(**p))
+        db.session.commit()
+
+
+def build_leaderboards():
+    """Ranglisten einmal aufbauen (mit gunicorn --preload erben die Worker sie)."""
+    from src.services.leaderboards import leaderboards
+
+    leaderboards.build()
+
+
+STARTUP_TASKS = [ensure_schema, seed_default_phases, build_leaderboards]
+
+
+def run_startup_tasks(app):
+    """Führt alle Startaufgaben einmal pro App aus; weitere Aufrufe sind no-ops."""
+    if app.extensions.get('startup_tasks_done'):
+        return
+    with app.app_context():
+        with schema_lock(db.engine):
+            for task in STARTUP_TASKS:
+                task()
+        # Verbindungen des Startvorgangs schließen: mit gunicorn --preload würden
+        # sie sonst in alle Worker-Prozesse vererbt (SQLite-Handles nicht fork-sicher)
+        db.session.remove()
+        db.engine.dispose()
+    app.extensions['startup_tasks_done'] = True
+
+
+if __name__ == '__main__':
+    from src.main import create_app
+
+    run_startup_tasks(create_app({'STARTUP_TASKS': False}))
+    print('startup tasks done')
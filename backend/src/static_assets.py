@@ -0,0 +1,204 @@
+"""Auslieferung des gebauten Frontends aus dem Static-Ordner.
+
+Beim Start wird der Ordner einmal eingelesen (Manifest: relativer Pfad ->
+Größe, mtime, ETag, MIME-Typ, vorkomprimierte Varianten). Requests werden
+danach ohne Dateisystemzugriffe beantwortet: Der Inhalt einer Datei (bis
+``STATIC_MEMORY_MAX_BYTES``, Default 1 MiB) wird beim ersten Abruf in den
+Speicher geladen, für komprimierbare Typen zusätzlich eine gzip-Variante.
+Liegen ``<datei>.br`` bzw. ``<datei>.gz`` daneben (``python -m
+src.static_assets``), werden diese je nach ``Accept-Encoding`` ausgeliefert.
+
+Dateien mit Content-Hash im Namen (Vite: ``assets/index-B6aZxQc1.js``,
+``STATIC_IMMUTABLE_PATTERN``) erhalten ``Cache-Control: public,
+max-age=31536000, immutable``, alle anderen (``index.html``) ``no-cache``,
+d.h. der Browser fragt mit ``If-None-Match``/``If-Modified-Since`` nach und
+bekommt ein 304. Unbekannte Pfade liefern wie bisher ``index.html``
+(Client-Routing der SPA).
+
+Im Debug-Modus wird das Manifest bei jedem Request neu eingelesen, damit
+neue Builds ohne Neustart sichtbar sind.
+"""
+import gzip
+import mimetypes
+import os
+import re
+import sys
+import threading
+
+from flask import current_app, request, send_file
+
+IMMUTABLE_PATTERN = r'^assets/.+[-.][A-Za-z0-9_-]{8,}\.[A-Za-z0-9]+$'
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+MEMORY_MAX_BYTES = 1024 * 1024
+# Vorkomprimierte Geschwister-Dateien, in Präferenzreihenfolge
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+_COMPRESSIBLE = ('text/', 'application/javascript', 'application/json', 'application/xml',
+                 'application/manifest+json', 'application/wasm', 'image/svg+xml')
+_MIN_COMPRESS_BYTES = 1024
+
+mimetypes.add_type('text/javascript', '.js')
+mimetypes.add_type('text/javascript', '.mjs')
+mimetypes.add_type('application/json', '.map')
+mimetypes.add_type('application/manifest+json', '.webmanifest')
+
+
+def _compressible(mimetype):
+    return mimetype.startswith(_COMPRESSIBLE)
+
+
+class StaticAsset:
+    """Eine Datei des Static-Ordners samt Varianten (``identity``, ``gzip``, ``br``)."""
+    __slots__ = ('path', 'size', 'mtime', 'etag', 'mimetype', 'immutable', 'disk', 'bodies', '_lock')
+
+    def __init__(self, path, stat, mimetype, immutable, encodings):
+        self.path = path
+        self.size = stat.st_size
+        self.mtime = int(stat.st_mtime)
+        self.etag = f'{stat.st_size:x}-{stat.st_mtime_ns:x}'
+        self.mimetype = mimetype
+        self.immutable = immutable
+        self.disk = {'identity': path}
+        for encoding, suffix in ENCODINGS:
+            if encoding in encodings:
+                self.disk[encoding] = path + suffix
+        self.bodies = None  # Encoding -> bytes, beim ersten Abruf gefüllt
+        self._lock = threading.Lock()
+
+    def _load(self, memory_max):
+        with self._lock:
+            if self.bodies is not None:
+                return self.bodies
+            bodies = {}
+            for encoding, path in self.disk.items():
+                try:
+                    if os.path.getsize(path) <= memory_max:
+                        with open(path, 'rb') as fh:
+                            bodies[encoding] = fh.read()
+                except OSError:
+                    continue
+            data = bodies.get('identity')
+            if (data is not None and 'gzip' not in self.disk and len(data) >= _MIN_COMPRESS_BYTES
+                    and _compressible(self.mimetype)):
+                compressed = gzip.compress(data, 9, mtime=0)
+                if len(compressed) < len(data) * 0.9:
+                    bodies['gzip'] = compressed
+            self.bodies = bodies
+            return bodies
+
+    def encodings(self, memory_max):
+        """Verfügbare Encodings (vorkomprimiert oder im Speicher erzeugt)."""
+        return self.disk.keys() | self._load(memory_max).keys()
+
+
+class AssetManifest:
+    def __init__(self, root, immutable_pattern=IMMUTABLE_PATTERN):
+        self.root = root
+        self._immutable = re.compile(immutable_pattern)
+        self._assets = {}
+        self.build()
+
+    def build(self):
+        assets = {}
+        if self.root and os.path.isdir(self.root):
+            for directory, _, files in os.walk(self.root):
+                names = set(files)
+                for name in files:
+                    if name.endswith(tuple(suffix for _, suffix in ENCODINGS)) and name.rsplit('.', 1)[0] in names:
+                        continue  # Variante einer anderen Datei
+                    path = os.path.join(directory, name)
+                    rel = os.path.relpath(path, self.root).replace(os.sep, '/')
+                    mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+                    encodings = {encoding for encoding, suffix in ENCODINGS if name + suffix in names}
+                    assets[rel] = StaticAsset(path, os.stat(path), mimetype,
+                                              bool(self._immutable.match(rel)), encodings)
+        self._assets = assets
+
+    def get(self, rel):
+        return self._assets.get(rel)
+
+    def __len__(self):
+        return len(self._assets)
+
+
+def _negotiate(asset, memory_max):
+    available = asset.encodings(memory_max)
+    accepted = request.accept_encodings
+    for encoding, _ in ENCODINGS:
+        if encoding in available and accepted.quality(encoding) > 0:
+            return encoding
+    return 'identity'
+
+
+def serve(path):
+    """Liefert ``path`` aus dem Manifest bzw. ``index.html`` als SPA-Fallback."""
+    manifest = current_app.extensions['static_assets']
+    if manifest.root is None:
+        return "Static folder not configured", 404
+    if current_app.debug:
+        manifest.build()
+    asset = (manifest.get(path) if path else None) or manifest.get('index.html')
+    if asset is None:
+        return "index.html not found", 404
+
+    memory_max = current_app.config['STATIC_MEMORY_MAX_BYTES']
+    encoding = _negotiate(asset, memory_max)
+    body = asset._load(memory_max).get(encoding)
+    if body is not None:
+        response = current_app.response_class(body, mimetype=asset.mimetype)
+    else:
+        response = send_file(asset.disk[encoding], mimetype=asset.mimetype, conditional=False,
+                             etag=False, max_age=None)
+
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    if len(asset.disk) > 1 or 'gzip' in asset.bodies:
+        response.vary.add('Accept-Encoding')
+    response.set_etag(asset.etag if encoding == 'identity' else f'{asset.etag}-{encoding}')
+    response.last_modified = asset.mtime
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL if asset.immutable else 'no-cache'
+    return response.make_conditional(request)
+
+
+def init_app(app):
+    """Liest den Static-Ordner einmal ein (mit gunicorn --preload im Master-Prozess)."""
+    app.config.setdefault('STATIC_MEMORY_MAX_BYTES', MEMORY_MAX_BYTES)
+    app.config.setdefault('STATIC_IMMUTABLE_PATTERN', IMMUTABLE_PATTERN)
+    app.extensions['static_assets'] = AssetManifest(app.static_folder, app.config['STATIC_IMMUTABLE_PATTERN'])
+
+
+def precompress(root, level=9):
+    """Schreibt ``.gz`` (und ``.br``, falls ``brotli`` installiert ist) neben komprimierbare Dateien."""
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+
+    written = 0
+    for directory, _, files in os.walk(root):
+        for name in files:
+            if name.endswith(tuple(suffix for _, suffix in ENCODINGS)):
+                continue
+            mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+            path = os.path.join(directory, name)
+            if not _compressible(mimetype) or os.path.getsize(path) < _MIN_COMPRESS_BYTES:
+                continue
+            with open(path, 'rb') as fh:
+                data = fh.read()
+            variants = [('.gz', gzip.compress(data, level, mtime=0))]
+            if brotli is not None:
+                variants.append(('.br', brotli.compress(data, quality=11)))
+            for suffix, compressed in variants:
+                if len(compressed) < len(data) * 0.9:
+                    with open(path + suffix, 'wb') as fh:
+                        fh.write(compressed)
+                    # gleiche mtime wie das Original, damit Build-Tools nichts neu bauen
+                    stat = os.stat(path)
+                    os.utime(path + suffix, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+                    written += 1
+    return written, brotli is not None
+
+
+if __name__ == '__main__':
+    target = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(__file__), 'static')
+    count, with_brotli = precompress(target)
+    print(f'{count} komprimierte Varianten geschrieben' + ('' if with_brotli else ' (ohne brotli: nur gzip)'))